@@ -0,0 +1,163 @@
+"""Shared helpers for the Ecto Modbus benchmark scripts."""
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+# Make the integration importable when running `python benchmarks/<script>.py`
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+def quiet_logging(level=logging.WARNING):
+    """Keep integration debug logging out of the measurements."""
+    logging.basicConfig(level=level)
+    logging.getLogger("custom_components.ecto_modbus").setLevel(level)
+    logging.getLogger("modbus_tk").setLevel(level)
+
+
+class FakeServer:
+    """Minimal stand-in for RtuServer: owns a modbus_tk databank, no serial port."""
+
+    def __init__(self, databank=None):
+        from modbus_tk.modbus import Databank
+        self.databank = databank if databank is not None else Databank(error_on_missing_slave=False)
+
+    def add_slave(self, slave_id, unsigned=True, memory=None):
+        return self.databank.add_slave(slave_id, unsigned, memory)
+
+    def get_slave(self, slave_id):
+        return self.databank.get_slave(slave_id)
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Return a dict with the usual latency statistics (same unit as samples)."""
+    return {
+        "n": len(samples),
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "p50": percentile(samples, 50),
+        "p99": percentile(samples, 99),
+        "max": max(samples),
+    }
+
+
+def print_table(title, rows, unit):
+    """Print a list of (label, summary_dict) rows as a fixed-width table."""
+    print(title)
+    print("  %-28s %6s %10s %10s %10s %10s" % ("case", "n", "p50", "p99", "mean", "max"))
+    for label, stats in rows:
+        print("  %-28s %6d %10.3f %10.3f %10.3f %10.3f %s" % (
+            label, stats["n"], stats["p50"], stats["p99"], stats["mean"], stats["max"], unit))
+
+
+def open_pty():
+    """Open a raw pseudo-terminal pair without socat.
+
+    Returns:
+        tuple: (master_fd, slave_path) - the integration opens ``slave_path``
+        as its serial port, the simulated bus master talks through ``master_fd``
+    """
+    import pty
+    import tty
+    master_fd, slave_fd = pty.openpty()
+    tty.setraw(master_fd)
+    tty.setraw(slave_fd)
+    slave_path = os.ttyname(slave_fd)
+    # Keep slave_fd open for the lifetime of the process: closing the last
+    # slave handle would hang up the master side between reopenings.
+    return master_fd, slave_path
+
+
+def rtu_frame(slave, pdu):
+    """Build an RTU frame (slave + PDU + CRC)."""
+    import struct
+    from modbus_tk import utils
+    data = bytes([slave]) + bytes(pdu)
+    return data + struct.pack(">H", utils.calculate_crc(data))
+
+
+def read_exact(fd, size, timeout):
+    """Read exactly `size` bytes from `fd`; returns (data, first_byte_time)."""
+    import select
+    import time
+    data = bytearray()
+    first_byte_at = None
+    deadline = time.perf_counter() + timeout
+    while len(data) < size:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+        ready, _, _ = select.select([fd], [], [], remaining)
+        if not ready:
+            break
+        chunk = os.read(fd, size - len(data))
+        if first_byte_at is None:
+            first_byte_at = time.perf_counter()
+        data += chunk
+    return bytes(data), first_byte_at
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path, benchmark, args, results):
+    """Write benchmark results as JSON, with the commit and environment they ran on."""
+    document = {
+        "benchmark": benchmark,
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "args": args,
+        "results": results,
+    }
+    with open(path, "w") as out:
+        json.dump(document, out, indent=2, sort_keys=True)
+
+
+def _lookup(result, metric):
+    value = result
+    for key in metric.split("."):
+        value = value[key]
+    return value
+
+
+def compare_results(path, results, keys, metrics):
+    """Print the change of `metrics` against a results file written by write_results.
+
+    Results are matched on the values of `keys`; metrics may name nested
+    values with dots (``turnaround_ms.p99``).
+    """
+    with open(path) as src:
+        baseline = json.load(src)
+    old = {tuple(r[k] for k in keys): r for r in baseline["results"]}
+    print("Compared with %s (commit %s)" % (path, baseline.get("commit")))
+    for result in results:
+        key = tuple(result[k] for k in keys)
+        if key not in old:
+            continue
+        label = ", ".join(str(k) for k in key)
+        for metric in metrics:
+            before, after = _lookup(old[key], metric), _lookup(result, metric)
+            change = (after - before) / before * 100.0 if before else float("nan")
+            print("  %-28s %-22s %12.3f -> %12.3f  %+7.1f%%" % (label, metric, before, after, change))
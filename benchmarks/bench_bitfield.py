@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""Microbenchmarks for the channel bitfield codec.
+
+Compares the table-driven codec used by EctoRelay10CH/EctoCH10BinarySensor
+with the per-channel bit loops it replaced (reproduced here without the
+logging calls):
+
+* encode:        channel states -> register 0x10 value
+* decode+diff:   register value -> changed channels (one changed, none changed)
+* relay:         EctoRelay10CH.set_switch_state / on_register_write end to end
+
+Usage:
+    python benchmarks/bench_bitfield.py [--number N]
+"""
+import argparse
+import timeit
+
+from _common import FakeServer, quiet_logging
+
+from custom_components.ecto_modbus.devices import bitfield
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+
+
+def legacy_encode(channels):
+    msb = 0
+    for i in range(8):
+        if channels[i]:
+            msb |= (1 << i)
+    lsb = 0
+    if channels[8]:
+        lsb |= 1
+    if channels[9]:
+        lsb |= 2
+    return (msb << 8) | lsb
+
+
+def legacy_decode(channels, value, changed):
+    msb = (value >> 8) & 0xFF
+    for i in range(8):
+        new_state = (msb >> i) & 1
+        if channels[i] != new_state:
+            channels[i] = new_state
+            changed.append(i)
+    lsb = value & 0xFF
+    for i in range(2):
+        new_state = (lsb >> i) & 1
+        if channels[8 + i] != new_state:
+            channels[8 + i] = new_state
+            changed.append(8 + i)
+
+
+def codec_decode(mask, value, changed):
+    new_mask = bitfield.decode_channels(value) & 0x3FF
+    diff = mask ^ new_mask
+    if diff:
+        changed.extend(bitfield.iter_channels(diff))
+    return new_mask
+
+
+def _us(stmt, number):
+    return timeit.timeit(stmt, number=number) / number * 1e6
+
+
+def main(args):
+    n = args.number
+    states = [1, 0, 1, 1, 0, 0, 1, 0, 1, 0]
+    mask = bitfield.states_to_mask(states)
+    value = bitfield.encode_channels(mask)
+    other = value ^ 0x0100
+
+    rows = [
+        ("encode", _us(lambda: legacy_encode(states), n),
+         _us(lambda: bitfield.encode_channels(mask), n)),
+        ("decode+diff, 1 changed", _us(lambda: legacy_decode(list(states), other, []), n),
+         _us(lambda: codec_decode(mask, other, []), n)),
+        ("decode+diff, unchanged", _us(lambda: legacy_decode(list(states), value, []), n),
+         _us(lambda: codec_decode(mask, value, []), n)),
+    ]
+
+    print("Bitfield codec (%d iterations)" % n)
+    print("  %-26s %12s %12s" % ("case", "legacy us", "codec us"))
+    for label, legacy, codec in rows:
+        print("  %-26s %12.3f %12.3f" % (label, legacy, codec))
+
+    device = EctoRelay10CH({"addr": 5}, FakeServer(RegisterBankDatabank()))
+    for channel in range(10):
+        device.set_state_change_callback(channel, lambda ch, st: None)
+    toggle = [0]
+
+    def switch():
+        toggle[0] ^= 1
+        device.set_switch_state(3, toggle[0])
+
+    def external_write():
+        toggle[0] ^= 1
+        device.on_register_write(0x10, [0x0800 if toggle[0] else 0])
+
+    print("EctoRelay10CH end to end")
+    print("  %-26s %12.3f us" % ("set_switch_state", _us(switch, n)))
+    print("  %-26s %12.3f us" % ("on_register_write", _us(external_write, n)))
+    print("  %-26s %12.3f us" % ("on_register_write (same)",
+                                 _us(lambda: device.on_register_write(0x10, [0]), n)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200000, help="timeit iterations per case")
+    quiet_logging()
+    main(parser.parse_args())
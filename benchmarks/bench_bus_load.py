@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+"""End-to-end bus load: polling cycles of a simulated master against the integration.
+
+The integration is set up with ``async_setup`` on a real Home Assistant core
+and serves its bus on a pseudo-terminal with each RTU backend. A simulated
+bus master (a forked child) runs realistic polling cycles over all slaves:
+
+* identity:     FC 0x03 registers 0x0000-0x0003, every slave
+* relay state:  FC 0x03 register 0x0010 of the relays
+* relay write:  FC 0x06 register 0x0010 of one relay per cycle (a channel
+                toggles; the write hook reaches the device on the HA loop)
+* contacts:     FC 0x04 register 0x0010 of the binary sensors
+* temperature:  FC 0x04 register 0x0020 of the temperature sensors, whose
+                source entities change on the HA side while the bus runs
+
+Requests are written at line speed for each ``--baudrate`` (11 bits per
+character) with a 3.5 character gap after each response, like a real
+master. Reported per backend and baud rate: throughput, turnaround from
+the last request byte to the first response byte (p50/p99, also per request
+kind) and server CPU per request. Server CPU is this process (HA loop and
+server thread) plus the server process of the process backend (Linux
+/proc), not the master.
+
+Slave addresses run from 3 upwards; the integration's config schema limits
+real installs to 3-32, the servers take any address.
+
+``--json`` writes the results for comparison across commits, ``--compare``
+prints the change against a file written earlier.
+
+Usage:
+    python benchmarks/bench_bus_load.py [--cycles N] [--baudrate B ...] [--backend NAME ...]
+                                        [--json PATH] [--compare PATH]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import struct
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+from _common import (
+    compare_results, open_pty, print_table, quiet_logging, read_exact, rtu_frame, summarize,
+    write_results,
+)
+
+from homeassistant.core import HomeAssistant
+
+import custom_components.ecto_modbus as ecto_modbus
+from custom_components.ecto_modbus.const import (
+    BACKEND_ASYNCIO, BACKEND_MODBUS_TK, BACKEND_PROCESS, BACKENDS, DOMAIN, PORT_TYPE_SERIAL,
+)
+from custom_components.ecto_modbus.devices import bitfield
+
+FIRST_ADDR = 3
+# Seconds between source temperature changes on the HA side
+TEMPERATURE_INTERVAL = 0.1
+
+
+def _layout(args):
+    """Device types by slave address."""
+    types = (["relay_10ch"] * args.relays + ["binary_sensor_10ch"] * args.binary
+             + ["temperature_sensor"] * args.temperature)
+    return {FIRST_ADDR + i: device_type for i, device_type in enumerate(types)}
+
+
+def _cycle(layout, cycle):
+    """Requests of one polling cycle: (kind, frame, response length)."""
+    requests = []
+    relays = [addr for addr, device_type in layout.items() if device_type == "relay_10ch"]
+    for addr, device_type in layout.items():
+        requests.append(("identity", rtu_frame(addr, struct.pack(">BHH", 0x03, 0x0000, 4)), 13))
+        if device_type == "relay_10ch":
+            requests.append(("relay state", rtu_frame(addr, struct.pack(">BHH", 0x03, 0x0010, 1)), 7))
+        elif device_type == "binary_sensor_10ch":
+            requests.append(("contacts", rtu_frame(addr, struct.pack(">BHH", 0x04, 0x0010, 1)), 7))
+        else:
+            requests.append(("temperature", rtu_frame(addr, struct.pack(">BHH", 0x04, 0x0020, 1)), 7))
+    if relays:
+        addr = relays[cycle % len(relays)]
+        value = bitfield.encode_channels(1 << (cycle // len(relays) % 10))
+        requests.append(("relay write", rtu_frame(addr, struct.pack(">BHH", 0x06, 0x0010, value)), 8))
+    return requests
+
+
+def _write_paced(fd, data, char_time):
+    deadline = time.perf_counter()
+    for byte in data:
+        os.write(fd, bytes((byte,)))
+        deadline += char_time
+        while time.perf_counter() < deadline:
+            pass
+
+
+def _master(master_fd, layout, n_cycles, baudrate, results):
+    """Child process: run the polling cycles, report (kind, ms) samples."""
+    char_time = 11.0 / baudrate
+    # t3.5; fixed 1.75 ms above 19200 baud per the Modbus serial line spec
+    gap = 3.5 * char_time if baudrate <= 19200 else 0.00175
+    probe, probe_len = _cycle(layout, 0)[0][1:]
+    deadline = time.perf_counter() + 30
+    while time.perf_counter() < deadline:
+        # The server may still be starting (server process)
+        os.write(master_fd, probe)
+        if len(read_exact(master_fd, probe_len, timeout=0.5)[0]) == probe_len:
+            break
+    samples = []
+    timeouts = 0
+    started = time.perf_counter()
+    for cycle in range(n_cycles):
+        for kind, request, response_len in _cycle(layout, cycle):
+            _write_paced(master_fd, request, char_time)
+            sent_at = time.perf_counter()
+            response, first_byte_at = read_exact(master_fd, response_len, timeout=1.0)
+            if len(response) != response_len:
+                timeouts += 1
+                read_exact(master_fd, 4096, timeout=0.05)
+                continue
+            samples.append((kind, (first_byte_at - sent_at) * 1000.0))
+            time.sleep(gap)
+    results.put((samples, timeouts, time.perf_counter() - started))
+
+
+def _process_cpu(pid):
+    """CPU seconds (user + system) of another process, from /proc."""
+    with open("/proc/%d/stat" % pid) as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _server_cpu(servers):
+    cpu = time.process_time()
+    for server in servers:
+        process = getattr(server, "_process", None)
+        if process is not None:
+            cpu += _process_cpu(process.pid)
+    return cpu
+
+
+async def _churn_temperatures(hass, entity_ids, stop):
+    value = 20.0
+    while not stop.is_set():
+        value = 20.0 if value > 30.0 else value + 0.1
+        for entity_id in entity_ids:
+            hass.states.async_set(entity_id, "%.1f" % value)
+        await asyncio.sleep(TEMPERATURE_INTERVAL)
+
+
+async def _run(config_dir, backend, baudrate, args):
+    layout = _layout(args)
+    master_fd, slave_path = open_pty()
+    devices = []
+    for addr, device_type in layout.items():
+        device = {"type": device_type, "addr": addr}
+        if device_type == "temperature_sensor":
+            device.update(entity_id="sensor.source_%d" % addr, deadband=0)
+        devices.append(device)
+    config = {DOMAIN: {
+        "port": slave_path,
+        "port_type": PORT_TYPE_SERIAL,
+        "baudrate": baudrate,
+        "backend": backend,
+        "sync_interval": 0,
+        "capture": {"size": 0},
+        "devices": devices,
+    }}
+    hass = HomeAssistant(config_dir)
+    entity_ids = [device["entity_id"] for device in devices if "entity_id" in device]
+    for entity_id in entity_ids:
+        hass.states.async_set(entity_id, "20.0")
+    await ecto_modbus.async_setup(hass, config)
+    # async_setup lowers the modbus_tk logger again
+    quiet_logging()
+    servers = [bus["rtu"] for bus in hass.data[DOMAIN]["buses"].values()]
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    churn = asyncio.create_task(_churn_temperatures(hass, entity_ids, stop))
+    done = loop.create_future()
+
+    def master_thread():
+        ctx = multiprocessing.get_context("fork")
+        results = ctx.Queue()
+        proc = ctx.Process(target=_master, args=(master_fd, layout, args.cycles, baudrate, results))
+        proc.start()
+        result = results.get()
+        proc.join()
+        loop.call_soon_threadsafe(done.set_result, result)
+
+    cpu_start = _server_cpu(servers)
+    threading.Thread(target=master_thread, daemon=True).start()
+    samples, timeouts, elapsed = await done
+    cpu = _server_cpu(servers) - cpu_start
+
+    stop.set()
+    await churn
+    for server in servers:
+        server.stop()
+    await hass.async_stop(force=True)
+    ecto_modbus._DEVICE_REGISTRY.clear()
+    os.close(master_fd)
+
+    turnaround = [ms for _kind, ms in samples]
+    kinds = {}
+    for kind, ms in samples:
+        kinds.setdefault(kind, []).append(ms)
+    return {
+        "backend": backend,
+        "baudrate": baudrate,
+        "slaves": len(layout),
+        "requests": len(samples),
+        "timeouts": timeouts,
+        "throughput_rps": len(samples) / elapsed,
+        "cpu_us_per_request": cpu * 1e6 / len(samples) if samples else float("nan"),
+        "turnaround_ms": summarize(turnaround),
+        "turnaround_ms_by_kind": {kind: summarize(values) for kind, values in kinds.items()},
+    }
+
+
+async def main(args):
+    results = []
+    with tempfile.TemporaryDirectory() as config_dir, \
+            patch.object(ecto_modbus, "load_platform", lambda *a: None):
+        for baudrate in args.baudrate:
+            for backend in args.backend:
+                results.append(await _run(config_dir, backend, baudrate, args))
+
+    for baudrate in args.baudrate:
+        rows = [("%s" % r["backend"], r["turnaround_ms"]) for r in results if r["baudrate"] == baudrate]
+        print_table("Last request byte -> first response byte (%d slaves, %d baud)"
+                    % (len(_layout(args)), baudrate), rows, "ms")
+    print("Throughput and server CPU")
+    for r in results:
+        print("  %-28s %8.1f req/s %10.1f us/request  timeouts=%d" % (
+            "%s, %d baud" % (r["backend"], r["baudrate"]), r["throughput_rps"],
+            r["cpu_us_per_request"], r["timeouts"]))
+    for r in results:
+        print_table("By request kind: %s, %d baud" % (r["backend"], r["baudrate"]),
+                    sorted(r["turnaround_ms_by_kind"].items()), "ms")
+
+    if args.json:
+        write_results(args.json, "bus_load", vars(args), results)
+        print("Results written to %s" % args.json)
+    if args.compare:
+        compare_results(args.compare, results, ("backend", "baudrate"),
+                        ("throughput_rps", "cpu_us_per_request", "turnaround_ms.p50", "turnaround_ms.p99"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=20, help="polling cycles over all slaves")
+    parser.add_argument("--baudrate", type=int, nargs="+", default=[19200, 115200])
+    parser.add_argument("--backend", nargs="+", choices=BACKENDS,
+                        default=[BACKEND_MODBUS_TK, BACKEND_ASYNCIO, BACKEND_PROCESS])
+    parser.add_argument("--relays", type=int, default=12)
+    parser.add_argument("--binary", type=int, default=10, help="binary sensors")
+    parser.add_argument("--temperature", type=int, default=10, help="temperature sensors")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--compare", help="results file of an earlier run to compare with")
+    quiet_logging()
+    asyncio.run(main(parser.parse_args()))
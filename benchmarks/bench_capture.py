@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""Per-call cost of serial RX/TX recording on the RTU read path.
+
+Compares, for single-byte reads (the modbus_tk RtuServer pattern) and
+8-byte writes:
+
+* legacy:  the former LoggingSerialWrapper, hex string built on every call
+           and handed to a DEBUG log call (logging disabled)
+* capture: CaptureSerialWrapper appending to the in-memory ring buffer
+* mmap:    CaptureSerialWrapper appending to a memory-mapped capture file
+
+Usage:
+    python benchmarks/bench_capture.py [--number N] [--size BYTES]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import timeit
+
+from _common import quiet_logging
+
+from custom_components.ecto_modbus.transport.capture import CaptureSerialWrapper, PacketCapture
+
+FRAME = bytes([0x05, 0x03, 0x00, 0x10, 0x00, 0x01, 0x85, 0x8F])
+
+
+class NullPort:
+    def read(self, size=1):
+        return FRAME[:size]
+
+    def write(self, data):
+        return len(data)
+
+
+class LegacyWrapper:
+    """The former LoggingSerialWrapper, verbatim apart from the name."""
+
+    def __init__(self, serial_port, logger, port_name):
+        self._serial = serial_port
+        self._logger = logger
+        self._port_name = port_name
+
+    def read(self, size=1):
+        data = self._serial.read(size)
+        if data:
+            hex_str = ' '.join(f'{b:02x}' for b in data)
+            self._logger.debug("RT: %s RX (%d bytes): %s", self._port_name, len(data), hex_str)
+        return data
+
+    def write(self, data):
+        hex_str = ' '.join(f'{b:02x}' for b in data)
+        self._logger.debug("TX: %s TX (%d bytes): %s", self._port_name, len(data), hex_str)
+        return self._serial.write(data)
+
+
+def _us(stmt, number):
+    return timeit.timeit(stmt, number=number) / number * 1e6
+
+
+def main(args):
+    logger = logging.getLogger("bench_capture")
+    logger.setLevel(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        mmap_capture = PacketCapture(args.size, os.path.join(tmp, "capture.bin"))
+        wrappers = [
+            ("legacy", LegacyWrapper(NullPort(), logger, "/dev/null")),
+            ("capture", CaptureSerialWrapper(NullPort(), PacketCapture(args.size), logger)),
+            ("mmap", CaptureSerialWrapper(NullPort(), mmap_capture, logger)),
+        ]
+        print("Serial recording (%d calls, ring %d bytes)" % (args.number, args.size))
+        print("  %-10s %12s %14s" % ("wrapper", "read(1) us", "write(8) us"))
+        for label, wrapper in wrappers:
+            print("  %-10s %12.3f %14.3f" % (label, _us(lambda: wrapper.read(1), args.number),
+                                             _us(lambda: wrapper.write(FRAME), args.number)))
+        mmap_capture.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200000, help="calls per case")
+    parser.add_argument("--size", type=int, default=65536, help="capture ring buffer size")
+    quiet_logging()
+    main(parser.parse_args())
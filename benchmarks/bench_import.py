@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""Import time of the integration package and cold ``async_setup`` time per config size.
+
+Every round runs in a fresh interpreter with Home Assistant core already
+imported (it is loaded before any integration), so only the integration's
+own modules and their dependencies are counted:
+
+* import:   ``import custom_components.ecto_modbus``
+* eager:    the package plus every module the former ``__init__`` imported
+            at the top (all devices and transports, coordinator, services)
+* setup:    import plus the first ``async_setup`` for ``--devices`` devices
+            on PTY buses (modbus_tk backend), and the import of the
+            platforms it loads (load_platform itself is a no-op), after a
+            lazy or an eager import
+
+Device configs are ``mixed`` (relays, binary sensors and temperature
+sensors in turn) and ``temperature`` (temperature sensors only, which
+needs neither the switch platform nor the channel devices).
+
+Usage:
+    python benchmarks/bench_import.py [--devices N ...] [--rounds N]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from _common import REPO_ROOT, print_table, summarize
+
+# Imported before the integration in every round; Home Assistant has
+# bootstrapped (config entries, http, websocket API) before it sets up
+# integrations from YAML
+HA_MODULES = (
+    "voluptuous",
+    "homeassistant.bootstrap",
+    "homeassistant.core",
+    "homeassistant.const",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.discovery",
+    "homeassistant.helpers.entity",
+    "homeassistant.helpers.entity_registry",
+    "homeassistant.helpers.event",
+    "homeassistant.helpers.restore_state",
+)
+
+# Modules the package imported at the top before they were deferred
+EAGER_MODULES = (
+    "custom_components.ecto_modbus.coordinator",
+    "custom_components.ecto_modbus.devices.binary_sensor",
+    "custom_components.ecto_modbus.devices.relay",
+    "custom_components.ecto_modbus.devices.temperature",
+    "custom_components.ecto_modbus.services",
+    "custom_components.ecto_modbus.state_tracker",
+    "custom_components.ecto_modbus.timer_engine",
+    "custom_components.ecto_modbus.transport.async_rtu",
+    "custom_components.ecto_modbus.transport.capture",
+    "custom_components.ecto_modbus.transport.process_rtu",
+    "custom_components.ecto_modbus.transport.register_bank",
+    "custom_components.ecto_modbus.transport.rtu_server",
+    "custom_components.ecto_modbus.transport.serial_port",
+    "custom_components.ecto_modbus.transport.snapshot",
+)
+
+DEVICE_TYPES = {
+    "mixed": ("relay_10ch", "binary_sensor_10ch", "temperature_sensor"),
+    "temperature": ("temperature_sensor",),
+}
+# Devices per bus; the config schema allows addresses 3-32
+BUS_DEVICES = 30
+
+
+def _config(slave_paths, n_devices, types):
+    from custom_components.ecto_modbus.const import DOMAIN, PORT_TYPE_SERIAL
+    buses = []
+    for index, slave_path in enumerate(slave_paths):
+        devices = []
+        for i in range(index * BUS_DEVICES, min(n_devices, (index + 1) * BUS_DEVICES)):
+            device = {"type": types[i % len(types)], "addr": 3 + len(devices)}
+            if device["type"] == "temperature_sensor":
+                device.update(entity_id="sensor.temperature_%d" % i)
+            devices.append(device)
+        buses.append({"name": "bus_%d" % index, "port": slave_path,
+                      "port_type": PORT_TYPE_SERIAL, "devices": devices})
+    return {DOMAIN: {"buses": buses}}
+
+
+def _child(mode, n_devices, types):
+    """One round in this (fresh) interpreter; prints the timings as JSON."""
+    import asyncio
+    import importlib
+    import os
+    import tempfile
+    import time
+    from unittest.mock import patch
+
+    from _common import open_pty, quiet_logging
+
+    for module in HA_MODULES:
+        importlib.import_module(module)
+    quiet_logging()
+    from homeassistant.core import HomeAssistant
+
+    start = time.perf_counter()
+    import custom_components.ecto_modbus as ecto_modbus
+    if mode.startswith("eager"):
+        for module in EAGER_MODULES:
+            importlib.import_module(module)
+    result = {"import_ms": (time.perf_counter() - start) * 1000.0}
+
+    if mode.endswith("setup"):
+        platforms = []
+        ptys = [open_pty() for _ in range(-(-n_devices // BUS_DEVICES))]
+        config = ecto_modbus.CONFIG_SCHEMA(_config([path for _fd, path in ptys], n_devices, types))
+
+        async def setup(config_dir):
+            hass = HomeAssistant(config_dir)
+            os.makedirs(hass.config.path(".storage"), exist_ok=True)
+            setup_start = time.perf_counter()
+            await ecto_modbus.async_setup(hass, config)
+            for platform in platforms:
+                importlib.import_module("custom_components.ecto_modbus.%s" % platform)
+            elapsed = time.perf_counter() - setup_start
+            for bus in hass.data[ecto_modbus.DOMAIN]["buses"].values():
+                bus["rtu"].stop()
+            await hass.async_stop(force=True)
+            return elapsed
+
+        with tempfile.TemporaryDirectory() as config_dir, \
+                patch.object(ecto_modbus, "load_platform",
+                             lambda hass, platform, *args: platforms.append(platform)):
+            result["setup_ms"] = asyncio.run(setup(config_dir)) * 1000.0
+        result["platforms"] = platforms
+
+    result["modules"] = sum(1 for name in sys.modules if name.startswith("custom_components.ecto_modbus"))
+    print(json.dumps(result))
+
+
+def _round(mode, n_devices=0, config="mixed"):
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", mode, str(n_devices), config],
+        capture_output=True, text=True, check=True, cwd=REPO_ROOT).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main(args):
+    rows = []
+    for mode in ("import", "eager"):
+        samples = [_round(mode) for _ in range(args.rounds)]
+        rows.append(("%s (%d modules)" % (mode, samples[0]["modules"]),
+                     summarize([s["import_ms"] for s in samples])))
+    print_table("Package import with Home Assistant core loaded", rows, "ms")
+
+    rows = []
+    for config in ("mixed", "temperature"):
+        for n_devices in args.devices:
+            for mode, label in (("eager-setup", "eager"), ("setup", "lazy")):
+                samples = [_round(mode, n_devices, config) for _ in range(args.rounds)]
+                label = "%s %s x%d (%d modules)" % (
+                    label, config, n_devices, samples[0]["modules"])
+                rows.append((label, summarize([s["import_ms"] + s["setup_ms"] for s in samples])))
+    print_table("Package import and first async_setup of N devices, platform imports included",
+                rows, "ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        _child(sys.argv[2], int(sys.argv[3]), DEVICE_TYPES[sys.argv[4]])
+        sys.exit(0)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=[1, 10, 32])
+    parser.add_argument("--rounds", type=int, default=10, help="fresh interpreters per case")
+    main(parser.parse_args())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""Memory footprint of a maximal bus: bytes per slave and per channel switch.
+
+Builds ``--devices`` 10-channel devices (relays or binary sensors) on one
+server, then a switch entity per channel with its device callback
+registered, the way the switch platform does once HA added them. Memory
+is measured with tracemalloc after a collection, so only what the objects
+keep is counted:
+
+* devices:   device objects, their register wrappers and the slaves and
+             register blocks of the databank
+* switches:  channel switch entities and their device callbacks
+
+Per layer the allocating modules with the largest share are listed;
+"instances" are the objects themselves (and their __dict__ before
+__init__ fills it), allocated where the benchmark creates them.
+
+The integration's config schema limits a bus to addresses 3-32 (30
+devices); the servers take any address, 32 devices are the default here.
+
+Usage:
+    python benchmarks/bench_memory.py [--devices N] [--type relay|binary] [--top N]
+"""
+import argparse
+import gc
+import os
+import tracemalloc
+
+from _common import FakeServer, quiet_logging
+
+from modbus_tk.modbus import Databank
+
+from custom_components.ecto_modbus.devices.binary_sensor import EctoCH10BinarySensor
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.switch import EctoChannelSwitch, EctoStateFlusher
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+
+DEVICE_CLASSES = {"relay": EctoRelay10CH, "binary": EctoCH10BinarySensor}
+DATABANKS = {
+    "register bank": lambda: RegisterBankDatabank(error_on_missing_slave=False),
+    "modbus_tk": lambda: Databank(error_on_missing_slave=False),
+}
+
+
+def _traced():
+    gc.collect()
+    return tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+def _module(stat):
+    path = stat.traceback[0].filename
+    if path == __file__:
+        # Instances are allocated in the frame that calls the class
+        return "instances"
+    parts = path.split(os.sep)
+    for root in ("custom_components", "site-packages"):
+        if root in parts:
+            return "/".join(parts[parts.index(root) + 1:])
+    return os.path.basename(path)
+
+
+def _measure(device_class, databank, n_devices):
+    """Return (device layer, switch layer) as (total bytes, [(module, bytes)])."""
+    layers = []
+    start = _traced()
+    server = FakeServer(databank())
+    devices = [device_class({"addr": 3 + i}, server) for i in range(n_devices)]
+    after_devices = _traced()
+    flusher = EctoStateFlusher(None)
+    switches = []
+    for device in devices:
+        for channel in range(device.CHANNEL_COUNT):
+            switch = EctoChannelSwitch(device, channel, flusher)
+            device.set_state_change_callback(channel, switch._on_device_state_change)
+            switches.append(switch)
+    after_switches = _traced()
+    for before, after in ((start, after_devices), (after_devices, after_switches)):
+        stats = after.compare_to(before, "filename")
+        modules = {}
+        for stat in stats:
+            modules[_module(stat)] = modules.get(_module(stat), 0) + stat.size_diff
+        layers.append((sum(modules.values()), sorted(modules.items(), key=lambda item: -item[1])))
+    # Keep the objects alive until both layers are measured
+    del devices, switches, server
+    return layers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=32)
+    parser.add_argument("--type", choices=sorted(DEVICE_CLASSES), default="relay")
+    parser.add_argument("--top", type=int, default=4, help="allocating modules listed per layer")
+    args = parser.parse_args()
+    quiet_logging()
+
+    device_class = DEVICE_CLASSES[args.type]
+    channels = args.devices * device_class.CHANNEL_COUNT
+    tracemalloc.start()
+    # Warm up imports, interned strings and class caches
+    _measure(device_class, DATABANKS["register bank"], 2)
+    print("%d %s devices, %d channels" % (args.devices, device_class.__name__, channels))
+    for name, databank in DATABANKS.items():
+        (device_total, device_modules), (switch_total, switch_modules) = _measure(
+            device_class, databank, args.devices)
+        print("%s databank" % name)
+        for layer, total, modules, per_unit in (
+                ("devices", device_total, device_modules, "%d B/slave" % (device_total / args.devices)),
+                ("switches", switch_total, switch_modules, "%d B/channel" % (switch_total / channels))):
+            print("  %-44s %8.1f KiB %14s" % (layer, total / 1024.0, per_unit))
+            for module, size in modules[:args.top]:
+                print("    %-42s %8.1f KiB" % (module, size / 1024.0))
+        bus_total = device_total + switch_total
+        print("  %-44s %8.1f KiB %14s" % ("bus", bus_total / 1024.0, "%d B/channel" % (bus_total / channels)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""Response turnaround under simulated HA load: server thread vs. server process.
+
+A simulated bus master runs in a forked child and polls relay slaves over a
+pseudo-terminal (identity registers 0x0000-0x0003 and state register 0x0010).
+The server side runs with the buffered modbus_tk thread backend in this
+process, or with the process backend (RtuServer in a spawned child process
+on a shared-memory register bank). Meanwhile ``--load`` Python threads in
+this process keep the GIL busy with pure-Python work, standing in for
+recorder flushes and template storms on a busy Home Assistant.
+
+Usage:
+    python benchmarks/bench_process_backend.py [--requests N] [--slaves S] [--load T]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import struct
+import threading
+import time
+
+from _common import (
+    open_pty, print_table, quiet_logging, read_exact, rtu_frame, summarize,
+)
+
+import serial
+
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.transport.process_rtu import ProcessRtuServer
+from custom_components.ecto_modbus.transport.rtu_server import EctoRtuServer
+
+FIRST_ADDR = 3
+BAUDRATE = 19200
+
+
+def _master(master_fd, n_requests, n_slaves, results):
+    """Child process: poll all slaves round-robin, report turnarounds in ms."""
+    polls = []
+    for addr in range(FIRST_ADDR, FIRST_ADDR + n_slaves):
+        polls.append((rtu_frame(addr, struct.pack(">BHH", 0x03, 0x0000, 4)), 5 + 2 * 4))
+        polls.append((rtu_frame(addr, struct.pack(">BHH", 0x03, 0x0010, 1)), 5 + 2 * 1))
+    # Wait until the server answers (the server process needs to start)
+    deadline = time.perf_counter() + 30
+    while time.perf_counter() < deadline:
+        os.write(master_fd, polls[-1][0])
+        response, _first = read_exact(master_fd, polls[-1][1], timeout=0.5)
+        if len(response) == polls[-1][1]:
+            break
+    turnaround = []
+    timeouts = 0
+    for i in range(n_requests):
+        request, response_len = polls[i % len(polls)]
+        os.write(master_fd, request)
+        sent_at = time.perf_counter()
+        response, first_byte_at = read_exact(master_fd, response_len, timeout=1.0)
+        if len(response) != response_len:
+            timeouts += 1
+            # Drop a late response before the next request
+            read_exact(master_fd, 4096, timeout=0.05)
+            continue
+        turnaround.append((first_byte_at - sent_at) * 1000.0)
+        time.sleep(0.002)
+    results.put((turnaround, timeouts))
+
+
+def _busy(stop):
+    """Pure-Python work holding the GIL, like a busy HA instance."""
+    while not stop.is_set():
+        sum(i * i for i in range(20000))
+
+
+def _run(args, start_server):
+    master_fd, slave_path = open_pty()
+    server = start_server(slave_path)
+    for addr in range(FIRST_ADDR, FIRST_ADDR + args.slaves):
+        EctoRelay10CH({"addr": addr}, server)
+    stop = threading.Event()
+    load = [threading.Thread(target=_busy, args=(stop,), daemon=True) for _ in range(args.load)]
+    for thread in load:
+        thread.start()
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_master, args=(master_fd, args.requests, args.slaves, results))
+    proc.start()
+    turnaround, timeouts = results.get()
+    proc.join()
+    stop.set()
+    for thread in load:
+        thread.join()
+    server.stop()
+    os.close(master_fd)
+    return turnaround, timeouts
+
+
+def _thread_server(slave_path):
+    port = serial.Serial(slave_path, baudrate=BAUDRATE, timeout=0.002)
+    server = EctoRtuServer(port, interchar_multiplier=1, error_on_missing_slave=False)
+    server.start()
+    return server
+
+
+def _process_server(slave_path):
+    server = ProcessRtuServer({"port": slave_path, "port_type": "serial", "baudrate": BAUDRATE},
+                              loop=asyncio.new_event_loop())
+    server.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--slaves", type=int, default=8)
+    parser.add_argument("--load", type=int, default=2, help="GIL-busy threads in the HA process")
+    args = parser.parse_args()
+    quiet_logging()
+
+    rows = []
+    timeouts = []
+    for load in (0, args.load):
+        for label, start_server in (("thread", _thread_server), ("process", _process_server)):
+            run_args = argparse.Namespace(**dict(vars(args), load=load))
+            turnaround, missed = _run(run_args, start_server)
+            name = "%s, %d load threads" % (label, load)
+            rows.append((name, summarize(turnaround)))
+            timeouts.append((name, missed))
+
+    print_table("Request -> first response byte (%d slaves, %d baud)" % (args.slaves, BAUDRATE),
+                rows, "ms")
+    print("Timeouts (1 s)")
+    for name, missed in timeouts:
+        print("  %-28s %d/%d" % (name, missed, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""Memory and access cost of the register storage, modbus_tk blocks vs. register bank.
+
+Builds ``--slaves`` relay devices (identity, state and timer registers) on a
+plain modbus_tk Databank and on a RegisterBankDatabank, then reports:
+
+* heap bytes per slave (tracemalloc, device objects included)
+* set_raw_value / get_values cost of ModBusRegisterSensor
+* FC 0x03 handle_request cost for the relay timer registers
+
+Usage:
+    python benchmarks/bench_register_bank.py [--slaves N] [--number N]
+"""
+import argparse
+import gc
+import struct
+import timeit
+import tracemalloc
+
+from _common import FakeServer, quiet_logging
+
+from modbus_tk.modbus import Databank
+
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+
+
+def _build(databank, slaves):
+    server = FakeServer(databank)
+    return [EctoRelay10CH({"addr": addr}, server) for addr in range(1, slaves + 1)]
+
+
+def _memory_per_slave(make_databank, slaves):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    devices = _build(make_databank(), slaves)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del devices
+    return (after - before) / slaves
+
+
+def _timings(make_databank, number):
+    device = _build(make_databank(), 1)[0]
+    sensor = device.registers[0x20]
+    values = [0x8001] * sensor.reg_size
+    request = struct.pack(">BHH", 0x03, sensor.addr, sensor.reg_size)
+    slave = device.slave
+    return {
+        "set_raw_value": timeit.timeit(lambda: sensor.set_raw_value(values), number=number) / number,
+        "get_values": timeit.timeit(sensor.get_values, number=number) / number,
+        "FC3 request": timeit.timeit(lambda: slave.handle_request(request), number=number) / number,
+    }
+
+
+def main(args):
+    backends = [
+        ("modbus_tk blocks", lambda: Databank(error_on_missing_slave=False)),
+        ("register bank", lambda: RegisterBankDatabank(error_on_missing_slave=False)),
+    ]
+
+    print("Heap per relay slave (%d slaves)" % args.slaves)
+    for label, make_databank in backends:
+        print("  %-20s %10.0f bytes" % (label, _memory_per_slave(make_databank, args.slaves)))
+
+    print("Access cost (%d iterations)" % args.number)
+    results = [(label, _timings(make_databank, args.number)) for label, make_databank in backends]
+    for op in results[0][1]:
+        print("  %-14s" % op + "".join(
+            " %s %7.2f us" % (label, stats[op] * 1e6) for label, stats in results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slaves", type=int, default=32, help="relay slaves on the bus")
+    parser.add_argument("--number", type=int, default=20000, help="timeit iterations per operation")
+    quiet_logging()
+    main(parser.parse_args())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+"""HA-side write latency, lock hold times and torn reads: modbus_tk slave lock vs. copy-on-write images.
+
+A server thread serves a relay slave the way the RTU server does
+(Slave.handle_request): it reads the state register 0x0010 and the ten timer
+registers 0x0020-0x0029, and writes all ten timers with FC 0x10. Meanwhile
+the "HA loop" thread writes the ten timers with set_raw_value, as
+EctoRelay10CH.set_timer does, and reads them back with get_values.
+
+Every write stores ten equal values, so a read returning different values
+saw a half-applied write ("torn"). Lock hold times are taken from the
+outermost acquire/release of the slave's modbus_tk data lock and, for the
+register bank, of its writer lock; the HA thread's time spent waiting in
+acquire() is reported separately. Maxima include GIL switches (5 ms).
+
+Usage:
+    python benchmarks/bench_register_snapshot.py [--writes N]
+"""
+import argparse
+import struct
+import threading
+import time
+
+from _common import FakeServer, print_table, quiet_logging, summarize
+
+from modbus_tk.modbus import Databank
+
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+
+READ_STATE = struct.pack(">BHH", 0x03, 0x0010, 1)
+READ_TIMERS = struct.pack(">BHH", 0x03, 0x0020, 10)
+
+
+class TimedLock:
+    """Lock wrapper recording hold times (us) and the HA thread's waits for it."""
+
+    def __init__(self, lock):
+        self._lock = lock
+        self._depth = 0
+        self._acquired_at = 0
+        self.holds = []
+        self.ha_waits = []
+
+    def acquire(self, *args, **kwargs):
+        start = time.perf_counter_ns()
+        acquired = self._lock.acquire(*args, **kwargs)
+        if threading.current_thread() is threading.main_thread():
+            self.ha_waits.append((time.perf_counter_ns() - start) / 1000.0)
+        if acquired:
+            self._depth += 1
+            if self._depth == 1:
+                self._acquired_at = time.perf_counter_ns()
+        return acquired
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self.holds.append((time.perf_counter_ns() - self._acquired_at) / 1000.0)
+        self._lock.release()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def _write_timers_pdu(value):
+    return struct.pack(">BHHB", 0x10, 0x0020, 10, 20) + struct.pack(">10H", *([value] * 10))
+
+
+def _torn(values):
+    return len(set(values)) > 1
+
+
+def run(databank, writes):
+    relay = EctoRelay10CH({"addr": 5}, FakeServer(databank))
+    slave = relay.slave
+    locks = {"slave data lock": TimedLock(slave._data_lock)}
+    slave._data_lock = locks["slave data lock"]
+    if hasattr(slave, "_write_lock"):
+        locks["bank write lock"] = TimedLock(slave._write_lock)
+        slave._write_lock = locks["bank write lock"]
+
+    stop = threading.Event()
+    server_torn = [0, 0]
+
+    def server():
+        value = 0
+        while not stop.is_set():
+            slave.handle_request(READ_STATE)
+            response = slave.handle_request(READ_TIMERS)
+            server_torn[0] += _torn(struct.unpack(">10H", response[2:22]))
+            server_torn[1] += 1
+            value = (value + 1) & 0x7FFF
+            slave.handle_request(_write_timers_pdu(value))
+
+    thread = threading.Thread(target=server, daemon=True)
+    thread.start()
+    timers = relay.registers[0x20]
+    latencies = []
+    ha_torn = 0
+    for index in range(writes):
+        start = time.perf_counter_ns()
+        timers.set_raw_value([0x8000 | (index & 0x7FFF)] * 10)
+        latencies.append((time.perf_counter_ns() - start) / 1000.0)
+        ha_torn += _torn(timers.get_values())
+    stop.set()
+    thread.join()
+    return latencies, locks, ha_torn, server_torn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=20000, help="HA-side timer writes")
+    args = parser.parse_args()
+    quiet_logging()
+
+    cases = (
+        ("modbus_tk slave", Databank(error_on_missing_slave=False)),
+        ("register bank", RegisterBankDatabank(error_on_missing_slave=False, response_cache=False)),
+    )
+    write_rows = []
+    wait_rows = []
+    lock_rows = []
+    torn_rows = []
+    for label, databank in cases:
+        latencies, locks, ha_torn, server_torn = run(databank, args.writes)
+        write_rows.append((label, summarize(latencies)))
+        for lock_name, lock in locks.items():
+            if lock.holds:
+                lock_rows.append(("%s: %s" % (label, lock_name), summarize(lock.holds)))
+            if lock.ha_waits:
+                wait_rows.append(("%s: %s" % (label, lock_name), summarize(lock.ha_waits)))
+        torn_rows.append((label, ha_torn, args.writes, server_torn[0], server_torn[1]))
+
+    print_table("HA-side set_raw_value of the 10 timers (server thread busy)", write_rows, "us")
+    print_table("HA thread waiting for a lock", wait_rows, "us")
+    print_table("Lock hold time", lock_rows, "us")
+    print("Torn reads of the 10 timers")
+    for label, ha_torn, ha_reads, server_torn, server_reads in torn_rows:
+        print("  %-28s HA %d/%d  server %d/%d" % (label, ha_torn, ha_reads, server_torn, server_reads))
+
+
+if __name__ == "__main__":
+    main()
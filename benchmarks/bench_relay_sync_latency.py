@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""Latency from an external 0x10 write to the relay state-change callback.
+
+Compares the two sync paths of EctoRelay10CH:
+
+* hook:    modbus_tk write hooks forward the write to the event loop
+           with call_soon_threadsafe (event-driven path)
+* polling: the coordinator calls sync_channels_from_register every
+           ``--poll-interval`` seconds (legacy path, now a safety net)
+
+External writes are injected from a separate thread through
+``Slave.handle_request`` - the same call the RtuServer thread makes - so the
+hook path is exercised exactly as on a real bus, minus the serial port.
+
+Usage:
+    python benchmarks/bench_relay_sync_latency.py [--samples N] [--poll-interval S]
+"""
+import argparse
+import asyncio
+import random
+import struct
+import threading
+import time
+
+from _common import FakeServer, print_table, quiet_logging, summarize
+
+from modbus_tk import hooks
+
+from custom_components import ecto_modbus
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+
+RELAY_ADDR = 5
+
+
+def _write_pdu(value):
+    return struct.pack(">BHH", 0x06, 0x10, value)
+
+
+async def _measure(loop, device, samples, pace, poll_interval=None):
+    """Inject `samples` external writes and time each callback delivery."""
+    slave = device.slave
+    latencies = []
+    fired = asyncio.Event()
+    sent_at = [0.0]
+
+    def on_change(channel, state):
+        latencies.append((time.perf_counter() - sent_at[0]) * 1000.0)
+        fired.set()
+
+    device.set_state_change_callback(0, on_change)
+
+    poll_task = None
+    if poll_interval is not None:
+        async def poll():
+            while True:
+                await asyncio.sleep(poll_interval)
+                device.sync_channels_from_register()
+        poll_task = asyncio.ensure_future(poll())
+
+    state = 0
+    for _ in range(samples):
+        state ^= 1
+        fired.clear()
+        # Random phase so polling latency is not synchronised with the timer
+        await asyncio.sleep(random.uniform(0, pace))
+
+        def inject(value=state << 8):
+            sent_at[0] = time.perf_counter()
+            slave.handle_request(_write_pdu(value))
+
+        thread = threading.Thread(target=inject)
+        thread.start()
+        await fired.wait()
+        thread.join()
+
+    if poll_task is not None:
+        poll_task.cancel()
+    return latencies
+
+
+async def main(args):
+    loop = asyncio.get_running_loop()
+
+    server = FakeServer()
+    device = EctoRelay10CH({"addr": RELAY_ADDR}, server)
+    ecto_modbus._DEVICE_REGISTRY[RELAY_ADDR] = device
+
+    # Event-driven path
+    ecto_modbus._install_write_hooks(loop)
+    hook_ms = await _measure(loop, device, args.samples, pace=0.01)
+    for hook_name in ecto_modbus.WRITE_HOOK_NAMES:
+        hooks.uninstall_hook(hook_name, ecto_modbus._WRITE_HOOK)
+    ecto_modbus._WRITE_HOOK = None
+
+    # Legacy polling path
+    poll_ms = await _measure(loop, device, args.poll_samples, pace=args.poll_interval,
+                             poll_interval=args.poll_interval)
+
+    print_table(
+        "External 0x10 write -> switch callback latency",
+        [
+            ("write hook", summarize(hook_ms)),
+            ("polling @ %.1fs" % args.poll_interval, summarize(poll_ms)),
+        ],
+        "ms",
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=500,
+                        help="external writes measured on the hook path")
+    parser.add_argument("--poll-samples", type=int, default=20,
+                        help="external writes measured on the polling path")
+    parser.add_argument("--poll-interval", type=float, default=5.0,
+                        help="coordinator poll interval in seconds (legacy default: 5)")
+    quiet_logging()
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""Cost per request of serving a polling cycle, with and without the response cache.
+
+Replays a bus master's polling cycle through RegisterBankDatabank.handle_request
+(the call both RTU backends make per frame): identity registers 0x0000-0x0003
+and state register 0x0010 of every relay, plus the computed temperature
+register 0x0020 of every temperature slave, which is never cached. With
+``--write-every K`` Home Assistant changes one relay state every K requests,
+which invalidates that relay's cached state read.
+
+``--capture FILE`` replays the requests of a capture file recorded by the
+integration (``capture: file:``) instead of the synthetic cycle; received
+chunks that are not a complete request frame are skipped.
+
+Usage:
+    python benchmarks/bench_response_cache.py [--cycles N] [--relays R] [--temperature T]
+                                              [--write-every K] [--capture FILE]
+"""
+import argparse
+import struct
+import time
+
+from _common import FakeServer, quiet_logging, rtu_frame
+
+import modbus_tk.defines as cst
+from modbus_tk.modbus_rtu import RtuQuery
+
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.transport.async_rtu import is_complete_frame
+from custom_components.ecto_modbus.transport.capture import DIRECTION_RX, read_capture_file
+from custom_components.ecto_modbus.transport.modBusRTU import ModBusRegisterSensor
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+
+FIRST_ADDR = 3
+
+
+def _polling_cycle(args):
+    cycle = []
+    for addr in range(FIRST_ADDR, FIRST_ADDR + args.relays):
+        cycle.append(rtu_frame(addr, struct.pack(">BHH", 0x03, 0x0000, 4)))
+        cycle.append(rtu_frame(addr, struct.pack(">BHH", 0x03, 0x0010, 1)))
+    for addr in range(FIRST_ADDR + args.relays, FIRST_ADDR + args.relays + args.temperature):
+        cycle.append(rtu_frame(addr, struct.pack(">BHH", 0x03, 0x0000, 4)))
+        cycle.append(rtu_frame(addr, struct.pack(">BHH", 0x04, 0x0020, 1)))
+    return cycle
+
+
+def _recorded_cycle(path):
+    records, _epoch_ns = read_capture_file(path)
+    return [bytes(data) for _time_ns, direction, data in records
+            if direction == DIRECTION_RX and is_complete_frame(data)]
+
+
+def _make_bank(args, response_cache):
+    databank = RegisterBankDatabank(error_on_missing_slave=False, response_cache=response_cache)
+    server = FakeServer(databank)
+    relays = [EctoRelay10CH({"addr": addr}, server)
+              for addr in range(FIRST_ADDR, FIRST_ADDR + args.relays)]
+    for addr in range(FIRST_ADDR + args.relays, FIRST_ADDR + args.relays + args.temperature):
+        slave = databank.add_slave(addr)
+        ModBusRegisterSensor(slave, cst.HOLDING_REGISTERS, 0x0000, 4).set_raw_value([0x8000, 0, addr, 0x2201])
+        temperature = ModBusRegisterSensor(slave, cst.ANALOG_INPUTS, 0x0020, 1)
+        temperature.set_compute(lambda: [215])
+    return databank, relays
+
+
+def _run(args, cycle, response_cache):
+    databank, relays = _make_bank(args, response_cache)
+    requests = [memoryview(bytearray(frame)) for frame in cycle] * args.cycles
+    query = RtuQuery()
+    handle = databank.handle_request
+    write_every = args.write_every
+    writes = 0
+    start = time.perf_counter()
+    for index, request in enumerate(requests):
+        if write_every and relays and index % write_every == 0:
+            writes += 1
+            relays[writes % len(relays)].set_switch_state(0, (writes // len(relays)) & 1)
+        handle(query, request)
+    elapsed = time.perf_counter() - start
+    return elapsed * 1e6 / len(requests), databank.response_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=2000, help="polling cycles to replay")
+    parser.add_argument("--relays", type=int, default=8)
+    parser.add_argument("--temperature", type=int, default=2, help="temperature slaves")
+    parser.add_argument("--write-every", type=int, default=0, help="HA relay write every K requests")
+    parser.add_argument("--capture", help="replay the requests of a capture file")
+    args = parser.parse_args()
+    quiet_logging()
+
+    cycle = _recorded_cycle(args.capture) if args.capture else _polling_cycle(args)
+    print("Polling cycle: %d requests x %d cycles%s" % (
+        len(cycle), args.cycles, ", HA write every %d" % args.write_every if args.write_every else ""))
+    print("  %-16s %12s %10s" % ("case", "us/request", "hit rate"))
+    for label, response_cache in (("modbus_tk path", False), ("response cache", True)):
+        us, cache = _run(args, cycle, response_cache)
+        hit_rate = cache.as_dict()["hit_rate"] if cache is not None else None
+        print("  %-16s %12.2f %10s" % (label, us, "-" if hit_rate is None else "%.1f%%" % (100 * hit_rate)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+"""Response turnaround and CPU cost: modbus_tk RtuServer thread vs asyncio engine.
+
+A simulated bus master runs in a child process and polls relay slaves over a
+pseudo-terminal (identity registers 0x0000-0x0003 and state register 0x0010).
+The server side runs in this process with each backend: plain modbus_tk
+RtuServer, EctoRtuServer (buffered frame reader) and the asyncio engine.
+Server CPU time is taken from time.process_time() across the run, so the
+master's cost is not included.
+
+A PTY delivers a whole request at once; ``--paced`` makes the master write
+one byte per character time instead, like a real line at ``--baudrate``.
+
+Usage:
+    python benchmarks/bench_rtu_backends.py [--requests N] [--baudrate B] [--slaves S] [--paced]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import struct
+import threading
+import time
+
+from _common import (
+    open_pty, print_table, quiet_logging, read_exact, rtu_frame, summarize,
+)
+
+import serial
+from modbus_tk import modbus_rtu
+
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.transport.async_rtu import AsyncRtuServer
+from custom_components.ecto_modbus.transport.rtu_server import EctoRtuServer
+
+FIRST_ADDR = 3
+
+
+def _write_paced(fd, data, char_time):
+    deadline = time.perf_counter()
+    for byte in data:
+        os.write(fd, bytes((byte,)))
+        deadline += char_time
+        while time.perf_counter() < deadline:
+            pass
+
+
+def _master(master_fd, n_requests, n_slaves, char_time, results):
+    """Child process: poll all slaves round-robin, report turnarounds in ms."""
+    polls = []
+    for addr in range(FIRST_ADDR, FIRST_ADDR + n_slaves):
+        polls.append((rtu_frame(addr, struct.pack(">BHH", 0x03, 0x0000, 4)), 5 + 2 * 4))
+        polls.append((rtu_frame(addr, struct.pack(">BHH", 0x03, 0x0010, 1)), 5 + 2 * 1))
+    turnaround = []
+    timeouts = 0
+    for i in range(n_requests):
+        request, response_len = polls[i % len(polls)]
+        if char_time:
+            _write_paced(master_fd, request, char_time)
+        else:
+            os.write(master_fd, request)
+        sent_at = time.perf_counter()
+        response, first_byte_at = read_exact(master_fd, response_len, timeout=1.0)
+        if len(response) != response_len:
+            timeouts += 1
+            continue
+        turnaround.append((first_byte_at - sent_at) * 1000.0)
+        # Respect t3.5 before the next request like a real master would
+        time.sleep(0.002)
+    results.put((turnaround, timeouts))
+
+
+def _run_master(master_fd, args):
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    char_time = 11.0 / args.baudrate if args.paced else 0
+    proc = ctx.Process(target=_master, args=(master_fd, args.requests, args.slaves, char_time, results))
+    proc.start()
+    turnaround, timeouts = results.get()
+    proc.join()
+    return turnaround, timeouts
+
+
+def _make_devices(server, n_slaves):
+    return [EctoRelay10CH({"addr": addr}, server)
+            for addr in range(FIRST_ADDR, FIRST_ADDR + n_slaves)]
+
+
+def bench_modbus_tk(args, server_class=modbus_rtu.RtuServer):
+    master_fd, slave_path = open_pty()
+    port = serial.Serial(slave_path, baudrate=args.baudrate, timeout=0.002)
+    server = server_class(port, interchar_multiplier=1, error_on_missing_slave=False)
+    _make_devices(server, args.slaves)
+    server.start()
+    time.sleep(0.1)
+    cpu_start = time.process_time()
+    turnaround, timeouts = _run_master(master_fd, args)
+    cpu = time.process_time() - cpu_start
+    server.stop()
+    os.close(master_fd)
+    return turnaround, timeouts, cpu
+
+
+def bench_asyncio(args):
+    master_fd, slave_path = open_pty()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        port = serial.Serial(slave_path, baudrate=args.baudrate, timeout=0)
+        server = AsyncRtuServer(port, loop=loop)
+        _make_devices(server, args.slaves)
+        server.start()
+        cpu_start = time.process_time()
+        done = loop.create_future()
+
+        def master_thread():
+            result = _run_master(master_fd, args)
+            loop.call_soon_threadsafe(done.set_result, result)
+
+        threading.Thread(target=master_thread, daemon=True).start()
+        turnaround, timeouts = await done
+        cpu = time.process_time() - cpu_start
+        server.stop()
+        return turnaround, timeouts, cpu
+
+    result = asyncio.run(run())
+    os.close(master_fd)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--baudrate", type=int, default=19200)
+    parser.add_argument("--slaves", type=int, default=8)
+    parser.add_argument("--paced", action="store_true", help="write requests at line speed")
+    args = parser.parse_args()
+    quiet_logging()
+
+    rows = []
+    cpu_rows = []
+    backends = (
+        ("modbus_tk thread", bench_modbus_tk),
+        ("buffered thread", lambda args: bench_modbus_tk(args, EctoRtuServer)),
+        ("asyncio engine", bench_asyncio),
+    )
+    for label, bench in backends:
+        turnaround, timeouts, cpu = bench(args)
+        rows.append((label, summarize(turnaround)))
+        served = len(turnaround)
+        cpu_rows.append((label, cpu, cpu * 1e6 / served if served else float("nan"), timeouts))
+
+    print_table("Request -> first response byte (%d slaves, %d baud%s)" % (
+        args.slaves, args.baudrate, ", paced" if args.paced else ""),
+                rows, "ms")
+    print("Server CPU")
+    for label, cpu, per_request, timeouts in cpu_rows:
+        print("  %-28s %8.3f s total %10.1f us/request  timeouts=%d" % (label, cpu, per_request, timeouts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""Integration startup time and event-loop stalls, bus bring-up on the loop vs. in executors.
+
+Runs ``async_setup`` of the integration on a real Home Assistant core with
+``--devices`` devices (relays, binary sensors and temperature sensors in
+turn) split over ``--buses`` buses on pseudo-terminals, for each RTU
+backend. A heartbeat task measures the longest time the event loop was
+blocked during setup.
+
+* inline:    executor jobs run on the event loop, like the former setup that
+             opened the port and started the server synchronously
+* executor:  port, snapshot and server start-up run in HA's executor while
+             the loop keeps going
+
+Platform loading is left out (load_platform is a no-op).
+
+Usage:
+    python benchmarks/bench_startup.py [--devices N] [--buses N] [--rounds N] [--snapshot]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+from _common import open_pty, print_table, quiet_logging, summarize
+
+from homeassistant.core import HomeAssistant
+
+import custom_components.ecto_modbus as ecto_modbus
+from custom_components.ecto_modbus.const import (
+    BACKEND_ASYNCIO, BACKEND_MODBUS_TK, BACKEND_PROCESS, DOMAIN, PORT_TYPE_SERIAL,
+)
+
+DEVICE_TYPES = ("relay_10ch", "binary_sensor_10ch", "temperature_sensor")
+
+
+def _config(slave_paths, backend, n_devices, snapshot):
+    buses = []
+    for index, slave_path in enumerate(slave_paths):
+        devices = []
+        for i in range(index, n_devices, len(slave_paths)):
+            device = {"type": DEVICE_TYPES[i % len(DEVICE_TYPES)], "addr": 3 + len(devices)}
+            if device["type"] == "temperature_sensor":
+                device.update(entity_id="sensor.temperature_%d" % i)
+            devices.append(device)
+        buses.append({
+            "name": "bus_%d" % index,
+            "port": slave_path,
+            "port_type": PORT_TYPE_SERIAL,
+            "backend": backend,
+            "snapshot": snapshot,
+            "devices": devices,
+        })
+    return ecto_modbus.CONFIG_SCHEMA({DOMAIN: {"buses": buses}})
+
+
+async def _inline_executor_job(target, *args):
+    return target(*args)
+
+
+async def _heartbeat(stop, stalls):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(0)
+        now = time.perf_counter()
+        stalls.append(now - last)
+        last = now
+
+
+async def _setup_once(config_dir, config, inline):
+    hass = HomeAssistant(config_dir)
+    os.makedirs(hass.config.path(".storage"), exist_ok=True)
+    if inline:
+        hass.async_add_executor_job = _inline_executor_job
+    stop = asyncio.Event()
+    stalls = []
+    heartbeat = asyncio.create_task(_heartbeat(stop, stalls))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await ecto_modbus.async_setup(hass, config)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await heartbeat
+    for bus in hass.data[DOMAIN]["buses"].values():
+        bus["rtu"].stop()
+    await hass.async_stop(force=True)
+    ecto_modbus._DEVICE_REGISTRY.clear()
+    return elapsed * 1000.0, max(stalls) * 1000.0
+
+
+async def main(args):
+    rows_total = []
+    rows_stall = []
+    with tempfile.TemporaryDirectory() as config_dir, \
+            patch.object(ecto_modbus, "load_platform", lambda *a: None):
+        for backend in (BACKEND_MODBUS_TK, BACKEND_ASYNCIO, BACKEND_PROCESS):
+            for label, inline in (("inline", True), ("executor", False)):
+                totals, stalls = [], []
+                for _ in range(args.rounds):
+                    ptys = [open_pty() for _ in range(args.buses)]
+                    config = _config([path for _fd, path in ptys], backend, args.devices, args.snapshot)
+                    total, stall = await _setup_once(config_dir, config, inline)
+                    for master_fd, _path in ptys:
+                        os.close(master_fd)
+                    totals.append(total)
+                    stalls.append(stall)
+                name = "%s, %s" % (backend, label)
+                rows_total.append((name, summarize(totals)))
+                rows_stall.append((name, summarize(stalls)))
+    print_table("async_setup time (%d devices, %d buses)" % (args.devices, args.buses), rows_total, "ms")
+    print_table("Longest event-loop stall during setup", rows_stall, "ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=32)
+    parser.add_argument("--buses", type=int, default=2, help="buses (up to 30 devices each)")
+    parser.add_argument("--rounds", type=int, default=10, help="setups per case")
+    parser.add_argument("--snapshot", action="store_true", help="enable the register snapshot")
+    quiet_logging()
+    asyncio.run(main(parser.parse_args()))
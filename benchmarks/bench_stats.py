@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""Cost of the per-slave bus statistics on the request path.
+
+Feeds BusStats.record with answered FC 0x03 requests, requests answered
+with an exception and unanswered frames with a bad CRC, and reports the
+time per call and the number of memory blocks left allocated per call
+(tracemalloc), which stays at zero once the slave is known.
+
+Usage:
+    python benchmarks/bench_stats.py [--number N]
+"""
+import argparse
+import time
+import timeit
+import tracemalloc
+
+from _common import quiet_logging, rtu_frame
+
+from custom_components.ecto_modbus.transport.stats import BusStats
+
+READ = rtu_frame(5, bytes([0x03, 0x00, 0x10, 0x00, 0x01]))
+RESPONSE = rtu_frame(5, bytes([0x03, 0x02, 0x81, 0x03]))
+EXCEPTION = rtu_frame(5, bytes([0x83, 0x02]))
+BAD_CRC = READ[:-1] + bytes([READ[-1] ^ 0xFF])
+
+
+def _blocks_per_call(func, number):
+    func()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(number):
+        func()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    grown = sum(stat.count_diff for stat in after.compare_to(before, "filename")
+                if stat.traceback[0].filename.endswith("stats.py"))
+    return grown / number
+
+
+def main(args):
+    stats = BusStats()
+    rx_ns = time.perf_counter_ns()
+    cases = [
+        ("answered", lambda: stats.record(READ, RESPONSE, rx_ns)),
+        ("exception", lambda: stats.record(READ, EXCEPTION, rx_ns)),
+        ("bad CRC", lambda: stats.record(BAD_CRC, b"", rx_ns)),
+    ]
+    print("BusStats.record (%d iterations)" % args.number)
+    print("  %-12s %10s %16s" % ("case", "us/call", "blocks kept/call"))
+    for label, func in cases:
+        us = timeit.timeit(func, number=args.number) / args.number * 1e6
+        print("  %-12s %10.3f %16.4f" % (label, us, _blocks_per_call(func, max(args.number // 10, 1))))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200000, help="calls per case")
+    quiet_logging()
+    main(parser.parse_args())
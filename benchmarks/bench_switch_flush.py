@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""Event-loop cost of a mass channel change, per-entity writes vs. per-tick flush.
+
+Builds ``--devices`` EctoRelay10CH relays with one EctoChannelSwitch per
+channel on a real Home Assistant state machine, then applies mass changes:
+
+* flip:    one external 0x10 write per device flips all 10 channels
+* bounce:  three writes per device in the same loop iteration (flip, flip
+           back, flip again), channels end up flipped once
+
+For each scenario it reports the event-loop time until every state is
+written and the number of state_changed events fired. "direct" is the
+former behaviour (async_schedule_update_ha_state from the device
+callback), "flush" uses EctoStateFlusher.
+
+Usage:
+    python benchmarks/bench_switch_flush.py [--devices N] [--rounds N]
+"""
+import argparse
+import asyncio
+import gc
+import tempfile
+import time
+
+from _common import FakeServer, print_table, quiet_logging, summarize
+
+from homeassistant.const import EVENT_STATE_CHANGED, STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+
+from custom_components.ecto_modbus.devices import bitfield
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.switch import EctoChannelSwitch, EctoStateFlusher
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+
+
+class BenchSwitch(EctoChannelSwitch):
+    """Switch writing straight to the state machine, without an entity platform."""
+
+    def async_write_ha_state(self):
+        self.hass.states.async_set(self.entity_id, STATE_ON if self._state else STATE_OFF)
+
+
+def _build(hass, devices, flusher):
+    server = FakeServer(RegisterBankDatabank(error_on_missing_slave=False))
+    relays = []
+    for addr in range(3, 3 + devices):
+        relay = EctoRelay10CH({"addr": addr}, server)
+        for channel in range(relay.CHANNEL_COUNT):
+            switch = BenchSwitch(relay, channel, flusher)
+            switch.hass = hass
+            switch._hass = hass
+            switch.entity_id = "switch.device_%d_ch%d" % (addr, channel + 1)
+            relay.set_state_change_callback(channel, switch._on_device_state_change)
+        relays.append(relay)
+    return relays
+
+
+async def _drain():
+    # Two iterations: one for the flush callback, one for anything it scheduled
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+
+async def _run(hass, relays, rounds, bounce):
+    events = []
+    unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, lambda event: events.append(1))
+    all_on = bitfield.encode_channels(EctoRelay10CH.CHANNEL_MASK)
+    samples = []
+    state = 0
+    for _ in range(rounds):
+        gc.collect()
+        state ^= all_on
+        start = time.perf_counter()
+        for relay in relays:
+            if bounce:
+                relay.on_register_write(0x10, [state])
+                relay.on_register_write(0x10, [state ^ all_on])
+            relay.on_register_write(0x10, [state])
+        await _drain()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    await _drain()
+    unsub()
+    return samples, len(events) / rounds
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        rows = []
+        for scenario, bounce in (("flip", False), ("bounce", True)):
+            for label, flusher in (("direct", None), ("flush", EctoStateFlusher(hass))):
+                relays = _build(hass, args.devices, flusher)
+                samples, events = await _run(hass, relays, args.rounds, bounce)
+                rows.append(("%s %s (%d ev)" % (scenario, label, events), summarize(samples)))
+        print_table("Mass change of %d switches (%d relays)" % (args.devices * 10, args.devices),
+                    rows, "ms")
+        await hass.async_stop(force=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=32, help="relay devices (10 switches each)")
+    parser.add_argument("--rounds", type=int, default=200, help="mass changes per scenario")
+    quiet_logging()
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""Switch restore at startup, per-entity writes vs. one register write per device.
+
+Builds ``--devices`` EctoCH10BinarySensor devices and as many EctoRelay10CH
+relays on a register bank, with a last HA state for every channel switch
+(random ON/OFF). Then restores them the way the switch platform does:
+
+* entity:  the former behaviour, every switch applies its own last state
+           with set_switch_state (relays: set_switch_state(ch, 0))
+* device:  restore_channel_states, last states of all channels composed into
+           one set_channels call per device
+
+It reports the time of the restore phase and the number of register bank
+writes per startup.
+
+Usage:
+    python benchmarks/bench_switch_restore.py [--devices N] [--rounds N]
+"""
+import argparse
+import gc
+import random
+import time
+
+from _common import FakeServer, print_table, quiet_logging, summarize
+
+from homeassistant.const import STATE_OFF, STATE_ON
+
+from custom_components.ecto_modbus.devices.binary_sensor import EctoCH10BinarySensor
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.switch import restore_channel_states
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+
+
+class CountingDatabank(RegisterBankDatabank):
+    """Register bank counting the register writes of its slaves."""
+
+    writes = 0
+
+    def add_slave(self, slave_id, unsigned=True, memory=None):
+        slave = super().add_slave(slave_id, unsigned, memory)
+        write = slave.write
+
+        def counting_write(table, address, values):
+            CountingDatabank.writes += 1
+            return write(table, address, values)
+
+        slave.write = counting_write
+        return slave
+
+
+def _build(n_devices, seed):
+    server = FakeServer(CountingDatabank(error_on_missing_slave=False))
+    devices = []
+    for i in range(n_devices):
+        devices.append(EctoCH10BinarySensor({"addr": 3 + i}, server))
+        relay = EctoRelay10CH({"addr": 3 + n_devices + i}, server)
+        # Relays come up with channels the master switched on before HA started
+        relay.set_channels(relay.CHANNEL_MASK, 0b0101010101)
+        devices.append(relay)
+    rnd = random.Random(seed)
+    states = {(device.addr, channel): rnd.choice((STATE_ON, STATE_OFF))
+              for device in devices for channel in range(device.CHANNEL_COUNT)}
+    return devices, states
+
+
+def _restore_per_entity(devices, states):
+    for device in devices:
+        for channel in range(device.CHANNEL_COUNT):
+            if isinstance(device, EctoRelay10CH):
+                device.set_switch_state(channel, 0)
+            elif states[(device.addr, channel)] == STATE_ON:
+                device.set_switch_state(channel, 1)
+            else:
+                device.set_switch_state(channel, 0)
+
+
+def _restore_per_device(devices, states):
+    restore_channel_states(devices, lambda device, channel: states[(device.addr, channel)])
+
+
+def _run(restore, args):
+    samples = []
+    writes = 0
+    for seed in range(args.rounds):
+        devices, states = _build(args.devices, seed)
+        gc.collect()
+        CountingDatabank.writes = 0
+        start = time.perf_counter()
+        restore(devices, states)
+        samples.append((time.perf_counter() - start) * 1000.0)
+        writes += CountingDatabank.writes
+    return samples, writes / args.rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=32,
+                        help="binary sensors and relays each (10 switches per device)")
+    parser.add_argument("--rounds", type=int, default=200, help="startups per case")
+    args = parser.parse_args()
+    quiet_logging()
+
+    rows = []
+    for label, restore in (("entity", _restore_per_entity), ("device", _restore_per_device)):
+        samples, writes = _run(restore, args)
+        rows.append(("%s (%d writes)" % (label, writes), summarize(samples)))
+    print_table("Restore of %d switches (%d binary sensors, %d relays)"
+                % (args.devices * 20, args.devices, args.devices), rows, "ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""Cost of fast-changing temperature sources, eager writes vs. computed register.
+
+Each EctoTemperatureSensor follows an HA entity whose state changes
+``--changes-per-poll`` times between two bus reads of register 0x20.
+
+* eager:    every state change parses, scales and writes 0x20
+            (plain modbus_tk slave, the former behaviour)
+* computed: state changes only store the snapshot; 0x20 is scaled when
+            the master reads it (register bank slave)
+
+Reported: cost of one state change, of one FC 0x04 read, and total
+CPU time per poll cycle of ``--sensors`` sensors.
+
+Usage:
+    python benchmarks/bench_temperature_churn.py [--sensors N] [--changes-per-poll N] [--cycles N]
+"""
+import argparse
+import asyncio
+import struct
+import time
+
+from _common import FakeServer, quiet_logging
+
+from modbus_tk.modbus import Databank
+
+from custom_components.ecto_modbus.devices.temperature import EctoTemperatureSensor
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+
+READ_0x20 = struct.pack(">BHH", 0x04, 0x20, 1)
+
+
+class FakeState:
+    __slots__ = ("state",)
+
+    def __init__(self, state):
+        self.state = state
+
+
+async def _run(databank, args):
+    server = FakeServer(databank)
+    sensors = [EctoTemperatureSensor({"addr": addr, "entity_id": "sensor.t%d" % addr}, server)
+               for addr in range(3, 3 + args.sensors)]
+    states = [FakeState("%.2f" % (20 + i / 100.0)) for i in range(args.changes_per_poll)]
+
+    change_time = 0.0
+    read_time = 0.0
+    for _ in range(args.cycles):
+        start = time.perf_counter()
+        for sensor in sensors:
+            for state in states:
+                await sensor._state_changed(sensor.entity_id, None, state)
+        change_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for sensor in sensors:
+            sensor.slave.handle_request(READ_0x20)
+        read_time += time.perf_counter() - start
+
+    changes = args.cycles * args.sensors * args.changes_per_poll
+    reads = args.cycles * args.sensors
+    return {
+        "computed": sensors[0].computed,
+        "change_us": change_time / changes * 1e6,
+        "read_us": read_time / reads * 1e6,
+        "cycle_ms": (change_time + read_time) / args.cycles * 1e3,
+    }
+
+
+async def main(args):
+    rows = [
+        ("eager", await _run(Databank(error_on_missing_slave=False), args)),
+        ("computed", await _run(RegisterBankDatabank(error_on_missing_slave=False), args)),
+    ]
+    print("%d sensors, %d state changes per poll, %d poll cycles" % (
+        args.sensors, args.changes_per_poll, args.cycles))
+    print("  %-10s %14s %12s %14s" % ("mode", "change us", "read us", "cycle ms"))
+    for label, stats in rows:
+        assert stats["computed"] == (label == "computed")
+        print("  %-10s %14.3f %12.3f %14.3f" % (label, stats["change_us"], stats["read_us"], stats["cycle_ms"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sensors", type=int, default=16, help="temperature sensors on the bus")
+    parser.add_argument("--changes-per-poll", type=int, default=50,
+                        help="entity state changes between two bus reads")
+    parser.add_argument("--cycles", type=int, default=200, help="poll cycles measured")
+    quiet_logging()
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,40 @@
+"""Fixtures of the device hot path microbenchmarks (pytest-benchmark)."""
+import logging
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+# benchmarks/ for _common, the repository root for the integration
+BENCHMARKS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BENCHMARKS)
+sys.path.insert(0, os.path.dirname(BENCHMARKS))
+
+# Home Assistant's default log format
+LOG_FORMAT = "%(asctime)s %(levelname)s (%(threadName)s) [%(name)s] %(message)s"
+
+
+@pytest.fixture(params=[logging.INFO, logging.DEBUG], ids=["info", "debug"])
+def log_level(request):
+    """Integration logging at INFO or DEBUG, formatted and written like HA does (to /dev/null)."""
+    logger = logging.getLogger("custom_components.ecto_modbus")
+    saved = logger.level, logger.propagate, logger.handlers[:]
+    stream = open(os.devnull, "w")
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logger.handlers[:] = [handler]
+    logger.setLevel(request.param)
+    logger.propagate = False
+    yield request.param
+    logger.setLevel(saved[0])
+    logger.propagate = saved[1]
+    logger.handlers[:] = saved[2]
+    stream.close()
+
+
+@pytest.fixture(params=[1, 8, 32], ids=lambda n: "%ddev" % n)
+def n_devices(request):
+    """Number of devices every benchmark round goes through."""
+    return request.param
@@ -0,0 +1,138 @@
+"""Per-operation cost of the device layer hot paths.
+
+Every benchmark round runs the operation once on each of ``n_devices``
+devices, so the cost of one operation is the round time divided by
+``extra_info["operations"]``. Devices sit on a register bank databank like
+in the integration, with logging at INFO and DEBUG (see conftest.py).
+
+Run from the repository root:
+
+    python -m pytest benchmarks/micro -p no:logging
+"""
+import pytest
+
+from homeassistant.core import State
+
+from _common import FakeServer
+from custom_components.ecto_modbus.devices import bitfield
+from custom_components.ecto_modbus.devices.binary_sensor import EctoCH10BinarySensor
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.devices.temperature import EctoTemperatureSensor
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+
+FIRST_ADDR = 3
+
+
+def _devices(device_class, n_devices, **config):
+    server = FakeServer(RegisterBankDatabank(error_on_missing_slave=False))
+    return [device_class(dict(config, addr=addr), server)
+            for addr in range(FIRST_ADDR, FIRST_ADDR + n_devices)]
+
+
+def _run(benchmark, n_devices, op):
+    benchmark.extra_info["operations"] = n_devices
+    benchmark(op)
+
+
+def test_relay_set_switch_state(benchmark, log_level, n_devices):
+    """EctoRelay10CH.set_switch_state, channel toggled on every call."""
+    relays = _devices(EctoRelay10CH, n_devices)
+    state = [0]
+
+    def op():
+        state[0] ^= 1
+        for relay in relays:
+            relay.set_switch_state(3, state[0])
+
+    _run(benchmark, n_devices, op)
+
+
+def test_relay_sync_unchanged(benchmark, log_level, n_devices):
+    """EctoRelay10CH.sync_channels_from_register, register unchanged (steady polling)."""
+    relays = _devices(EctoRelay10CH, n_devices)
+
+    def op():
+        for relay in relays:
+            relay.sync_channels_from_register()
+
+    _run(benchmark, n_devices, op)
+
+
+def test_relay_on_register_write(benchmark, log_level, n_devices):
+    """EctoRelay10CH.on_register_write of 0x10, two channels flipped on every call."""
+    relays = _devices(EctoRelay10CH, n_devices)
+    for relay in relays:
+        for channel in range(relay.CHANNEL_COUNT):
+            relay.set_state_change_callback(channel, lambda channel, state: None)
+    values = [bitfield.encode_channels(0b0000000011), bitfield.encode_channels(0b1100000000)]
+    state = [0]
+
+    def op():
+        state[0] ^= 1
+        value = [values[state[0]]]
+        for relay in relays:
+            relay.on_register_write(0x10, value)
+
+    _run(benchmark, n_devices, op)
+
+
+def test_binary_sensor_set_switch_state(benchmark, log_level, n_devices):
+    """EctoCH10BinarySensor.set_switch_state, channel toggled on every call."""
+    sensors = _devices(EctoCH10BinarySensor, n_devices)
+    state = [0]
+
+    def op():
+        state[0] ^= 1
+        for sensor in sensors:
+            sensor.set_switch_state(3, state[0])
+
+    _run(benchmark, n_devices, op)
+
+
+@pytest.mark.parametrize("computed", [True, False], ids=["computed", "eager"])
+def test_temperature_state_changed(benchmark, log_level, n_devices, computed):
+    """EctoTemperatureSensor._state_changed with a new temperature on every call.
+
+    "computed" is the register bank's scale-on-read path, "eager" scales and
+    writes 0x20 on every state (modbus_tk databanks, process backend).
+    """
+    sensors = _devices(EctoTemperatureSensor, n_devices, entity_id="sensor.source")
+    for sensor in sensors:
+        sensor.computed = computed
+    states = [State("sensor.source", "21.5"), State("sensor.source", "21.6")]
+    index = [0]
+
+    def op():
+        index[0] ^= 1
+        new_state = states[index[0]]
+        for sensor in sensors:
+            # The handler never awaits: drive the coroutine without an event loop
+            try:
+                sensor._state_changed("sensor.source", None, new_state).send(None)
+            except StopIteration:
+                pass
+
+    _run(benchmark, n_devices, op)
+
+
+def test_register_set_raw_value(benchmark, log_level, n_devices):
+    """ModBusRegisterSensor.set_raw_value of the 4 identity registers."""
+    registers = [relay.registers[0] for relay in _devices(EctoRelay10CH, n_devices)]
+    values = [0x80, 0x00, 0x03, 0x110A]
+
+    def op():
+        for register in registers:
+            register.set_raw_value(values)
+
+    _run(benchmark, n_devices, op)
+
+
+def test_register_get_values(benchmark, log_level, n_devices):
+    """ModBusRegisterSensor.get_values of the 4 identity registers."""
+    registers = [relay.registers[0] for relay in _devices(EctoRelay10CH, n_devices)]
+
+    def op():
+        for register in registers:
+            register.get_values()
+
+    _run(benchmark, n_devices, op)
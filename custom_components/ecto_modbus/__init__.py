@@ -1,60 +1,55 @@
+import asyncio
 import logging
 import struct
 from datetime import timedelta
 
-import modbus_tk
 import voluptuous as vol
 # from pymodbus.server import ModbusSerialServer
 # from pymodbus.datastore import ModbusSlaveContext, ModbusServerContext
 # from pymodbus.datastore import ModbusSequentialDataBlock
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.event import async_track_time_interval
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from .devices import EctoCH10BinarySensor, EctoRelay10CH, EctoTemperatureSensor
+from . import devices
 from .const import (
     DOMAIN,
+    BACKEND_ASYNCIO,
+    BACKEND_PROCESS,
+    BACKENDS,
+    DEFAULT_BACKEND,
     DEFAULT_BAUDRATE,
-    DEVICE_TYPES,
+    DEFAULT_BUS,
+    DEFAULT_CAPTURE_SIZE,
+    DEFAULT_MASTER_TIMEOUT,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_SYNC_INTERVAL,
     PORT_TYPE_SERIAL,
-    PORT_TYPE_RS485
+    PORT_TYPE_RS485,
+    REMOTE_DEVICE_TYPES,
 )
 from homeassistant.helpers.discovery import load_platform
-from modbus_tk import modbus_rtu, hooks
-from serial import rs485
-from modbus_tk import utils
+
+# modbus_tk, transport, device and coordinator modules are imported in the
+# functions using them, only for the backends, devices and options a config
+# uses, so importing the package adds little to Home Assistant's startup.
+# voluptuous stays a module import: CONFIG_SCHEMA is read before setup and
+# Home Assistant has loaded it already.
 
 _LOGGER = logging.getLogger(__name__)
 
-# Global device registry for hook callback
+# Global device registry for hook callback: modbus_tk slave -> device.
+# Slaves belong to one bus, so equal addresses on different buses do not clash.
 _DEVICE_REGISTRY = {}
 
+# modbus_tk hooks fired by the server thread before a holding register write
+WRITE_HOOK_NAMES = (
+    "modbus.Slave.handle_write_single_register_request",
+    "modbus.Slave.handle_write_multiple_registers_request",
+)
 
-class LoggingSerialWrapper:
-    """Wrapper around serial port to log all RT/TX bytes"""
-    
-    def __init__(self, serial_port, logger, port_name):
-        self._serial = serial_port
-        self._logger = logger
-        self._port_name = port_name
-        
-    def read(self, size=1):
-        """Read and log bytes from serial port"""
-        data = self._serial.read(size)
-        if data:
-            hex_str = ' '.join(f'{b:02x}' for b in data)
-            self._logger.debug("RT: %s RX (%d bytes): %s", self._port_name, len(data), hex_str)
-        return data
-    
-    def write(self, data):
-        """Write and log bytes to serial port"""
-        hex_str = ' '.join(f'{b:02x}' for b in data)
-        self._logger.debug("TX: %s TX (%d bytes): %s", self._port_name, len(data), hex_str)
-        return self._serial.write(data)
-    
-    def __getattr__(self, name):
-        """Proxy all other attributes to the wrapped serial port"""
-        return getattr(self._serial, name)
+# Currently installed write hook (replaced on every async_setup)
+_WRITE_HOOK = None
 
 
 def _log_modbus_error(data):
@@ -75,153 +70,543 @@ def _log_modbus_error(data):
         _LOGGER.error("Modbus Error: Failed to parse error data: %s, data=%s", e, data)
 
 
-class EctoCoordinator(DataUpdateCoordinator):
-    """Coordinator to sync device states from Modbus registers."""
-
-    def __init__(self, hass: HomeAssistant, devices: list):
-        """Initialize the coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            name="ecto_modbus_coordinator",
-            update_interval=timedelta(seconds=5),
-        )
-        self.devices = devices
-
-    async def _async_update_data(self):
-        """Fetch data from Modbus registers and sync device states."""
-        _LOGGER.debug("Coordinator _async_update_data called")
-        for device in self.devices:
-            # Only sync devices that have the sync method (relays)
-            if hasattr(device, 'sync_channels_from_register'):
-                _LOGGER.debug("Calling sync_channels_from_register for device addr=%s", device.addr)
-                device.sync_channels_from_register()
-        return True
-
+def _parse_write_request(request_pdu):
+    """Extract (start_address, values) from a FC 0x06/0x10 request PDU.
+
+    Returns:
+        tuple: (start_address, list of values), or None if the PDU is not a
+        well-formed holding register write
+    """
+    import modbus_tk.defines as cst
+
+    if len(request_pdu) < 5:
+        return None
+    function_code = request_pdu[0]
+    if function_code == cst.WRITE_SINGLE_REGISTER:
+        address, value = struct.unpack(">HH", request_pdu[1:5])
+        return address, [value]
+    if function_code == cst.WRITE_MULTIPLE_REGISTERS and len(request_pdu) >= 6:
+        address, quantity, byte_count = struct.unpack(">HHB", request_pdu[1:6])
+        if quantity == 0 or byte_count != quantity * 2 or len(request_pdu) < 6 + byte_count:
+            return None
+        values = list(struct.unpack(">%dH" % quantity, request_pdu[6:6 + byte_count]))
+        return address, values
+    return None
+
+
+def _make_write_hook(loop):
+    """Build a modbus_tk write hook that forwards external writes to the HA loop.
+
+    The hook runs in the RTU server thread, so the owning device is looked up
+    by its slave in _DEVICE_REGISTRY and its on_register_write handler is scheduled on the
+    event loop with call_soon_threadsafe instead of being called directly.
+    """
+    def _on_modbus_write(data):
+        slave, request_pdu = data[0], data[1]
+        device = _DEVICE_REGISTRY.get(slave)
+        if device is None or not hasattr(device, "on_register_write"):
+            return None
+        try:
+            parsed = _parse_write_request(request_pdu)
+        except struct.error as e:
+            _LOGGER.error("Modbus write hook: failed to parse request %s: %s", request_pdu, e)
+            return None
+        if parsed is not None:
+            loop.call_soon_threadsafe(device.on_register_write, parsed[0], parsed[1])
+        # Returning None lets modbus_tk apply the write as usual
+        return None
+
+    return _on_modbus_write
+
+
+def _install_write_hooks(loop):
+    """Install (or replace) the external write hooks for FC 0x06/0x10."""
+    from modbus_tk import hooks
+
+    global _WRITE_HOOK
+    if _WRITE_HOOK is not None:
+        for hook_name in WRITE_HOOK_NAMES:
+            try:
+                hooks.uninstall_hook(hook_name, _WRITE_HOOK)
+            except (KeyError, ValueError):
+                pass
+    _WRITE_HOOK = _make_write_hook(loop)
+    for hook_name in WRITE_HOOK_NAMES:
+        hooks.install_hook(hook_name, _WRITE_HOOK)
+    _LOGGER.debug("Modbus write hooks installed: %s", WRITE_HOOK_NAMES)
+
+
+# Device type -> class name in .devices (imported on first use)
 DEVICE_CLASSES = {
-    'binary_sensor_10ch': EctoCH10BinarySensor,
-    'relay_10ch': EctoRelay10CH,
-    'temperature_sensor': EctoTemperatureSensor
-
+    'binary_sensor_10ch': 'EctoCH10BinarySensor',
+    'relay_10ch': 'EctoRelay10CH',
+    'temperature_sensor': 'EctoTemperatureSensor',
 }
 
-CONFIG_SCHEMA = vol.Schema({
-    DOMAIN: vol.Schema({
-        vol.Required("port"): str,
-        vol.Optional("port_type", default=PORT_TYPE_RS485): vol.In({
-            PORT_TYPE_SERIAL,
-            PORT_TYPE_RS485
-        }),
-        vol.Optional("baudrate", default=DEFAULT_BAUDRATE): cv.positive_int,
-        vol.Required("devices"): vol.All(
-            cv.ensure_list,
-            [
-                vol.Any(
-                    {
-                        vol.Required("type"): 'temperature_sensor',
-                        vol.Required("addr"): vol.All(
-                            cv.positive_int,
-                            vol.Range(min=3, max=32)
-                        ),
-                        vol.Required("entity_id"): cv.entity_id
-                    },
-                    {
-                        vol.Required("type"): vol.In(
-                            ['binary_sensor_10ch', 'relay_10ch']
-                        ),
-                        vol.Required("addr"): vol.All(
-                            cv.positive_int,
-                            vol.Range(min=3, max=32)
-                        )
-                    }
+# Device types with channel switches (switch platform)
+SWITCH_DEVICE_TYPES = ('binary_sensor_10ch', 'relay_10ch')
+# Polled device types with channel binary sensors (binary_sensor platform)
+MASTER_CHANNEL_DEVICE_TYPES = ('binary_sensor_10ch', 'relay_10ch')
+
+
+def _device_class(device_type):
+    """Return the device class of a device type, importing its module."""
+    return getattr(devices, DEVICE_CLASSES[device_type])
+
+
+DEVICES_SCHEMA = vol.All(
+    cv.ensure_list,
+    [
+        vol.Any(
+            {
+                vol.Required("type"): 'temperature_sensor',
+                vol.Required("addr"): vol.All(
+                    cv.positive_int,
+                    vol.Range(min=3, max=32)
+                ),
+                vol.Required("entity_id"): cv.entity_id,
+                # Temperature changes of at most this many °C are not sent
+                vol.Optional("deadband", default=0): vol.All(
+                    vol.Coerce(float),
+                    vol.Range(min=0)
+                )
+            },
+            {
+                vol.Required("type"): vol.In(
+                    ['binary_sensor_10ch', 'relay_10ch']
+                ),
+                vol.Required("addr"): vol.All(
+                    cv.positive_int,
+                    vol.Range(min=3, max=32)
                 )
-            ]
+            }
         )
-    })
-}, extra=vol.ALLOW_EXTRA)
+    ]
+)
 
+# Serial line settings of one bus
+BUS_OPTIONS = {
+    vol.Optional("port_type", default=PORT_TYPE_RS485): vol.In({
+        PORT_TYPE_SERIAL,
+        PORT_TYPE_RS485
+    }),
+    vol.Optional("baudrate", default=DEFAULT_BAUDRATE): cv.positive_int,
+    vol.Optional("backend", default=DEFAULT_BACKEND): vol.In(BACKENDS),
+    # Keep the registers in a memory-mapped file and restore them on startup
+    vol.Optional("snapshot", default=False): cv.boolean,
+    # Raw RX/TX capture ring buffer; size 0 disables it
+    vol.Optional("capture", default={}): vol.Schema({
+        vol.Optional("size", default=DEFAULT_CAPTURE_SIZE): cv.positive_int,
+        # Memory-mapped capture file for long sessions
+        vol.Optional("file"): cv.string,
+        # Debug log every RX/TX chunk as hex
+        vol.Optional("log_hex", default=False): cv.boolean,
+    }),
+}
 
-async def async_setup(hass: HomeAssistant, config: dict) -> bool:
-    _LOGGER.info("Setting up Ecto Modbus integration")
-    conf = config[DOMAIN]
-    ecto_devices = []
+BUS_SCHEMA = vol.Schema({
+    vol.Required("name"): cv.slug,
+    vol.Required("port"): str,
+    **BUS_OPTIONS,
+    vol.Required("devices"): DEVICES_SCHEMA,
+})
+
+
+# Real Ectocontrol devices polled by a master bus
+MASTER_DEVICES_SCHEMA = vol.All(
+    cv.ensure_list,
+    [
+        {
+            vol.Required("type"): vol.In(REMOTE_DEVICE_TYPES),
+            vol.Required("addr"): vol.All(
+                cv.positive_int,
+                vol.Range(min=1, max=32)
+            ),
+            vol.Optional("name"): cv.string,
+        }
+    ]
+)
 
-    _LOGGER.debug("Creating dummy logger for modbus_tk")
-    logger = utils.create_logger(name="dummy",level=logging.DEBUG, record_format="%(message)s")
+MASTER_SCHEMA = vol.Schema({
+    vol.Required("name"): cv.slug,
+    vol.Required("port"): str,
+    vol.Optional("port_type", default=PORT_TYPE_RS485): vol.In({
+        PORT_TYPE_SERIAL,
+        PORT_TYPE_RS485
+    }),
+    vol.Optional("baudrate", default=DEFAULT_BAUDRATE): cv.positive_int,
+    # Seconds to wait for each response
+    vol.Optional("timeout", default=DEFAULT_MASTER_TIMEOUT): vol.All(
+        vol.Coerce(float),
+        vol.Range(min=0.05, max=10)
+    ),
+    vol.Optional("poll_interval", default=DEFAULT_POLL_INTERVAL): vol.All(
+        cv.positive_int,
+        vol.Range(min=1)
+    ),
+    vol.Required("devices"): MASTER_DEVICES_SCHEMA,
+})
+
+
+def _bus_configs(conf):
+    """Return the configured buses; top-level port/devices form the default bus."""
+    buses = []
+    if "port" in conf:
+        buses.append({
+            "name": DEFAULT_BUS,
+            "port": conf["port"],
+            "port_type": conf.get("port_type", PORT_TYPE_RS485),
+            "baudrate": conf.get("baudrate", DEFAULT_BAUDRATE),
+            "backend": conf.get("backend", DEFAULT_BACKEND),
+            "snapshot": conf.get("snapshot", False),
+            "capture": conf.get("capture", {}),
+            "devices": conf["devices"],
+        })
+    buses.extend(conf.get("buses", []))
+    return buses
+
+
+def _validate_buses(conf):
+    """Require port + devices, buses and/or masters, with unique names and ports."""
+    if ("port" in conf) != ("devices" in conf):
+        raise vol.Invalid("port and devices must be given together")
+    buses = _bus_configs(conf)
+    masters = conf.get("masters", [])
+    if not buses and not masters:
+        raise vol.Invalid("either port and devices, buses or masters is required")
+    names = [bus["name"] for bus in buses]
+    if len(set(names)) != len(names):
+        raise vol.Invalid(f"bus names must be unique: {names}")
+    master_names = [master["name"] for master in masters]
+    if len(set(master_names)) != len(master_names):
+        raise vol.Invalid(f"master bus names must be unique: {master_names}")
+    ports = [bus["port"] for bus in buses + masters]
+    if len(set(ports)) != len(ports):
+        raise vol.Invalid(f"every bus needs its own port: {ports}")
+    return conf
 
-    _LOGGER.debug("Installing Modbus error logging hook")
-    hooks.install_hook("modbus.Databank.on_error", _log_modbus_error)
 
-    port = conf.get("port")
-    port_type = conf.get("port_type", PORT_TYPE_RS485)
-    baudrate = conf.get("baudrate", DEFAULT_BAUDRATE)
+CONFIG_SCHEMA = vol.Schema({
+    DOMAIN: vol.All(vol.Schema({
+        vol.Optional("port"): str,
+        **BUS_OPTIONS,
+        # Register polling is only a safety net: external writes are pushed
+        # through modbus_tk write hooks. 0 disables polling entirely.
+        vol.Optional("sync_interval", default=DEFAULT_SYNC_INTERVAL): cv.positive_int,
+        vol.Optional("devices"): DEVICES_SCHEMA,
+        # Additional serial ports, each with its own server and devices
+        vol.Optional("buses"): vol.All(cv.ensure_list, [BUS_SCHEMA]),
+        # Serial ports on which the integration polls real devices as master
+        vol.Optional("masters"): vol.All(cv.ensure_list, [MASTER_SCHEMA]),
+    }), _validate_buses)
+}, extra=vol.ALLOW_EXTRA)
 
-    _LOGGER.debug("Configuring %s port: %s", port_type, port)
 
-    if port_type == PORT_TYPE_RS485:
-        port485_main = rs485.RS485(port, baudrate=baudrate, inter_byte_timeout=0.002)
-        _LOGGER.info("RS485 port configured: %s, baudrate=%d", port, baudrate)
+def _snapshot_path(hass: HomeAssistant, name):
+    """Register snapshot file of a bus, next to HA's own storage."""
+    filename = "ecto_modbus_registers.bin" if name == DEFAULT_BUS else f"ecto_modbus_registers_{name}.bin"
+    return hass.config.path(".storage", filename)
+
+
+def _open_bus(hass: HomeAssistant, bus_conf):
+    """Open the port of one bus and create its RTU server.
+
+    Blocking (serial port, snapshot and capture files, server process
+    resources): runs in an executor. The server is started by async_setup
+    once the devices exist and the register snapshot (if enabled) is
+    restored.
+
+    Returns:
+        tuple: (bus entry stored in hass.data[DOMAIN]["buses"], list of
+        functions to call on shutdown)
+    """
+    name = bus_conf["name"]
+    port = bus_conf["port"]
+    port_type = bus_conf.get("port_type", PORT_TYPE_RS485)
+    baudrate = bus_conf.get("baudrate", DEFAULT_BAUDRATE)
+    backend = bus_conf.get("backend", DEFAULT_BACKEND)
+
+    _LOGGER.debug("Configuring bus %s: %s port %s", name, port_type, port)
+    capture_conf = bus_conf.get("capture", {})
+    on_stop = []
+
+    snapshot = None
+    if bus_conf.get("snapshot"):
+        from .transport.snapshot import RegisterSnapshot
+        snapshot = RegisterSnapshot(_snapshot_path(hass, name))
+        _LOGGER.info("Register snapshot enabled for bus %s: %s", name, snapshot.path)
+        # Flush the register snapshot on shutdown
+        on_stop.append(snapshot.close)
+
+    if backend == BACKEND_PROCESS:
+        from .transport.process_rtu import ProcessRtuServer
+        # The server process opens the port; registers are shared with it
+        if capture_conf.get("file"):
+            _LOGGER.warning("Packet capture is not available with the process backend: bus=%s", name)
+        server = ProcessRtuServer({"port": port, "port_type": port_type, "baudrate": baudrate},
+                                  loop=hass.loop, snapshot=snapshot)
+        # Stop the server process and free the shared register bank; the
+        # process is joined in an executor
+        on_stop.append(server.async_stop)
+        return {
+            "name": name,
+            "port": port,
+            "backend": backend,
+            "rtu": server,
+            "devices": [],
+            "stats": server.stats,
+            "response_cache": None,
+            "capture": None,
+            "snapshot": snapshot,
+        }, on_stop
+
+    from .transport.capture import CaptureSerialWrapper, PacketCapture
+    from .transport.register_bank import RegisterBankDatabank
+    from .transport.serial_port import open_serial_port
+
+    port485_main = open_serial_port(port, port_type, baudrate)
+
+    # Wrap serial port with packet capture
+    capture = None
+    capture_size = capture_conf.get("size", DEFAULT_CAPTURE_SIZE)
+    if capture_size:
+        capture = PacketCapture(capture_size, capture_conf.get("file"))
+        _LOGGER.info("Serial packet capture enabled for port %s: %d bytes, file=%s",
+                     port, capture_size, capture_conf.get("file"))
+        if capture_conf.get("file"):
+            # Flush the capture file on shutdown
+            on_stop.append(capture.close)
+    port485_main = CaptureSerialWrapper(port485_main, capture, _LOGGER, port,
+                                        log_hex=capture_conf.get("log_hex", False))
+
+    # Repeated register polls are answered from pre-encoded responses
+    databank = RegisterBankDatabank(error_on_missing_slave=False, snapshot=snapshot)
+    if backend == BACKEND_ASYNCIO:
+        from .transport.async_rtu import AsyncRtuServer
+        _LOGGER.debug("Creating asyncio Modbus RTU server")
+        server = AsyncRtuServer(port485_main, loop=hass.loop, databank=databank)
     else:
-        import serial
-        port485_main = serial.Serial(port, baudrate=baudrate, timeout=0.002)
-        _LOGGER.info("Serial port configured: %s, baudrate=%d", port, baudrate)
+        from .transport.rtu_server import EctoRtuServer
+        _LOGGER.debug("Creating Modbus RTU server")
+        server = EctoRtuServer(port485_main, interchar_multiplier=1, databank=databank)
+
+    return {
+        "name": name,
+        "port": port,
+        "backend": backend,
+        "rtu": server,
+        "devices": [],
+        "stats": server.stats,
+        "response_cache": databank.response_cache,
+        "capture": capture,
+        "snapshot": snapshot,
+    }, on_stop
+
+
+def _async_call_on_stop(hass: HomeAssistant, func, loop_safe=False):
+    """Call `func` once when Home Assistant stops.
+
+    Cleanups may block (file flushes, shared memory release), so they run in
+    an executor. `loop_safe` ones must run on the event loop (they remove
+    add_reader watches) and are called there; coroutine functions are awaited.
+    """
+    async def _async_on_stop(_event):
+        if asyncio.iscoroutinefunction(func):
+            await func()
+        elif loop_safe:
+            func()
+        else:
+            await hass.async_add_executor_job(func)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_on_stop)
+
 
-    # Wrap serial port with logging
-    port485_main = LoggingSerialWrapper(port485_main, _LOGGER, port)
-    _LOGGER.info("Serial packet logging enabled for port %s", port)
+async def _async_setup_bus(hass: HomeAssistant, bus_conf, state_tracker, timer_engine):
+    """Bring up one bus: open it in an executor, create its devices, restore the snapshot.
 
-    _LOGGER.debug("Creating Modbus RTU server")
-    server19200 = modbus_rtu.RtuServer(port485_main, interchar_multiplier=1, error_on_missing_slave=False)
-    server19200.start()
-    _LOGGER.info("Modbus RTU server started on port %s", port)
+    Returns:
+        dict: the bus entry, with its devices; the server is not started yet
+    """
+    bus, on_stop = await hass.async_add_executor_job(_open_bus, hass, bus_conf)
+    for func in on_stop:
+        _async_call_on_stop(hass, func)
 
-    device_count = len(conf["devices"])
-    _LOGGER.info("Initializing %d device(s)", device_count)
+    device_count = len(bus_conf["devices"])
+    _LOGGER.info("Initializing %d device(s) on bus %s", device_count, bus["name"])
 
-    for idx, device_conf in enumerate(conf["devices"]):
+    for idx, device_conf in enumerate(bus_conf["devices"]):
         device_type = device_conf["type"]
         device_addr = device_conf["addr"]
-        _LOGGER.debug("Creating device %d/%d: type=%s, addr=%s",
-                     idx + 1, device_count, device_type, device_addr)
-        device_class = DEVICE_CLASSES[device_type]
-        device = device_class(device_conf, server19200)
+        _LOGGER.debug("Creating device %d/%d: bus=%s, type=%s, addr=%s",
+                     idx + 1, device_count, bus["name"], device_type, device_addr)
+        device_class = _device_class(device_type)
+        device = device_class(dict(device_conf, bus=bus["name"]), bus["rtu"])
 
-        if hasattr(device, 'async_init'):
-            _LOGGER.debug("Calling async_init for device: addr=%s", device_addr)
-            await device.async_init(hass)
+        if hasattr(device, 'set_timers'):
+            timer_engine.add_device(device)
 
-        ecto_devices.append(device)
+        bus["devices"].append(device)
 
-        # Register device for Modbus write hook callback
-        _DEVICE_REGISTRY[device_addr] = device
-        _LOGGER.debug("Device registered for sync: addr=%s", device_addr)
+        # Register device for Modbus write hook callback; slaves are per bus
+        _DEVICE_REGISTRY[device.slave] = device
+        _LOGGER.debug("Device registered for sync: bus=%s, addr=%s", bus["name"], device_addr)
 
-    _LOGGER.info("All devices initialized: total=%d", len(ecto_devices))
+    await asyncio.gather(*(device.async_init(hass, state_tracker)
+                           for device in bus["devices"] if hasattr(device, 'async_init')))
+
+    # The master sees the restored registers from its first poll
+    if bus["snapshot"] is not None:
+        for device in bus["devices"]:
+            device.restore_registers(bus["snapshot"])
+    return bus
+
+
+async def _async_start_bus(hass: HomeAssistant, bus):
+    """Start the RTU server of a bus."""
+    if bus["backend"] == BACKEND_ASYNCIO:
+        # Watches the port with add_reader: must run on the event loop
+        bus["rtu"].start()
+        # Release the serial port before the event loop goes away
+        _async_call_on_stop(hass, bus["rtu"].stop, loop_safe=True)
+    else:
+        # Server thread or process start-up blocks
+        await hass.async_add_executor_job(bus["rtu"].start)
+    _LOGGER.info("Modbus RTU server started: bus=%s, port=%s, backend=%s",
+                 bus["name"], bus["port"], bus["backend"])
+
+
+def _open_master_port(master_conf):
+    """Open the serial port of a master bus. Blocking: runs in an executor."""
+    from .transport.serial_port import open_serial_port
+    return open_serial_port(master_conf["port"], master_conf.get("port_type", PORT_TYPE_RS485),
+                            master_conf.get("baudrate", DEFAULT_BAUDRATE))
+
+
+async def _async_setup_master(hass: HomeAssistant, master_conf):
+    """Open a master bus, start its request engine and create its poll coordinator.
+
+    Returns:
+        dict: the master entry stored in hass.data[DOMAIN]["masters"]
+    """
+    from .master import EctoMasterCoordinator
+    from .transport.async_master import AsyncRtuMaster
+
+    name = master_conf["name"]
+    serial_port = await hass.async_add_executor_job(_open_master_port, master_conf)
+    master = AsyncRtuMaster(serial_port, loop=hass.loop,
+                            timeout=master_conf.get("timeout", DEFAULT_MASTER_TIMEOUT))
+    # Watches the port with add_reader: must run on the event loop
+    master.start()
+    _async_call_on_stop(hass, master.stop, loop_safe=True)
+
+    poll_interval = master_conf.get("poll_interval", DEFAULT_POLL_INTERVAL)
+    coordinator = EctoMasterCoordinator(hass, name, master, list(master_conf["devices"]),
+                                        timedelta(seconds=poll_interval))
+    _LOGGER.info("Modbus RTU master started: bus=%s, port=%s, devices=%d, poll_interval=%ss",
+                 name, master_conf["port"], len(master_conf["devices"]), poll_interval)
+    return {
+        "name": name,
+        "port": master_conf["port"],
+        "master": master,
+        "coordinator": coordinator,
+    }
+
+
+async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+    _LOGGER.info("Setting up Ecto Modbus integration")
+    conf = config[DOMAIN]
+
+    from modbus_tk import hooks
+    from modbus_tk import utils
+
+    _LOGGER.debug("Creating dummy logger for modbus_tk")
+    utils.create_logger(name="dummy",level=logging.DEBUG, record_format="%(message)s")
+
+    _LOGGER.debug("Installing Modbus error logging hook")
+    hooks.install_hook("modbus.Databank.on_error", _log_modbus_error)
+
+    _LOGGER.debug("Installing Modbus write hooks for event-driven sync")
+    _install_write_hooks(hass.loop)
+
+    sync_interval = conf.get("sync_interval", DEFAULT_SYNC_INTERVAL)
+
+    from .coordinator import EctoCoordinator
+    from .services import async_setup_services
+    from .state_tracker import EctoStateTracker
+    from .timer_engine import EctoTimerEngine
+
+    state_tracker = EctoStateTracker(hass)
+    timer_engine = EctoTimerEngine(hass.loop)
+    # Pending timers must not fire against a bus that has been closed
+    _async_call_on_stop(hass, timer_engine.async_stop, loop_safe=True)
+
+    # Buses come up concurrently; their blocking I/O runs in executors
+    setup = await asyncio.gather(*(_async_setup_bus(hass, bus_conf, state_tracker, timer_engine)
+                                   for bus_conf in _bus_configs(conf)))
+    buses = {bus["name"]: bus for bus in setup}
+    ecto_devices = [device for bus in setup for device in bus["devices"]]
+    # Servers start in the background while the platforms load
+    starts = [asyncio.create_task(_async_start_bus(hass, bus)) for bus in setup]
+
+    masters = {master["name"]: master for master in await asyncio.gather(
+        *(_async_setup_master(hass, master_conf) for master_conf in conf.get("masters", [])))}
+    for master in masters.values():
+        # Entities show the polled values once the first poll completes
+        hass.async_create_background_task(master["coordinator"].async_refresh(),
+                                          f"ecto_modbus master {master['name']} first poll")
+
+    _LOGGER.info("All devices initialized: total=%d, buses=%d", len(ecto_devices), len(buses))
+    state_tracker.async_start()
     _LOGGER.debug("Storing devices and server in hass.data")
 
-    # Set up coordinator to sync device states from Modbus registers
-    coordinator = EctoCoordinator(hass, ecto_devices)
+    # Set up coordinator to sync device states from Modbus registers.
+    # External writes are delivered by the write hooks; polling only catches
+    # anything the hooks cannot see (e.g. FC 0x16/0x17 writes).
+    update_interval = timedelta(seconds=sync_interval) if sync_interval else None
+    coordinator = EctoCoordinator(hass, ecto_devices, update_interval)
     await coordinator.async_refresh()
 
-    # Schedule periodic coordinator updates for YAML-based integration
-    # (async_refresh only runs once, need explicit scheduling for periodic updates)
-    async def scheduled_update(_now):
-        """Trigger coordinator update."""
-        await coordinator.async_refresh()
+    unsub_interval = None
+    if update_interval is not None:
+        # Schedule periodic coordinator updates for YAML-based integration
+        # (async_refresh only runs once, need explicit scheduling for periodic updates)
+        async def scheduled_update(_now):
+            """Trigger coordinator update."""
+            await coordinator.async_refresh()
 
-    unsub_interval = async_track_time_interval(
-        hass, scheduled_update, timedelta(seconds=5)
-    )
+        unsub_interval = async_track_time_interval(
+            hass, scheduled_update, update_interval
+        )
+        _LOGGER.debug("Register sync polling enabled: interval=%ss", sync_interval)
+    else:
+        _LOGGER.info("Register sync polling disabled, relying on Modbus write hooks")
 
     hass.data[DOMAIN] = {
         "devices": ecto_devices,
-        "rtu": server19200,
+        "buses": buses,
+        # Server of the first bus
+        "rtu": next(iter(buses.values()))["rtu"] if buses else None,
+        "masters": masters,
         "coordinator": coordinator,
-        "unsub_interval": unsub_interval
+        "unsub_interval": unsub_interval,
+        "state_tracker": state_tracker,
+        "timer_engine": timer_engine,
     }
 
-    _LOGGER.debug("Loading switch platform")
-    load_platform(hass, "switch", DOMAIN, {}, config)
+    async_setup_services(hass)
+
+    if any(device_conf["type"] in SWITCH_DEVICE_TYPES
+           for bus_conf in _bus_configs(conf) for device_conf in bus_conf["devices"]):
+        _LOGGER.debug("Loading switch platform")
+        load_platform(hass, "switch", DOMAIN, {}, config)
+    _LOGGER.debug("Loading diagnostic sensor platform")
+    load_platform(hass, "sensor", DOMAIN, {}, config)
+    if any(device_conf["type"] in MASTER_CHANNEL_DEVICE_TYPES
+           for master_conf in conf.get("masters", []) for device_conf in master_conf["devices"]):
+        _LOGGER.debug("Loading binary sensor platform")
+        load_platform(hass, "binary_sensor", DOMAIN, {}, config)
+
+    await asyncio.gather(*starts)
     _LOGGER.info("Ecto Modbus integration setup completed")
     return True
 
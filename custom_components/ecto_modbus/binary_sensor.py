@@ -0,0 +1,48 @@
+import logging
+
+from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .entity import remote_device_info, remote_device_name, remote_unique_prefix
+from .master import REMOTE_CHANNEL_COUNT, REMOTE_CHANNELS
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EctoRemoteChannelSensor(CoordinatorEntity, BinarySensorEntity):
+    """Channel of a relay block or contact splitter on a master bus, from the register cache."""
+
+    def __init__(self, coordinator, device, channel):
+        super().__init__(coordinator)
+        self._device = device
+        self._channel = channel
+        self._attr_unique_id = f"{remote_unique_prefix(coordinator.bus, device)}_ch{channel}"
+        self._attr_name = f"{remote_device_name(coordinator.bus, device)} Ch.{channel + 1}"
+
+    @property
+    def available(self):
+        return super().available and self.coordinator.cache.available(self._device["addr"])
+
+    @property
+    def is_on(self):
+        state = self.coordinator.channel_state(self._device, self._channel)
+        return None if state is None else bool(state)
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return remote_device_info(self.coordinator.bus, self._device)
+
+
+async def async_setup_platform(hass, config, async_add_entities, discovery_info):
+    _LOGGER.info("Setting up Ecto binary sensor platform")
+    sensors = []
+    for master in hass.data[DOMAIN].get("masters", {}).values():
+        coordinator = master["coordinator"]
+        for device in coordinator.devices:
+            if device["type"] in REMOTE_CHANNELS:
+                sensors.extend(EctoRemoteChannelSensor(coordinator, device, channel)
+                               for channel in range(REMOTE_CHANNEL_COUNT))
+    _LOGGER.info("Created %d channel binary sensor(s) for polled devices", len(sensors))
+    async_add_entities(sensors)
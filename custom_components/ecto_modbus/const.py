@@ -1,13 +1,46 @@
 # custom_components/ecto/const.py
 DOMAIN = "ecto_modbus"
 DEFAULT_BAUDRATE = 19200
+# Seconds between safety-net register polls (0 disables polling)
+DEFAULT_SYNC_INTERVAL = 30
 DEVICE_TYPES = [
     "binary_sensor_10ch",
     "relay_10ch",
     "temperature_sensor"
 ]
 
+# Name of the bus configured by the top-level port/devices options. Its
+# entities keep the unique IDs used before multi-bus support.
+DEFAULT_BUS = "default"
+
 PORT_TYPE_SERIAL = "serial"
 PORT_TYPE_RS485 = "rs485"
 DEFAULT_PORT_TYPE = PORT_TYPE_RS485
-PORT_TYPES = [PORT_TYPE_SERIAL, PORT_TYPE_RS485]
\ No newline at end of file
+PORT_TYPES = [PORT_TYPE_SERIAL, PORT_TYPE_RS485]
+
+# Modbus RTU slave engines
+BACKEND_MODBUS_TK = "modbus_tk"   # modbus_tk RtuServer thread
+BACKEND_ASYNCIO = "asyncio"       # frames parsed on the HA event loop
+BACKEND_PROCESS = "process"       # RtuServer in a child process, shared-memory registers
+DEFAULT_BACKEND = BACKEND_MODBUS_TK
+BACKENDS = [BACKEND_MODBUS_TK, BACKEND_ASYNCIO, BACKEND_PROCESS]
+
+# Master buses: real Ectocontrol devices polled by the integration
+REMOTE_DEVICE_TYPES = [
+    "opentherm_v2",
+    "temperature_sensor",
+    "binary_sensor_10ch",
+    "relay_10ch"
+]
+# Seconds between polls of a master bus and to wait for a response
+DEFAULT_POLL_INTERVAL = 15
+DEFAULT_MASTER_TIMEOUT = 2.0
+
+# Bytes of the serial packet capture ring buffer
+DEFAULT_CAPTURE_SIZE = 65536
+
+# Services
+SERVICE_SET_CHANNELS = "set_channels"
+SERVICE_SET_TIMERS = "set_timers"
+SERVICE_GET_STATS = "get_stats"
+SERVICE_DUMP_CAPTURE = "dump_capture"
@@ -0,0 +1,34 @@
+import logging
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import DEFAULT_SYNC_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EctoCoordinator(DataUpdateCoordinator):
+    """Coordinator to sync device states from Modbus registers."""
+
+    def __init__(self, hass: HomeAssistant, devices: list,
+                 update_interval: timedelta | None = timedelta(seconds=DEFAULT_SYNC_INTERVAL)):
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="ecto_modbus_coordinator",
+            update_interval=update_interval,
+        )
+        self.devices = devices
+
+    async def _async_update_data(self):
+        """Fetch data from Modbus registers and sync device states."""
+        _LOGGER.debug("Coordinator _async_update_data called")
+        for device in self.devices:
+            # Only sync devices that have the sync method (relays)
+            if hasattr(device, 'sync_channels_from_register'):
+                _LOGGER.debug("Calling sync_channels_from_register for device addr=%s", device.addr)
+                device.sync_channels_from_register()
+        return True
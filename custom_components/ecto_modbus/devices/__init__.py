@@ -1,9 +1,17 @@
-from .binary_sensor import EctoCH10BinarySensor
-from .relay import EctoRelay10CH
-from .temperature import EctoTemperatureSensor
-
-__all__ = [
-    'EctoCH10BinarySensor',
-    'EctoRelay10CH',
-    'EctoTemperatureSensor'
-]
\ No newline at end of file
+import importlib
+
+# Device class -> module; a module is imported when its class is first used
+_CLASS_MODULES = {
+    'EctoCH10BinarySensor': '.binary_sensor',
+    'EctoRelay10CH': '.relay',
+    'EctoTemperatureSensor': '.temperature',
+}
+
+__all__ = list(_CLASS_MODULES)
+
+
+def __getattr__(name):
+    module = _CLASS_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
@@ -1,6 +1,8 @@
 import logging
 from modbus_tk.modbus_rtu import RtuServer
 import modbus_tk.defines as cst
+from . import bitfield
+from ..const import DEFAULT_BUS
 from ..transport.modBusRTU import ModBusRegisterSensor
 
 _LOGGER = logging.getLogger(__name__)
@@ -11,10 +13,17 @@ class EctoDevice:
     DEVICE_TYPE = 0x00
     CHANNEL_COUNT = 1
     UID_BASE = 0x800000
+    # Registers loaded from the register snapshot on startup: (table, address, count)
+    RESTORED_REGISTERS = ()
+
+    # A bus holds up to 30 devices for the lifetime of HA; no per-instance __dict__
+    __slots__ = ('config', 'addr', 'bus', 'server', 'slave', 'uid', 'registers')
 
     def __init__(self, config, server: RtuServer):
         self.config = config
         self.addr = config['addr']
+        # Name of the bus (serial port) the device is served on
+        self.bus = config.get('bus', DEFAULT_BUS)
         self.server = server
         _LOGGER.debug("Creating EctoDevice: addr=%s, type=%s", self.addr, hex(self.DEVICE_TYPE))
         self.slave = server.add_slave(self.addr)
@@ -30,3 +39,122 @@ class EctoDevice:
         self.registers = {0: reg}
         _LOGGER.info("EctoDevice initialized: addr=%s, uid=%s, device_type=%s, channels=%s",
                     self.addr, hex(self.uid), hex(self.DEVICE_TYPE), self.CHANNEL_COUNT)
+
+
+    def restore_registers(self, snapshot):
+        """Load the RESTORED_REGISTERS recorded in a register snapshot.
+
+        Returns:
+            int: Number of register blocks restored
+        """
+        restored = 0
+        for table, address, count in self.RESTORED_REGISTERS:
+            values = snapshot.load(self.addr, table, address, count)
+            if values is None:
+                continue
+            self.registers[address].set_raw_value(list(values))
+            self._on_registers_restored(address, values)
+            restored += 1
+        if restored:
+            _LOGGER.info("Registers restored from snapshot: addr=%s, blocks=%d", self.addr, restored)
+        return restored
+
+    def _on_registers_restored(self, address, values):
+        """Bring device state in line with restored register values."""
+
+    @property
+    def unique_prefix(self):
+        """Prefix of the entity unique IDs; the default bus keeps the single-bus IDs."""
+        if self.bus == DEFAULT_BUS:
+            return f"ecto_{self.addr}"
+        return f"ecto_{self.bus}_{self.addr}"
+
+    @property
+    def display_name(self):
+        """Device part of the entity names."""
+        if self.bus == DEFAULT_BUS:
+            return f"Device {self.addr}"
+        return f"Device {self.bus} {self.addr}"
+
+
+class EctoChannelDevice(EctoDevice):
+    """Base for devices whose channels are packed into the register 0x10 bitfield.
+
+    Channel states are kept as an int mask (bit N = channel N) and written
+    to register 0x10, which subclasses create, in the relay bit layout.
+    """
+    CHANNEL_COUNT = 10
+    CHANNEL_MASK = (1 << CHANNEL_COUNT) - 1
+    # Channel switches get their last HA state back on startup
+    RESTORE_CHANNELS = True
+
+    __slots__ = ('_mask', '_state_change_callbacks')
+
+    def __init__(self, config, server: RtuServer):
+        super().__init__(config, server)
+        # Channel states as a bitmask, bit N = channel N
+        self._mask = 0
+        # Callbacks for state changes (to notify HA entities) - one per channel
+        self._state_change_callbacks = {}
+
+    def _write_channels(self, mask):
+        """Write the channel mask to register 0x10."""
+        self.registers[0x10].set_raw_value([bitfield.encode_channels(mask)])
+
+    def get_channel_state(self, channel):
+        """Get current state of a channel.
+
+        Args:
+            channel: Channel number (0-9)
+
+        Returns:
+            int: 1 for ON, 0 for OFF, None if invalid channel
+        """
+        if 0 <= channel < self.CHANNEL_COUNT:
+            return (self._mask >> channel) & 1
+        return None
+
+    def set_state_change_callback(self, channel, callback):
+        """Set callback to be called when a specific channel state changes.
+
+        Args:
+            channel: Channel number (0-9)
+            callback: Function taking (channel, state) arguments
+        """
+        if 0 <= channel < self.CHANNEL_COUNT:
+            self._state_change_callbacks[channel] = callback
+            _LOGGER.debug("State change callback set for addr=%s, channel=%s",
+                         self.addr, channel)
+
+    def _notify_channels(self, changed):
+        """Call the state-change callbacks of the channels set in `changed`."""
+        mask = self._mask
+        callbacks = self._state_change_callbacks
+        for channel in bitfield.iter_channels(changed):
+            callback = callbacks.get(channel)
+            if callback is not None:
+                callback(channel, (mask >> channel) & 1)
+
+    def set_channels(self, mask, values):
+        """Set several channels with a single register write.
+
+        Args:
+            mask: Bitmask of the channels to set (bit N = channel N)
+            values: Bitmask of their new states; bits outside `mask` are ignored
+
+        Returns:
+            int: Bitmask of the channels that actually changed
+        """
+        mask &= self.CHANNEL_MASK
+        new_mask = (self._mask & ~mask) | (values & mask)
+        changed = new_mask ^ self._mask
+        if not changed:
+            _LOGGER.debug("set_channels: addr=%s already in requested state", self.addr)
+            return 0
+
+        self._mask = new_mask
+        _LOGGER.debug("set_channels: addr=%s, channels=0x%03X, changed_mask=0x%03X",
+                      self.addr, new_mask, changed)
+        self._write_channels(new_mask)
+        self._notify_channels(changed)
+        return changed
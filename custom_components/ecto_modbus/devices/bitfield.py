@@ -0,0 +1,66 @@
+"""Channel bitfield codec shared by the relay and contact splitter devices.
+
+Both devices pack their channels into the 16-bit register 0x10 as:
+
+- MSB byte (bits 15-8): CHN 0-7, BIT_NO = CHN_NO % 8
+- LSB byte (bits 7-0): CHN 8-15, BIT_NO = CHN_NO % 8
+
+Devices keep the channel states as an int mask (bit N = channel N), so the
+register value is the mask with its two bytes swapped. Per-channel work is
+done through 256-entry tables indexed by one byte of a mask.
+"""
+
+# Channel offsets of the set bits of a byte, e.g. BYTE_BITS[0b101] == (0, 2)
+BYTE_BITS = tuple(tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256))
+
+# States of the 8 channels held by a byte, e.g. BYTE_STATES[0b101] == (1, 0, 1, 0, 0, 0, 0, 0)
+BYTE_STATES = tuple(tuple(value >> bit & 1 for bit in range(8)) for value in range(256))
+
+# Byte value of 8 channel states, the inverse of BYTE_STATES
+STATES_BYTE = {states: value for value, states in enumerate(BYTE_STATES)}
+
+
+def encode_channels(mask):
+    """Return the register 0x10 value for a channel mask."""
+    return ((mask & 0xFF) << 8) | ((mask >> 8) & 0xFF)
+
+
+def decode_channels(value):
+    """Return the channel mask held by a register 0x10 value."""
+    return ((value & 0xFF) << 8) | ((value >> 8) & 0xFF)
+
+
+def iter_channels(mask):
+    """Yield the channel numbers set in a mask, lowest first."""
+    base = 0
+    while mask:
+        for bit in BYTE_BITS[mask & 0xFF]:
+            yield base + bit
+        mask >>= 8
+        base += 8
+
+
+def channel_states(mask, count):
+    """Return the states of the first `count` channels as a list of 0/1."""
+    states = []
+    for base in range(0, count, 8):
+        states.extend(BYTE_STATES[(mask >> base) & 0xFF])
+    del states[count:]
+    return states
+
+
+def states_to_mask(states):
+    """Return the channel mask for a sequence of channel states."""
+    mask = 0
+    for base in range(0, len(states), 8):
+        chunk = tuple(1 if state else 0 for state in states[base:base + 8])
+        chunk += (0,) * (8 - len(chunk))
+        mask |= STATES_BYTE[chunk] << base
+    return mask
+
+
+def set_channel(mask, channel, state):
+    """Return `mask` with `channel` set to `state`."""
+    if state:
+        return mask | (1 << channel)
+    return mask & ~(1 << channel)
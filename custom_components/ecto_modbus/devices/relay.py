@@ -1,6 +1,7 @@
 import logging
 
-from .base import EctoDevice
+from . import bitfield
+from .base import EctoChannelDevice
 import modbus_tk.defines as cst
 from ..transport.modBusRTU import ModBusRegisterSensor
 from modbus_tk.modbus_rtu import RtuServer
@@ -8,10 +9,21 @@ from modbus_tk.modbus_rtu import RtuServer
 _LOGGER = logging.getLogger(__name__)
 
 
-class EctoRelay10CH(EctoDevice):
+def encode_timer(initial_state, timeout_seconds):
+    """Return the timer register value: bit 15 initial state, bits 14-0 timeout in 500ms units."""
+    timer_value = (1 << 15) if initial_state else 0
+    return timer_value | (int(timeout_seconds * 2) & 0x7FFF)
+
+
+class EctoRelay10CH(EctoChannelDevice):
     """10-channel relay module with timer functionality."""
     DEVICE_TYPE = 0xC1
     CHANNEL_COUNT = 10
+    # Relays always start OFF with no timer running: nothing is restored
+    RESTORED_REGISTERS = ()
+    RESTORE_CHANNELS = False
+
+    __slots__ = ('_register', 'timers', 'timer_listener')
 
     def __init__(self, config, server: RtuServer):
         super().__init__(config, server)
@@ -27,18 +39,22 @@ class EctoRelay10CH(EctoDevice):
             self.slave, cst.HOLDING_REGISTERS, 0x20, 10
         )
 
-        # Track channel states (0-9)
-        self.channels = [0] * 10
+        # Last register 0x10 value written or seen
+        self._register = 0
 
         # Track timer values (0-9)
         self.timers = [0] * 10
-
-        # Callbacks for state changes (to notify HA entities) - one per channel
-        self._state_change_callbacks = {}
+        # Called as (device, channel, value) when a timer register changes
+        self.timer_listener = None
 
         _LOGGER.info("EctoRelay10CH initialized: addr=%s, channels=%s",
                      self.addr, self.CHANNEL_COUNT)
 
+    @property
+    def channels(self):
+        """Channel states (0-9) as a list of 0/1."""
+        return bitfield.channel_states(self._mask, self.CHANNEL_COUNT)
+
     def set_switch_state(self, num, state):
         """Set relay channel state per Modbus protocol section 4.2.
 
@@ -48,37 +64,29 @@ class EctoRelay10CH(EctoDevice):
 
         Direct bit mapping: Channel N → Bit (N % 8) in byte (N / 8)
         """
-        _LOGGER.debug("set_switch_state called: channel=%s, state=%s, "
-                      "current_states=%s", num, state, self.channels)
-
-        if state != self.channels[num]:
-            _LOGGER.debug("Toggle relay channel %s to %s", num, state)
-            state_value = 1 if state else 0
-            self.channels[num] = state_value
-
-            # Calculate MSB byte (channels 0-7): direct bit mapping
-            msb = 0
-            for i in range(8):
-                if self.channels[i]:
-                    msb |= (1 << i)  # Channel i → Bit i
-
-            # Calculate LSB byte (channels 8-9): direct bit mapping
-            lsb = 0
-            if self.channels[8]:
-                lsb |= (1 << 0)  # Channel 8 → Bit 0
-            if self.channels[9]:
-                lsb |= (1 << 1)  # Channel 9 → Bit 1
-
-            final_value = (msb << 8) | lsb
-            _LOGGER.debug("Calculated register value: channels=%s, msb=0x%02X, lsb=0x%02X, value=0x%04X",
-                          self.channels, msb, lsb, final_value)
-            self.registers[0x10].set_raw_value([final_value])
-        else:
+        if not 0 <= num < self.CHANNEL_COUNT:
+            _LOGGER.error("Invalid channel %s for set_switch_state (must be 0-9)", num)
+            return
+
+        mask = bitfield.set_channel(self._mask, num, state)
+        if mask == self._mask:
             _LOGGER.debug("Relay channel %s already in state %s, skipping", num, state)
+            return
+
+        self._mask = mask
+        _LOGGER.debug("Toggle relay channel %s to %s", num, state)
+        self._write_channels(mask)
+
+    def _write_channels(self, mask):
+        self._register = bitfield.encode_channels(mask)
+        self.registers[0x10].set_raw_value([self._register])
 
     def set_timer(self, channel, initial_state, timeout_seconds):
         """Set timer for relay channel.
 
+        Only the channel's own register (0x20 + channel) is written, and
+        nothing is written when the value does not change.
+
         Args:
             channel: Channel number (0-9)
             initial_state: True for ON, False for OFF
@@ -87,40 +95,67 @@ class EctoRelay10CH(EctoDevice):
         Timer format:
             Bit 15 = initial state (1=ON, 0=OFF)
             Bits 14-0 = timeout in 500ms units
+
+        Returns:
+            bool: True if the timer register was written
         """
         if not 0 <= channel < self.CHANNEL_COUNT:
             _LOGGER.error("Invalid channel %s for set_timer (must be 0-9)", channel)
-            return
-
-        # Convert timeout to 500ms units
-        timeout_units = int(timeout_seconds * 2)
+            return False
 
-        # Bit 15 = initial state, bits 14-0 = timeout
-        timer_value = (1 << 15) if initial_state else 0
-        timer_value |= (timeout_units & 0x7FFF)
+        timer_value = encode_timer(initial_state, timeout_seconds)
+        if timer_value == self.timers[channel]:
+            _LOGGER.debug("Timer for channel %s already %s, skipping", channel, hex(timer_value))
+            return False
 
         self.timers[channel] = timer_value
-
-        # Build the full 10-register array
-        timer_values = [self.timers[i] for i in range(10)]
-        self.registers[0x20].set_raw_value(timer_values)
+        self.registers[0x20].set_raw_value([timer_value], offset=channel)
 
         _LOGGER.debug("Set timer for channel %s: initial_state=%s, timeout=%ss, "
                       "value=%s", channel, initial_state, timeout_seconds,
                       hex(timer_value))
+        self._notify_timers(1 << channel)
+        return True
 
-    def get_channel_state(self, channel):
-        """Get current state of a channel.
+    def set_timers(self, timers):
+        """Set several channel timers with one contiguous register write.
+
+        The write covers the changed timers only, from the first to the last
+        of them; nothing is written when no value changes.
 
         Args:
-            channel: Channel number (0-9)
+            timers: {channel: (initial_state, timeout_seconds)}
 
         Returns:
-            int: 1 for ON, 0 for OFF, None if invalid channel
+            int: Bitmask of the channels whose timer changed
         """
-        if 0 <= channel < self.CHANNEL_COUNT:
-            return self.channels[channel]
-        return None
+        changed = 0
+        for channel, (initial_state, timeout_seconds) in timers.items():
+            if not 0 <= channel < self.CHANNEL_COUNT:
+                _LOGGER.error("Invalid channel %s for set_timers (must be 0-9)", channel)
+                continue
+            timer_value = encode_timer(initial_state, timeout_seconds)
+            if timer_value != self.timers[channel]:
+                self.timers[channel] = timer_value
+                changed |= 1 << channel
+        if not changed:
+            _LOGGER.debug("set_timers: addr=%s already in requested state", self.addr)
+            return 0
+
+        first = (changed & -changed).bit_length() - 1
+        last = changed.bit_length() - 1
+        self.registers[0x20].set_raw_value(self.timers[first:last + 1], offset=first)
+        _LOGGER.debug("set_timers: addr=%s, changed_mask=0x%03X, registers=0x%02X-0x%02X",
+                      self.addr, changed, 0x20 + first, 0x20 + last)
+        self._notify_timers(changed)
+        return changed
+
+    def _notify_timers(self, changed):
+        """Report the timers of the channels set in `changed` to the timer listener."""
+        if self.timer_listener is None:
+            return
+        for channel in bitfield.iter_channels(changed):
+            self.timer_listener(self, channel, self.timers[channel])
 
     def get_timer(self, channel):
         """Get current timer value for a channel.
@@ -135,17 +170,30 @@ class EctoRelay10CH(EctoDevice):
             return self.timers[channel]
         return None
 
-    def set_state_change_callback(self, channel, callback):
-        """Set callback to be called when a specific channel state changes via Modbus.
+    def _apply_register(self, value, source):
+        """Update channel states from a register 0x10 value.
 
-        Args:
-            channel: Channel number (0-9)
-            callback: Function taking (channel, state) arguments
+        Callbacks fire only for the channels set in the XOR of the old and
+        new masks.
+
+        Returns:
+            bool: True if any channel state changed
         """
-        if 0 <= channel < self.CHANNEL_COUNT:
-            self._state_change_callbacks[channel] = callback
-            _LOGGER.debug("State change callback set for relay addr=%s, channel=%s",
-                         self.addr, channel)
+        value = int(value)
+        if value == self._register:
+            return False
+        self._register = value
+
+        mask = bitfield.decode_channels(value) & self.CHANNEL_MASK
+        changed = mask ^ self._mask
+        if not changed:
+            return False
+        self._mask = mask
+
+        _LOGGER.info("Relay addr=%s channels changed via %s: register=0x%04X, changed_mask=0x%03X",
+                     self.addr, source, value, changed)
+        self._notify_channels(changed)
+        return True
 
     def sync_channels_from_register(self):
         """Sync channel states from the actual Modbus register value.
@@ -157,53 +205,10 @@ class EctoRelay10CH(EctoDevice):
             bool: True if any channel state changed
         """
         values = self.registers[0x10].get_values()
-        _LOGGER.debug("sync_channels_from_register: addr=%s, values=%s, type=%s",
-                     self.addr, values, type(values))
         if not values:
             _LOGGER.warning("sync_channels_from_register: No values returned for addr=%s", self.addr)
             return False
-
-        value = values[0]
-        _LOGGER.debug("sync_channels_from_register: addr=%s, register_value=%s (0x%04X), current_channels=%s",
-                     self.addr, value, value, self.channels)
-        changed = False
-
-        # Parse MSB byte (channels 0-7): BIT_NO = CHN_NO % 8
-        msb = (value >> 8) & 0xFF
-        for i in range(8):
-            new_state = (msb >> i) & 1  # Direct: Channel i → Bit i
-
-            if self.channels[i] != new_state:
-                self.channels[i] = new_state
-                changed = True
-                _LOGGER.info("Channel %d changed to %d (detected via sync)", i, new_state)
-                if i in self._state_change_callbacks:
-                    _LOGGER.debug("Calling callback for channel %d, callback=%s", i, self._state_change_callbacks[i])
-                    self._state_change_callbacks[i](i, new_state)
-                else:
-                    _LOGGER.warning("No callback registered for channel %d, registered channels: %s",
-                                   i, list(self._state_change_callbacks.keys()))
-
-        # Parse LSB byte (channels 8-9)
-        lsb = value & 0xFF
-        for i in range(2):
-            channel = 8 + i
-            new_state = (lsb >> i) & 1
-
-            if self.channels[channel] != new_state:
-                self.channels[channel] = new_state
-                changed = True
-                _LOGGER.info("Channel %d changed to %d (detected via sync)", channel, new_state)
-                if channel in self._state_change_callbacks:
-                    _LOGGER.debug("Calling callback for channel %d, callback=%s", channel, self._state_change_callbacks[channel])
-                    self._state_change_callbacks[channel](channel, new_state)
-                else:
-                    _LOGGER.warning("No callback registered for channel %d, registered channels: %s",
-                                   channel, list(self._state_change_callbacks.keys()))
-
-        _LOGGER.debug("sync_channels_from_register complete: addr=%s, changed=%s, channels=%s",
-                     self.addr, changed, self.channels)
-        return changed
+        return self._apply_register(values[0], "sync")
 
     def on_register_write(self, reg_addr, values):
         """Handle external Modbus write to holding registers.
@@ -215,35 +220,20 @@ class EctoRelay10CH(EctoDevice):
             reg_addr: Register address that was written
             values: List of values written
         """
-        if reg_addr != 0x10 or not values:
+        if not values:
+            return
+        if 0x20 <= reg_addr < 0x20 + self.CHANNEL_COUNT:
+            # Keep the timer values current so set_timer skips unchanged writes correctly
+            first = reg_addr - 0x20
+            changed = 0
+            for channel, value in enumerate(values[:self.CHANNEL_COUNT - first], first):
+                if self.timers[channel] != value & 0xFFFF:
+                    self.timers[channel] = value & 0xFFFF
+                    changed |= 1 << channel
+            self._notify_timers(changed)
+            return
+        if reg_addr != 0x10:
             _LOGGER.debug("Ignoring write to register 0x%s", hex(reg_addr))
             return
 
-        value = values[0]
-        _LOGGER.info("External Modbus write to register 0x10: addr=%s, value=%s",
-                     self.addr, hex(value))
-
-        # Parse MSB byte (channels 0-7): BIT_NO = CHN_NO % 8
-        msb = (value >> 8) & 0xFF
-        for i in range(8):
-            new_state = (msb >> i) & 1  # Direct: Channel i → Bit i
-
-            if self.channels[i] != new_state:
-                self.channels[i] = new_state
-                _LOGGER.debug("Channel %d changed to %d via Modbus write", i, new_state)
-                if i in self._state_change_callbacks:
-                    self._state_change_callbacks[i](i, new_state)
-
-        # Parse LSB byte (channels 8-9)
-        lsb = value & 0xFF
-        for i in range(2):
-            channel = 8 + i
-            new_state = (lsb >> i) & 1
-
-            if self.channels[channel] != new_state:
-                self.channels[channel] = new_state
-                _LOGGER.debug("Channel %d changed to %d via Modbus write", channel, new_state)
-                if channel in self._state_change_callbacks:
-                    self._state_change_callbacks[channel](channel, new_state)
-
-        _LOGGER.debug("Channel states after Modbus write: %s", self.channels)
+        self._apply_register(values[0], "Modbus write")
@@ -1,7 +1,6 @@
 # custom_components/ecto/devices/temperature.py
 import logging
 
-from homeassistant.helpers.event import async_track_state_change
 from .base import EctoDevice
 import modbus_tk.defines as cst
 from ..transport.modBusRTU import ModBusRegisterSensor
@@ -15,6 +14,11 @@ class EctoTemperatureSensor(EctoDevice):
     DEVICE_TYPE = 0x22
     CHANNEL_COUNT = 1
     SCALE_FACTOR = 10  # Масштабирование значений (0.1°C)
+    # The last temperature is served until the source entity reports
+    RESTORED_REGISTERS = ((cst.READ_INPUT_REGISTERS, 0x20, 1),)
+
+    __slots__ = ('entity_id', '_hass', 'deadband', '_published', '_latest_state', '_state_seq',
+                 '_computed_seq', 'computed')
 
     def __init__(self, config, server: RtuServer):
         super().__init__(config, server)
@@ -23,36 +27,92 @@ class EctoTemperatureSensor(EctoDevice):
         self.registers[0x20] = reg
         self.entity_id = config.get('entity_id')
         self._hass = None
-        _LOGGER.info("EctoTemperatureSensor initialized: addr=%s, entity_id=%s",
-                    self.addr, self.entity_id)
+        # Changes of at most `deadband` (0.1°C units) are not written to 0x20
+        self.deadband = int(round(config.get('deadband', 0) * self.SCALE_FACTOR))
+        self._published = None
+        # Latest entity state and change counter, consumed when the master reads 0x20
+        self._latest_state = None
+        self._state_seq = 0
+        self._computed_seq = 0
+        self.computed = reg.set_compute(self._compute_register) is True
+        _LOGGER.info("EctoTemperatureSensor initialized: addr=%s, entity_id=%s, computed=%s",
+                    self.addr, self.entity_id, self.computed)
 
-    async def async_init(self, hass):
+    async def async_init(self, hass, state_tracker=None):
         """Инициализация после получения ссылки на HA"""
         _LOGGER.debug("async_init called for temperature sensor: addr=%s", self.addr)
         self._hass = hass
-        if self.entity_id:
-            _LOGGER.debug("Setting up state tracking for entity: %s", self.entity_id)
-            async_track_state_change(
-                hass, self.entity_id, self._state_changed
-            )
-            _LOGGER.info("State tracking enabled: addr=%s, entity=%s",
-                        self.addr, self.entity_id)
-        else:
+        if not self.entity_id:
             _LOGGER.warning("No entity_id configured for temperature sensor: addr=%s", self.addr)
+        elif state_tracker is None:
+            _LOGGER.warning("No state tracker for temperature sensor: addr=%s, entity=%s",
+                            self.addr, self.entity_id)
+        else:
+            state_tracker.register(self.entity_id, self)
 
     async def _state_changed(self, entity, old_state, new_state):
         """Обработчик изменения состояния сенсора"""
-        _LOGGER.debug("State changed for temperature sensor: addr=%s, entity=%s, old=%s, new=%s",
-                     self.addr, entity, old_state.state if old_state else None,
-                     new_state.state if new_state else None)
+        if new_state is None:
+            _LOGGER.error("Error updating temperature: addr=%s, entity=%s, error=no state",
+                         self.addr, entity)
+            return
+        self.apply_state(new_state.state)
+
+    def apply_state(self, state):
+        """Take a new state of the source entity.
+
+        In computed mode the state is only stored and scaled on the next bus
+        read; otherwise it is scaled and written to 0x20 right away.
+        """
+        if self.computed:
+            self._latest_state = state
+            self._state_seq += 1
+            return
         try:
-            temp = float(new_state.state)
-            scaled_value = int(temp * 10)
+            scaled_value = self._scale(state)
+        except (ValueError, TypeError) as e:
+            _LOGGER.error("Error updating temperature: addr=%s, entity=%s, error=%s",
+                         self.addr, self.entity_id, e)
+            return
+        if self._publish(scaled_value):
             _LOGGER.debug("Updating temperature register: addr=%s, temp=%s, scaled=%s",
-                         self.addr, temp, scaled_value)
+                         self.addr, state, scaled_value)
             self.registers[0x20].set_raw_value([scaled_value])
-            _LOGGER.debug("Temperature register updated: addr=%s, value=%s",
-                         self.addr, scaled_value)
-        except (ValueError, AttributeError, TypeError) as e:
+
+    def _publish(self, scaled_value):
+        """Deadband and dedupe: return True if the value should reach the databank."""
+        if self._published is not None and abs(scaled_value - self._published) <= self.deadband:
+            return False
+        self._published = scaled_value
+        return True
+
+    def _on_registers_restored(self, address, values):
+        if address == 0x20:
+            # Registers are unsigned; temperatures below zero are two's complement
+            self._published = values[0] - 0x10000 if values[0] & 0x8000 else values[0]
+
+    def _scale(self, state):
+        """Convert an entity state string to the register value (0.1°C units)."""
+        return int(float(state) * self.SCALE_FACTOR)
+
+    def _compute_register(self):
+        """Read provider for 0x20: scale the latest state once per change.
+
+        Runs in the RTU server context; it only touches plain attributes.
+        Returns None when nothing changed since the last read, the state is
+        not a number or the change is within the deadband, so the master
+        keeps reading the last published value.
+        """
+        seq = self._state_seq
+        if seq == self._computed_seq:
+            return None
+        self._computed_seq = seq
+        try:
+            scaled_value = self._scale(self._latest_state)
+        except (ValueError, TypeError) as e:
             _LOGGER.error("Error updating temperature: addr=%s, entity=%s, error=%s",
-                         self.addr, entity, e)
\ No newline at end of file
+                         self.addr, self.entity_id, e)
+            return None
+        if not self._publish(scaled_value):
+            return None
+        return [scaled_value]
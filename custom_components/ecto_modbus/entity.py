@@ -0,0 +1,51 @@
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from .const import DEFAULT_BUS, DOMAIN
+
+
+def ecto_unit_device_info(bus=DEFAULT_BUS) -> DeviceInfo:
+    """HA device grouping the entities of one bus."""
+    if bus == DEFAULT_BUS:
+        return DeviceInfo(
+            identifiers={(DOMAIN, "local_ecto_unit")},
+            name="Ecto Unit",
+            model="1.1.1",
+            manufacturer="Ectostroy"
+        )
+    return DeviceInfo(
+        identifiers={(DOMAIN, f"local_ecto_unit_{bus}")},
+        name=f"Ecto Unit {bus}",
+        model="1.1.1",
+        manufacturer="Ectostroy"
+    )
+
+
+# Names of the devices a master bus can poll, by configured type
+REMOTE_DEVICE_NAMES = {
+    "opentherm_v2": "OpenTherm Adapter",
+    "temperature_sensor": "Temperature Sensor",
+    "binary_sensor_10ch": "Contact Splitter",
+    "relay_10ch": "Relay Block",
+}
+
+
+def remote_device_name(bus, device):
+    """Configured name of a device polled on a master bus, or its type and address."""
+    if device.get("name"):
+        return device["name"]
+    return f"{REMOTE_DEVICE_NAMES[device['type']]} {bus} {device['addr']}"
+
+
+def remote_unique_prefix(bus, device):
+    """Prefix of the unique IDs of a polled device's entities."""
+    return f"ecto_master_{bus}_{device['addr']}"
+
+
+def remote_device_info(bus, device) -> DeviceInfo:
+    """HA device of a real Ectocontrol device polled on a master bus."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, remote_unique_prefix(bus, device))},
+        name=remote_device_name(bus, device),
+        model=REMOTE_DEVICE_NAMES[device["type"]],
+        manufacturer="Ectocontrol"
+    )
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+import modbus_tk.defines as cst
+from modbus_tk.exceptions import ModbusError, ModbusInvalidResponseError
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .const import DEFAULT_POLL_INTERVAL
+from .devices import bitfield
+from .transport.async_master import RegisterCache
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _i16(raw):
+    """Signed 16-bit value; 0x7FFF marks an unavailable sensor."""
+    if raw == 0x7FFF:
+        return None
+    return raw - 0x10000 if raw & 0x8000 else raw
+
+
+def _u16(raw):
+    """Unsigned 16-bit value; 0xFFFF marks an unavailable value."""
+    return None if raw == 0xFFFF else raw
+
+
+def _u16_sensor(raw):
+    """Unsigned 16-bit sensor value; 0x7FFF marks an unavailable sensor."""
+    return None if raw == 0x7FFF else raw
+
+
+def _i8_msb(raw):
+    """Signed 8-bit value in the MSB; 0x7F marks an invalid reading."""
+    msb = raw >> 8
+    if msb == 0x7F:
+        return None
+    return msb - 0x100 if msb & 0x80 else msb
+
+
+def _u8_lsb(raw):
+    """Unsigned 8-bit value in the LSB; 0xFF marks an unavailable sensor."""
+    lsb = raw & 0xFF
+    return None if lsb == 0xFF else lsb
+
+
+def _scaled(decode, divisor):
+    def decode_scaled(raw):
+        value = decode(raw)
+        return None if value is None else value / divisor
+    return decode_scaled
+
+
+def _relay_channels(values):
+    """Relay block register 0x10: channels 0-7 in the MSB (bit 8 = channel 0), 8-9 in the LSB (bit 0 = channel 8)."""
+    return bitfield.decode_channels(values[0])
+
+
+def _splitter_channels(values):
+    """Contact splitter registers 0x10-0x11: channels 0-7 in bits 0-7, 8-9 in bits 0-1."""
+    return (values[0] & 0xFF) | (values[1] & 0x03) << 8
+
+
+# Register blocks read on every poll: (function code, first address, count).
+# Real devices keep every register in the holding table.
+REMOTE_POLL_BLOCKS = {
+    # All adapter sensors (0x10-0x26) in one round trip
+    "opentherm_v2": ((cst.READ_HOLDING_REGISTERS, 0x10, 23),),
+    "temperature_sensor": ((cst.READ_HOLDING_REGISTERS, 0x20, 1),),
+    "binary_sensor_10ch": ((cst.READ_HOLDING_REGISTERS, 0x10, 2),),
+    "relay_10ch": ((cst.READ_HOLDING_REGISTERS, 0x10, 1),),
+}
+
+# Sensor readings: device type -> {key: (name, function code, address, decode, kind)}
+# `kind` selects unit and device class in the sensor platform.
+REMOTE_READINGS = {
+    "opentherm_v2": {
+        "ch_temperature": ("CH temperature", cst.READ_HOLDING_REGISTERS, 0x18,
+                           _scaled(_i16, 10), "temperature"),
+        "dhw_temperature": ("DHW temperature", cst.READ_HOLDING_REGISTERS, 0x19,
+                            _scaled(_u16_sensor, 10), "temperature"),
+        "pressure": ("pressure", cst.READ_HOLDING_REGISTERS, 0x1A, _scaled(_u8_lsb, 10), "pressure"),
+        "flow_rate": ("DHW flow rate", cst.READ_HOLDING_REGISTERS, 0x1B, _scaled(_u8_lsb, 10), "flow_rate"),
+        "modulation": ("modulation level", cst.READ_HOLDING_REGISTERS, 0x1C, _u8_lsb, "percentage"),
+        "main_error": ("main error", cst.READ_HOLDING_REGISTERS, 0x1E, _u16, None),
+        "additional_error": ("additional error", cst.READ_HOLDING_REGISTERS, 0x1F, _u16, None),
+        "outdoor_temperature": ("outdoor temperature", cst.READ_HOLDING_REGISTERS, 0x20,
+                                _i8_msb, "temperature"),
+        "ch_setpoint_active": ("CH setpoint", cst.READ_HOLDING_REGISTERS, 0x26,
+                               _scaled(_i16, 256), "temperature"),
+    },
+    "temperature_sensor": {
+        "temperature": ("temperature", cst.READ_HOLDING_REGISTERS, 0x20, _scaled(_i16, 10), "temperature"),
+    },
+}
+
+# Channel devices: device type -> (first address, count, decode) of the channel
+# registers; decode turns the register values into a mask, bit N = channel N
+REMOTE_CHANNELS = {
+    "binary_sensor_10ch": (0x10, 2, _splitter_channels),
+    "relay_10ch": (0x10, 1, _relay_channels),
+}
+REMOTE_CHANNEL_COUNT = 10
+
+
+class EctoMasterCoordinator(DataUpdateCoordinator):
+    """Polls the real devices of one master bus into a register cache.
+
+    Every poll queues the register blocks of all devices at once; the
+    master sends them back to back. A device that does not answer is
+    marked unavailable in the cache, the others keep their values. The
+    update fails only if no device answered.
+    """
+
+    def __init__(self, hass: HomeAssistant, name, master, devices: list,
+                 update_interval: timedelta | None = timedelta(seconds=DEFAULT_POLL_INTERVAL)):
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"ecto_modbus_master_{name}",
+            update_interval=update_interval,
+        )
+        self.bus = name
+        self.master = master
+        self.devices = devices
+        self.cache = RegisterCache()
+
+    async def _async_poll_device(self, device):
+        addr = device["addr"]
+        was_unavailable = addr in self.cache.unavailable
+        try:
+            for function_code, address, count in REMOTE_POLL_BLOCKS[device["type"]]:
+                values = await self.master.read_registers(addr, address, count, function_code)
+                self.cache.store(addr, function_code, address, values)
+        except (asyncio.TimeoutError, ModbusError, ModbusInvalidResponseError) as e:
+            if not was_unavailable:
+                _LOGGER.warning("Device not answering: bus=%s, type=%s, addr=%s: %r",
+                                self.bus, device["type"], addr, e)
+            self.cache.mark_unavailable(addr)
+            return False
+        if was_unavailable:
+            _LOGGER.info("Device answering again: bus=%s, type=%s, addr=%s", self.bus, device["type"], addr)
+        return True
+
+    async def _async_update_data(self):
+        """Read the register blocks of all devices into the cache."""
+        results = await asyncio.gather(*(self._async_poll_device(device) for device in self.devices))
+        if self.devices and not any(results):
+            raise UpdateFailed(f"No device answered on master bus {self.bus}")
+        return self.cache
+
+    def reading(self, device, key):
+        """Decoded value of a sensor reading, or None if unavailable."""
+        _name, function_code, address, decode, _kind = REMOTE_READINGS[device["type"]][key]
+        raw = self.cache.get(device["addr"], function_code, address)
+        return None if raw is None else decode(raw)
+
+    def channel_state(self, device, channel):
+        """State (0/1) of a channel of a relay block or contact splitter, or None."""
+        address, count, decode = REMOTE_CHANNELS[device["type"]]
+        values = [self.cache.get(device["addr"], cst.READ_HOLDING_REGISTERS, address + offset)
+                  for offset in range(count)]
+        if None in values:
+            return None
+        return (decode(values) >> channel) & 1
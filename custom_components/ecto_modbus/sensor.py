@@ -0,0 +1,157 @@
+import logging
+from datetime import timedelta
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
+from homeassistant.const import (
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfPressure,
+    UnitOfTemperature,
+    UnitOfTime,
+    UnitOfVolumeFlowRate,
+)
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN
+from .entity import ecto_unit_device_info, remote_device_info, remote_device_name, remote_unique_prefix
+
+_LOGGER = logging.getLogger(__name__)
+
+# The statistics are plain counters in memory, polling them is cheap
+SCAN_INTERVAL = timedelta(seconds=30)
+
+# key -> (name, SlaveStats attribute)
+COUNTERS = {
+    "requests": ("requests", "requests"),
+    "exceptions": ("exception responses", "exceptions"),
+    "crc_errors": ("CRC errors", "crc_errors"),
+}
+
+
+class EctoStatsSensor(SensorEntity):
+    """Diagnostic sensor over the bus statistics of one slave address."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, device, slave_stats, key, name):
+        self._device = device
+        self._stats = slave_stats
+        self._key = key
+        self._attr_unique_id = f"{device.unique_prefix}_{key}"
+        self._attr_name = f"{device.display_name} {name}"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return ecto_unit_device_info(self._device.bus)
+
+
+class EctoCounterSensor(EctoStatsSensor):
+    """Total of one per-slave counter."""
+
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    def __init__(self, device, slave_stats, key, name, attribute):
+        super().__init__(device, slave_stats, key, name)
+        self._attribute = attribute
+
+    @property
+    def native_value(self):
+        return getattr(self._stats, self._attribute)
+
+
+class EctoTurnaroundSensor(EctoStatsSensor):
+    """99th percentile turnaround of the requests answered since the previous update.
+
+    The value stays unchanged over intervals without answered requests;
+    lifetime figures are exposed as attributes.
+    """
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_suggested_display_precision = 1
+
+    def __init__(self, device, slave_stats):
+        super().__init__(device, slave_stats, "turnaround_p99", "turnaround p99")
+        self._previous = slave_stats.turnaround.snapshot()
+        self._attr_native_value = None
+
+    async def async_update(self):
+        histogram = self._stats.turnaround
+        p99 = histogram.percentile(99, since=self._previous)
+        self._previous = histogram.snapshot()
+        if p99 is not None:
+            self._attr_native_value = p99 / 1000.0
+        lifetime = histogram.as_dict()
+        self._attr_extra_state_attributes = {
+            key: lifetime[key] for key in ("count", "mean_ms", "p50_ms", "p99_ms", "max_ms")
+        }
+
+
+# Reading kind (kind of master.REMOTE_READINGS) -> (unit, device class)
+READING_KINDS = {
+    "temperature": (UnitOfTemperature.CELSIUS, SensorDeviceClass.TEMPERATURE),
+    "pressure": (UnitOfPressure.BAR, SensorDeviceClass.PRESSURE),
+    "flow_rate": (UnitOfVolumeFlowRate.LITERS_PER_MINUTE, SensorDeviceClass.VOLUME_FLOW_RATE),
+    "percentage": (PERCENTAGE, None),
+    None: (None, None),
+}
+
+
+class EctoRemoteSensor(CoordinatorEntity, SensorEntity):
+    """Reading of a real device on a master bus, decoded from the register cache."""
+
+    def __init__(self, coordinator, device, key, name, kind):
+        super().__init__(coordinator)
+        self._device = device
+        self._key = key
+        unit, device_class = READING_KINDS[kind]
+        self._attr_unique_id = f"{remote_unique_prefix(coordinator.bus, device)}_{key}"
+        self._attr_name = f"{remote_device_name(coordinator.bus, device)} {name}"
+        self._attr_native_unit_of_measurement = unit
+        self._attr_device_class = device_class
+        if unit is not None:
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def available(self):
+        return super().available and self.coordinator.cache.available(self._device["addr"])
+
+    @property
+    def native_value(self):
+        return self.coordinator.reading(self._device, self._key)
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return remote_device_info(self.coordinator.bus, self._device)
+
+
+async def async_setup_platform(hass, config, async_add_entities, discovery_info):
+    _LOGGER.info("Setting up Ecto diagnostic sensor platform")
+    sensors = []
+    for bus in hass.data[DOMAIN]["buses"].values():
+        for device in bus["devices"]:
+            slave_stats = bus["stats"].slave(device.addr)
+            sensors.append(EctoTurnaroundSensor(device, slave_stats))
+            for key, (name, attribute) in COUNTERS.items():
+                sensors.append(EctoCounterSensor(device, slave_stats, key, name, attribute))
+    _LOGGER.info("Created %d diagnostic sensor(s)", len(sensors))
+    async_add_entities(sensors, True)
+
+    masters = hass.data[DOMAIN].get("masters")
+    if not masters:
+        return
+    # Only installs with a master bus load the poll engine
+    from .master import REMOTE_READINGS
+    remote_sensors = []
+    for master in masters.values():
+        coordinator = master["coordinator"]
+        for device in coordinator.devices:
+            for key, (name, _function_code, _address, _decode, kind) in \
+                    REMOTE_READINGS.get(device["type"], {}).items():
+                remote_sensors.append(EctoRemoteSensor(coordinator, device, key, name, kind))
+    if remote_sensors:
+        _LOGGER.info("Created %d sensor(s) for polled devices", len(remote_sensors))
+        # Values come from the master's polls, not from entity updates
+        async_add_entities(remote_sensors)
@@ -0,0 +1,210 @@
+import logging
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+
+from .const import (
+    DEFAULT_BUS,
+    DOMAIN,
+    SERVICE_DUMP_CAPTURE,
+    SERVICE_GET_STATS,
+    SERVICE_SET_CHANNELS,
+    SERVICE_SET_TIMERS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+CHANNEL = vol.All(vol.Coerce(int), vol.Range(min=0, max=9))
+CHANNEL_LIST = vol.All(cv.ensure_list, [CHANNEL])
+# Needed only when the address exists on several buses
+DEVICE_BUS = vol.Optional("bus")
+DEVICE_ADDR = vol.All(cv.positive_int, vol.Range(min=3, max=32))
+
+SET_CHANNELS_SCHEMA = vol.Schema({
+    vol.Required("devices"): vol.All(
+        cv.ensure_list,
+        [
+            vol.Schema({
+                DEVICE_BUS: cv.slug,
+                vol.Required("addr"): DEVICE_ADDR,
+                vol.Optional("turn_on", default=[]): CHANNEL_LIST,
+                vol.Optional("turn_off", default=[]): CHANNEL_LIST,
+            })
+        ]
+    )
+})
+
+SET_TIMERS_SCHEMA = vol.Schema({
+    vol.Required("devices"): vol.All(
+        cv.ensure_list,
+        [
+            vol.Schema({
+                DEVICE_BUS: cv.slug,
+                vol.Required("addr"): DEVICE_ADDR,
+                vol.Required("timers"): vol.All(
+                    cv.ensure_list,
+                    [
+                        vol.Schema({
+                            vol.Required("channel"): CHANNEL,
+                            vol.Optional("initial_state", default=False): cv.boolean,
+                            # 15-bit count of 500 ms units
+                            vol.Required("seconds"): vol.All(
+                                vol.Coerce(float), vol.Range(min=0, max=0x7FFF / 2)
+                            ),
+                        })
+                    ]
+                ),
+            })
+        ]
+    )
+})
+
+DUMP_CAPTURE_SCHEMA = vol.Schema({
+    vol.Optional("bus"): cv.slug,
+    vol.Optional("path"): cv.string,
+})
+
+# Default dump file, relative to the HA configuration directory
+DEFAULT_CAPTURE_DUMP = "ecto_modbus_capture.pcap"
+
+
+def _channel_mask(channels):
+    mask = 0
+    for channel in channels:
+        mask |= 1 << channel
+    return mask
+
+
+def _devices_by_addr(devices, method):
+    """Group the devices having `method` by Modbus address."""
+    by_addr = {}
+    for device in devices:
+        if hasattr(device, method):
+            by_addr.setdefault(device.addr, []).append(device)
+    return by_addr
+
+
+def _find_device(by_addr, entry, kind):
+    """Return the device a service entry addresses by addr and optional bus."""
+    candidates = by_addr.get(entry["addr"], [])
+    if "bus" in entry:
+        candidates = [device for device in candidates if device.bus == entry["bus"]]
+    if not candidates:
+        raise HomeAssistantError(f"No {kind} at address {entry['addr']}"
+                                 + (f" on bus {entry['bus']}" if "bus" in entry else ""))
+    if len(candidates) > 1:
+        raise HomeAssistantError(
+            f"Address {entry['addr']} exists on several buses, set bus for it"
+        )
+    return candidates[0]
+
+
+def _resolve_set_channels(devices, entries):
+    """Map service entries to (device, mask, values), validating all of them first."""
+    by_addr = _devices_by_addr(devices, "set_channels")
+    targets = []
+    for entry in entries:
+        device = _find_device(by_addr, entry, "relay or contact splitter")
+        on_mask = _channel_mask(entry["turn_on"])
+        off_mask = _channel_mask(entry["turn_off"])
+        if on_mask & off_mask:
+            raise HomeAssistantError(
+                f"Channels listed in both turn_on and turn_off for address {entry['addr']}"
+            )
+        targets.append((device, on_mask | off_mask, on_mask))
+    return targets
+
+
+def _resolve_set_timers(devices, entries):
+    """Map service entries to (device, {channel: (initial_state, seconds)}), validating all first."""
+    by_addr = _devices_by_addr(devices, "set_timers")
+    targets = []
+    for entry in entries:
+        device = _find_device(by_addr, entry, "relay")
+        timers = {}
+        for timer in entry["timers"]:
+            if timer["channel"] in timers:
+                raise HomeAssistantError(
+                    f"Channel {timer['channel']} listed twice for address {entry['addr']}"
+                )
+            timers[timer["channel"]] = (timer["initial_state"], timer["seconds"])
+        targets.append((device, timers))
+    return targets
+
+
+def _resolve_bus(buses, name):
+    """Return the bus entry `name`, or the only bus when no name is given."""
+    if name is None:
+        if len(buses) == 1:
+            return next(iter(buses.values()))
+        name = DEFAULT_BUS
+    bus = buses.get(name)
+    if bus is None:
+        raise HomeAssistantError(f"Unknown bus {name}, configured: {', '.join(buses)}")
+    return bus
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the ecto_modbus services."""
+
+    async def _async_set_channels(call: ServiceCall) -> None:
+        """Apply channel states with one register write per device."""
+        targets = _resolve_set_channels(hass.data[DOMAIN]["devices"], call.data["devices"])
+        for device, mask, values in targets:
+            changed = device.set_channels(mask, values)
+            _LOGGER.debug("set_channels service: addr=%s, mask=0x%03X, values=0x%03X, changed=0x%03X",
+                          device.addr, mask, values, changed)
+
+    async def _async_set_timers(call: ServiceCall) -> None:
+        """Apply relay timers with one contiguous register write per device."""
+        targets = _resolve_set_timers(hass.data[DOMAIN]["devices"], call.data["devices"])
+        for device, timers in targets:
+            changed = device.set_timers(timers)
+            _LOGGER.debug("set_timers service: addr=%s, channels=%s, changed=0x%03X",
+                          device.addr, sorted(timers), changed)
+
+    async def _async_get_stats(call: ServiceCall) -> ServiceResponse:
+        """Return the turnaround histograms and request counters of every bus and master bus."""
+        response = {}
+        for name, bus in hass.data[DOMAIN]["buses"].items():
+            stats = response[name] = bus["stats"].as_dict()
+            if bus.get("response_cache") is not None:
+                stats["response_cache"] = bus["response_cache"].as_dict()
+        masters = {name: master["master"].as_dict()
+                   for name, master in hass.data[DOMAIN].get("masters", {}).items()}
+        return {"buses": response, "masters": masters}
+
+    async def _async_dump_capture(call: ServiceCall) -> ServiceResponse:
+        """Write the serial packet capture to a pcap file."""
+        bus = _resolve_bus(hass.data[DOMAIN]["buses"], call.data.get("bus"))
+        capture = bus["capture"]
+        if capture is None:
+            raise HomeAssistantError(f"Packet capture is disabled on bus {bus['name']} (capture size is 0)")
+        path = call.data.get("path")
+        if path is None:
+            filename = DEFAULT_CAPTURE_DUMP
+            if bus["name"] != DEFAULT_BUS:
+                filename = f"ecto_modbus_capture_{bus['name']}.pcap"
+            path = hass.config.path(filename)
+        elif not hass.config.is_allowed_path(path):
+            raise HomeAssistantError(f"Cannot write capture to {path}: not in allowlist_external_dirs")
+        packets = await hass.async_add_executor_job(capture.dump_pcap, path)
+        return {"bus": bus["name"], "path": path, "packets": packets}
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_CHANNELS, _async_set_channels, schema=SET_CHANNELS_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_TIMERS, _async_set_timers, schema=SET_TIMERS_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_GET_STATS, _async_get_stats, supports_response=SupportsResponse.ONLY
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_DUMP_CAPTURE, _async_dump_capture, schema=DUMP_CAPTURE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL
+    )
+    _LOGGER.debug("Services registered: %s.%s, %s.%s, %s.%s, %s.%s", DOMAIN, SERVICE_SET_CHANNELS,
+                  DOMAIN, SERVICE_SET_TIMERS, DOMAIN, SERVICE_GET_STATS, DOMAIN, SERVICE_DUMP_CAPTURE)
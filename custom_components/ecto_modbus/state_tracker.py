@@ -0,0 +1,74 @@
+import logging
+
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EctoStateTracker:
+    """One state listener for every HA entity mirrored into Ecto registers.
+
+    Devices register the entity they follow; several devices may follow the
+    same entity. State changes are collected per entity and handed to the
+    devices' apply_state in one pass on the next loop iteration, so an
+    entity changing several times within an iteration is applied once.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+        # entity_id -> devices fed by it
+        self._devices = {}
+        # entity_id -> latest state string, waiting for the next pass
+        self._pending = {}
+        self._handle = None
+        self._unsub = None
+
+    def register(self, entity_id, device):
+        """Feed `device.apply_state` from the state of `entity_id`."""
+        self._devices.setdefault(entity_id, []).append(device)
+        _LOGGER.debug("State tracking registered: entity=%s, addr=%s", entity_id, device.addr)
+
+    @callback
+    def async_start(self):
+        """Subscribe to the registered entities and apply their current states."""
+        if self._unsub is not None or not self._devices:
+            return
+        self._unsub = async_track_state_change_event(
+            self._hass, list(self._devices), self._async_on_state_event
+        )
+        for entity_id in self._devices:
+            state = self._hass.states.get(entity_id)
+            if state is not None:
+                self._pending[entity_id] = state.state
+        if self._pending:
+            self._flush()
+        _LOGGER.info("State tracking enabled: %d entit(ies), %d device(s)",
+                     len(self._devices), sum(len(devices) for devices in self._devices.values()))
+
+    @callback
+    def async_stop(self):
+        """Unsubscribe and drop pending updates."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._pending.clear()
+
+    @callback
+    def _async_on_state_event(self, event: Event):
+        new_state = event.data.get("new_state")
+        if new_state is None:
+            return
+        self._pending[event.data["entity_id"]] = new_state.state
+        if self._handle is None:
+            self._handle = self._hass.loop.call_soon(self._flush)
+
+    def _flush(self):
+        self._handle = None
+        pending, self._pending = self._pending, {}
+        for entity_id, state in pending.items():
+            for device in self._devices.get(entity_id, ()):
+                device.apply_state(state)
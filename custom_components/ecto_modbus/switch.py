@@ -2,23 +2,108 @@ import logging
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.const import STATE_UNAVAILABLE, STATE_ON
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import restore_state
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.restore_state import RestoreEntity
 
-from . import DOMAIN
-from .devices.binary_sensor import EctoCH10BinarySensor
-from .devices.relay import EctoRelay10CH
+from .const import DOMAIN
+from .devices.base import EctoChannelDevice
+from .entity import ecto_unit_device_info
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def channel_unique_id(device, channel):
+    """Unique ID of the switch of a device channel."""
+    return f"{device.unique_prefix}_ch{channel}"
+
+
+def restore_channel_states(devices, last_state):
+    """Restore the channels of the switch devices with one register write per device.
+
+    Devices with RESTORE_CHANNELS (binary sensors) get the last HA state of
+    their channel switches; channels without one keep the device state
+    (e.g. from the register snapshot). The others (relays) do not persist
+    state across restarts and are switched OFF.
+
+    Args:
+        devices: EctoChannelDevice devices
+        last_state: Function (device, channel) returning the last HA state
+            string of the channel's switch, or None
+
+    Returns:
+        int: Number of devices whose channel register was written
+    """
+    written = 0
+    for device in devices:
+        if not device.RESTORE_CHANNELS:
+            mask, values = device.CHANNEL_MASK, 0
+        else:
+            mask = values = 0
+            for channel in range(device.CHANNEL_COUNT):
+                state = last_state(device, channel)
+                if state in (None, STATE_UNAVAILABLE):
+                    continue
+                mask |= 1 << channel
+                if state == STATE_ON:
+                    values |= 1 << channel
+        if device.set_channels(mask, values):
+            written += 1
+        _LOGGER.debug("Restored channels: device_addr=%s, restored=0x%03X, on=0x%03X",
+                      device.addr, mask, values)
+    return written
+
+
+def _last_state_lookup(hass):
+    """Return a last_state function for restore_channel_states reading HA's restore data."""
+    registry = er.async_get(hass)
+    last_states = restore_state.async_get(hass).last_states
+
+    def last_state(device, channel):
+        entity_id = registry.async_get_entity_id("switch", DOMAIN, channel_unique_id(device, channel))
+        stored = last_states.get(entity_id) if entity_id is not None else None
+        return stored.state.state if stored is not None else None
+
+    return last_state
+
+
+class EctoStateFlusher:
+    """Coalesces HA state writes of channel switches.
+
+    Switches changed by the device (external writes, sync passes, bulk
+    service calls) are collected and written in one batch on the next loop
+    iteration, so a mass change costs one scheduled callback and each entity
+    is written once per iteration however often it flipped.
+    """
+
+    def __init__(self, hass):
+        self._hass = hass
+        self._pending = {}
+        self._handle = None
+
+    def schedule(self, entity):
+        """Queue an entity for the next flush. Must be called from the event loop."""
+        self._pending[entity] = None
+        if self._handle is None:
+            self._handle = self._hass.loop.call_soon(self._flush)
+
+    def _flush(self):
+        self._handle = None
+        pending, self._pending = self._pending, {}
+        _LOGGER.debug("Flushing %d switch state(s)", len(pending))
+        for entity in pending:
+            if entity.hass is not None:
+                entity.async_write_ha_state()
+
+
 class EctoChannelSwitch(SwitchEntity, RestoreEntity):
-    def __init__(self, device, channel):
+    def __init__(self, device, channel, flusher: EctoStateFlusher | None = None):
         super().__init__()
-        self._device: EctoCH10BinarySensor = device
+        self._device: EctoChannelDevice = device
         self._channel = channel
+        self._flusher = flusher
         self._state = False
-        self._hass = None  # Will be set when added to HA
         _LOGGER.debug("EctoChannelSwitch created: device_addr=%s, channel=%s",
                      self._device.addr, self._channel)
 
@@ -30,23 +115,24 @@ class EctoChannelSwitch(SwitchEntity, RestoreEntity):
             _LOGGER.info("Switch state changed via Modbus: device_addr=%s, channel=%s, state=%s",
                         self._device.addr, self._channel, state)
             self._state = bool(state)
-            _LOGGER.debug("Attempting to schedule HA state update: _hass=%s, hass=%s",
-                         self._hass, self.hass if hasattr(self, 'hass') else 'N/A')
-            if self._hass is not None:
-                self.async_schedule_update_ha_state()
+            if self.hass is not None:
+                if self._flusher is not None:
+                    self._flusher.schedule(self)
+                else:
+                    self.async_schedule_update_ha_state()
                 _LOGGER.debug("HA state update scheduled for device_addr=%s, channel=%s",
                              self._device.addr, self._channel)
             else:
-                _LOGGER.warning("Cannot schedule HA state update: _hass is None for device_addr=%s, channel=%s",
+                _LOGGER.warning("Cannot schedule HA state update: hass is None for device_addr=%s, channel=%s",
                                self._device.addr, self._channel)
 
     @property
     def unique_id(self):
-        return f"ecto_{self._device.addr}_ch{self._channel}"
+        return channel_unique_id(self._device, self._channel)
 
     @property
     def name(self):
-        return f"Device {self._device.addr} Ch.{self._channel + 1}"
+        return f"{self._device.display_name} Ch.{self._channel + 1}"
 
     @property
     def is_on(self):
@@ -81,18 +167,12 @@ class EctoChannelSwitch(SwitchEntity, RestoreEntity):
 
     @property
     def device_info(self) -> DeviceInfo:
-        return DeviceInfo(
-            identifiers={(DOMAIN, "local_ecto_unit")},
-            name="Ecto Unit",
-            model="1.1.1",
-            manufacturer="Ectostroy"
-        )
+        return ecto_unit_device_info(self._device.bus)
 
     async def async_internal_added_to_hass(self) -> None:
         """Call when the switch is added to hass."""
         _LOGGER.debug("Switch added to HA: device_addr=%s, channel=%s",
                      self._device.addr, self._channel)
-        self._hass = self.hass
         await super().async_internal_added_to_hass()
 
         # Register callback for external Modbus writes
@@ -101,50 +181,28 @@ class EctoChannelSwitch(SwitchEntity, RestoreEntity):
             _LOGGER.debug("Registered state change callback: device_addr=%s, channel=%s",
                          self._device.addr, self._channel)
 
-        # Relays should NOT persist state after restart - always start OFF
-        # Binary sensors can restore their previous state
-        if isinstance(self._device, EctoRelay10CH):
-            _LOGGER.info("Relay switch initialized without state persistence: device_addr=%s, channel=%s",
-                        self._device.addr, self._channel)
-            self._state = False
-            self._device.set_switch_state(self._channel, 0)
-        else:
-            state = await self.async_get_last_state()
-            _LOGGER.debug("Restoring previous state: device_addr=%s, channel=%s, previous_state=%s",
-                         self._device.addr, self._channel, state.state if state else None)
-            if state is not None and state.state not in (STATE_UNAVAILABLE, None):
-                if state.state == STATE_ON:
-                    _LOGGER.info("Restoring switch to ON: device_addr=%s, channel=%s",
-                               self._device.addr, self._channel)
-                    self._device.set_switch_state(self._channel, 1)
-                    self._state = True
-                else:
-                    _LOGGER.info("Restoring switch to OFF: device_addr=%s, channel=%s",
-                               self._device.addr, self._channel)
-                    self._device.set_switch_state(self._channel, 0)
-                    self._state = False
-            else:
-                # No previous HA state - sync from device's current channel state
-                if hasattr(self._device, 'get_channel_state'):
-                    device_state = self._device.get_channel_state(self._channel)
-                    if device_state is not None:
-                        self._state = bool(device_state)
-                        _LOGGER.info("Synced switch state from device: device_addr=%s, channel=%s, state=%s",
-                                   self._device.addr, self._channel, self._state)
-                else:
-                    _LOGGER.debug("No previous state to restore: device_addr=%s, channel=%s",
-                                 self._device.addr, self._channel)
+        # Channels were restored per device by async_setup_platform
+        device_state = self._device.get_channel_state(self._channel)
+        if device_state is not None:
+            self._state = bool(device_state)
+        _LOGGER.debug("Switch state from device: device_addr=%s, channel=%s, state=%s",
+                     self._device.addr, self._channel, self._state)
 
 
 async def async_setup_platform(hass, config, async_add_entities, discovery_info):
     _LOGGER.info("Setting up Ecto switch platform")
     devices = hass.data[DOMAIN]["devices"]
+    flusher = EctoStateFlusher(hass)
+    switch_devices = [device for device in devices if isinstance(device, EctoChannelDevice)]
+    # Restore all channels of a device at once, before the entities read them
+    written = restore_channel_states(switch_devices, _last_state_lookup(hass))
+    _LOGGER.info("Restored switch channels: %d register write(s) for %d device(s)",
+                 written, len(switch_devices))
     relay = []
-    for device in devices:
-        if isinstance(device, (EctoCH10BinarySensor, EctoRelay10CH)):
-            _LOGGER.debug("Creating switches for device: addr=%s, channels=%s",
-                         device.addr, device.CHANNEL_COUNT)
-            for channel in range(device.CHANNEL_COUNT):
-                relay.append(EctoChannelSwitch(device, channel))
+    for device in switch_devices:
+        _LOGGER.debug("Creating switches for device: addr=%s, channels=%s",
+                     device.addr, device.CHANNEL_COUNT)
+        for channel in range(device.CHANNEL_COUNT):
+            relay.append(EctoChannelSwitch(device, channel, flusher))
     _LOGGER.info("Created %d switch(es) for %d device(s)", len(relay), len(devices))
     async_add_entities(relay)
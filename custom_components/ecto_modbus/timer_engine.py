@@ -0,0 +1,129 @@
+import heapq
+import itertools
+import logging
+
+from homeassistant.core import callback
+
+_LOGGER = logging.getLogger(__name__)
+
+# Timer register: bit 15 initial state, bits 14-0 timeout in 500 ms units
+TIMER_STATE_BIT = 0x8000
+TIMER_UNITS_MASK = 0x7FFF
+TIMER_UNIT_SECONDS = 0.5
+
+# Stale heap entries tolerated before the heap is rebuilt from the armed timers
+_COMPACT_SLACK = 64
+
+
+class EctoTimerEngine:
+    """Runs the relay channel timers of every device on one heap.
+
+    A timer is armed when a relay's timer register (0x20 + channel) gets a
+    non-zero timeout, from HA (set_timer/set_timers) or from the bus master:
+    the channel switches to the initial state (bit 15) at once and to the
+    opposite state when the timeout (bits 14-0, 500 ms units) expires, and
+    the timer register is cleared. A zero timeout cancels the timer.
+
+    All deadlines live in one heap served by a single loop.call_at handle
+    for the earliest one. Timers expiring together are applied per device
+    with one set_channels and one set_timers call. Re-armed or cancelled
+    timers leave stale heap entries that are skipped when popped.
+    """
+
+    def __init__(self, loop):
+        self._loop = loop
+        # (deadline, sequence, device, channel)
+        self._heap = []
+        # (device, channel) -> (sequence, initial_state) of the live timer
+        self._armed = {}
+        self._sequence = itertools.count()
+        self._handle = None
+        self._handle_deadline = None
+
+    def __len__(self):
+        return len(self._armed)
+
+    def add_device(self, device):
+        """Follow the timer registers of a relay."""
+        device.timer_listener = self.on_timer_changed
+        _LOGGER.debug("Timer engine follows relay addr=%s", device.addr)
+
+    @callback
+    def on_timer_changed(self, device, channel, value):
+        """Arm or cancel a channel timer after its register changed."""
+        units = value & TIMER_UNITS_MASK
+        if not units:
+            if self._armed.pop((device, channel), None) is not None:
+                _LOGGER.debug("Timer cancelled: addr=%s, channel=%s", device.addr, channel)
+            return
+        initial_state = 1 if value & TIMER_STATE_BIT else 0
+        self.arm(device, channel, initial_state, units * TIMER_UNIT_SECONDS)
+        device.set_channels(1 << channel, initial_state << channel)
+
+    def arm(self, device, channel, initial_state, seconds):
+        """Schedule the channel to leave `initial_state` in `seconds`."""
+        sequence = next(self._sequence)
+        deadline = self._loop.time() + seconds
+        self._armed[(device, channel)] = (sequence, initial_state)
+        heapq.heappush(self._heap, (deadline, sequence, device, channel))
+        if len(self._heap) > 2 * len(self._armed) + _COMPACT_SLACK:
+            self._compact()
+        _LOGGER.debug("Timer armed: addr=%s, channel=%s, initial_state=%s, timeout=%ss",
+                      device.addr, channel, initial_state, seconds)
+        self._schedule()
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap
+                      if self._armed.get((entry[2], entry[3]), (None,))[0] == entry[1]]
+        heapq.heapify(self._heap)
+
+    def _schedule(self):
+        """Point the loop callback at the earliest live deadline."""
+        heap = self._heap
+        while heap and self._armed.get((heap[0][2], heap[0][3]), (None,))[0] != heap[0][1]:
+            heapq.heappop(heap)
+        deadline = heap[0][0] if heap else None
+        if deadline == self._handle_deadline:
+            return
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._handle_deadline = deadline
+        if deadline is not None:
+            self._handle = self._loop.call_at(deadline, self._on_expired)
+
+    @callback
+    def _on_expired(self):
+        """Apply every timer due by now, grouped per device."""
+        self._handle = None
+        self._handle_deadline = None
+        now = self._loop.time()
+        heap = self._heap
+        # device -> [channel mask, channel values]
+        expired = {}
+        while heap and heap[0][0] <= now:
+            _deadline, sequence, device, channel = heapq.heappop(heap)
+            armed = self._armed.get((device, channel))
+            if armed is None or armed[0] != sequence:
+                continue
+            del self._armed[(device, channel)]
+            change = expired.setdefault(device, [0, 0])
+            change[0] |= 1 << channel
+            if not armed[1]:
+                change[1] |= 1 << channel
+        for device, (mask, values) in expired.items():
+            _LOGGER.debug("Timers expired: addr=%s, channels=0x%03X", device.addr, mask)
+            device.set_channels(mask, values)
+            device.set_timers({channel: (False, 0) for channel in range(device.CHANNEL_COUNT)
+                               if mask >> channel & 1})
+        self._schedule()
+
+    @callback
+    def async_stop(self):
+        """Drop every timer and the pending loop callback."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._handle_deadline = None
+        self._heap.clear()
+        self._armed.clear()
@@ -0,0 +1,271 @@
+import asyncio
+import itertools
+import logging
+import struct
+import time
+
+from modbus_tk import utils
+from modbus_tk.exceptions import ModbusError, ModbusInvalidResponseError
+from modbus_tk.modbus_rtu import RtuQuery
+import modbus_tk.defines as cst
+
+from ..const import DEFAULT_MASTER_TIMEOUT
+
+_LOGGER = logging.getLogger(__name__)
+
+# Queue priorities: writes from HA go ahead of queued polls
+PRIORITY_WRITE = 0
+PRIORITY_READ = 1
+
+# Response sizes (slave + PDU + CRC) of the fixed-length function codes
+_FIXED_RESPONSE_LENGTHS = {
+    cst.WRITE_SINGLE_REGISTER: 8,
+    cst.WRITE_MULTIPLE_REGISTERS: 8,
+}
+# Slave + function code + exception code + CRC
+_EXCEPTION_RESPONSE_LENGTH = 5
+
+
+def expected_response_length(request_pdu):
+    """Return the RTU response length of a request, or None if unknown."""
+    function_code = request_pdu[0]
+    if function_code in (cst.READ_HOLDING_REGISTERS, cst.READ_INPUT_REGISTERS):
+        count = struct.unpack(">H", request_pdu[3:5])[0]
+        return 5 + 2 * count
+    return _FIXED_RESPONSE_LENGTHS.get(function_code)
+
+
+class RegisterCache:
+    """Last register values read from the slaves of a master bus.
+
+    Poll results are kept per slave, function code and address; entities
+    read single registers from here instead of the bus. A slave that
+    stopped answering is unavailable: get() returns None for it until the
+    next successful read.
+    """
+
+    def __init__(self):
+        # (slave, function code) -> {address: value}
+        self._tables = {}
+        # slave -> time.monotonic() of the last successful read
+        self.updated = {}
+        # Slaves whose last read failed
+        self.unavailable = set()
+
+    def store(self, slave, function_code, address, values):
+        """Store registers read from a slave and mark it available."""
+        table = self._tables.setdefault((slave, function_code), {})
+        for offset, value in enumerate(values):
+            table[address + offset] = value
+        self.updated[slave] = time.monotonic()
+        self.unavailable.discard(slave)
+
+    def mark_unavailable(self, slave):
+        self.unavailable.add(slave)
+
+    def available(self, slave):
+        return slave in self.updated and slave not in self.unavailable
+
+    def get(self, slave, function_code, address):
+        """Return a cached register value, or None if unknown or the slave is unavailable."""
+        if not self.available(slave):
+            return None
+        return self._tables.get((slave, function_code), {}).get(address)
+
+
+class _Request:
+    """A queued request and the future of its caller."""
+
+    __slots__ = ("slave", "pdu", "timeout", "future")
+
+    def __init__(self, slave, pdu, timeout, future):
+        self.slave = slave
+        self.pdu = pdu
+        self.timeout = timeout
+        self.future = future
+
+
+class AsyncRtuMaster:
+    """Modbus RTU master polling real Ectocontrol devices from the asyncio event loop.
+
+    Callers queue requests (read_registers, write_register, ...) and await
+    their result; one worker task sends them in priority order. RS-485 is
+    half-duplex, so the worker is the only writer on the bus: a request is
+    sent only after the previous response arrived or timed out and the bus
+    was silent for t3.5. Responses are read with loop.add_reader and
+    complete as soon as their expected length arrived, not on a silence
+    timer.
+
+    Failed requests raise on the caller: asyncio.TimeoutError after the
+    request's timeout, ModbusError for an exception response and
+    ModbusInvalidResponseError for a bad CRC or a response from another
+    slave. Request and failure counters are kept in `requests`,
+    `timeouts` and `errors`.
+    """
+
+    def __init__(self, serial_port, loop=None, timeout=DEFAULT_MASTER_TIMEOUT, interframe_multiplier=3.5):
+        self._serial = serial_port
+        self._loop = loop
+        self.timeout = timeout
+        self._frame_gap = interframe_multiplier * utils.calculate_rtu_inter_char(serial_port.baudrate)
+        self._queue = asyncio.PriorityQueue()
+        # Tie-breaker keeping FIFO order within a priority
+        self._sequence = itertools.count()
+        self._worker = None
+        self._buffer = bytearray()
+        # Length and future of the response being waited for
+        self._expected = None
+        self._response = None
+        self._idle_at = 0.0
+        self.requests = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    @property
+    def running(self):
+        return self._worker is not None
+
+    def start(self):
+        """Start watching the port and serving the queue. Must be called from the event loop thread."""
+        if self._worker is not None:
+            return
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        if not self._serial.is_open:
+            self._serial.open()
+        # Never block the loop: reads only ever drain what is already buffered
+        self._serial.timeout = 0
+        self._loop.add_reader(self._serial.fileno(), self._on_readable)
+        self._worker = self._loop.create_task(self._serve())
+        _LOGGER.info("AsyncRtuMaster started on %s", getattr(self._serial, "name", self._serial))
+
+    def stop(self):
+        """Stop serving requests, fail the queued ones and release the port."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        self._worker = None
+        self._loop.remove_reader(self._serial.fileno())
+        while not self._queue.empty():
+            self._queue.get_nowait()[2].future.cancel()
+        if self._serial.is_open:
+            self._serial.close()
+        _LOGGER.info("AsyncRtuMaster stopped")
+
+    def as_dict(self):
+        """Request counters and queue length, for the get_stats service."""
+        return {
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "queued": self._queue.qsize(),
+        }
+
+    async def execute(self, slave, pdu, priority=PRIORITY_READ, timeout=None):
+        """Queue a request PDU for a slave and return the response PDU."""
+        if self._worker is None:
+            raise RuntimeError("Modbus master is not running")
+        future = self._loop.create_future()
+        request = _Request(slave, bytes(pdu), self.timeout if timeout is None else timeout, future)
+        self._queue.put_nowait((priority, next(self._sequence), request))
+        return await future
+
+    async def read_registers(self, slave, address, count,
+                             function_code=cst.READ_HOLDING_REGISTERS, timeout=None):
+        """Read `count` holding (or input) registers of a slave.
+
+        Returns:
+            tuple: register values (unsigned 16-bit)
+        """
+        pdu = struct.pack(">BHH", function_code, address, count)
+        response = await self.execute(slave, pdu, PRIORITY_READ, timeout)
+        if len(response) != 2 + 2 * count or response[1] != 2 * count:
+            raise ModbusInvalidResponseError(
+                "Response of {0} bytes to a read of {1} registers".format(len(response), count))
+        return struct.unpack(">%dH" % count, response[2:])
+
+    async def write_register(self, slave, address, value, timeout=None):
+        """Write one holding register of a slave (FC 0x06)."""
+        pdu = struct.pack(">BHH", cst.WRITE_SINGLE_REGISTER, address, value & 0xFFFF)
+        await self.execute(slave, pdu, PRIORITY_WRITE, timeout)
+
+    async def write_registers(self, slave, address, values, timeout=None):
+        """Write consecutive holding registers of a slave (FC 0x10)."""
+        pdu = struct.pack(">BHHB%dH" % len(values), cst.WRITE_MULTIPLE_REGISTERS, address,
+                          len(values), 2 * len(values), *(v & 0xFFFF for v in values))
+        await self.execute(slave, pdu, PRIORITY_WRITE, timeout)
+
+    async def _serve(self):
+        """Worker: send the queued requests one at a time."""
+        while True:
+            request = (await self._queue.get())[2]
+            if request.future.done():
+                # The caller went away while the request was queued
+                continue
+            try:
+                result = await self._transaction(request)
+            except asyncio.CancelledError:
+                if not request.future.done():
+                    request.future.cancel()
+                raise
+            except Exception as e:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            else:
+                if not request.future.done():
+                    request.future.set_result(result)
+
+    async def _transaction(self, request):
+        """Send one request and wait for its response PDU."""
+        # Keep the bus silent for t3.5 after the previous frame
+        delay = self._idle_at - self._loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # A late response to a timed-out request is not ours
+        self._buffer.clear()
+        query = RtuQuery()
+        frame = query.build_request(request.pdu, request.slave)
+        self._expected = expected_response_length(request.pdu)
+        self._response = self._loop.create_future()
+        self.requests += 1
+        try:
+            self._serial.write(frame)
+            response = await asyncio.wait_for(self._response, request.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            _LOGGER.debug("No response: slave=%s, function=0x%02X, timeout=%.3fs",
+                          request.slave, request.pdu[0], request.timeout)
+            raise
+        finally:
+            self._response = None
+            self._idle_at = self._loop.time() + self._frame_gap
+        try:
+            pdu = query.parse_response(response)
+        except ModbusInvalidResponseError:
+            self.errors += 1
+            raise
+        if pdu[0] & 0x80:
+            self.errors += 1
+            raise ModbusError(pdu[1])
+        return pdu
+
+    def _on_readable(self):
+        """Drain the port and complete the awaited response if it is whole."""
+        try:
+            data = self._serial.read(self._serial.in_waiting or 1)
+        except Exception as e:
+            _LOGGER.error("AsyncRtuMaster read failed: %s", e)
+            return
+        response = self._response
+        if not data or response is None or response.done():
+            # Nothing asked for: noise or a response after its timeout
+            return
+        self._buffer += data
+        buffer = self._buffer
+        if len(buffer) >= 2 and buffer[1] & 0x80:
+            expected = _EXCEPTION_RESPONSE_LENGTH
+        else:
+            expected = self._expected
+        if expected is not None and len(buffer) >= expected:
+            response.set_result(bytes(buffer[:expected]))
+            buffer.clear()
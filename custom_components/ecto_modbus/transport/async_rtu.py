@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import struct
+import time
+
+from modbus_tk import utils
+from modbus_tk.modbus_rtu import RtuQuery
+import modbus_tk.defines as cst
+
+from .register_bank import RegisterBankDatabank
+from .stats import BusStats
+
+_LOGGER = logging.getLogger(__name__)
+
+# Request sizes (slave + PDU + CRC) for fixed-length function codes
+_FIXED_REQUEST_LENGTHS = {
+    cst.READ_COILS: 8,
+    cst.READ_DISCRETE_INPUTS: 8,
+    cst.READ_HOLDING_REGISTERS: 8,
+    cst.READ_INPUT_REGISTERS: 8,
+    cst.WRITE_SINGLE_COIL: 8,
+    cst.WRITE_SINGLE_REGISTER: 8,
+    cst.READ_EXCEPTION_STATUS: 4,
+    cst.MASK_WRITE_REGISTER: 10,
+}
+
+# Variable-length requests: offset of the byte-count field in the frame
+_BYTE_COUNT_OFFSETS = {
+    cst.WRITE_MULTIPLE_COILS: 6,
+    cst.WRITE_MULTIPLE_REGISTERS: 6,
+    cst.READ_WRITE_MULTIPLE_REGISTERS: 10,
+}
+
+
+def expected_request_length(frame):
+    """Return the full RTU request length announced by a partial frame.
+
+    Returns:
+        int: expected length in bytes, or None if it cannot be known yet
+        (too few bytes, or an unknown function code)
+    """
+    if len(frame) < 2:
+        return None
+    function_code = frame[1]
+    length = _FIXED_REQUEST_LENGTHS.get(function_code)
+    if length is not None:
+        return length
+    offset = _BYTE_COUNT_OFFSETS.get(function_code)
+    if offset is None or len(frame) <= offset:
+        return None
+    return offset + 1 + frame[offset] + 2
+
+
+def is_complete_frame(frame):
+    """Return True if `frame` is exactly its announced request length with a valid CRC."""
+    expected = expected_request_length(frame)
+    return expected is not None and len(frame) == expected \
+        and utils.calculate_crc(frame[:-2]) == struct.unpack(">H", frame[-2:])[0]
+
+
+class AsyncRtuServer:
+    """Modbus RTU slave engine running on the asyncio event loop.
+
+    Drop-in alternative to modbus_tk's threaded RtuServer: it serves the same
+    modbus_tk Databank/Slave objects (so EctoDevice and ModBusRegisterSensor
+    work unchanged, including the Slave write hooks), but the serial port is
+    watched with loop.add_reader and every frame is parsed and answered on the
+    event loop. No thread, no cross-thread hand-off for register updates.
+    Slaves default to the array-backed RegisterBankSlave.
+
+    Frames are completed as soon as the announced request length has arrived
+    with a valid CRC; otherwise on t3.5 of line silence. Completed frames are
+    handed to the parser as a memoryview, without a copy. Turnaround times and
+    request counters are kept per slave in ``stats``.
+    """
+
+    def __init__(self, serial_port, loop=None, databank=None, error_on_missing_slave=False,
+                 interframe_multiplier=3.5):
+        self._serial = serial_port
+        self._loop = loop
+        self._databank = databank if databank else RegisterBankDatabank(error_on_missing_slave=error_on_missing_slave)
+        self._t0 = utils.calculate_rtu_inter_char(serial_port.baudrate)
+        self._frame_timeout = interframe_multiplier * self._t0
+        self._buffer = bytearray()
+        self._frame_timer = None
+        self._last_rx_ns = 0
+        self._running = False
+        self.stats = BusStats()
+        _LOGGER.debug("AsyncRtuServer created: baudrate=%s, t3.5=%.6fs",
+                      serial_port.baudrate, self._frame_timeout)
+
+    def get_db(self):
+        """Return the databank"""
+        return self._databank
+
+    def add_slave(self, slave_id, unsigned=True, memory=None):
+        """Add slave to the server"""
+        return self._databank.add_slave(slave_id, unsigned, memory)
+
+    def get_slave(self, slave_id):
+        """Get the slave with the given id"""
+        return self._databank.get_slave(slave_id)
+
+    def remove_slave(self, slave_id):
+        """Remove the slave with the given id"""
+        self._databank.remove_slave(slave_id)
+
+    def remove_all_slaves(self):
+        """Remove all slaves"""
+        self._databank.remove_all_slaves()
+
+    def start(self):
+        """Start watching the serial port. Must be called from the event loop thread."""
+        if self._running:
+            return
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        if not self._serial.is_open:
+            self._serial.open()
+        # Never block the loop: reads only ever drain what is already buffered
+        self._serial.timeout = 0
+        self._loop.add_reader(self._serial.fileno(), self._on_readable)
+        self._running = True
+        _LOGGER.info("AsyncRtuServer started on %s", getattr(self._serial, "name", self._serial))
+
+    def stop(self):
+        """Stop serving requests and release the port."""
+        if not self._running:
+            return
+        self._running = False
+        self._loop.remove_reader(self._serial.fileno())
+        self._cancel_frame_timer()
+        self._buffer.clear()
+        if self._serial.is_open:
+            self._serial.close()
+        _LOGGER.info("AsyncRtuServer stopped")
+
+    def _cancel_frame_timer(self):
+        if self._frame_timer is not None:
+            self._frame_timer.cancel()
+            self._frame_timer = None
+
+    def _on_readable(self):
+        """Drain the port and complete the frame if it is whole."""
+        try:
+            data = self._serial.read(self._serial.in_waiting or 1)
+        except Exception as e:
+            _LOGGER.error("AsyncRtuServer read failed: %s", e)
+            return
+        if not data:
+            return
+        self._last_rx_ns = time.perf_counter_ns()
+        self._buffer += data
+
+        if is_complete_frame(self._buffer):
+            self._cancel_frame_timer()
+            frame, self._buffer = self._buffer, bytearray()
+            self._process_frame(memoryview(frame))
+            return
+
+        # Unknown length, trailing garbage or bad CRC: wait for t3.5 silence
+        self._cancel_frame_timer()
+        self._frame_timer = self._loop.call_later(self._frame_timeout, self._on_frame_timeout)
+
+    def _on_frame_timeout(self):
+        self._frame_timer = None
+        if self._buffer:
+            frame, self._buffer = self._buffer, bytearray()
+            self._process_frame(memoryview(frame))
+
+    def _process_frame(self, request):
+        response = self._handle(request)
+        if not response:
+            self.stats.record(request, response, self._last_rx_ns)
+            return
+        if self._serial.in_waiting > 0:
+            # Master most likely timed out and already started a new request
+            _LOGGER.warning("Not sending response because there is new request pending")
+            self.stats.record(request, b"", self._last_rx_ns)
+            return
+        self.stats.record(request, response, self._last_rx_ns)
+        try:
+            self._serial.write(response)
+        except Exception as e:
+            _LOGGER.error("AsyncRtuServer write failed: %s", e)
+
+    def _handle(self, request):
+        """Handle a complete request frame and return the response frame."""
+        return self._databank.handle_request(RtuQuery(), request)
@@ -0,0 +1,219 @@
+import logging
+import mmap
+import os
+import struct
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+DIRECTION_RX = 0
+DIRECTION_TX = 1
+
+# perf_counter_ns, payload length, direction
+RECORD_HEADER = struct.Struct("<QHB")
+# magic, size of one half, wall clock minus perf_counter_ns
+FILE_HEADER = struct.Struct("<8sIq")
+FILE_MAGIC = b"ECTOCAP1"
+
+# pcap with nanosecond timestamps; every packet is a direction byte
+# (0 = received, 1 = sent) followed by the raw serial bytes
+PCAP_HEADER = struct.Struct("<IHHiIII")
+PCAP_RECORD = struct.Struct("<IIII")
+PCAP_MAGIC_NS = 0xA1B23C4D
+LINKTYPE_USER0 = 147
+
+_HEADER_SIZE = RECORD_HEADER.size
+_MIN_HALF = 1024
+
+
+class HexView:
+    """Lazily formatted hex dump of a byte string, for %s logging arguments."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return self.data.hex(" ")
+
+
+class PacketCapture:
+    """Ring buffer of raw serial chunks with their receive/send timestamps.
+
+    The buffer is split into two halves: chunks are appended to the active
+    half and when it is full the other half is cleared and becomes active,
+    so the buffer always holds between one and two halves of history.
+    Appending is a header pack and a slice copy, nothing is formatted.
+
+    With `path` the buffer is a memory-mapped file, which keeps the capture
+    of long sessions on disk (see read_capture_file).
+    """
+
+    def __init__(self, size, path=None):
+        self._half = max(size // 2, _MIN_HALF)
+        # Clears a half on every switch without allocating on the capture path
+        self._zeros = bytes(self._half)
+        self._path = path
+        self._file = None
+        # Records carry perf_counter_ns(); this converts them to wall clock
+        self.epoch_ns = time.time_ns() - time.perf_counter_ns()
+        self._pack_header = RECORD_HEADER.pack_into
+        if path is None:
+            self._buf = bytearray(2 * self._half)
+            self._base = 0
+        else:
+            self._file = open(path, "w+b")
+            self._file.truncate(FILE_HEADER.size + 2 * self._half)
+            self._buf = mmap.mmap(self._file.fileno(), 0)
+            FILE_HEADER.pack_into(self._buf, 0, FILE_MAGIC, self._half, self.epoch_ns)
+            self._base = FILE_HEADER.size
+        # Slice assignment to a bytearray copies bytes sources first; through
+        # a memoryview appends and switches copy straight into the buffer
+        self._view = memoryview(self._buf)
+        self._active = 0
+        # Offset of the active half in the buffer
+        self._start = self._base
+        self._pos = 0
+        self.packets = 0
+        _LOGGER.debug("Packet capture created: %d bytes, file=%s", 2 * self._half, path)
+
+    def append(self, direction, data, now_ns):
+        """Record one chunk of serial bytes seen at perf_counter_ns() `now_ns`."""
+        length = len(data)
+        pos = self._pos
+        if pos + _HEADER_SIZE + length > self._half:
+            self._switch()
+            pos = 0
+            if _HEADER_SIZE + length > self._half:
+                length = self._half - _HEADER_SIZE
+                data = data[:length]
+        start = self._start + pos
+        self._pack_header(self._buf, start, now_ns, length, direction)
+        start += _HEADER_SIZE
+        self._view[start:start + length] = data
+        self._pos = pos + _HEADER_SIZE + length
+        self.packets += 1
+
+    def _switch(self):
+        self._active ^= 1
+        self._pos = 0
+        self._start = self._base + self._active * self._half
+        self._view[self._start:self._start + self._half] = self._zeros
+
+    def records(self):
+        """Return the captured (perf_counter_ns, direction, data) records, oldest first."""
+        snapshot = bytes(self._buf[self._base:self._base + 2 * self._half])
+        older = self._active ^ 1
+        return (_parse_half(snapshot, older * self._half, self._half)
+                + _parse_half(snapshot, self._active * self._half, self._half))
+
+    def dump_pcap(self, path):
+        """Write the captured records to a pcap file and return their count."""
+        return write_pcap(path, self.records(), self.epoch_ns)
+
+    def close(self):
+        """Flush and release the capture file, if any."""
+        if self._file is not None:
+            self._view.release()
+            self._buf.flush()
+            self._buf.close()
+            self._file.close()
+            self._file = None
+
+
+def _parse_half(buf, start, size):
+    records = []
+    pos = start
+    end = start + size
+    while pos + RECORD_HEADER.size <= end:
+        time_ns, length, direction = RECORD_HEADER.unpack_from(buf, pos)
+        if not time_ns:
+            break
+        pos += RECORD_HEADER.size
+        if pos + length > end:
+            break
+        records.append((time_ns, direction, buf[pos:pos + length]))
+        pos += length
+    return records
+
+
+def read_capture_file(path):
+    """Read a memory-mapped capture file offline.
+
+    Returns:
+        tuple: (records oldest first, epoch_ns), ready for write_pcap
+    """
+    with open(path, "rb") as capture_file:
+        buf = capture_file.read()
+    magic, half, epoch_ns = FILE_HEADER.unpack_from(buf, 0)
+    if magic != FILE_MAGIC:
+        raise ValueError(f"{path} is not an ecto_modbus capture file")
+    halves = [_parse_half(buf, FILE_HEADER.size + index * half, half) for index in (0, 1)]
+    # The half that was active last starts with the newer timestamp
+    halves.sort(key=lambda records: records[0][0] if records else 0)
+    return halves[0] + halves[1], epoch_ns
+
+
+def write_pcap(path, records, epoch_ns=0):
+    """Write (timestamp_ns, direction, data) records as pcap and return their count.
+
+    `epoch_ns` is added to the timestamps to get wall clock time.
+    """
+    with open(path, "wb") as pcap:
+        pcap.write(PCAP_HEADER.pack(PCAP_MAGIC_NS, 2, 4, 0, 0, 0xFFFF, LINKTYPE_USER0))
+        for time_ns, direction, data in records:
+            seconds, nanoseconds = divmod(time_ns + epoch_ns, 1000000000)
+            pcap.write(PCAP_RECORD.pack(seconds, nanoseconds, len(data) + 1, len(data) + 1))
+            pcap.write(bytes((direction,)))
+            pcap.write(data)
+    _LOGGER.info("Capture written: %s, %d packet(s)", os.fspath(path), len(records))
+    return len(records)
+
+
+class CaptureSerialWrapper:
+    """Serial port proxy recording RX/TX bytes into a PacketCapture.
+
+    Also keeps the time of the last received byte for the turnaround
+    statistics. Hex logging is opt-in (`log_hex`) and formatted lazily.
+    """
+
+    def __init__(self, serial_port, capture=None, logger=_LOGGER, port_name=None, log_hex=False):
+        self._serial = serial_port
+        self._capture = capture
+        self._logger = logger
+        self._port_name = port_name
+        self._log_hex = log_hex
+        # perf_counter_ns() of the last received byte, used for turnaround stats
+        self.last_rx_ns = 0
+
+    def read(self, size=1):
+        """Read bytes from the serial port and record them"""
+        data = self._serial.read(size)
+        if data:
+            self.last_rx_ns = now_ns = time.perf_counter_ns()
+            if self._capture is not None:
+                self._capture.append(DIRECTION_RX, data, now_ns)
+            if self._log_hex:
+                self._logger.debug("RX: %s (%d bytes): %s", self._port_name, len(data), HexView(data))
+        return data
+
+    def write(self, data):
+        """Record bytes and write them to the serial port"""
+        if self._capture is not None:
+            self._capture.append(DIRECTION_TX, data, time.perf_counter_ns())
+        if self._log_hex:
+            self._logger.debug("TX: %s (%d bytes): %s", self._port_name, len(data), HexView(data))
+        return self._serial.write(data)
+
+    @property
+    def timeout(self):
+        return self._serial.timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._serial.timeout = value
+
+    def __getattr__(self, name):
+        """Proxy all other attributes to the wrapped serial port"""
+        return getattr(self._serial, name)
@@ -1,11 +1,16 @@
 import logging
 from modbus_tk.modbus import Slave
 
+from .register_bank import RegisterBankSlave
+
 _LOGGER = logging.getLogger(__name__)
 
 
 class ModBusRegisterSensor:
 
+    # Every device keeps two or three of these; no per-instance __dict__
+    __slots__ = ('block_name', 'addr', 'reg_type', 'reg_size', 'read_callback', 'slave', '_bank')
+
     def __init__(self, slave: Slave, reg_type: int, addr: int, reg_size: int, read_callback=None):
         self.block_name = "val-x" + str(addr)
         self.addr = addr
@@ -14,23 +19,50 @@ class ModBusRegisterSensor:
         self.read_callback = read_callback
         slave.add_block(self.block_name, reg_type, addr, reg_size)
         self.slave = slave
+        # Register bank slaves are written/read straight through their table image
+        self._bank = isinstance(slave, RegisterBankSlave) and reg_type in slave.images
         _LOGGER.debug("Created ModbusRegisterSensor: block=%s, type=%s, addr=%s, size=%s",
                      self.block_name, hex(reg_type), hex(addr), reg_size)
 
-    def set_raw_value(self, raw_value):
+    def set_raw_value(self, raw_value, offset=0):
+        """Write register values, starting `offset` registers into the block."""
+        addr = self.addr + offset
         _LOGGER.debug("TX: Writing to register - block=%s, addr=%s (0x%s), value=%s, type=%s",
-                     self.block_name, self.addr, hex(self.addr), raw_value,
+                     self.block_name, addr, hex(addr), raw_value,
                      "HOLDING" if self.reg_type == 0 else "INPUT")
-        self.slave.set_values(self.block_name, self.addr, raw_value)
+        if self._bank:
+            self.slave.write(self.reg_type, addr, raw_value)
+        else:
+            self.slave.set_values(self.block_name, addr, raw_value)
         _LOGGER.debug("TX: Register write completed - block=%s, addr=%s (0x%s)",
-                     self.block_name, self.addr, hex(self.addr))
+                     self.block_name, addr, hex(addr))
+
+    def set_compute(self, compute):
+        """Turn the block into a computed register.
+
+        `compute()` returns the register values (or None to keep the stored
+        ones) and runs when a bus read reaches the block, and before
+        get_values. Only register bank slaves can evaluate on read.
+
+        Returns:
+            bool: True if the slave evaluates on read; False if the caller
+            has to keep writing values eagerly
+        """
+        if not self._bank:
+            return False
+        self.slave.set_read_provider(self.reg_type, self.addr, self.reg_size, compute)
+        return True
 
     def get_values(self):
         """Get values from the register with optional callback logging"""
         _LOGGER.debug("RT: Reading from register - block=%s, addr=%s (0x%s), size=%s, type=%s",
                      self.block_name, self.addr, hex(self.addr), self.reg_size,
                      "HOLDING" if self.reg_type == 0 else "INPUT")
-        values = self.slave.get_values(self.block_name, self.addr, self.reg_size)
+        if self._bank:
+            self.slave.refresh(self.reg_type, self.addr, self.reg_size)
+            values = tuple(self.slave.read(self.reg_type, self.addr, self.reg_size))
+        else:
+            values = self.slave.get_values(self.block_name, self.addr, self.reg_size)
         _LOGGER.debug("RT: Register read completed - block=%s, addr=%s (0x%s), values=%s",
                      self.block_name, self.addr, hex(self.addr), values)
         if self.read_callback:
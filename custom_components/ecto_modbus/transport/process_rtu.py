@@ -0,0 +1,224 @@
+import logging
+import multiprocessing
+import threading
+
+import modbus_tk.defines as cst
+from modbus_tk.exceptions import MissingKeyError
+from modbus_tk.hooks import call_hooks
+
+from .capture import CaptureSerialWrapper
+from .response_cache import written_registers
+from .rtu_server import EctoRtuServer
+from .serial_port import open_serial_port
+from .shared_bank import SharedBankDatabank, SharedRegisterBank
+from .stats import BusStats
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds between statistics updates from the server process
+STATS_INTERVAL = 1.0
+# Seconds the server process gets to exit on stop() before it is terminated
+STOP_TIMEOUT = 2.0
+
+# modbus_tk write hooks replayed in the integration, by function code
+WRITE_HOOKS = {
+    cst.WRITE_SINGLE_REGISTER: "modbus.Slave.handle_write_single_register_request",
+    cst.WRITE_MULTIPLE_REGISTERS: "modbus.Slave.handle_write_multiple_registers_request",
+}
+
+
+class ProcessRtuServer:
+    """Modbus RTU slave served by a child process from a shared register bank.
+
+    The child process opens the serial port and runs EctoRtuServer with its
+    own interpreter and GIL, so a busy Home Assistant (recorder flushes,
+    template storms) does not delay bus responses. Register images live in a
+    SharedRegisterBank both processes map; devices keep using add_slave and
+    ModBusRegisterSensor as with the other backends, and their register
+    writes are visible to the bus master without a message.
+
+    Two pipes connect the processes: commands (slaves and register blocks
+    to declare, stop) go to the child, events come back on the HA loop via
+    add_reader. A bus write is replayed in the integration through the same
+    modbus_tk write hooks the thread backend fires, so on_register_write is
+    reached unchanged. Bus statistics are sent every STATS_INTERVAL seconds
+    and copied into `stats`.
+
+    Read providers are not available: set_compute reports False and the
+    devices write computed registers eagerly.
+
+    With a `snapshot`, register writes of both processes are recorded in it.
+    """
+
+    def __init__(self, port_settings, loop, snapshot=None):
+        """
+        Args:
+            port_settings: port, port_type and baudrate of the bus
+            loop: HA event loop receiving the events of the server process
+            snapshot: RegisterSnapshot recording the register writes, or None
+        """
+        self.port_settings = dict(port_settings)
+        self._loop = loop
+        self._context = multiprocessing.get_context("spawn")
+        self.bank = SharedRegisterBank(write_lock=self._context.Lock())
+        self.databank = SharedBankDatabank(self.bank, error_on_missing_slave=False,
+                                           layout_listener=self._declare_block, snapshot=snapshot)
+        self.stats = BusStats()
+        self._child_commands, self._commands = self._context.Pipe(duplex=False)
+        self._events, self._child_events = self._context.Pipe(duplex=False)
+        self._process = None
+        self._add_reader = None
+
+    def add_slave(self, slave_id, unsigned=True, memory=None):
+        """Add a slave here and in the server process."""
+        slave = self.databank.add_slave(slave_id, unsigned, memory)
+        self._commands.send(("add_slave", slave_id))
+        return slave
+
+    def get_slave(self, slave_id):
+        return self.databank.get_slave(slave_id)
+
+    def _declare_block(self, slave_id, block_name, block_type, starting_address, size):
+        self._commands.send(("add_block", slave_id, block_name, block_type, starting_address, size))
+
+    def start(self):
+        """Start the server process and listen for its events.
+
+        Spawning the process blocks; start() may run in an executor, the
+        event reader is added on the loop.
+        """
+        self._process = self._context.Process(
+            target=serve_bus,
+            args=(self.port_settings, self.bank.name, self.bank.write_lock,
+                  self._child_commands, self._child_events),
+            name="ecto_modbus %s" % self.port_settings["port"],
+            daemon=True,
+        )
+        self._process.start()
+        # The child holds its own ends now
+        self._child_commands.close()
+        self._child_events.close()
+        self._add_reader = self._loop.call_soon_threadsafe(
+            self._loop.add_reader, self._events.fileno(), self._on_events)
+        _LOGGER.debug("Server process started: port=%s, pid=%s",
+                      self.port_settings["port"], self._process.pid)
+
+    def stop(self):
+        """Stop the server process and release the shared register bank.
+
+        Blocks for up to STOP_TIMEOUT while the process exits; on the event
+        loop use async_stop.
+        """
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        self._remove_reader()
+        self._shutdown(process)
+
+    async def async_stop(self):
+        """Stop from the event loop: the server process is joined in an executor."""
+        if self._process is None:
+            return
+        process, self._process = self._process, None
+        self._remove_reader()
+        await self._loop.run_in_executor(None, self._shutdown, process)
+
+    def _remove_reader(self):
+        self._add_reader.cancel()
+        self._loop.remove_reader(self._events.fileno())
+
+    def _shutdown(self, process):
+        """Ask the server process to exit, reap it and release the pipes and bank. Blocking."""
+        try:
+            self._commands.send(("stop",))
+        except OSError:
+            pass
+        process.join(STOP_TIMEOUT)
+        if process.is_alive():
+            _LOGGER.warning("Server process did not stop, terminating: pid=%s", process.pid)
+            process.terminate()
+            process.join()
+        self._commands.close()
+        self._events.close()
+        self.bank.close()
+
+    def _on_events(self):
+        """Handle the events the server process sent (HA loop)."""
+        events = self._events
+        try:
+            while events.poll():
+                event = events.recv()
+                if event[0] == "write":
+                    self._replay_write(event[1], event[2])
+                elif event[0] == "stats":
+                    self.stats.update_from(event[1])
+        except EOFError:
+            _LOGGER.error("Server process exited: port=%s", self.port_settings["port"])
+            self._loop.remove_reader(events.fileno())
+
+    def _replay_write(self, slave_id, request_pdu):
+        try:
+            slave = self.databank.get_slave(slave_id)
+        except MissingKeyError:
+            return
+        snapshot = self.databank.snapshot
+        written = written_registers(request_pdu)
+        if snapshot is not None and written is not None:
+            start, end = written
+            snapshot.store(slave_id, cst.HOLDING_REGISTERS, start,
+                           self.bank.read(slave_id, cst.HOLDING_REGISTERS, start, end - start))
+        hook_name = WRITE_HOOKS.get(request_pdu[0])
+        if hook_name is not None:
+            call_hooks(hook_name, (slave, request_pdu))
+
+
+def _apply_command(databank, command):
+    """Apply a command of the integration; False for stop."""
+    if command[0] == "stop":
+        return False
+    if command[0] == "add_slave":
+        databank.add_slave(command[1])
+    elif command[0] == "add_block":
+        databank.get_slave(command[1]).add_block(*command[2:])
+    return True
+
+
+def serve_bus(port_settings, bank_name, write_lock, commands, events):
+    """Server process: answer the bus from the shared register bank until stopped."""
+    bank = SharedRegisterBank(bank_name, write_lock)
+    send_lock = threading.Lock()
+
+    def send(event):
+        # Called from the server thread and this one
+        with send_lock:
+            events.send(event)
+
+    databank = SharedBankDatabank(
+        bank, error_on_missing_slave=False,
+        write_listener=lambda slave_id, request_pdu: send(("write", slave_id, request_pdu)))
+    port = CaptureSerialWrapper(open_serial_port(**port_settings), None, _LOGGER, port_settings["port"])
+    server = EctoRtuServer(port, interchar_multiplier=1, databank=databank)
+    frames = 0
+    try:
+        # Declare the slaves queued before the process started, so that the
+        # first requests find them
+        while commands.poll():
+            if not _apply_command(databank, commands.recv()):
+                return
+        server.start()
+        while True:
+            if commands.poll(STATS_INTERVAL) and not _apply_command(databank, commands.recv()):
+                break
+            if server.stats.frames != frames:
+                try:
+                    send(("stats", server.stats))
+                    frames = server.stats.frames
+                except RuntimeError:
+                    # A new slave was added while pickling; send on the next round
+                    pass
+    except EOFError:
+        # The integration went away without stopping us
+        pass
+    finally:
+        server.stop()
+        bank.close()
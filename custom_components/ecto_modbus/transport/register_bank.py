@@ -0,0 +1,382 @@
+import logging
+import struct
+import sys
+import threading
+from array import array
+
+import modbus_tk.defines as cst
+from modbus_tk.exceptions import (
+    DuplicatedKeyError,
+    InvalidArgumentError,
+    MissingKeyError,
+    ModbusError,
+    OutOfModbusBlockError,
+    OverlapModbusBlockError,
+)
+from modbus_tk.modbus import Databank, Slave
+
+from .response_cache import (
+    CACHED_FUNCTIONS,
+    READ_REQUEST_LENGTH,
+    ResponseCache,
+    written_range,
+    written_registers,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Register tables kept as array images; coils/discrete inputs stay on modbus_tk blocks
+BANK_TABLES = (cst.HOLDING_REGISTERS, cst.ANALOG_INPUTS)
+
+_SWAP_BYTES = sys.byteorder == "little"
+
+
+class _FunctionCodeMap:
+    """Per-slave view of the Slave function-code dispatch table.
+
+    modbus_tk builds a dict of eleven bound methods for every slave; this
+    binds on lookup from one class-level table instead.
+    """
+
+    __slots__ = ("_slave",)
+
+    def __init__(self, slave):
+        self._slave = slave
+
+    def __contains__(self, function_code):
+        return function_code in self._slave.FUNCTION_CODES
+
+    def __getitem__(self, function_code):
+        return getattr(self._slave, self._slave.FUNCTION_CODES[function_code])
+
+
+class RegisterBankSlave(Slave):
+    """modbus_tk Slave whose register tables live in one array('H') image each.
+
+    Blocks added with add_block only mark an address range as valid; their
+    values are stored in the per-table image, so set_values/get_values and
+    the RTU read/write handlers index a flat array instead of looking up and
+    copying per-block Python lists. Reads are served as a byte-swapped slice
+    of the image. Images are created on the first block of a table and grow
+    to the highest mapped register.
+
+    Images are copy-on-write: a writer copies the table image, changes the
+    copy and publishes it with one reference swap, so a reader always gets a
+    whole image with every write either fully applied or not at all (the 10
+    relay timers included). Readers, the RTU server's read requests among
+    them, take no lock. Writers only serialize among themselves on a short
+    write lock held for the copy and the swap; modbus_tk's slave lock, which
+    the server holds for a whole request, is never taken from the HA loop.
+    Writes from the bus (FC 0x06/0x10/0x16/0x17) are applied by modbus_tk to
+    a draft copy, and the written registers are published when the request
+    succeeded.
+
+    With a `response_cache` (set by RegisterBankDatabank) every write drops
+    the cached read responses overlapping the written registers; with a
+    `snapshot` every published write is also copied into the register
+    snapshot file.
+    """
+
+    FUNCTION_CODES = {
+        cst.READ_COILS: "_read_coils",
+        cst.READ_DISCRETE_INPUTS: "_read_discrete_inputs",
+        cst.READ_INPUT_REGISTERS: "_read_input_registers",
+        cst.READ_HOLDING_REGISTERS: "_read_holding_registers",
+        cst.READ_EXCEPTION_STATUS: "_read_exception_status",
+        cst.WRITE_SINGLE_COIL: "_write_single_coil",
+        cst.WRITE_SINGLE_REGISTER: "_write_single_register",
+        cst.WRITE_MULTIPLE_COILS: "_write_multiple_coils",
+        cst.WRITE_MULTIPLE_REGISTERS: "_write_multiple_registers",
+        cst.MASK_WRITE_REGISTER: "_mask_write_register",
+        cst.READ_WRITE_MULTIPLE_REGISTERS: "_read_write_multiple_registers",
+    }
+
+    def __init__(self, slave_id, unsigned=True, memory=None):
+        super().__init__(slave_id, unsigned, memory)
+        self._fn_code_map = _FunctionCodeMap(self)
+        # table -> array('H'); a published image is never changed in place
+        self.images = {}
+        # Serializes writers (HA loop and bus writes); readers never take it
+        self._write_lock = threading.Lock()
+        # Holding register copy modbus_tk writes into while serving a bus write
+        self._draft = None
+        # block name -> (table, start, end)
+        self._bank_blocks = {}
+        # Computed registers: (table, start, end, provider) evaluated on bus reads
+        self._read_providers = []
+        self.response_cache = None
+        self.snapshot = None
+
+    @property
+    def slave_id(self):
+        return self._id
+
+    def _invalidate(self, table, start, end):
+        if self.response_cache is not None:
+            self.response_cache.invalidate(self._id, table, start, end)
+
+    def _grow(self, table, size):
+        """Extend (or create) a table image so that `size` registers fit."""
+        with self._write_lock:
+            image = self.images.get(table)
+            image = array('H') if image is None else image[:]
+            missing = size - len(image)
+            if missing > 0:
+                image.frombytes(bytes(2 * missing))
+            self.images[table] = image
+
+    def add_block(self, block_name, block_type, starting_address, size):
+        """Register a block as a valid address range of the table image."""
+        if block_type not in BANK_TABLES:
+            return super().add_block(block_name, block_type, starting_address, size)
+        with self._data_lock:
+            if size <= 0:
+                raise InvalidArgumentError("size must be a positive number")
+            if starting_address < 0:
+                raise InvalidArgumentError("starting address must be zero or positive number")
+            if block_name in self._blocks or block_name in self._bank_blocks:
+                raise DuplicatedKeyError("Block {0} already exists. ".format(block_name))
+
+            end = starting_address + size
+            for table, start, stop in self._bank_blocks.values():
+                if table == block_type and starting_address < stop and start < end:
+                    raise OverlapModbusBlockError(
+                        "Overlap block at {0} size {1}".format(starting_address, size)
+                    )
+            self._grow(block_type, end)
+            self._bank_blocks[block_name] = (block_type, starting_address, end)
+            self._invalidate(block_type, starting_address, end)
+
+    def remove_block(self, block_name):
+        """Remove the block with the given name."""
+        if block_name not in self._bank_blocks:
+            return super().remove_block(block_name)
+        with self._data_lock:
+            block_type, starting_address, end = self._bank_blocks.pop(block_name)
+            self._publish(block_type, starting_address, array('H', bytes(2 * (end - starting_address))))
+            self._invalidate(block_type, starting_address, end)
+
+    def remove_all_blocks(self):
+        """Remove all the blocks"""
+        with self._data_lock:
+            super().remove_all_blocks()
+            self._bank_blocks.clear()
+            self.images.clear()
+            if self.response_cache is not None:
+                self.response_cache.clear(self._id)
+
+    def _bank_range(self, block_name, address, size):
+        try:
+            block_type, starting_address, end = self._bank_blocks[block_name]
+        except KeyError:
+            raise MissingKeyError("block {0} not found".format(block_name))
+        if address < starting_address or address + size > end:
+            raise OutOfModbusBlockError(
+                "address {0} size {1} is out of block {2}".format(address, size, block_name)
+            )
+        return block_type
+
+    def set_values(self, block_name, address, values):
+        """Set the values of the items at the given address"""
+        if block_name not in self._bank_blocks:
+            return super().set_values(block_name, address, values)
+        if not isinstance(values, (list, tuple, array)):
+            values = (values,)
+        block_type = self._bank_range(block_name, address, len(values))
+        self.write(block_type, address, values)
+
+    def get_values(self, block_name, address, size=1):
+        """Return the values of n items at the given address of the given block"""
+        if block_name not in self._bank_blocks:
+            return super().get_values(block_name, address, size)
+        block_type = self._bank_range(block_name, address, size)
+        return tuple(self.images[block_type][address:address + size])
+
+    def write(self, table, address, values):
+        """Write register values straight into the table image.
+
+        Values are stored as unsigned 16-bit (negative numbers in two's
+        complement), matching what the master reads back.
+        """
+        self._publish(table, address, array('H', [v & 0xFFFF for v in values]))
+        self._invalidate(table, address, address + len(values))
+
+    def _publish(self, table, address, values):
+        """Swap in a copy of the table image with `values` stored at `address`."""
+        with self._write_lock:
+            image = self.images[table][:]
+            image[address:address + len(values)] = values
+            self.images[table] = image
+            if self.snapshot is not None:
+                self.snapshot.store(self._id, table, address, values)
+
+    def read(self, table, address, count):
+        """Return a copy of `count` registers from the table image."""
+        return self.images[table][address:address + count]
+
+    def set_read_provider(self, table, address, size, provider):
+        """Compute registers when a bus read reaches them.
+
+        `provider()` is called from the RTU server (thread or event loop)
+        before a read overlapping address..address+size-1 is answered. It
+        returns the new register values, or None to serve the stored ones.
+        """
+        self._read_providers.append((table, address, address + size, provider))
+        self._invalidate(table, address, address + size)
+
+    def has_read_provider(self, table, address, count):
+        """Return True if registers address..address+count-1 are (partly) computed."""
+        end = address + count
+        for provider_table, start, stop, _provider in self._read_providers:
+            if provider_table == table and start < end and address < stop:
+                return True
+        return False
+
+    def refresh(self, table, address, count):
+        """Run the read providers overlapping the given register range."""
+        end = address + count
+        for provider_table, start, stop, provider in self._read_providers:
+            if provider_table == table and start < end and address < stop:
+                try:
+                    values = provider()
+                except Exception as e:
+                    _LOGGER.error("Read provider for registers 0x%02X-0x%02X failed: %s",
+                                  start, stop - 1, e)
+                    continue
+                if values is not None:
+                    self.write(table, start, values)
+
+    def _get_block_and_offset(self, block_type, address, length):
+        """Return (image, address) for register tables; modbus_tk indexes it like a block."""
+        if block_type not in BANK_TABLES:
+            return super()._get_block_and_offset(block_type, address, length)
+        end = address + length
+        # Like modbus_tk, a request must fall inside a single block
+        for table, start, stop in self._bank_blocks.values():
+            if table == block_type and start <= address and end <= stop:
+                if self._draft is not None and block_type == cst.HOLDING_REGISTERS:
+                    return self._draft, address
+                return self.images[block_type], address
+        raise ModbusError(cst.ILLEGAL_DATA_ADDRESS)
+
+    def _write_request(self, handler, request_pdu):
+        """Run a modbus_tk write handler on a draft image, publish it on success.
+
+        The handler runs without the write lock; only the written registers
+        are merged into the then-current image, so HA writes to other
+        registers made meanwhile are kept.
+        """
+        written = written_registers(request_pdu)
+        if written is None or cst.HOLDING_REGISTERS not in self.images:
+            return handler(request_pdu)
+        self._draft = draft = self.images[cst.HOLDING_REGISTERS][:]
+        try:
+            response = handler(request_pdu)
+        finally:
+            self._draft = None
+        start, end = written
+        self._publish(cst.HOLDING_REGISTERS, start, draft[start:end])
+        return response
+
+    def _write_single_register(self, request_pdu):
+        return self._write_request(super()._write_single_register, request_pdu)
+
+    def _write_multiple_registers(self, request_pdu):
+        return self._write_request(super()._write_multiple_registers, request_pdu)
+
+    def _mask_write_register(self, request_pdu):
+        return self._write_request(super()._mask_write_register, request_pdu)
+
+    def _read_write_multiple_registers(self, request_pdu):
+        return self._write_request(super()._read_write_multiple_registers, request_pdu)
+
+    def _read_registers(self, block_type, request_pdu):
+        """Serve FC 0x03/0x04 as one byte-swapped slice of the table image."""
+        (starting_address, quantity_of_x) = struct.unpack(">HH", request_pdu[1:5])
+        if (quantity_of_x <= 0) or (quantity_of_x > 125):
+            raise ModbusError(cst.ILLEGAL_DATA_VALUE)
+        self._get_block_and_offset(block_type, starting_address, quantity_of_x)
+        if self._read_providers:
+            self.refresh(block_type, starting_address, quantity_of_x)
+        # Fetch the image after the providers published their values
+        values = self.images[block_type][starting_address:starting_address + quantity_of_x]
+        if _SWAP_BYTES:
+            values.byteswap()
+        return bytes((2 * quantity_of_x,)) + values.tobytes()
+
+
+class RegisterBankDatabank(Databank):
+    """Databank creating RegisterBankSlave slaves; usable by both RTU backends.
+
+    Signed slaves keep the plain modbus_tk Slave: the images are unsigned.
+
+    Register reads of bank slaves are answered from `response_cache` when the
+    same request was served before and no write touched its registers since.
+    Computed registers (read providers) are never cached. Cache hits skip the
+    modbus_tk Slave hooks of the read; write hooks are unaffected.
+    """
+
+    def __init__(self, error_on_missing_slave=True, response_cache=True, snapshot=None):
+        super().__init__(error_on_missing_slave)
+        self.response_cache = ResponseCache() if response_cache else None
+        # RegisterSnapshot recording the register writes of every slave
+        self.snapshot = snapshot
+
+    def handle_request(self, query, request):
+        """Serve cached register reads, handle everything else like modbus_tk."""
+        cache = self.response_cache
+        if cache is None:
+            return super().handle_request(query, request)
+        if len(request) == READ_REQUEST_LENGTH and request[1] in CACHED_FUNCTIONS and request[0]:
+            key = bytes(request)
+            response = cache.get(key)
+            if response is not None:
+                return response
+            generation = cache.generation
+            response = super().handle_request(query, request)
+            if response and response[1] == key[1] and self._cacheable(key):
+                cache.store(key, response, generation)
+            return response
+        response = super().handle_request(query, request)
+        # Writes from the bus change the image in place, past RegisterBankSlave.write
+        written = written_range(request)
+        if written is not None:
+            if request[0]:
+                cache.invalidate(request[0], cst.HOLDING_REGISTERS, *written)
+            else:
+                cache.clear()
+        return response
+
+    def _cacheable(self, key):
+        slave = self._slaves.get(key[0])
+        if not isinstance(slave, RegisterBankSlave) or slave.response_cache is not self.response_cache:
+            return False
+        start, count = struct.unpack(">HH", key[2:6])
+        return not slave.has_read_provider(CACHED_FUNCTIONS[key[1]], start, count)
+
+    def add_slave(self, slave_id, unsigned=True, memory=None):
+        """Add a new slave with the given id"""
+        if not unsigned:
+            return super().add_slave(slave_id, unsigned, memory)
+        with self._lock:
+            if (slave_id <= 0) or (slave_id > 255):
+                raise Exception("Invalid slave id {0}".format(slave_id))
+            if slave_id in self._slaves:
+                raise DuplicatedKeyError("Slave {0} already exists".format(slave_id))
+            slave = self._slaves[slave_id] = RegisterBankSlave(slave_id, unsigned, memory)
+            slave.response_cache = self.response_cache
+            slave.snapshot = self.snapshot
+            _LOGGER.debug("Register bank slave added: slave_id=%s", slave_id)
+            return slave
+
+    def remove_slave(self, slave_id):
+        """Remove the slave with the given id"""
+        super().remove_slave(slave_id)
+        if self.response_cache is not None:
+            self.response_cache.clear(slave_id)
+
+    def remove_all_slaves(self):
+        """Remove all the slaves"""
+        super().remove_all_slaves()
+        if self.response_cache is not None:
+            self.response_cache.clear()
@@ -0,0 +1,136 @@
+import logging
+import struct
+
+import modbus_tk.defines as cst
+
+_LOGGER = logging.getLogger(__name__)
+
+# Cached read function code -> register table
+CACHED_FUNCTIONS = {
+    cst.READ_HOLDING_REGISTERS: cst.HOLDING_REGISTERS,
+    cst.READ_INPUT_REGISTERS: cst.ANALOG_INPUTS,
+}
+
+# Read requests are slave, function code, start, count and CRC
+READ_REQUEST_LENGTH = 8
+
+DEFAULT_MAX_ENTRIES = 256
+
+_ADDRESS_COUNT = struct.Struct(">HH")
+
+
+def written_registers(request_pdu):
+    """Return (start, end) of the holding registers written by a request PDU.
+
+    Returns:
+        tuple: half-open register range, or None if the request writes no
+        holding registers
+    """
+    if len(request_pdu) < 5:
+        return None
+    function_code = request_pdu[0]
+    if function_code in (cst.WRITE_SINGLE_REGISTER, cst.MASK_WRITE_REGISTER):
+        (address,) = struct.unpack(">H", request_pdu[1:3])
+        return address, address + 1
+    if function_code == cst.WRITE_MULTIPLE_REGISTERS:
+        address, count = _ADDRESS_COUNT.unpack(request_pdu[1:5])
+        return address, address + count
+    if function_code == cst.READ_WRITE_MULTIPLE_REGISTERS and len(request_pdu) >= 9:
+        address, count = _ADDRESS_COUNT.unpack(request_pdu[5:9])
+        return address, address + count
+    return None
+
+
+def written_range(frame):
+    """Return (start, end) of the holding registers written by an RTU request frame."""
+    return written_registers(memoryview(frame)[1:])
+
+
+class ResponseCache:
+    """Fully encoded RTU responses of register reads (FC 0x03/0x04).
+
+    Entries are keyed by the request frame, which is the slave, function
+    code, start address and count plus their CRC: a repeated poll costs one
+    dict lookup and the stored frame is written back as is, without parsing,
+    databank lookup or CRC.
+
+    Writes drop exactly the entries whose register range they overlap
+    (invalidate). A response computed while a write lands in another thread
+    is not kept: every invalidation bumps `generation`, and store() discards
+    its entry if the generation moved since the request was parsed.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        # request frame -> response frame
+        self._responses = {}
+        # slave id -> {request frame: (table, start, end)}
+        self._ranges = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._responses)
+
+    def get(self, key):
+        """Return the cached response for a request frame (bytes), or None."""
+        response = self._responses.get(key)
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def store(self, key, response, generation):
+        """Keep the response of a read request parsed at `generation`."""
+        if generation != self.generation:
+            return
+        if len(self._responses) >= self.max_entries:
+            # A master scanning the address space; start over
+            self.clear()
+            generation = self.generation
+        slave_id = key[0]
+        table = CACHED_FUNCTIONS[key[1]]
+        start, count = _ADDRESS_COUNT.unpack(key[2:6])
+        self._ranges.setdefault(slave_id, {})[key] = (table, start, start + count)
+        self._responses[key] = response
+        if generation != self.generation:
+            # A writer got in between: it may have missed the new entry
+            self._drop(slave_id, key)
+
+    def invalidate(self, slave_id, table, start, end):
+        """Drop the entries of a slave overlapping registers start..end-1 of a table."""
+        self.generation += 1
+        entries = self._ranges.get(slave_id)
+        if not entries:
+            return
+        for key, (entry_table, entry_start, entry_end) in list(entries.items()):
+            if entry_table == table and entry_start < end and start < entry_end:
+                self._drop(slave_id, key)
+
+    def clear(self, slave_id=None):
+        """Drop the entries of one slave, or all of them."""
+        self.generation += 1
+        if slave_id is None:
+            self._responses.clear()
+            self._ranges.clear()
+            return
+        for key in list(self._ranges.pop(slave_id, ())):
+            self._responses.pop(key, None)
+
+    def _drop(self, slave_id, key):
+        self._responses.pop(key, None)
+        entries = self._ranges.get(slave_id)
+        if entries is not None:
+            entries.pop(key, None)
+
+    def as_dict(self):
+        """Return the counters as a JSON-friendly dict."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._responses),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
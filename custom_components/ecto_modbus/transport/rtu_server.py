@@ -0,0 +1,103 @@
+import logging
+import time
+
+from modbus_tk import modbus_rtu
+from modbus_tk.hooks import call_hooks
+
+from .async_rtu import expected_request_length, is_complete_frame
+from .stats import BusStats
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EctoRtuServer(modbus_rtu.RtuServer):
+    """modbus_tk RtuServer with a buffered frame reader and turnaround statistics.
+
+    modbus_tk reads a request through pyserial's timed read loop, which wakes
+    up for every received byte and only completes the frame after an extra
+    read timeout. Here the thread blocks for the first byte only, then sleeps
+    for as long as the rest of the announced request takes on the wire and
+    drains ``in_waiting`` in bulk. A frame is complete as soon as its
+    announced length has arrived with a valid CRC, otherwise after t3.5 of
+    line silence (computed from the baudrate). The frame is handed to the
+    parser as one memoryview.
+
+    The turnaround starts at the last request byte, taken from the
+    ``last_rx_ns`` timestamp of the serial wrapper (time of the handler call
+    when the port is not wrapped), and ends when the response is handed to
+    the port.
+    """
+
+    def __init__(self, serial, *args, **kwargs):
+        super().__init__(serial, *args, **kwargs)
+        self.stats = BusStats()
+        self._frame_silence = self.get_timeout()
+        # Time one character takes on the wire (t0 is floored above 19200 baud)
+        self._char_time = 11.0 / self._serial.baudrate
+
+    def _handle(self, request):
+        rx_ns = getattr(self._serial, "last_rx_ns", None) or time.perf_counter_ns()
+        response = super()._handle(request)
+        self.stats.record(request, response, rx_ns)
+        return response
+
+    def _read_frame(self):
+        """Block for the next request frame and return it (empty if none arrived)."""
+        serial = self._serial
+        frame = bytearray()
+        if self._block_on_first_byte:
+            serial.timeout = None
+            try:
+                frame += serial.read(1)
+            except Exception:
+                serial.close()
+                serial.open()
+            serial.timeout = self._timeout
+        last_rx = time.perf_counter()
+        while True:
+            if is_complete_frame(frame):
+                return frame
+            waiting = serial.in_waiting
+            if waiting:
+                frame += serial.read(waiting)
+                last_rx = time.perf_counter()
+                continue
+            idle = time.perf_counter() - last_rx
+            if idle >= self._frame_silence:
+                return frame
+            # Sleep while the rest of the request is on the wire
+            expected = expected_request_length(frame)
+            remaining = expected - len(frame) if expected is not None and expected > len(frame) else 1
+            time.sleep(min(remaining * self._char_time, self._frame_silence - idle))
+
+    def _do_run(self):
+        """Serve one request: same hooks and write path as modbus_tk's RtuServer."""
+        try:
+            frame = self._read_frame()
+            if not frame:
+                return
+            request = memoryview(frame)
+            retval = call_hooks("modbus_rtu.RtuServer.after_read", (self, request))
+            if retval is not None:
+                request = retval
+
+            response = self._handle(request)
+
+            retval = call_hooks("modbus_rtu.RtuServer.before_write", (self, response))
+            if retval is not None:
+                response = retval
+
+            if response:
+                if self._serial.in_waiting > 0:
+                    # Most likely master timed out on this request and started a new one
+                    _LOGGER.warning("Not sending response because there is new request pending")
+                else:
+                    self._serial.write(response)
+                    self._serial.flush()
+                    time.sleep(self.get_timeout())
+
+            call_hooks("modbus_rtu.RtuServer.after_write", (self, response))
+
+        except Exception as excpt:
+            _LOGGER.error("Error while handling request, Exception occurred: %s", excpt)
+            call_hooks("modbus_rtu.RtuServer.on_error", (self, excpt))
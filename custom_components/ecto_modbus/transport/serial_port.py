@@ -0,0 +1,19 @@
+import logging
+
+from serial import rs485
+
+from ..const import DEFAULT_BAUDRATE, PORT_TYPE_RS485
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def open_serial_port(port, port_type=PORT_TYPE_RS485, baudrate=DEFAULT_BAUDRATE):
+    """Open the serial port of a bus: an RS485 transceiver or a plain serial line."""
+    if port_type == PORT_TYPE_RS485:
+        serial_port = rs485.RS485(port, baudrate=baudrate, inter_byte_timeout=0.002)
+        _LOGGER.info("RS485 port configured: %s, baudrate=%d", port, baudrate)
+    else:
+        import serial
+        serial_port = serial.Serial(port, baudrate=baudrate, timeout=0.002)
+        _LOGGER.info("Serial port configured: %s, baudrate=%d", port, baudrate)
+    return serial_port
@@ -0,0 +1,277 @@
+import logging
+import struct
+import threading
+import time
+from array import array
+from multiprocessing import shared_memory
+
+import modbus_tk.defines as cst
+from modbus_tk.exceptions import (
+    DuplicatedKeyError,
+    InvalidArgumentError,
+    MissingKeyError,
+    ModbusError,
+    OutOfModbusBlockError,
+    OverlapModbusBlockError,
+)
+from modbus_tk.hooks import call_hooks
+from modbus_tk.modbus import Databank, Slave
+
+from .response_cache import written_registers
+
+_LOGGER = logging.getLogger(__name__)
+
+# Register tables kept in shared memory, in segment order
+SHARED_TABLES = (cst.HOLDING_REGISTERS, cst.ANALOG_INPUTS)
+_TABLE_INDEX = {table: index for index, table in enumerate(SHARED_TABLES)}
+
+# Registers 0x00-0x3F of every table of every slave address
+SHARED_REGISTERS = 0x40
+SLAVE_IDS = 256
+
+# Segment layout: one uint32 sequence counter per slave, then the registers
+_SEQUENCE_BYTES = 4 * SLAVE_IDS
+_REGISTER_BYTES = 2 * SLAVE_IDS * len(SHARED_TABLES) * SHARED_REGISTERS
+SEGMENT_SIZE = _SEQUENCE_BYTES + _REGISTER_BYTES
+
+
+class SharedRegisterBank:
+    """Register images of every slave in one multiprocessing.shared_memory segment.
+
+    Holding and input registers 0x00-0x3F of all 256 slave addresses sit at
+    fixed offsets, so the integration and the server process see the same
+    values without copying or messages. The segment is created by the
+    integration (no `name`) and attached by the server process by name.
+
+    Each slave has a sequence counter that writers make odd while changing
+    its registers (seqlock). Writers of both processes serialize on
+    `write_lock`, a multiprocessing lock; readers take no lock and retry
+    until they saw an even, unchanged counter, so a read never mixes old and
+    new values of a multi-register write (the 10 relay timers).
+    """
+
+    def __init__(self, name=None, write_lock=None):
+        create = name is None
+        self._shm = shared_memory.SharedMemory(name=name, create=create, size=SEGMENT_SIZE)
+        self._owner = create
+        self.write_lock = write_lock if write_lock is not None else threading.Lock()
+        buf = self._shm.buf
+        self._sequence = buf[:_SEQUENCE_BYTES].cast('I')
+        self.registers = buf[_SEQUENCE_BYTES:SEGMENT_SIZE].cast('H')
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @staticmethod
+    def offset(slave_id, table, address):
+        """Index of a register in `registers`."""
+        return (slave_id * len(SHARED_TABLES) + _TABLE_INDEX[table]) * SHARED_REGISTERS + address
+
+    def begin_write(self, slave_id):
+        """Take the write lock and mark the slave's registers as changing."""
+        self.write_lock.acquire()
+        self._sequence[slave_id] += 1
+
+    def end_write(self, slave_id):
+        """Publish the slave's changed registers and release the write lock."""
+        self._sequence[slave_id] += 1
+        self.write_lock.release()
+
+    def write(self, slave_id, table, address, values):
+        """Store register values (unsigned 16-bit) of a slave."""
+        start = self.offset(slave_id, table, address)
+        values = array('H', [v & 0xFFFF for v in values])
+        self.begin_write(slave_id)
+        try:
+            self.registers[start:start + len(values)] = values
+        finally:
+            self.end_write(slave_id)
+
+    def read_consistent(self, slave_id, read):
+        """Call `read()` until it ran without a write of the slave in between."""
+        sequence = self._sequence
+        while True:
+            before = sequence[slave_id]
+            if before & 1:
+                # A writer is in the middle of an update; let it finish
+                time.sleep(0)
+                continue
+            result = read()
+            if sequence[slave_id] == before:
+                return result
+
+    def read(self, slave_id, table, address, count):
+        """Return a consistent tuple of `count` registers of a slave."""
+        start = self.offset(slave_id, table, address)
+        registers = self.registers
+        return self.read_consistent(slave_id, lambda: tuple(registers[start:start + count]))
+
+    def close(self):
+        """Detach from the segment; the creating side also removes it."""
+        self._sequence.release()
+        self.registers.release()
+        try:
+            self._shm.close()
+        except BufferError as e:
+            _LOGGER.warning("Shared register bank %s still in use: %s", self.name, e)
+        if self._owner:
+            self._shm.unlink()
+
+
+class SharedBankSlave(Slave):
+    """modbus_tk Slave whose register tables live in a SharedRegisterBank.
+
+    The same class serves both sides: in the integration set_values and
+    get_values (ModBusRegisterSensor) go to the bank, in the server process
+    the modbus_tk request handlers index the bank directly. Blocks only mark
+    address ranges as valid; `layout_listener(slave_id, block_name, table,
+    start, size)` is told about every register block so that the other
+    process can declare it too. Coils and discrete inputs stay on local
+    modbus_tk blocks.
+
+    Bus write requests are parsed and checked first and then stored with one
+    bank write, so the seqlock is held only for the register copy; bus read
+    requests are retried until no write overlapped them. `write_listener(slave_id,
+    request_pdu)` is called after every successful register write request.
+    Register writes through set_values are copied to `snapshot` if set.
+    """
+
+    def __init__(self, slave_id, bank, unsigned=True, memory=None,
+                 layout_listener=None, write_listener=None):
+        super().__init__(slave_id, unsigned, memory)
+        self.bank = bank
+        # block name -> (table, start, end)
+        self._bank_blocks = {}
+        self.layout_listener = layout_listener
+        self.write_listener = write_listener
+        self.snapshot = None
+
+    @property
+    def slave_id(self):
+        return self._id
+
+    def add_block(self, block_name, block_type, starting_address, size):
+        """Register a block as a valid address range of the shared table."""
+        if block_type not in SHARED_TABLES:
+            return super().add_block(block_name, block_type, starting_address, size)
+        with self._data_lock:
+            if size <= 0:
+                raise InvalidArgumentError("size must be a positive number")
+            if starting_address < 0 or starting_address + size > SHARED_REGISTERS:
+                raise InvalidArgumentError(
+                    "registers 0x{0:02X}-0x{1:02X} are outside the shared bank".format(
+                        starting_address, starting_address + size - 1))
+            if block_name in self._blocks or block_name in self._bank_blocks:
+                raise DuplicatedKeyError("Block {0} already exists. ".format(block_name))
+            end = starting_address + size
+            for table, start, stop in self._bank_blocks.values():
+                if table == block_type and starting_address < stop and start < end:
+                    raise OverlapModbusBlockError(
+                        "Overlap block at {0} size {1}".format(starting_address, size)
+                    )
+            self._bank_blocks[block_name] = (block_type, starting_address, end)
+        if self.layout_listener is not None:
+            self.layout_listener(self._id, block_name, block_type, starting_address, size)
+
+    def _bank_range(self, block_name, address, size):
+        try:
+            block_type, starting_address, end = self._bank_blocks[block_name]
+        except KeyError:
+            raise MissingKeyError("block {0} not found".format(block_name))
+        if address < starting_address or address + size > end:
+            raise OutOfModbusBlockError(
+                "address {0} size {1} is out of block {2}".format(address, size, block_name)
+            )
+        return block_type
+
+    def set_values(self, block_name, address, values):
+        """Set the values of the items at the given address"""
+        if block_name not in self._bank_blocks:
+            return super().set_values(block_name, address, values)
+        if not isinstance(values, (list, tuple, array)):
+            values = (values,)
+        block_type = self._bank_range(block_name, address, len(values))
+        self.bank.write(self._id, block_type, address, values)
+        if self.snapshot is not None:
+            self.snapshot.store(self._id, block_type, address, values)
+
+    def get_values(self, block_name, address, size=1):
+        """Return the values of n items at the given address of the given block"""
+        if block_name not in self._bank_blocks:
+            return super().get_values(block_name, address, size)
+        block_type = self._bank_range(block_name, address, size)
+        return self.bank.read(self._id, block_type, address, size)
+
+    def _get_block_and_offset(self, block_type, address, length):
+        """Return (bank registers, index) for shared tables; modbus_tk indexes it like a block."""
+        if block_type not in SHARED_TABLES:
+            return super()._get_block_and_offset(block_type, address, length)
+        end = address + length
+        # Like modbus_tk, a request must fall inside a single block
+        for table, start, stop in self._bank_blocks.values():
+            if table == block_type and start <= address and end <= stop:
+                return self.bank.registers, self.bank.offset(self._id, block_type, address)
+        raise ModbusError(cst.ILLEGAL_DATA_ADDRESS)
+
+    def _write_single_register(self, request_pdu):
+        """execute modbus function 6 with one bank write"""
+        call_hooks("modbus.Slave.handle_write_single_register_request", (self, request_pdu))
+        (data_address, value) = struct.unpack(">HH", request_pdu[1:5])
+        self._get_block_and_offset(cst.HOLDING_REGISTERS, data_address, 1)
+        self.bank.write(self._id, cst.HOLDING_REGISTERS, data_address, (value,))
+        # returns echo of the command
+        return request_pdu[1:]
+
+    def _write_multiple_registers(self, request_pdu):
+        """execute modbus function 16 with one bank write"""
+        call_hooks("modbus.Slave.handle_write_multiple_registers_request", (self, request_pdu))
+        (starting_address, quantity_of_x, byte_count) = struct.unpack(">HHB", request_pdu[1:6])
+        if (quantity_of_x <= 0) or (quantity_of_x > 123) or (byte_count != (quantity_of_x * 2)):
+            raise ModbusError(cst.ILLEGAL_DATA_VALUE)
+        self._get_block_and_offset(cst.HOLDING_REGISTERS, starting_address, quantity_of_x)
+        values = struct.unpack(">%dH" % quantity_of_x, request_pdu[6:6 + byte_count])
+        self.bank.write(self._id, cst.HOLDING_REGISTERS, starting_address, values)
+        return struct.pack(">HH", starting_address, quantity_of_x)
+
+    def handle_request(self, request_pdu, broadcast=False):
+        """Serve a request from the bus against the shared registers."""
+        handle = super().handle_request
+        if written_registers(request_pdu) is None:
+            return self.bank.read_consistent(self._id, lambda: handle(request_pdu, broadcast))
+        response = handle(request_pdu, broadcast)
+        # Broadcasts answer "", exceptions set bit 7 of the function code
+        if self.write_listener is not None and (broadcast or (response and not response[0] & 0x80)):
+            self.write_listener(self._id, bytes(request_pdu))
+        return response
+
+
+class SharedBankDatabank(Databank):
+    """Databank creating SharedBankSlave slaves on one SharedRegisterBank.
+
+    Signed slaves keep the plain modbus_tk Slave: the bank is unsigned.
+    """
+
+    def __init__(self, bank, error_on_missing_slave=True, layout_listener=None, write_listener=None,
+                 snapshot=None):
+        super().__init__(error_on_missing_slave)
+        self.bank = bank
+        self.layout_listener = layout_listener
+        self.write_listener = write_listener
+        self.snapshot = snapshot
+
+    def add_slave(self, slave_id, unsigned=True, memory=None):
+        """Add a new slave with the given id"""
+        if not unsigned:
+            return super().add_slave(slave_id, unsigned, memory)
+        with self._lock:
+            if (slave_id <= 0) or (slave_id > 255):
+                raise Exception("Invalid slave id {0}".format(slave_id))
+            if slave_id in self._slaves:
+                raise DuplicatedKeyError("Slave {0} already exists".format(slave_id))
+            slave = self._slaves[slave_id] = SharedBankSlave(
+                slave_id, self.bank, unsigned, memory,
+                layout_listener=self.layout_listener, write_listener=self.write_listener)
+            slave.snapshot = self.snapshot
+            _LOGGER.debug("Shared bank slave added: slave_id=%s", slave_id)
+            return slave
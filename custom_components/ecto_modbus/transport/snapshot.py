@@ -0,0 +1,94 @@
+import logging
+import mmap
+import os
+import struct
+from array import array
+
+import modbus_tk.defines as cst
+
+_LOGGER = logging.getLogger(__name__)
+
+# Register tables kept in the snapshot, in file order
+SNAPSHOT_TABLES = (cst.HOLDING_REGISTERS, cst.ANALOG_INPUTS)
+_TABLE_INDEX = {table: index for index, table in enumerate(SNAPSHOT_TABLES)}
+
+# Registers 0x00-0x3F of every table of every slave address
+SNAPSHOT_REGISTERS = 0x40
+SLAVE_IDS = 256
+
+# magic, registers per table, tables
+FILE_HEADER = struct.Struct("<8sHH")
+FILE_MAGIC = b"ECTOREG1"
+
+# Header, one "has been written" byte per slave, then the registers
+_PRESENT_START = FILE_HEADER.size
+_REGISTERS_START = _PRESENT_START + SLAVE_IDS
+FILE_SIZE = _REGISTERS_START + 2 * SLAVE_IDS * len(SNAPSHOT_TABLES) * SNAPSHOT_REGISTERS
+
+
+class RegisterSnapshot:
+    """Register images of every slave of a bus, kept in a memory-mapped file.
+
+    Register writes (from HA and from the bus) are copied into the mapping
+    as they happen, so the file always holds the last register values
+    without a save step; the kernel writes the pages back. On startup the
+    devices load the registers their restore policy allows (see
+    EctoDevice.RESTORED_REGISTERS) before the RTU server starts, so the
+    master reads the previous values from the first poll.
+
+    A file with another layout is started over.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        exists = os.path.exists(path) and os.path.getsize(path) == FILE_SIZE
+        self._file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            self._file.truncate(FILE_SIZE)
+        self._buf = mmap.mmap(self._file.fileno(), FILE_SIZE)
+        header = FILE_HEADER.unpack_from(self._buf, 0)
+        if header != (FILE_MAGIC, SNAPSHOT_REGISTERS, len(SNAPSHOT_TABLES)):
+            if exists:
+                _LOGGER.warning("Register snapshot %s has an unknown layout, starting over", path)
+            self._buf[:] = bytes(FILE_SIZE)
+            FILE_HEADER.pack_into(self._buf, 0, FILE_MAGIC, SNAPSHOT_REGISTERS, len(SNAPSHOT_TABLES))
+        view = memoryview(self._buf)
+        self._present = view[_PRESENT_START:_REGISTERS_START]
+        self._registers = view[_REGISTERS_START:FILE_SIZE].cast('H')
+        _LOGGER.debug("Register snapshot opened: %s, restored=%s", path, exists)
+
+    @staticmethod
+    def _offset(slave_id, table, address):
+        return (slave_id * len(SNAPSHOT_TABLES) + _TABLE_INDEX[table]) * SNAPSHOT_REGISTERS + address
+
+    def store(self, slave_id, table, address, values):
+        """Record written register values; registers past 0x3F are not kept."""
+        if table not in _TABLE_INDEX:
+            return
+        count = min(len(values), SNAPSHOT_REGISTERS - address)
+        if count <= 0:
+            return
+        values = values[:count]
+        if not isinstance(values, array):
+            values = array('H', [v & 0xFFFF for v in values])
+        start = self._offset(slave_id, table, address)
+        self._registers[start:start + count] = values
+        self._present[slave_id] = 1
+
+    def load(self, slave_id, table, address, count):
+        """Return the recorded registers as a tuple, or None if the slave was never written."""
+        if not self._present[slave_id] or address + count > SNAPSHOT_REGISTERS:
+            return None
+        start = self._offset(slave_id, table, address)
+        return tuple(self._registers[start:start + count])
+
+    def close(self):
+        """Flush the mapping and close the file."""
+        if self._file is None:
+            return
+        self._buf.flush()
+        self._present.release()
+        self._registers.release()
+        self._buf.close()
+        self._file.close()
+        self._file = None
@@ -0,0 +1,162 @@
+import time
+from array import array
+from bisect import bisect_left
+
+from modbus_tk import utils
+
+# Upper bounds (µs) of the turnaround histogram buckets; one overflow bucket follows
+LATENCY_BUCKETS_US = (
+    250, 500, 750, 1000, 1500, 2000, 3000, 4000, 5000, 7500,
+    10000, 15000, 20000, 30000, 50000, 75000, 100000, 200000, 500000, 1000000,
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of turnaround times; recording never allocates."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_US):
+        self.buckets = buckets
+        self.counts = array('Q', bytes(8 * (len(buckets) + 1)))
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, us):
+        self.counts[bisect_left(self.buckets, us)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def snapshot(self):
+        """Copy of the bucket counts, to be passed back as percentile(since=...)."""
+        return array('Q', self.counts)
+
+    def percentile(self, pct, since=None):
+        """Upper bound (µs) of the bucket holding the pct-th percentile, None if empty.
+
+        With `since` (a snapshot), only samples recorded after it are considered.
+        """
+        counts = self.counts
+        if since is not None:
+            counts = [now - then for now, then in zip(counts, since)]
+        total = sum(counts)
+        if not total:
+            return None
+        rank = pct / 100.0 * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= rank and count:
+                return self.buckets[index] if index < len(self.buckets) else self.max_us
+        return self.max_us
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_us / self.count / 1000.0, 3) if self.count else None,
+            "p50_ms": _ms(self.percentile(50)),
+            "p99_ms": _ms(self.percentile(99)),
+            "max_ms": _ms(self.max_us) if self.count else None,
+            "buckets_us": list(self.buckets),
+            "counts": list(self.counts),
+        }
+
+
+class SlaveStats:
+    """Request counters and turnaround histogram of one slave address."""
+
+    def __init__(self, slave_id):
+        self.slave_id = slave_id
+        # Requests per function code
+        self.function_codes = array('Q', bytes(8 * 256))
+        self.requests = 0
+        self.responses = 0
+        self.exceptions = 0
+        self.crc_errors = 0
+        self.turnaround = LatencyHistogram()
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "responses": self.responses,
+            "exceptions": self.exceptions,
+            "crc_errors": self.crc_errors,
+            "function_codes": {
+                "0x%02X" % code: count for code, count in enumerate(self.function_codes) if count
+            },
+            "turnaround": self.turnaround.as_dict(),
+        }
+
+
+class BusStats:
+    """Per-slave statistics of one RTU bus.
+
+    The RTU frontends call record() once per request frame with the time
+    the last request byte arrived and the time the response is written.
+    """
+
+    def __init__(self):
+        self.slaves = {}
+        self.frames = 0
+        self.short_frames = 0
+
+    def slave(self, slave_id):
+        """Return the statistics of a slave, creating them on first use."""
+        stats = self.slaves.get(slave_id)
+        if stats is None:
+            stats = self.slaves[slave_id] = SlaveStats(slave_id)
+        return stats
+
+    def record(self, request, response, rx_ns, tx_ns=None):
+        """Account one request frame and its response (empty if none was sent)."""
+        self.frames += 1
+        if len(request) < 4:
+            self.short_frames += 1
+            return
+        stats = self.slave(request[0])
+        # Only unanswered frames can have failed the CRC check
+        if not response and utils.calculate_crc(request[:-2]) != (request[-2] << 8 | request[-1]):
+            stats.crc_errors += 1
+            return
+        stats.requests += 1
+        stats.function_codes[request[1]] += 1
+        if not response:
+            return
+        stats.responses += 1
+        if len(response) > 1 and response[1] & 0x80:
+            stats.exceptions += 1
+        if tx_ns is None:
+            tx_ns = time.perf_counter_ns()
+        stats.turnaround.record((tx_ns - rx_ns) // 1000)
+
+    def update_from(self, other):
+        """Copy the counters of another BusStats in place (from the server process).
+
+        SlaveStats objects already handed out (diagnostic sensors) stay valid.
+        """
+        self.frames = other.frames
+        self.short_frames = other.short_frames
+        for slave_id, source in other.slaves.items():
+            stats = self.slave(slave_id)
+            stats.function_codes[:] = source.function_codes
+            stats.requests = source.requests
+            stats.responses = source.responses
+            stats.exceptions = source.exceptions
+            stats.crc_errors = source.crc_errors
+            turnaround = stats.turnaround
+            turnaround.counts[:] = source.turnaround.counts
+            turnaround.count = source.turnaround.count
+            turnaround.total_us = source.turnaround.total_us
+            turnaround.max_us = source.turnaround.max_us
+
+    def as_dict(self):
+        return {
+            "frames": self.frames,
+            "short_frames": self.short_frames,
+            "slaves": {str(slave_id): stats.as_dict() for slave_id, stats in sorted(self.slaves.items())},
+        }
+
+
+def _ms(us):
+    return None if us is None else round(us / 1000.0, 3)
@@ -170,7 +170,13 @@ def hass():
     """
     hass = MagicMock(spec=HomeAssistant)
     hass.data = {}
-    hass.async_add_executor_job = AsyncMock()
+    hass.loop = MagicMock()
+    hass.bus = MagicMock()
+    hass.services = MagicMock()
+    hass.states = MagicMock()
+    hass.states.get.return_value = None
+    # Executor jobs run inline
+    hass.async_add_executor_job = AsyncMock(side_effect=lambda target, *args: target(*args))
 
     # Mock common HA methods
     hass.async_run_job = AsyncMock()
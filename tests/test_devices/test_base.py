@@ -3,7 +3,11 @@ import pytest
 from unittest.mock import MagicMock, patch
 import modbus_tk.defines as cst
 
-from custom_components.ecto_modbus.devices.base import EctoDevice
+from custom_components.ecto_modbus.devices import bitfield
+from custom_components.ecto_modbus.devices.base import EctoChannelDevice, EctoDevice
+from custom_components.ecto_modbus.devices.binary_sensor import EctoCH10BinarySensor
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.devices.temperature import EctoTemperatureSensor
 
 
 class TestEctoDevice:
@@ -198,3 +202,25 @@ class TestEctoDevice:
 
         # Assert
         assert device.slave is mock_slave
+
+    @pytest.mark.parametrize("device_class", [EctoCH10BinarySensor, EctoRelay10CH, EctoTemperatureSensor])
+    def test_devices_and_registers_have_no_instance_dict(self, mock_modbus_server, device_class):
+        """Test that devices and their register wrappers are slotted."""
+        mock_server = MagicMock()
+        mock_server.add_slave.return_value = MagicMock()
+
+        device = device_class({'addr': 4}, mock_server)
+
+        assert not hasattr(device, '__dict__')
+        for register in device.registers.values():
+            assert not hasattr(register, '__dict__')
+
+    def test_channel_device_writes_register_0x10(self, mock_modbus_server):
+        """Test that channel devices write the encoded mask to register 0x10 by default."""
+        register = MagicMock()
+        device = EctoChannelDevice({'addr': 4}, MagicMock())
+        device.registers[0x10] = register
+
+        device.set_channels(0b1000000101, 0b1000000001)
+
+        register.set_raw_value.assert_called_once_with([bitfield.encode_channels(0b1000000001)])
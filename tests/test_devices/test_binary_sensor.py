@@ -300,3 +300,34 @@ class TestEctoCH10BinarySensor:
         assert hasattr(device, 'slave')
         assert hasattr(device, 'server')
         assert hasattr(device, 'config')
+
+    def test_set_switch_state_channels_8_and_9(self, mock_modbus_server):
+        """Test that channels 8-9 use the LSB byte instead of aliasing channels 6-7."""
+        mock_server = MagicMock()
+        mock_server.add_slave.return_value = MagicMock()
+
+        with patch('custom_components.ecto_modbus.devices.binary_sensor.ModBusRegisterSensor') as mock_sensor:
+            mock_instance = MagicMock()
+            mock_sensor.return_value = mock_instance
+
+            device = EctoCH10BinarySensor({'addr': 3}, mock_server)
+            device.set_switch_state(8, 1)
+            device.set_switch_state(9, 1)
+
+            mock_instance.set_raw_value.assert_called_with([0x0003])
+            assert device.switch == [0] * 8
+            assert device.get_channel_state(9) == 1
+
+    def test_set_channels(self, mock_modbus_server):
+        """Test that set_channels writes the splitter register once."""
+        mock_server = MagicMock()
+        mock_server.add_slave.return_value = MagicMock()
+
+        with patch('custom_components.ecto_modbus.devices.binary_sensor.ModBusRegisterSensor') as mock_sensor:
+            mock_instance = MagicMock()
+            mock_sensor.return_value = mock_instance
+
+            device = EctoCH10BinarySensor({'addr': 3}, mock_server)
+            device.set_channels(0x3FF, 0b1000000001)
+
+            mock_instance.set_raw_value.assert_called_once_with([0x0102])
@@ -0,0 +1,41 @@
+"""Tests for the channel bitfield codec."""
+from custom_components.ecto_modbus.devices import bitfield
+
+
+class TestBitfieldCodec:
+    """Test suite for register 0x10 encode/decode."""
+
+    def test_encode_msb_channels(self):
+        """Test that channels 0-7 land in the MSB byte."""
+        assert bitfield.encode_channels(0b1) == 0x0100
+        assert bitfield.encode_channels(0xFF) == 0xFF00
+
+    def test_encode_lsb_channels(self):
+        """Test that channels 8-9 land in bits 0-1 of the LSB byte."""
+        assert bitfield.encode_channels(1 << 8) == 0x0001
+        assert bitfield.encode_channels(0x3FF) == 0xFF03
+
+    def test_decode_roundtrip(self):
+        """Test that decode inverts encode for every 16-bit value."""
+        for value in range(0x10000):
+            assert bitfield.encode_channels(bitfield.decode_channels(value)) == value
+
+    def test_iter_channels(self):
+        """Test iterating the set channels of a diff mask."""
+        assert list(bitfield.iter_channels(0)) == []
+        assert list(bitfield.iter_channels(0b1000000101)) == [0, 2, 9]
+
+    def test_channel_states(self):
+        """Test expanding a mask to a list of states."""
+        assert bitfield.channel_states(0b1000000101, 10) == [1, 0, 1, 0, 0, 0, 0, 0, 0, 1]
+
+    def test_states_to_mask(self):
+        """Test packing a list of states into a mask."""
+        assert bitfield.states_to_mask([1, 0, 1, 0, 0, 0, 0, 0, 0, 1]) == 0b1000000101
+        assert bitfield.states_to_mask([True, False, 1]) == 0b101
+
+    def test_set_channel(self):
+        """Test setting and clearing a single channel."""
+        mask = bitfield.set_channel(0, 9, 1)
+        assert mask == 1 << 9
+        assert bitfield.set_channel(mask, 9, 0) == 0
@@ -279,6 +279,56 @@ class TestEctoRelay10CHTimer:
         assert all(t == 0 for t in device.timers)
 
 
+class TestEctoRelay10CHTimerWrites:
+    """Test suite for the delta and bulk timer register writes."""
+
+    @pytest.fixture
+    def device(self):
+        mock_server = MagicMock()
+        mock_server.add_slave.return_value = MagicMock()
+        device = EctoRelay10CH({'addr': 5}, mock_server)
+        device.registers[0x20] = MagicMock()
+        return device
+
+    def test_set_timer_writes_one_register(self, device):
+        """Test that set_timer only writes the channel's own register."""
+        assert device.set_timer(3, True, 10) is True
+
+        device.registers[0x20].set_raw_value.assert_called_once_with([(1 << 15) | 20], offset=3)
+
+    def test_set_timer_skips_unchanged(self, device):
+        """Test that writing the current value again is skipped."""
+        device.set_timer(3, True, 10)
+        device.registers[0x20].set_raw_value.reset_mock()
+
+        assert device.set_timer(3, True, 10) is False
+        device.registers[0x20].set_raw_value.assert_not_called()
+
+    def test_set_timers_one_contiguous_write(self, device):
+        """Test that set_timers writes the changed range once."""
+        device.set_timer(4, False, 1)
+        device.registers[0x20].set_raw_value.reset_mock()
+
+        changed = device.set_timers({2: (False, 5), 4: (False, 1), 6: (True, 3)})
+
+        assert changed == (1 << 2) | (1 << 6)
+        device.registers[0x20].set_raw_value.assert_called_once_with([10, 0, 2, 0, (1 << 15) | 6], offset=2)
+
+    def test_set_timers_unchanged(self, device):
+        """Test that set_timers writes nothing when no timer changes."""
+        assert device.set_timers({0: (False, 0)}) == 0
+        device.registers[0x20].set_raw_value.assert_not_called()
+
+    def test_external_timer_write_tracked(self, device):
+        """Test that master writes to the timers keep the skip check correct."""
+        device.set_timer(1, False, 5)
+        device.on_register_write(0x21, [0])
+        device.registers[0x20].set_raw_value.reset_mock()
+
+        assert device.set_timer(1, False, 5) is True
+        assert device.timers[1] == 10
+
+
 class TestEctoRelay10CHHelpers:
     """Test suite for EctoRelay10CH helper methods."""
 
@@ -414,3 +464,94 @@ class TestEctoRelay10CHModbusSync:
 
         # Channels should remain unchanged
         assert all(ch == 0 for ch in device.channels)
+
+    def test_on_register_write_callbacks_only_for_changed_channels(self, mock_modbus_server):
+        """Test that only channels in the XOR diff mask get a callback."""
+        mock_server = MagicMock()
+        mock_server.add_slave.return_value = MagicMock()
+
+        device = EctoRelay10CH({'addr': 5}, mock_server)
+        callback_calls = []
+        for channel in range(10):
+            device.set_state_change_callback(channel, lambda ch, st: callback_calls.append((ch, st)))
+
+        device.on_register_write(0x10, [0x0101])  # channels 0 and 8 ON
+        device.on_register_write(0x10, [0x0300])  # channel 1 ON, channel 8 OFF
+
+        assert callback_calls == [(0, 1), (8, 1), (1, 1), (8, 0)]
+
+    def test_sync_unchanged_register_fast_path(self, mock_modbus_server):
+        """Test that syncing an unchanged register reports no change and fires nothing."""
+        mock_server = MagicMock()
+        mock_server.add_slave.return_value = MagicMock()
+
+        device = EctoRelay10CH({'addr': 5}, mock_server)
+        callback = MagicMock()
+        device.set_state_change_callback(0, callback)
+        device.set_switch_state(0, 1)
+        device.slave.get_values.return_value = (0x0100,)
+
+        assert device.sync_channels_from_register() is False
+        callback.assert_not_called()
+
+    def test_unused_register_bits_ignored(self, mock_modbus_server):
+        """Test that LSB bits above channel 9 do not create phantom channels."""
+        mock_server = MagicMock()
+        mock_server.add_slave.return_value = MagicMock()
+
+        device = EctoRelay10CH({'addr': 5}, mock_server)
+        device.on_register_write(0x10, [0x00FC])
+
+        assert all(ch == 0 for ch in device.channels)
+
+
+class TestEctoRelay10CHSetChannels:
+    """Test suite for the bulk set_channels API."""
+
+    def test_set_channels_single_register_write(self, mock_modbus_server):
+        """Test that many channels are switched with one register write."""
+        mock_server = MagicMock()
+        mock_server.add_slave.return_value = MagicMock()
+        device = EctoRelay10CH({'addr': 5}, mock_server)
+        device.registers[0x10] = MagicMock()
+
+        changed = device.set_channels(0x3FF, 0b1100000101)
+
+        assert changed == 0b1100000101
+        device.registers[0x10].set_raw_value.assert_called_once_with([0x0503])
+        assert device.channels == [1, 0, 1, 0, 0, 0, 0, 0, 1, 1]
+
+    def test_set_channels_keeps_unmasked_channels(self, mock_modbus_server):
+        """Test that channels outside the mask keep their state."""
+        mock_server = MagicMock()
+        mock_server.add_slave.return_value = MagicMock()
+        device = EctoRelay10CH({'addr': 5}, mock_server)
+        device.set_switch_state(3, 1)
+
+        device.set_channels(0b11, 0b11111)
+
+        assert device.channels[:5] == [1, 1, 0, 1, 0]
+
+    def test_set_channels_notifies_changed_channels(self, mock_modbus_server):
+        """Test that callbacks fire once per changed channel."""
+        mock_server = MagicMock()
+        mock_server.add_slave.return_value = MagicMock()
+        device = EctoRelay10CH({'addr': 5}, mock_server)
+        device.set_switch_state(0, 1)
+        calls = []
+        for channel in range(10):
+            device.set_state_change_callback(channel, lambda ch, st: calls.append((ch, st)))
+
+        device.set_channels(0b111, 0b110)
+
+        assert calls == [(0, 0), (1, 1), (2, 1)]
+
+    def test_set_channels_no_change(self, mock_modbus_server):
+        """Test that an already applied state skips the register write."""
+        mock_server = MagicMock()
+        mock_server.add_slave.return_value = MagicMock()
+        device = EctoRelay10CH({'addr': 5}, mock_server)
+        device.registers[0x10] = MagicMock()
+
+        assert device.set_channels(0b11, 0) == 0
+        device.registers[0x10].set_raw_value.assert_not_called()
@@ -1,9 +1,12 @@
 """Tests for EctoTemperatureSensor device."""
+import struct
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
 import modbus_tk.defines as cst
 
 from custom_components.ecto_modbus.devices.temperature import EctoTemperatureSensor
+from custom_components.ecto_modbus.transport.modBusRTU import ModBusRegisterSensor
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankSlave
 
 
 class TestEctoTemperatureSensor:
@@ -74,18 +77,14 @@ class TestEctoTemperatureSensor:
 
         mock_hass = MagicMock()
         mock_hass.async_run_job = AsyncMock()
+        mock_tracker = MagicMock()
 
-        with patch('custom_components.ecto_modbus.devices.temperature.async_track_state_change') as mock_track:
-            # Execute
-            await device.async_init(mock_hass)
+        # Execute
+        await device.async_init(mock_hass, mock_tracker)
 
-            # Assert
-            assert device._hass is mock_hass
-            mock_track.assert_called_once_with(
-                mock_hass,
-                'sensor.test_temperature',
-                device._state_changed
-            )
+        # Assert
+        assert device._hass is mock_hass
+        mock_tracker.register.assert_called_once_with('sensor.test_temperature', device)
 
     @pytest.mark.asyncio
     async def test_async_init_without_entity_id(self, mock_modbus_server):
@@ -326,3 +325,117 @@ class TestEctoTemperatureSensor:
 
             # Assert - Should have 5 calls
             assert mock_instance.set_raw_value.call_count == len(temperatures)
+
+
+class TestEctoTemperatureSensorComputed:
+    """Test suite for read-time evaluation of register 0x20."""
+
+    def _device(self):
+        server = MagicMock()
+        server.add_slave.return_value = RegisterBankSlave(4)
+        return EctoTemperatureSensor({'addr': 4, 'entity_id': 'sensor.test'}, server)
+
+    @staticmethod
+    def _state(value):
+        state = MagicMock()
+        state.state = value
+        return state
+
+    @staticmethod
+    def _bus_read(device):
+        response = device.slave.handle_request(struct.pack(">BHH", 0x04, 0x20, 1))
+        return struct.unpack(">h", response[2:4])[0]
+
+    def test_register_bank_enables_computed_mode(self):
+        """Test that register bank slaves evaluate 0x20 on read."""
+        assert self._device().computed is True
+
+    @pytest.mark.asyncio
+    async def test_state_change_defers_write(self):
+        """Test that state changes only update the snapshot."""
+        device = self._device()
+
+        with patch.object(ModBusRegisterSensor, "set_raw_value") as set_raw_value:
+            for value in ("20.0", "20.1", "20.2"):
+                await device._state_changed('sensor.test', None, self._state(value))
+
+        set_raw_value.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_bus_read_returns_latest_scaled_value(self):
+        """Test that a bus read of 0x20 sees the latest state, scaled."""
+        device = self._device()
+        await device._state_changed('sensor.test', None, self._state("21.0"))
+        await device._state_changed('sensor.test', None, self._state("-5.5"))
+
+        assert self._bus_read(device) == -55
+
+    @pytest.mark.asyncio
+    async def test_unchanged_state_not_recomputed(self):
+        """Test that repeated reads without a state change reuse the stored value."""
+        device = self._device()
+        await device._state_changed('sensor.test', None, self._state("22.5"))
+
+        assert device._compute_register() == [225]
+        assert device._compute_register() is None
+
+    @pytest.mark.asyncio
+    async def test_invalid_state_keeps_last_value(self):
+        """Test that non-numeric states leave the last valid value in place."""
+        device = self._device()
+        await device._state_changed('sensor.test', None, self._state("22.5"))
+        assert self._bus_read(device) == 225
+
+        await device._state_changed('sensor.test', None, self._state("unavailable"))
+
+        assert self._bus_read(device) == 225
+
+    @pytest.mark.asyncio
+    async def test_get_values_sees_latest_state(self):
+        """Test that HA-side reads are refreshed too."""
+        device = self._device()
+        await device._state_changed('sensor.test', None, self._state("23.0"))
+
+        assert device.registers[0x20].get_values() == (230,)
+
+
+class TestEctoTemperatureSensorDeadband:
+    """Test suite for deadband and dedupe of the scaled value."""
+
+    def _eager_device(self, deadband=0):
+        server = MagicMock()
+        server.add_slave.return_value = MagicMock()
+        device = EctoTemperatureSensor({'addr': 4, 'entity_id': 'sensor.test', 'deadband': deadband}, server)
+        device.registers[0x20] = MagicMock()
+        return device
+
+    def test_identical_scaled_value_skipped(self):
+        """Test that values equal after scaling never reach the databank."""
+        device = self._eager_device()
+
+        device.apply_state("21.50")
+        device.apply_state("21.51")
+        device.apply_state("21.5")
+
+        device.registers[0x20].set_raw_value.assert_called_once_with([215])
+
+    def test_deadband(self):
+        """Test that changes within the deadband are not written."""
+        device = self._eager_device(deadband=0.2)
+
+        for value in ("20.0", "20.1", "20.2", "20.3", "20.1"):
+            device.apply_state(value)
+
+        assert [c[0][0] for c in device.registers[0x20].set_raw_value.call_args_list] == [[200], [203]]
+
+    def test_computed_mode_dedupe(self):
+        """Test that computed reads skip the databank write for an unchanged scaled value."""
+        server = MagicMock()
+        server.add_slave.return_value = RegisterBankSlave(4)
+        device = EctoTemperatureSensor({'addr': 4, 'entity_id': 'sensor.test'}, server)
+
+        device.apply_state("22.5")
+        assert device._compute_register() == [225]
+        device.apply_state("22.50")
+
+        assert device._compute_register() is None
@@ -0,0 +1,65 @@
+"""Tests for the diagnostic bus statistics sensors."""
+import pytest
+from unittest.mock import MagicMock
+from homeassistant.const import EntityCategory
+
+from custom_components.ecto_modbus.const import DOMAIN
+from custom_components.ecto_modbus.sensor import (
+    EctoCounterSensor,
+    EctoTurnaroundSensor,
+    async_setup_platform,
+)
+from custom_components.ecto_modbus.transport.stats import BusStats
+
+
+def _device(addr, bus="default"):
+    return MagicMock(addr=addr, bus=bus, unique_prefix=f"ecto_{addr}", display_name=f"Device {addr}")
+
+
+class TestEctoStatsSensors:
+    """Test suite for EctoTurnaroundSensor and EctoCounterSensor."""
+
+    def test_counter(self):
+        """Test that counter sensors read the slave counter."""
+        slave_stats = BusStats().slave(5)
+        sensor = EctoCounterSensor(_device(5), slave_stats, "crc_errors", "CRC errors", "crc_errors")
+        slave_stats.crc_errors = 4
+
+        assert sensor.native_value == 4
+        assert sensor.unique_id == "ecto_5_crc_errors"
+        assert sensor.name == "Device 5 CRC errors"
+        assert sensor.entity_category == EntityCategory.DIAGNOSTIC
+
+    @pytest.mark.asyncio
+    async def test_turnaround_per_interval(self):
+        """Test that the turnaround covers only requests since the last update."""
+        slave_stats = BusStats().slave(5)
+        sensor = EctoTurnaroundSensor(_device(5), slave_stats)
+        slave_stats.turnaround.record(40000)
+        await sensor.async_update()
+        assert sensor.native_value == 50.0
+
+        slave_stats.turnaround.record(900)
+        await sensor.async_update()
+        assert sensor.native_value == 1.0
+        assert sensor.extra_state_attributes["count"] == 2
+
+        # No requests in the interval: value kept
+        await sensor.async_update()
+        assert sensor.native_value == 1.0
+
+    @pytest.mark.asyncio
+    async def test_setup_platform(self, hass):
+        """Test that every device gets a turnaround and three counter sensors."""
+        devices = [_device(3), _device(5)]
+        hass.data[DOMAIN] = {
+            "devices": devices,
+            "buses": {"default": {"devices": devices, "stats": BusStats()}},
+        }
+        add_entities = MagicMock()
+
+        await async_setup_platform(hass, {}, add_entities, None)
+
+        sensors = add_entities.call_args[0][0]
+        assert len(sensors) == 8
+        assert {sensor.unique_id for sensor in sensors} >= {"ecto_3_turnaround_p99", "ecto_5_requests"}
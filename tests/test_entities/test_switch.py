@@ -1,9 +1,27 @@
 """Tests for EctoChannelSwitch entity."""
 import pytest
-from unittest.mock import MagicMock, AsyncMock, patch
+from unittest.mock import MagicMock, patch
 from homeassistant.const import STATE_ON, STATE_OFF
 
-from custom_components.ecto_modbus.switch import EctoChannelSwitch
+from custom_components.ecto_modbus.devices.binary_sensor import EctoCH10BinarySensor
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.switch import (
+    EctoChannelSwitch,
+    EctoStateFlusher,
+    async_setup_platform,
+    restore_channel_states,
+)
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+
+
+def _mock_device(addr=3, bus="default"):
+    """Mock device with the naming attributes of EctoDevice."""
+    device = MagicMock()
+    device.addr = addr
+    device.bus = bus
+    device.unique_prefix = f"ecto_{addr}" if bus == "default" else f"ecto_{bus}_{addr}"
+    device.display_name = f"Device {addr}" if bus == "default" else f"Device {bus} {addr}"
+    return device
 
 
 class TestEctoChannelSwitch:
@@ -26,8 +44,7 @@ class TestEctoChannelSwitch:
     def test_unique_id(self):
         """Test unique_id property."""
         # Setup
-        mock_device = MagicMock()
-        mock_device.addr = 4
+        mock_device = _mock_device(4)
 
         switch = EctoChannelSwitch(mock_device, channel=5)
 
@@ -37,8 +54,7 @@ class TestEctoChannelSwitch:
     def test_name(self):
         """Test name property."""
         # Setup
-        mock_device = MagicMock()
-        mock_device.addr = 3
+        mock_device = _mock_device(3)
 
         switch = EctoChannelSwitch(mock_device, channel=0)
 
@@ -154,7 +170,7 @@ class TestEctoChannelSwitch:
     def test_device_info(self):
         """Test device_info property."""
         # Setup
-        mock_device = MagicMock()
+        mock_device = _mock_device()
         switch = EctoChannelSwitch(mock_device, channel=0)
 
         # Execute
@@ -166,148 +182,9 @@ class TestEctoChannelSwitch:
         assert device_info['model'] == "1.1.1"
         assert device_info['manufacturer'] == "Ectostroy"
 
-    @pytest.mark.asyncio
-    async def test_async_internal_added_to_hass_no_previous_state(self):
-        """Test async_internal_added_to_hass when no previous state exists."""
-        # Setup
-        mock_device = MagicMock()
-        switch = EctoChannelSwitch(mock_device, channel=0)
-        switch.async_get_last_state = AsyncMock(return_value=None)
-
-        # Set up platform mock
-        mock_platform = MagicMock()
-        mock_platform.platform_name = 'switch'
-        switch.platform = mock_platform
-
-        # Set up hass mock
-        mock_hass = MagicMock()
-        mock_hass.data = {}
-        switch.hass = mock_hass
-
-        # Execute
-        await switch.async_internal_added_to_hass()
-
-        # Assert - Should not call _update_state
-        mock_device.set_switch_state.assert_not_called()
-
-    @pytest.mark.asyncio
-    async def test_async_internal_added_to_hass_with_on_state(self):
-        """Test async_internal_added_to_hass when previous state is ON."""
-        # Setup
-        mock_device = MagicMock()
-        switch = EctoChannelSwitch(mock_device, channel=0)
-
-        mock_last_state = MagicMock()
-        mock_last_state.state = STATE_ON
-
-        switch.async_get_last_state = AsyncMock(return_value=mock_last_state)
-
-        # Set up platform mock
-        mock_platform = MagicMock()
-        mock_platform.platform_name = 'switch'
-        switch.platform = mock_platform
-
-        # Set up hass mock
-        mock_hass = MagicMock()
-        mock_hass.data = {}
-        switch.hass = mock_hass
-
-        # Execute
-        await switch.async_internal_added_to_hass()
-
-        # Assert
-        assert switch._state is True
-        mock_device.set_switch_state.assert_called_once_with(0, 1)
-
-    @pytest.mark.asyncio
-    async def test_async_internal_added_to_hass_with_off_state(self):
-        """Test async_internal_added_to_hass when previous state is OFF."""
-        # Setup
-        mock_device = MagicMock()
-        switch = EctoChannelSwitch(mock_device, channel=3)
-
-        mock_last_state = MagicMock()
-        mock_last_state.state = STATE_OFF
-
-        switch.async_get_last_state = AsyncMock(return_value=mock_last_state)
-
-        # Set up platform mock
-        mock_platform = MagicMock()
-        mock_platform.platform_name = 'switch'
-        switch.platform = mock_platform
-
-        # Set up hass mock
-        mock_hass = MagicMock()
-        mock_hass.data = {}
-        switch.hass = mock_hass
-
-        # Execute
-        await switch.async_internal_added_to_hass()
-
-        # Assert
-        assert switch._state is False
-        mock_device.set_switch_state.assert_called_once_with(3, 0)
-
-    @pytest.mark.asyncio
-    async def test_async_internal_added_to_hass_with_unavailable_state(self):
-        """Test async_internal_added_to_hass when previous state is unavailable."""
-        # Setup
-        mock_device = MagicMock()
-        switch = EctoChannelSwitch(mock_device, channel=0)
-
-        mock_last_state = MagicMock()
-        mock_last_state.state = "unavailable"
-
-        switch.async_get_last_state = AsyncMock(return_value=mock_last_state)
-
-        # Set up platform mock
-        mock_platform = MagicMock()
-        mock_platform.platform_name = 'switch'
-        switch.platform = mock_platform
-
-        # Set up hass mock
-        mock_hass = MagicMock()
-        mock_hass.data = {}
-        switch.hass = mock_hass
-
-        # Execute
-        await switch.async_internal_added_to_hass()
-
-        # Assert - Should not restore state
-        mock_device.set_switch_state.assert_not_called()
-
-    @pytest.mark.asyncio
-    async def test_async_internal_added_to_hass_with_none_state(self):
-        """Test async_internal_added_to_hass when previous state is None."""
-        # Setup
-        mock_device = MagicMock()
-        mock_device.get_channel_state = MagicMock(return_value=0)
-        switch = EctoChannelSwitch(mock_device, channel=0)
-
-        mock_last_state = MagicMock()
-        mock_last_state.state = None
-
-        switch.async_get_last_state = AsyncMock(return_value=mock_last_state)
-
-        # Set up platform mock
-        mock_platform = MagicMock()
-        mock_platform.platform_name = 'switch'
-        switch.platform = mock_platform
-
-        # Set up hass mock
-        mock_hass = MagicMock()
-        mock_hass.data = {}
-        switch.hass = mock_hass
-
-        # Execute
-        await switch.async_internal_added_to_hass()
-
-        # Assert - Should sync from device state
-        mock_device.get_channel_state.assert_called_once_with(0)
-
     @pytest.mark.asyncio
     async def test_async_internal_added_to_hass_syncs_from_device_state(self):
-        """Test that switch syncs from device channel state when no HA state exists."""
+        """Test that switch takes the device channel state restored by the platform."""
         # Setup
         mock_device = MagicMock()
         mock_device.addr = 5
@@ -315,8 +192,6 @@ class TestEctoChannelSwitch:
         mock_device.set_switch_state = MagicMock()
         switch = EctoChannelSwitch(mock_device, channel=3)
 
-        switch.async_get_last_state = AsyncMock(return_value=None)
-
         # Set up platform mock
         mock_platform = MagicMock()
         mock_platform.platform_name = 'switch'
@@ -330,15 +205,16 @@ class TestEctoChannelSwitch:
         # Execute
         await switch.async_internal_added_to_hass()
 
-        # Assert - Should sync from device (channel 3 = ON)
+        # Assert - Should sync from device (channel 3 = ON) without writing it
         assert switch._state is True
         mock_device.get_channel_state.assert_called_once_with(3)
+        mock_device.set_switch_state.assert_not_called()
+        mock_device.set_state_change_callback.assert_called_once_with(3, switch._on_device_state_change)
 
     def test_multiple_channels_same_device(self):
         """Test creating multiple switches for same device."""
         # Setup
-        mock_device = MagicMock()
-        mock_device.addr = 3
+        mock_device = _mock_device(3)
 
         # Execute
         switches = [EctoChannelSwitch(mock_device, i) for i in range(8)]
@@ -376,11 +252,9 @@ class TestEctoChannelSwitch:
     def test_different_device_addresses(self):
         """Test switches for different device addresses."""
         # Setup
-        mock_device_3 = MagicMock()
-        mock_device_3.addr = 3
+        mock_device_3 = _mock_device(3)
 
-        mock_device_10 = MagicMock()
-        mock_device_10.addr = 10
+        mock_device_10 = _mock_device(10)
 
         # Execute
         switch1 = EctoChannelSwitch(mock_device_3, channel=0)
@@ -391,3 +265,161 @@ class TestEctoChannelSwitch:
         assert switch2.unique_id == "ecto_10_ch0"
         assert switch1.name == "Device 3 Ch.1"
         assert switch2.name == "Device 10 Ch.1"
+
+    def test_named_bus(self):
+        """Test that devices on a named bus get bus-qualified ids and their own HA device."""
+        switch = EctoChannelSwitch(_mock_device(3, bus="upstairs"), channel=0)
+
+        assert switch.unique_id == "ecto_upstairs_3_ch0"
+        assert switch.name == "Device upstairs 3 Ch.1"
+        assert switch.device_info['identifiers'] == {('ecto_modbus', 'local_ecto_unit_upstairs')}
+
+
+class TestEctoStateFlusher:
+    """Test suite for coalesced switch state writes."""
+
+    def _switch(self, flusher, channel):
+        device = MagicMock()
+        device.addr = 5
+        switch = EctoChannelSwitch(device, channel=channel, flusher=flusher)
+        switch.hass = MagicMock()
+        switch.async_write_ha_state = MagicMock()
+        switch.async_schedule_update_ha_state = MagicMock()
+        return switch
+
+    def test_device_change_deferred_to_flush(self):
+        """Test that device callbacks queue the entity instead of writing."""
+        hass = MagicMock()
+        flusher = EctoStateFlusher(hass)
+        switch = self._switch(flusher, 0)
+
+        switch._on_device_state_change(0, 1)
+
+        switch.async_write_ha_state.assert_not_called()
+        switch.async_schedule_update_ha_state.assert_not_called()
+        hass.loop.call_soon.assert_called_once_with(flusher._flush)
+
+    def test_mass_change_single_flush(self):
+        """Test that many changes in one iteration share one flush."""
+        hass = MagicMock()
+        flusher = EctoStateFlusher(hass)
+        switches = [self._switch(flusher, channel) for channel in range(10)]
+
+        for channel, switch in enumerate(switches):
+            switch._on_device_state_change(channel, 1)
+        hass.loop.call_soon.call_args[0][0]()
+
+        hass.loop.call_soon.assert_called_once()
+        for switch in switches:
+            switch.async_write_ha_state.assert_called_once()
+            assert switch.is_on is True
+
+    def test_repeated_change_written_once(self):
+        """Test that an entity flipping twice before the flush is written once."""
+        hass = MagicMock()
+        flusher = EctoStateFlusher(hass)
+        switch = self._switch(flusher, 0)
+
+        switch._on_device_state_change(0, 1)
+        switch._on_device_state_change(0, 0)
+        flusher._flush()
+
+        switch.async_write_ha_state.assert_called_once()
+        assert switch.is_on is False
+
+    def test_next_change_schedules_new_flush(self):
+        """Test that a change after a flush schedules another one."""
+        hass = MagicMock()
+        flusher = EctoStateFlusher(hass)
+        switch = self._switch(flusher, 0)
+
+        switch._on_device_state_change(0, 1)
+        flusher._flush()
+        switch._on_device_state_change(0, 0)
+
+        assert hass.loop.call_soon.call_count == 2
+
+
+def _server():
+    """Server stand-in owning a register bank, no serial port."""
+    databank = RegisterBankDatabank(error_on_missing_slave=False)
+    server = MagicMock()
+    server.add_slave.side_effect = databank.add_slave
+    return server
+
+
+def _count_writes(device):
+    """Count the register writes of a device (its slave's)."""
+    device.slave.write = MagicMock(wraps=device.slave.write)
+    return device.slave.write
+
+
+class TestRestoreChannelStates:
+    """Test suite for the per-device restore of switch channels."""
+
+    def test_binary_sensor_restored_in_one_write(self):
+        """Test that all restored channels of a device share one register write."""
+        device = EctoCH10BinarySensor({"addr": 5}, _server())
+        writes = _count_writes(device)
+        states = {0: STATE_ON, 1: STATE_OFF, 3: STATE_ON, 9: STATE_ON}
+
+        written = restore_channel_states([device], lambda dev, channel: states.get(channel))
+
+        assert written == 1
+        writes.assert_called_once()
+        assert [device.get_channel_state(ch) for ch in range(10)] == [1, 0, 0, 1, 0, 0, 0, 0, 0, 1]
+
+    def test_missing_states_keep_device_state(self):
+        """Test that channels without a usable last state keep the device value."""
+        server = _server()
+        device = EctoCH10BinarySensor({"addr": 5}, server)
+        device.set_channels(0b110, 0b110)
+        states = {1: "unavailable", 2: STATE_OFF}
+
+        restore_channel_states([device], lambda dev, channel: states.get(channel))
+
+        assert device.get_channel_state(1) == 1
+        assert device.get_channel_state(2) == 0
+
+    def test_relays_forced_off(self):
+        """Test that relays are switched OFF once and never restored."""
+        server = _server()
+        on = EctoRelay10CH({"addr": 6}, server)
+        on.set_channels(on.CHANNEL_MASK, 0b1010)
+        off = EctoRelay10CH({"addr": 7}, server)
+        on_writes, off_writes = _count_writes(on), _count_writes(off)
+
+        written = restore_channel_states([on, off], lambda dev, channel: STATE_ON)
+
+        assert written == 1
+        on_writes.assert_called_once()
+        off_writes.assert_not_called()
+        assert on.get_channel_state(1) == 0 and on.get_channel_state(3) == 0
+
+    @pytest.mark.asyncio
+    async def test_setup_platform_restores_from_ha_states(self, hass):
+        """Test that the platform restores each device from the HA restore data."""
+        server = _server()
+        devices = [EctoCH10BinarySensor({"addr": addr}, server) for addr in range(3, 35)]
+        writes = [_count_writes(device) for device in devices]
+        hass.data["ecto_modbus"] = {"devices": devices}
+
+        registry = MagicMock()
+        registry.async_get_entity_id.side_effect = lambda domain, platform, unique_id: f"switch.{unique_id}"
+        stored = {}
+        for device in devices:
+            for channel in (0, 5):
+                stored[f"switch.{device.unique_prefix}_ch{channel}"] = MagicMock(state=MagicMock(state=STATE_ON))
+        restore_data = MagicMock(last_states=stored)
+        async_add_entities = MagicMock()
+
+        with patch("custom_components.ecto_modbus.switch.er.async_get", return_value=registry), \
+                patch("custom_components.ecto_modbus.switch.restore_state.async_get",
+                      return_value=restore_data):
+            await async_setup_platform(hass, {}, async_add_entities, None)
+
+        for device, device_writes in zip(devices, writes):
+            device_writes.assert_called_once()
+            assert device.get_channel_state(0) == 1 and device.get_channel_state(5) == 1
+            assert device.get_channel_state(1) == 0
+        assert len(async_add_entities.call_args[0][0]) == 320
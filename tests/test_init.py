@@ -1,21 +1,41 @@
 """Tests for main integration setup."""
+import asyncio
+import os
+import subprocess
+import sys
+
 import pytest
 from unittest.mock import MagicMock, patch, AsyncMock
 import voluptuous as vol
 
+import custom_components.ecto_modbus as ecto_modbus
 from custom_components.ecto_modbus import (
     CONFIG_SCHEMA,
     async_setup,
     async_unload_entry,
     DEVICE_CLASSES,
-    DOMAIN
+    DOMAIN,
+    _DEVICE_REGISTRY,
+    _async_call_on_stop,
+    _device_class,
+    _make_write_hook,
+    _parse_write_request,
 )
 from custom_components.ecto_modbus.const import (
     PORT_TYPE_RS485,
     PORT_TYPE_SERIAL,
-    DEFAULT_BAUDRATE
+    DEFAULT_BAUDRATE,
+    DEFAULT_CAPTURE_SIZE,
+    DEFAULT_MASTER_TIMEOUT,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_SYNC_INTERVAL,
+    BACKEND_ASYNCIO,
+    BACKEND_PROCESS,
+    BACKEND_MODBUS_TK
 )
 
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 class TestConfigSchema:
     """Test suite for configuration schema validation."""
@@ -209,6 +229,57 @@ class TestConfigSchema:
         # Assert
         assert validated[DOMAIN]['baudrate'] == 9600
 
+    def test_default_sync_interval(self):
+        """Test that the safety-net polling interval defaults are applied."""
+        config = {
+            DOMAIN: {
+                'port': '/dev/ttyUSB0',
+                'devices': [
+                    {'type': 'relay_10ch', 'addr': 5}
+                ]
+            }
+        }
+
+        validated = CONFIG_SCHEMA(config)
+
+        assert validated[DOMAIN]['sync_interval'] == DEFAULT_SYNC_INTERVAL
+
+    def test_backend_default_and_choices(self):
+        """Test that the RTU backend defaults to modbus_tk and rejects unknown engines."""
+        config = {
+            DOMAIN: {
+                'port': '/dev/ttyUSB0',
+                'devices': [
+                    {'type': 'relay_10ch', 'addr': 5}
+                ]
+            }
+        }
+
+        assert CONFIG_SCHEMA(config)[DOMAIN]['backend'] == BACKEND_MODBUS_TK
+
+        config[DOMAIN]['backend'] = BACKEND_ASYNCIO
+        assert CONFIG_SCHEMA(config)[DOMAIN]['backend'] == BACKEND_ASYNCIO
+
+        config[DOMAIN]['backend'] = 'pymodbus'
+        with pytest.raises(vol.MultipleInvalid):
+            CONFIG_SCHEMA(config)
+
+    def test_sync_interval_zero_allowed(self):
+        """Test that polling can be disabled with sync_interval: 0."""
+        config = {
+            DOMAIN: {
+                'port': '/dev/ttyUSB0',
+                'sync_interval': 0,
+                'devices': [
+                    {'type': 'relay_10ch', 'addr': 5}
+                ]
+            }
+        }
+
+        validated = CONFIG_SCHEMA(config)
+
+        assert validated[DOMAIN]['sync_interval'] == 0
+
 
 class TestAsyncSetup:
     """Test suite for async_setup function."""
@@ -228,8 +299,8 @@ class TestAsyncSetup:
             }
         }
 
-        with patch('custom_components.ecto_modbus.rs485.RS485') as mock_rs485, \
-             patch('custom_components.ecto_modbus.modbus_rtu.RtuServer') as mock_server_class, \
+        with patch('custom_components.ecto_modbus.transport.serial_port.rs485.RS485') as mock_rs485, \
+             patch('custom_components.ecto_modbus.transport.rtu_server.EctoRtuServer') as mock_server_class, \
              patch('custom_components.ecto_modbus.load_platform') as mock_load_platform, \
              patch('custom_components.ecto_modbus.async_track_time_interval') as mock_track:
 
@@ -250,7 +321,8 @@ class TestAsyncSetup:
             assert 'rtu' in hass.data[DOMAIN]
             mock_rs485.assert_called_once()
             mock_server.start.assert_called_once()
-            mock_load_platform.assert_called_once_with(hass, 'switch', DOMAIN, {}, config)
+            mock_load_platform.assert_any_call(hass, 'switch', DOMAIN, {}, config)
+            mock_load_platform.assert_any_call(hass, 'sensor', DOMAIN, {}, config)
 
     @pytest.mark.asyncio
     async def test_setup_with_serial(self, hass):
@@ -268,7 +340,7 @@ class TestAsyncSetup:
         }
 
         with patch('serial.Serial') as mock_serial, \
-             patch('custom_components.ecto_modbus.modbus_rtu.RtuServer') as mock_server_class, \
+             patch('custom_components.ecto_modbus.transport.rtu_server.EctoRtuServer') as mock_server_class, \
              patch('custom_components.ecto_modbus.load_platform') as mock_load_platform, \
              patch('custom_components.ecto_modbus.async_track_time_interval') as mock_track:
 
@@ -285,7 +357,7 @@ class TestAsyncSetup:
             # Assert
             assert result is True
             mock_serial.assert_called_once()
-            mock_load_platform.assert_called_once()
+            assert mock_load_platform.call_count == 2
 
     @pytest.mark.asyncio
     async def test_setup_multiple_devices(self, hass):
@@ -302,11 +374,11 @@ class TestAsyncSetup:
             }
         }
 
-        with patch('custom_components.ecto_modbus.rs485.RS485') as mock_rs485, \
-             patch('custom_components.ecto_modbus.modbus_rtu.RtuServer') as mock_server_class, \
+        with patch('custom_components.ecto_modbus.transport.serial_port.rs485.RS485') as mock_rs485, \
+             patch('custom_components.ecto_modbus.transport.rtu_server.EctoRtuServer') as mock_server_class, \
              patch('custom_components.ecto_modbus.load_platform') as mock_load_platform, \
              patch('custom_components.ecto_modbus.async_track_time_interval') as mock_track, \
-             patch('custom_components.ecto_modbus.devices.temperature.async_track_state_change'):
+             patch('custom_components.ecto_modbus.state_tracker.async_track_state_change_event'):
 
             mock_server = MagicMock()
             mock_server.start = MagicMock()
@@ -325,6 +397,298 @@ class TestAsyncSetup:
             assert len(devices) == 3
 
 
+    @pytest.mark.asyncio
+    async def test_setup_without_polling(self, hass):
+        """Test that sync_interval: 0 skips the periodic coordinator refresh."""
+        config = {
+            DOMAIN: {
+                'port': '/dev/ttyUSB0',
+                'sync_interval': 0,
+                'devices': [
+                    {'type': 'relay_10ch', 'addr': 5}
+                ]
+            }
+        }
+
+        with patch('custom_components.ecto_modbus.transport.serial_port.rs485.RS485'), \
+             patch('custom_components.ecto_modbus.transport.rtu_server.EctoRtuServer') as mock_server_class, \
+             patch('custom_components.ecto_modbus.load_platform'), \
+             patch('custom_components.ecto_modbus.async_track_time_interval') as mock_track:
+
+            mock_server_class.return_value = MagicMock()
+
+            result = await async_setup(hass, config)
+
+            assert result is True
+            mock_track.assert_not_called()
+            assert hass.data[DOMAIN]['unsub_interval'] is None
+            assert hass.data[DOMAIN]['coordinator'].update_interval is None
+
+
+    @pytest.mark.asyncio
+    async def test_setup_with_asyncio_backend(self, hass):
+        """Test that backend: asyncio uses the event-loop RTU engine."""
+        config = {
+            DOMAIN: {
+                'port': '/dev/ttyUSB0',
+                'backend': BACKEND_ASYNCIO,
+                'devices': [
+                    {'type': 'relay_10ch', 'addr': 5}
+                ]
+            }
+        }
+
+        with patch('custom_components.ecto_modbus.transport.serial_port.rs485.RS485'), \
+             patch('custom_components.ecto_modbus.transport.rtu_server.EctoRtuServer') as mock_threaded, \
+             patch('custom_components.ecto_modbus.transport.async_rtu.AsyncRtuServer') as mock_async, \
+             patch('custom_components.ecto_modbus.load_platform'), \
+             patch('custom_components.ecto_modbus.async_track_time_interval'):
+
+            mock_async.return_value = MagicMock()
+
+            result = await async_setup(hass, config)
+
+            assert result is True
+            mock_threaded.assert_not_called()
+            mock_async.return_value.start.assert_called_once()
+            assert hass.data[DOMAIN]['rtu'] is mock_async.return_value
+            # Server and timer engine
+            assert hass.bus.async_listen_once.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_stop_drops_relay_timers(self, hass):
+        """Test that Home Assistant stopping cancels the pending relay timers."""
+        config = {
+            DOMAIN: {
+                'port': '/dev/ttyUSB0',
+                'devices': [
+                    {'type': 'relay_10ch', 'addr': 5}
+                ]
+            }
+        }
+
+        with patch('custom_components.ecto_modbus.transport.serial_port.rs485.RS485'), \
+             patch('custom_components.ecto_modbus.transport.rtu_server.EctoRtuServer'), \
+             patch('custom_components.ecto_modbus.load_platform'), \
+             patch('custom_components.ecto_modbus.async_track_time_interval'):
+
+            await async_setup(hass, config)
+
+        timer_engine = hass.data[DOMAIN]['timer_engine']
+        hass.data[DOMAIN]['devices'][0].set_timer(0, True, 10)
+        handle = hass.loop.call_at.return_value
+        assert len(timer_engine) == 1
+
+        for call in hass.bus.async_listen_once.call_args_list:
+            await call[0][1](MagicMock())
+
+        assert len(timer_engine) == 0
+        handle.cancel.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_setup_restores_snapshot_before_start(self, hass, tmp_path):
+        """Test that snapshot registers are loaded before the server answers the bus."""
+        (tmp_path / ".storage").mkdir()
+        hass.config = MagicMock()
+        hass.config.path.side_effect = lambda *parts: str(tmp_path.joinpath(*parts))
+        config = {
+            DOMAIN: {
+                'port': '/dev/ttyUSB0',
+                'snapshot': True,
+                'devices': [
+                    {'type': 'binary_sensor_10ch', 'addr': 3}
+                ]
+            }
+        }
+        servers = []
+
+        def make_server(port, databank=None, **kwargs):
+            server = MagicMock()
+            server.add_slave.side_effect = databank.add_slave
+            server.start.side_effect = lambda: servers.append(
+                databank.get_slave(3).get_values("val-x16", 0x10, 1))
+            return server
+
+        with patch('custom_components.ecto_modbus.transport.serial_port.rs485.RS485'), \
+             patch('custom_components.ecto_modbus.transport.rtu_server.EctoRtuServer', side_effect=make_server), \
+             patch('custom_components.ecto_modbus.load_platform'), \
+             patch('custom_components.ecto_modbus.async_track_time_interval'):
+
+            await async_setup(hass, config)
+            hass.data[DOMAIN]['buses']['default']['devices'][0].set_channels(0b11, 0b11)
+            hass.data[DOMAIN]['buses']['default']['snapshot'].close()
+            _DEVICE_REGISTRY.clear()
+
+            await async_setup(hass, config)
+            hass.data[DOMAIN]['buses']['default']['snapshot'].close()
+
+        assert (tmp_path / ".storage" / "ecto_modbus_registers.bin").exists()
+        assert servers == [(0,), (0x0300,)]
+        assert hass.data[DOMAIN]['devices'][0].get_channel_state(1) == 1
+
+    @pytest.mark.asyncio
+    async def test_setup_with_process_backend(self, hass):
+        """Test that backend: process leaves the port to the server process."""
+        config = {
+            DOMAIN: {
+                'port': '/dev/ttyUSB0',
+                'backend': BACKEND_PROCESS,
+                'devices': [
+                    {'type': 'relay_10ch', 'addr': 5}
+                ]
+            }
+        }
+
+        with patch('custom_components.ecto_modbus.transport.serial_port.rs485.RS485') as mock_rs485, \
+             patch('custom_components.ecto_modbus.transport.rtu_server.EctoRtuServer') as mock_threaded, \
+             patch('custom_components.ecto_modbus.transport.process_rtu.ProcessRtuServer') as mock_process, \
+             patch('custom_components.ecto_modbus.load_platform'), \
+             patch('custom_components.ecto_modbus.async_track_time_interval'):
+
+            result = await async_setup(hass, config)
+
+            assert result is True
+            mock_rs485.assert_not_called()
+            mock_threaded.assert_not_called()
+            mock_process.assert_called_once_with(
+                {'port': '/dev/ttyUSB0', 'port_type': 'rs485', 'baudrate': 19200},
+                loop=hass.loop, snapshot=None)
+            mock_process.return_value.start.assert_called_once()
+            bus = hass.data[DOMAIN]['buses']['default']
+            assert bus['rtu'] is mock_process.return_value
+            assert bus['capture'] is None
+            # Server and timer engine
+            assert hass.bus.async_listen_once.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_setup_platforms_load_while_bus_starts(self, hass):
+        """Test that blocking bring-up runs in executors and platforms load before the server is up."""
+        config = {
+            DOMAIN: {
+                'port': '/dev/ttyUSB0',
+                'devices': [
+                    {'type': 'relay_10ch', 'addr': addr} for addr in range(3, 33)
+                ]
+            }
+        }
+        executor_jobs = []
+        platforms_loaded = asyncio.Event()
+
+        async def run_in_executor(target, *args):
+            executor_jobs.append(target)
+            if target is server.start:
+                # The server only comes up once the platforms were loaded
+                await asyncio.wait_for(platforms_loaded.wait(), 5)
+            return target(*args)
+
+        def load_platform(*args):
+            if args[1] == 'sensor':
+                platforms_loaded.set()
+
+        hass.async_add_executor_job = AsyncMock(side_effect=run_in_executor)
+        server = MagicMock()
+        with patch('custom_components.ecto_modbus.transport.serial_port.rs485.RS485') as mock_rs485, \
+             patch('custom_components.ecto_modbus.transport.rtu_server.EctoRtuServer', return_value=server), \
+             patch('custom_components.ecto_modbus.load_platform', side_effect=load_platform), \
+             patch('custom_components.ecto_modbus.async_track_time_interval'):
+
+            assert await async_setup(hass, config) is True
+
+        assert executor_jobs == [ecto_modbus._open_bus, server.start]
+        mock_rs485.assert_called_once()
+        server.start.assert_called_once()
+        assert len(hass.data[DOMAIN]['devices']) == 30
+
+
+class TestCallOnStop:
+    """Test suite for the shutdown callbacks."""
+
+    @pytest.mark.asyncio
+    async def test_blocking_cleanup_runs_in_executor(self, hass):
+        """Test that plain cleanups run in an executor and loop-safe ones on the loop."""
+        blocking, loop_safe, coroutine = MagicMock(), MagicMock(), AsyncMock()
+        _async_call_on_stop(hass, blocking)
+        _async_call_on_stop(hass, loop_safe, loop_safe=True)
+        _async_call_on_stop(hass, coroutine)
+
+        for call in hass.bus.async_listen_once.call_args_list:
+            await call[0][1](MagicMock())
+
+        hass.async_add_executor_job.assert_awaited_once_with(blocking)
+        blocking.assert_called_once()
+        loop_safe.assert_called_once()
+        coroutine.assert_awaited_once()
+
+
+class TestWriteHooks:
+    """Test suite for event-driven sync via modbus_tk write hooks."""
+
+    def test_parse_write_single_register(self):
+        """Test parsing a FC 0x06 request PDU."""
+        pdu = bytes([0x06, 0x00, 0x10, 0x81, 0x02])
+
+        assert _parse_write_request(pdu) == (0x10, [0x8102])
+
+    def test_parse_write_multiple_registers(self):
+        """Test parsing a FC 0x10 request PDU."""
+        pdu = bytes([0x10, 0x00, 0x20, 0x00, 0x02, 0x04, 0x80, 0x14, 0x00, 0x0A])
+
+        assert _parse_write_request(pdu) == (0x20, [0x8014, 0x000A])
+
+    def test_parse_rejects_bad_byte_count(self):
+        """Test that malformed FC 0x10 requests are ignored."""
+        pdu = bytes([0x10, 0x00, 0x20, 0x00, 0x02, 0x03, 0x80, 0x14, 0x00])
+
+        assert _parse_write_request(pdu) is None
+
+    def test_parse_ignores_other_functions(self):
+        """Test that read requests are not treated as writes."""
+        pdu = bytes([0x03, 0x00, 0x10, 0x00, 0x01])
+
+        assert _parse_write_request(pdu) is None
+
+    def test_hook_schedules_device_on_loop(self):
+        """Test that the hook routes the write to the owning device thread-safely."""
+        loop = MagicMock()
+        device = MagicMock()
+        slave = MagicMock()
+        slave._id = 5
+        hook = _make_write_hook(loop)
+
+        with patch.dict(_DEVICE_REGISTRY, {slave: device}, clear=True):
+            result = hook((slave, bytes([0x06, 0x00, 0x10, 0x01, 0x00])))
+
+        assert result is None
+        loop.call_soon_threadsafe.assert_called_once_with(
+            device.on_register_write, 0x10, [0x0100]
+        )
+        device.on_register_write.assert_not_called()
+
+    def test_hook_ignores_unknown_slave(self):
+        """Test that writes to unregistered slaves are not dispatched."""
+        loop = MagicMock()
+        slave = MagicMock()
+        slave._id = 7
+        hook = _make_write_hook(loop)
+
+        with patch.dict(_DEVICE_REGISTRY, {}, clear=True):
+            hook((slave, bytes([0x06, 0x00, 0x10, 0x01, 0x00])))
+
+        loop.call_soon_threadsafe.assert_not_called()
+
+    def test_install_replaces_previous_hook(self):
+        """Test that repeated setup does not stack duplicate write hooks."""
+        with patch('modbus_tk.hooks.install_hook'), \
+             patch('modbus_tk.hooks.uninstall_hook') as mock_uninstall:
+            ecto_modbus._install_write_hooks(MagicMock())
+            first_hook = ecto_modbus._WRITE_HOOK
+            ecto_modbus._install_write_hooks(MagicMock())
+
+            for hook_name in ecto_modbus.WRITE_HOOK_NAMES:
+                mock_uninstall.assert_any_call(hook_name, first_hook)
+            assert ecto_modbus._WRITE_HOOK is not first_hook
+
+
 class TestAsyncUnloadEntry:
     """Test suite for async_unload_entry function."""
 
@@ -359,6 +723,192 @@ class TestDeviceClasses:
             EctoTemperatureSensor
         )
 
-        assert DEVICE_CLASSES['binary_sensor_10ch'] == EctoCH10BinarySensor
-        assert DEVICE_CLASSES['relay_10ch'] == EctoRelay10CH
-        assert DEVICE_CLASSES['temperature_sensor'] == EctoTemperatureSensor
+        assert _device_class('binary_sensor_10ch') is EctoCH10BinarySensor
+        assert _device_class('relay_10ch') is EctoRelay10CH
+        assert _device_class('temperature_sensor') is EctoTemperatureSensor
+
+    def test_package_import_is_lazy(self):
+        """Test that importing the package loads no modbus_tk, device, transport or platform module."""
+        code = (
+            "import sys, custom_components.ecto_modbus\n"
+            "print(' '.join(m for m in sys.modules\n"
+            "               if m.startswith(('custom_components.ecto_modbus.', 'modbus_tk'))))"
+        )
+        loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                check=True, cwd=REPO_ROOT).stdout.split()
+
+        assert sorted(loaded) == ['custom_components.ecto_modbus.const',
+                                  'custom_components.ecto_modbus.devices']
+
+    def test_sensor_platform_does_not_load_master(self):
+        """Test that the sensor platform loads the poll engine only for master buses."""
+        code = (
+            "import sys, custom_components.ecto_modbus.sensor\n"
+            "print('custom_components.ecto_modbus.master' in sys.modules)"
+        )
+        loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                check=True, cwd=REPO_ROOT).stdout.split()
+
+        assert loaded == ['False']
+
+
+class TestTemperatureDeadbandSchema:
+    """Test suite for the temperature sensor deadband option."""
+
+    def test_deadband_default_and_value(self):
+        """Test that deadband defaults to 0 and accepts fractions of a degree."""
+        config = CONFIG_SCHEMA({DOMAIN: {'port': '/dev/ttyUSB0', 'devices': [
+            {'type': 'temperature_sensor', 'addr': 4, 'entity_id': 'sensor.a'},
+            {'type': 'temperature_sensor', 'addr': 5, 'entity_id': 'sensor.a', 'deadband': 0.2},
+        ]}})
+
+        assert config[DOMAIN]['devices'][0]['deadband'] == 0
+        assert config[DOMAIN]['devices'][1]['deadband'] == 0.2
+
+
+class TestCaptureSchema:
+    """Test suite for the packet capture options."""
+
+    def test_capture_defaults(self):
+        """Test that capture is enabled in memory without hex logging by default."""
+        config = CONFIG_SCHEMA({DOMAIN: {'port': '/dev/ttyUSB0', 'devices': []}})
+
+        assert config[DOMAIN]['capture'] == {'size': DEFAULT_CAPTURE_SIZE, 'log_hex': False}
+
+    def test_capture_file(self):
+        """Test the memory-mapped capture file option."""
+        config = CONFIG_SCHEMA({DOMAIN: {'port': '/dev/ttyUSB0', 'devices': [],
+                                         'capture': {'file': '/config/ecto.cap', 'size': 0}}})
+
+        assert config[DOMAIN]['capture']['file'] == '/config/ecto.cap'
+        assert config[DOMAIN]['capture']['size'] == 0
+
+
+class TestBusesSchema:
+    """Test suite for the multi-bus configuration."""
+
+    def test_buses_only(self):
+        """Test that buses can replace the top-level port."""
+        config = CONFIG_SCHEMA({DOMAIN: {'buses': [
+            {'name': 'upstairs', 'port': '/dev/ttyUSB1',
+             'devices': [{'type': 'relay_10ch', 'addr': 5}]},
+        ]}})
+
+        bus = config[DOMAIN]['buses'][0]
+        assert bus['baudrate'] == DEFAULT_BAUDRATE
+        assert bus['backend'] == BACKEND_MODBUS_TK
+
+    def test_port_without_devices(self):
+        """Test that a top-level port still needs devices alongside buses."""
+        with pytest.raises(vol.Invalid):
+            CONFIG_SCHEMA({DOMAIN: {'port': '/dev/ttyUSB0', 'buses': [
+                {'name': 'upstairs', 'port': '/dev/ttyUSB1', 'devices': []},
+            ]}})
+
+    def test_duplicate_names_and_ports(self):
+        """Test that bus names and ports must be unique."""
+        with pytest.raises(vol.Invalid):
+            CONFIG_SCHEMA({DOMAIN: {'buses': [
+                {'name': 'a', 'port': '/dev/ttyUSB1', 'devices': []},
+                {'name': 'a', 'port': '/dev/ttyUSB2', 'devices': []},
+            ]}})
+        with pytest.raises(vol.Invalid):
+            CONFIG_SCHEMA({DOMAIN: {'port': '/dev/ttyUSB1', 'devices': [], 'buses': [
+                {'name': 'b', 'port': '/dev/ttyUSB1', 'devices': []},
+            ]}})
+
+    def test_default_bus_name_reserved(self):
+        """Test that a named bus cannot take the name of the top-level bus."""
+        with pytest.raises(vol.Invalid):
+            CONFIG_SCHEMA({DOMAIN: {'port': '/dev/ttyUSB0', 'devices': [], 'buses': [
+                {'name': 'default', 'port': '/dev/ttyUSB1', 'devices': []},
+            ]}})
+
+    @pytest.mark.asyncio
+    async def test_setup_two_buses(self, hass):
+        """Test that every bus gets its own port, server and devices."""
+        config = CONFIG_SCHEMA({DOMAIN: {
+            'port': '/dev/ttyUSB0',
+            'devices': [{'type': 'relay_10ch', 'addr': 5}],
+            'buses': [{'name': 'upstairs', 'port': '/dev/ttyUSB1',
+                       'devices': [{'type': 'relay_10ch', 'addr': 5}]}],
+        }})
+
+        with patch('custom_components.ecto_modbus.transport.serial_port.rs485.RS485') as mock_rs485, \
+             patch('custom_components.ecto_modbus.transport.rtu_server.EctoRtuServer') as mock_server_class, \
+             patch('custom_components.ecto_modbus.load_platform'), \
+             patch('custom_components.ecto_modbus.async_track_time_interval'):
+
+            servers = [MagicMock(), MagicMock()]
+            mock_server_class.side_effect = servers
+
+            assert await async_setup(hass, config) is True
+
+        assert [call[0][0] for call in mock_rs485.call_args_list] == ['/dev/ttyUSB0', '/dev/ttyUSB1']
+        buses = hass.data[DOMAIN]['buses']
+        assert list(buses) == ['default', 'upstairs']
+        assert buses['upstairs']['rtu'] is servers[1]
+        default_relay, = buses['default']['devices']
+        upstairs_relay, = buses['upstairs']['devices']
+        assert default_relay.unique_prefix == 'ecto_5'
+        assert upstairs_relay.unique_prefix == 'ecto_upstairs_5'
+        assert _DEVICE_REGISTRY[upstairs_relay.slave] is upstairs_relay
+        assert hass.data[DOMAIN]['rtu'] is servers[0]
+
+
+class TestMastersSchema:
+    """Test suite for the master bus configuration."""
+
+    def test_masters_only(self):
+        """Test that a config may poll real devices without emulating any."""
+        config = CONFIG_SCHEMA({DOMAIN: {'masters': [
+            {'name': 'boiler', 'port': '/dev/ttyUSB1',
+             'devices': [{'type': 'opentherm_v2', 'addr': 1}]},
+        ]}})
+
+        master = config[DOMAIN]['masters'][0]
+        assert master['timeout'] == DEFAULT_MASTER_TIMEOUT
+        assert master['poll_interval'] == DEFAULT_POLL_INTERVAL
+        assert master['port_type'] == PORT_TYPE_RS485
+
+    def test_master_needs_its_own_port(self):
+        """Test that a master cannot share the port of an emulated bus."""
+        with pytest.raises(vol.Invalid):
+            CONFIG_SCHEMA({DOMAIN: {'port': '/dev/ttyUSB0', 'devices': [], 'masters': [
+                {'name': 'boiler', 'port': '/dev/ttyUSB0', 'devices': []},
+            ]}})
+
+    def test_unknown_remote_device_type(self):
+        """Test that only pollable device types are accepted."""
+        with pytest.raises(vol.Invalid):
+            CONFIG_SCHEMA({DOMAIN: {'masters': [
+                {'name': 'boiler', 'port': '/dev/ttyUSB1',
+                 'devices': [{'type': 'opentherm', 'addr': 1}]},
+            ]}})
+
+    @pytest.mark.asyncio
+    async def test_setup_master(self, hass):
+        """Test that a master bus starts its engine, polls in the background and loads its platforms."""
+        config = CONFIG_SCHEMA({DOMAIN: {'masters': [
+            {'name': 'boiler', 'port': '/dev/ttyUSB1',
+             'devices': [{'type': 'opentherm_v2', 'addr': 1}, {'type': 'relay_10ch', 'addr': 5}]},
+        ]}})
+        # The first poll is not run here
+        hass.async_create_background_task.side_effect = lambda coro, name: coro.close()
+
+        with patch('custom_components.ecto_modbus.transport.serial_port.rs485.RS485') as mock_rs485, \
+             patch('custom_components.ecto_modbus.transport.async_master.AsyncRtuMaster') as mock_master, \
+             patch('custom_components.ecto_modbus.load_platform') as mock_load_platform, \
+             patch('custom_components.ecto_modbus.async_track_time_interval'):
+
+            assert await async_setup(hass, config) is True
+
+        mock_rs485.assert_called_once()
+        mock_master.return_value.start.assert_called_once()
+        master = hass.data[DOMAIN]['masters']['boiler']
+        assert master['master'] is mock_master.return_value
+        assert [device['addr'] for device in master['coordinator'].devices] == [1, 5]
+        assert hass.data[DOMAIN]['rtu'] is None
+        hass.async_create_background_task.assert_called_once()
+        platforms = [call[0][1] for call in mock_load_platform.call_args_list]
+        assert 'binary_sensor' in platforms and 'switch' not in platforms
@@ -187,8 +187,8 @@ class TestIntegrationWithoutPTY:
             }
         }
 
-        with patch('custom_components.ecto_modbus.rs485.RS485') as mock_rs485, \
-             patch('custom_components.ecto_modbus.modbus_rtu.RtuServer') as mock_server_class, \
+        with patch('custom_components.ecto_modbus.transport.serial_port.rs485.RS485') as mock_rs485, \
+             patch('custom_components.ecto_modbus.transport.rtu_server.EctoRtuServer') as mock_server_class, \
              patch('custom_components.ecto_modbus.load_platform') as mock_load_platform, \
              patch('custom_components.ecto_modbus.async_track_time_interval') as mock_track:
 
@@ -207,7 +207,7 @@ class TestIntegrationWithoutPTY:
             assert 'ecto_modbus' in hass.data
             assert 'devices' in hass.data['ecto_modbus']
             assert 'rtu' in hass.data['ecto_modbus']
-            mock_load_platform.assert_called_once()
+            assert mock_load_platform.call_count == 2
 
     @pytest.mark.asyncio
     async def test_switch_entity_integration(self, hass):
@@ -217,6 +217,8 @@ class TestIntegrationWithoutPTY:
         # Setup
         mock_device = MagicMock()
         mock_device.addr = 3
+        mock_device.unique_prefix = "ecto_3"
+        mock_device.display_name = "Device 3"
         switch = EctoChannelSwitch(mock_device, channel=0)
 
         # Test properties
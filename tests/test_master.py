@@ -0,0 +1,162 @@
+"""Tests for the master bus poll coordinator and its entities."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+import modbus_tk.defines as cst
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from modbus_tk.exceptions import ModbusError
+
+from custom_components.ecto_modbus.binary_sensor import EctoRemoteChannelSensor
+from custom_components.ecto_modbus.devices import bitfield
+from custom_components.ecto_modbus.master import EctoMasterCoordinator, _relay_channels
+from custom_components.ecto_modbus.sensor import EctoRemoteSensor
+
+ADAPTER = {"type": "opentherm_v2", "addr": 1}
+RELAY = {"type": "relay_10ch", "addr": 5}
+SPLITTER = {"type": "binary_sensor_10ch", "addr": 6}
+THERMOMETER = {"type": "temperature_sensor", "addr": 7, "name": "Attic"}
+
+
+def _adapter_registers():
+    """Register block 0x10-0x26 of an OpenTherm adapter."""
+    values = [0] * 23
+    values[0x18 - 0x10] = 452          # CH temperature 45.2 °C
+    values[0x19 - 0x10] = 0x7FFF       # no DHW sensor
+    values[0x1A - 0x10] = 0x0012       # 1.8 bar
+    values[0x1C - 0x10] = 0xFF         # modulation unknown
+    values[0x20 - 0x10] = 0xF600       # outdoor -10 °C
+    values[0x26 - 0x10] = 60 * 256     # CH setpoint 60 °C
+    return tuple(values)
+
+
+def _splitter_registers(closed):
+    """Registers 0x10-0x11 of a contact splitter per docs/MODBUS_PROTOCOL.md §3.10.
+
+    Channel N (1-based) is bit N-1 of 0x10 for channels 1-8 and bit N-9 of
+    0x11 for channels 9-10.
+    """
+    low = sum(1 << (channel - 1) for channel in closed if channel <= 8)
+    high = sum(1 << (channel - 9) for channel in closed if channel > 8)
+    return (low, high)
+
+
+@pytest.fixture
+def master():
+    """Master double answering holding register reads from a register map; address 9 is absent.
+
+    Like a real device, any other function code is answered with an exception.
+    """
+    registers = {
+        (1, 0x10, 23): _adapter_registers(),
+        (5, 0x10, 1): (bitfield.encode_channels(0b101),),
+        (6, 0x10, 2): _splitter_registers({1, 3, 10}),
+        (7, 0x20, 1): (0xFF9C,),
+    }
+
+    async def read_registers(slave, address, count, function_code=cst.READ_HOLDING_REGISTERS):
+        if slave == 9:
+            raise asyncio.TimeoutError()
+        if function_code != cst.READ_HOLDING_REGISTERS:
+            raise ModbusError(cst.ILLEGAL_FUNCTION)
+        if (slave, address, count) not in registers:
+            raise ModbusError(cst.ILLEGAL_DATA_ADDRESS)
+        return registers[(slave, address, count)]
+
+    mock = MagicMock()
+    mock.read_registers = AsyncMock(side_effect=read_registers)
+    return mock
+
+
+def test_relay_channels_follow_register_layout():
+    """Test that relay channel 0 is register bit 8 and channel 8 is bit 0."""
+    assert _relay_channels([0x0100]) == 0b1
+    assert _relay_channels([0x8000]) == 1 << 7
+    assert _relay_channels([0x0001]) == 1 << 8
+
+
+class TestEctoMasterCoordinator:
+    """Test suite for EctoMasterCoordinator."""
+
+    @pytest.mark.asyncio
+    async def test_poll_decodes_readings(self, hass, master):
+        """Test that a poll fills the cache and readings are decoded from it."""
+        coordinator = EctoMasterCoordinator(hass, "boiler", master, [ADAPTER, RELAY, THERMOMETER])
+        await coordinator._async_update_data()
+
+        assert coordinator.reading(ADAPTER, "ch_temperature") == 45.2
+        assert coordinator.reading(ADAPTER, "dhw_temperature") is None
+        assert coordinator.reading(ADAPTER, "pressure") == 1.8
+        assert coordinator.reading(ADAPTER, "modulation") is None
+        assert coordinator.reading(ADAPTER, "outdoor_temperature") == -10
+        assert coordinator.reading(ADAPTER, "ch_setpoint_active") == 60.0
+        assert coordinator.reading(THERMOMETER, "temperature") == -10.0
+        assert [coordinator.channel_state(RELAY, channel) for channel in range(3)] == [1, 0, 1]
+        # One round trip per device
+        assert master.read_registers.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_absent_device_is_unavailable(self, hass, master):
+        """Test that a device that does not answer is unavailable while the others update."""
+        absent = {"type": "relay_10ch", "addr": 9}
+        coordinator = EctoMasterCoordinator(hass, "boiler", master, [RELAY, absent])
+        await coordinator._async_update_data()
+
+        assert coordinator.cache.available(5)
+        assert not coordinator.cache.available(9)
+        assert coordinator.channel_state(absent, 0) is None
+
+    @pytest.mark.asyncio
+    async def test_update_fails_if_no_device_answers(self, hass, master):
+        """Test that the update fails when every device timed out or answered with an exception."""
+        coordinator = EctoMasterCoordinator(
+            hass, "boiler", master, [{"type": "relay_10ch", "addr": 9}, {"type": "binary_sensor_10ch", "addr": 3}])
+        with pytest.raises(UpdateFailed):
+            await coordinator._async_update_data()
+
+    @pytest.mark.asyncio
+    async def test_device_answering_again_is_available(self, hass, master):
+        """Test that a device is available again after its next successful read."""
+        coordinator = EctoMasterCoordinator(hass, "boiler", master, [RELAY])
+        coordinator.cache.mark_unavailable(5)
+        await coordinator._async_update_data()
+        assert coordinator.cache.available(5)
+
+
+class TestRemoteEntities:
+    """Test suite for the entities of polled devices."""
+
+    @pytest.mark.asyncio
+    async def test_sensor(self, hass, master):
+        """Test that sensors read, name and identify polled readings."""
+        coordinator = EctoMasterCoordinator(hass, "boiler", master, [ADAPTER, THERMOMETER])
+        sensor = EctoRemoteSensor(coordinator, ADAPTER, "ch_temperature", "CH temperature", "temperature")
+        attic = EctoRemoteSensor(coordinator, THERMOMETER, "temperature", "temperature", "temperature")
+        assert sensor.available is False
+
+        await coordinator._async_update_data()
+        assert sensor.available is True
+        assert sensor.native_value == 45.2
+        assert sensor.native_unit_of_measurement == "°C"
+        assert sensor.unique_id == "ecto_master_boiler_1_ch_temperature"
+        assert attic.name == "Attic temperature"
+
+    @pytest.mark.asyncio
+    async def test_channel_binary_sensor(self, hass, master):
+        """Test that channel binary sensors follow the polled register 0x10."""
+        coordinator = EctoMasterCoordinator(hass, "boiler", master, [RELAY])
+        await coordinator._async_update_data()
+
+        channels = [EctoRemoteChannelSensor(coordinator, RELAY, channel) for channel in range(3)]
+        assert [channel.is_on for channel in channels] == [True, False, True]
+        assert channels[0].unique_id == "ecto_master_boiler_5_ch0"
+
+    @pytest.mark.asyncio
+    async def test_splitter_channels_use_documented_layout(self, hass, master):
+        """Test that contact splitter channels are decoded from registers 0x10-0x11, LSB first."""
+        coordinator = EctoMasterCoordinator(hass, "boiler", master, [SPLITTER])
+        await coordinator._async_update_data()
+
+        assert coordinator.cache.available(6)
+        channels = [EctoRemoteChannelSensor(coordinator, SPLITTER, channel) for channel in range(10)]
+        assert [channel.is_on for channel in channels] == [
+            True, False, True, False, False, False, False, False, False, True]
@@ -0,0 +1,247 @@
+"""Tests for the ecto_modbus services."""
+import pytest
+import voluptuous as vol
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.ecto_modbus.const import (
+    DOMAIN,
+    SERVICE_DUMP_CAPTURE,
+    SERVICE_GET_STATS,
+    SERVICE_SET_CHANNELS,
+    SERVICE_SET_TIMERS,
+)
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.services import (
+    SET_CHANNELS_SCHEMA,
+    SET_TIMERS_SCHEMA,
+    async_setup_services,
+)
+from custom_components.ecto_modbus.transport.response_cache import ResponseCache
+from custom_components.ecto_modbus.transport.stats import BusStats
+
+
+def _relay(addr, bus="default"):
+    server = MagicMock()
+    server.add_slave.return_value = MagicMock()
+    device = EctoRelay10CH({'addr': addr, 'bus': bus}, server)
+    device.registers[0x10] = MagicMock()
+    device.registers[0x20] = MagicMock()
+    return device
+
+
+def _handler(hass, service):
+    """Return the handler registered for an ecto_modbus service."""
+    for call in hass.services.async_register.call_args_list:
+        if call[0][:2] == (DOMAIN, service):
+            return call[0][2]
+    raise AssertionError(f"{service} not registered")
+
+
+@pytest.fixture
+def set_channels(hass):
+    """Register the services and return the set_channels handler."""
+    devices = [_relay(5), _relay(6)]
+    hass.data[DOMAIN] = {
+        "devices": devices,
+        "buses": {"default": {"name": "default", "devices": devices, "stats": BusStats(), "capture": None}},
+    }
+    async_setup_services(hass)
+    return _handler(hass, SERVICE_SET_CHANNELS)
+
+
+def _call(data):
+    call = MagicMock()
+    call.data = SET_CHANNELS_SCHEMA(data)
+    return call
+
+
+class TestSetChannelsSchema:
+    """Test suite for the set_channels service schema."""
+
+    def test_defaults(self):
+        """Test that turn_on/turn_off default to empty lists."""
+        data = SET_CHANNELS_SCHEMA({"devices": [{"addr": 5}]})
+        assert data["devices"][0]["turn_on"] == []
+        assert data["devices"][0]["turn_off"] == []
+
+    def test_channel_range(self):
+        """Test that channels outside 0-9 are rejected."""
+        with pytest.raises(vol.Invalid):
+            SET_CHANNELS_SCHEMA({"devices": [{"addr": 5, "turn_on": [10]}]})
+
+
+class TestSetChannelsService:
+    """Test suite for the set_channels service handler."""
+
+    @pytest.mark.asyncio
+    async def test_one_write_per_device(self, hass, set_channels):
+        """Test that each device gets a single register write."""
+        await set_channels(_call({"devices": [
+            {"addr": 5, "turn_on": [0, 1, 2], "turn_off": [9]},
+            {"addr": 6, "turn_on": [8]},
+        ]}))
+
+        relay5, relay6 = hass.data[DOMAIN]["devices"]
+        relay5.registers[0x10].set_raw_value.assert_called_once_with([0x0700])
+        relay6.registers[0x10].set_raw_value.assert_called_once_with([0x0001])
+
+    @pytest.mark.asyncio
+    async def test_unknown_device_applies_nothing(self, hass, set_channels):
+        """Test that a bad entry aborts the whole call before any write."""
+        with pytest.raises(HomeAssistantError):
+            await set_channels(_call({"devices": [
+                {"addr": 5, "turn_on": [0]},
+                {"addr": 7, "turn_on": [0]},
+            ]}))
+
+        relay5 = hass.data[DOMAIN]["devices"][0]
+        relay5.registers[0x10].set_raw_value.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_same_address_on_two_buses(self, hass, set_channels):
+        """Test that a shared address needs the bus field."""
+        upstairs = _relay(5, bus="upstairs")
+        hass.data[DOMAIN]["devices"].append(upstairs)
+
+        with pytest.raises(HomeAssistantError):
+            await set_channels(_call({"devices": [{"addr": 5, "turn_on": [0]}]}))
+
+        await set_channels(_call({"devices": [{"bus": "upstairs", "addr": 5, "turn_on": [0]}]}))
+
+        upstairs.registers[0x10].set_raw_value.assert_called_once_with([0x0100])
+        hass.data[DOMAIN]["devices"][0].registers[0x10].set_raw_value.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_conflicting_channels(self, hass, set_channels):
+        """Test that a channel in both lists is rejected."""
+        with pytest.raises(HomeAssistantError):
+            await set_channels(_call({"devices": [{"addr": 5, "turn_on": [1], "turn_off": [1]}]}))
+
+
+class TestSetTimersService:
+    """Test suite for the set_timers service handler."""
+
+    @pytest.mark.asyncio
+    async def test_one_write_per_relay(self, hass, set_channels):
+        """Test that each relay gets one contiguous timer write."""
+        call = MagicMock()
+        call.data = SET_TIMERS_SCHEMA({"devices": [
+            {"addr": 5, "timers": [
+                {"channel": 1, "initial_state": True, "seconds": 30},
+                {"channel": 3, "seconds": 1.5},
+            ]},
+        ]})
+
+        await _handler(hass, SERVICE_SET_TIMERS)(call)
+
+        relay5, relay6 = hass.data[DOMAIN]["devices"]
+        relay5.registers[0x20].set_raw_value.assert_called_once_with([(1 << 15) | 60, 0, 3], offset=1)
+        relay6.registers[0x20].set_raw_value.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_channel(self, hass, set_channels):
+        """Test that a channel listed twice is rejected before any write."""
+        call = MagicMock()
+        call.data = SET_TIMERS_SCHEMA({"devices": [
+            {"addr": 5, "timers": [{"channel": 1, "seconds": 1}, {"channel": 1, "seconds": 2}]},
+        ]})
+
+        with pytest.raises(HomeAssistantError):
+            await _handler(hass, SERVICE_SET_TIMERS)(call)
+
+        hass.data[DOMAIN]["devices"][0].registers[0x20].set_raw_value.assert_not_called()
+
+    def test_seconds_range(self):
+        """Test that timeouts beyond 15 bits of 500 ms are rejected."""
+        with pytest.raises(vol.Invalid):
+            SET_TIMERS_SCHEMA({"devices": [{"addr": 5, "timers": [{"channel": 0, "seconds": 16384}]}]})
+
+
+class TestGetStatsService:
+    """Test suite for the get_stats service handler."""
+
+    @pytest.mark.asyncio
+    async def test_returns_bus_stats(self, hass, set_channels):
+        """Test that the service responds with the bus statistics."""
+        hass.data[DOMAIN]["buses"]["default"]["stats"].slave(5).requests = 3
+        hass.data[DOMAIN]["buses"]["default"]["response_cache"] = ResponseCache()
+
+        response = await _handler(hass, SERVICE_GET_STATS)(MagicMock())
+
+        assert response["buses"]["default"]["slaves"]["5"]["requests"] == 3
+        assert response["buses"]["default"]["response_cache"]["hits"] == 0
+
+
+class TestDumpCaptureService:
+    """Test suite for the dump_capture service handler."""
+
+    @pytest.mark.asyncio
+    async def test_capture_disabled(self, hass, set_channels):
+        """Test that dumping without a capture buffer fails."""
+        call = MagicMock()
+        call.data = {}
+
+        with pytest.raises(HomeAssistantError):
+            await _handler(hass, SERVICE_DUMP_CAPTURE)(call)
+
+    @pytest.mark.asyncio
+    async def test_path_not_allowed(self, hass, set_channels):
+        """Test that explicit paths outside allowlist_external_dirs are refused."""
+        hass.data[DOMAIN]["buses"]["default"]["capture"] = MagicMock()
+        hass.config = MagicMock()
+        hass.config.is_allowed_path.return_value = False
+        call = MagicMock()
+        call.data = {"path": "/etc/capture.pcap"}
+
+        with pytest.raises(HomeAssistantError):
+            await _handler(hass, SERVICE_DUMP_CAPTURE)(call)
+
+        hass.data[DOMAIN]["buses"]["default"]["capture"].dump_pcap.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_dump_to_default_path(self, hass, set_channels):
+        """Test that the capture is written in the executor to the config directory."""
+        capture = hass.data[DOMAIN]["buses"]["default"]["capture"] = MagicMock()
+        hass.config = MagicMock()
+        hass.config.path.return_value = "/config/ecto_modbus_capture.pcap"
+        hass.async_add_executor_job = AsyncMock(return_value=12)
+        call = MagicMock()
+        call.data = {}
+
+        response = await _handler(hass, SERVICE_DUMP_CAPTURE)(call)
+
+        hass.async_add_executor_job.assert_awaited_once_with(
+            capture.dump_pcap, "/config/ecto_modbus_capture.pcap"
+        )
+        assert response == {"bus": "default", "path": "/config/ecto_modbus_capture.pcap", "packets": 12}
+
+    @pytest.mark.asyncio
+    async def test_dump_named_bus(self, hass, set_channels):
+        """Test that the bus field selects the capture and the default file name."""
+        capture = MagicMock()
+        hass.data[DOMAIN]["buses"]["upstairs"] = {
+            "name": "upstairs", "devices": [], "stats": BusStats(), "capture": capture,
+        }
+        hass.config = MagicMock()
+        hass.config.path.side_effect = lambda name: f"/config/{name}"
+        hass.async_add_executor_job = AsyncMock(return_value=4)
+        call = MagicMock()
+        call.data = {"bus": "upstairs"}
+
+        response = await _handler(hass, SERVICE_DUMP_CAPTURE)(call)
+
+        hass.async_add_executor_job.assert_awaited_once_with(
+            capture.dump_pcap, "/config/ecto_modbus_capture_upstairs.pcap"
+        )
+        assert response["bus"] == "upstairs"
+
+    @pytest.mark.asyncio
+    async def test_unknown_bus(self, hass, set_channels):
+        """Test that an unknown bus name is refused."""
+        call = MagicMock()
+        call.data = {"bus": "attic"}
+
+        with pytest.raises(HomeAssistantError):
+            await _handler(hass, SERVICE_DUMP_CAPTURE)(call)
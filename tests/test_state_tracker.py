@@ -0,0 +1,96 @@
+"""Tests for the shared entity state tracker."""
+from unittest.mock import MagicMock, patch
+
+from custom_components.ecto_modbus.state_tracker import EctoStateTracker
+
+
+def _event(entity_id, state):
+    new_state = None
+    if state is not None:
+        new_state = MagicMock()
+        new_state.state = state
+    event = MagicMock()
+    event.data = {"entity_id": entity_id, "new_state": new_state}
+    return event
+
+
+def _device(addr):
+    device = MagicMock()
+    device.addr = addr
+    return device
+
+
+class TestEctoStateTracker:
+    """Test suite for EctoStateTracker."""
+
+    def test_start_subscribes_once_for_all_entities(self, hass):
+        """Test that one listener covers every tracked entity."""
+        tracker = EctoStateTracker(hass)
+        tracker.register("sensor.a", _device(4))
+        tracker.register("sensor.b", _device(5))
+
+        with patch('custom_components.ecto_modbus.state_tracker.async_track_state_change_event') as mock_track:
+            tracker.async_start()
+
+        mock_track.assert_called_once_with(hass, ["sensor.a", "sensor.b"], tracker._async_on_state_event)
+
+    def test_start_applies_current_state(self, hass):
+        """Test that devices start from the entity's current state."""
+        hass.states.get.side_effect = lambda entity_id: MagicMock(state="21.5")
+        tracker = EctoStateTracker(hass)
+        device = _device(4)
+        tracker.register("sensor.a", device)
+
+        with patch('custom_components.ecto_modbus.state_tracker.async_track_state_change_event'):
+            tracker.async_start()
+
+        device.apply_state.assert_called_once_with("21.5")
+
+    def test_one_entity_feeds_several_devices(self, hass):
+        """Test that every device registered for an entity gets the state."""
+        tracker = EctoStateTracker(hass)
+        devices = [_device(4), _device(5)]
+        for device in devices:
+            tracker.register("sensor.a", device)
+
+        tracker._async_on_state_event(_event("sensor.a", "20.0"))
+        tracker._flush()
+
+        for device in devices:
+            device.apply_state.assert_called_once_with("20.0")
+
+    def test_changes_batched_per_iteration(self, hass):
+        """Test that changes within one iteration share a pass and keep the latest state."""
+        tracker = EctoStateTracker(hass)
+        device_a, device_b = _device(4), _device(5)
+        tracker.register("sensor.a", device_a)
+        tracker.register("sensor.b", device_b)
+
+        tracker._async_on_state_event(_event("sensor.a", "20.0"))
+        tracker._async_on_state_event(_event("sensor.b", "18.0"))
+        tracker._async_on_state_event(_event("sensor.a", "20.5"))
+        hass.loop.call_soon.call_args[0][0]()
+
+        hass.loop.call_soon.assert_called_once()
+        device_a.apply_state.assert_called_once_with("20.5")
+        device_b.apply_state.assert_called_once_with("18.0")
+
+    def test_removed_entity_ignored(self, hass):
+        """Test that events without a new state are skipped."""
+        tracker = EctoStateTracker(hass)
+        tracker.register("sensor.a", _device(4))
+
+        tracker._async_on_state_event(_event("sensor.a", None))
+
+        hass.loop.call_soon.assert_not_called()
+
+    def test_stop_unsubscribes(self, hass):
+        """Test that stop removes the listener."""
+        tracker = EctoStateTracker(hass)
+        tracker.register("sensor.a", _device(4))
+        with patch('custom_components.ecto_modbus.state_tracker.async_track_state_change_event') as mock_track:
+            tracker.async_start()
+
+        tracker.async_stop()
+
+        mock_track.return_value.assert_called_once()
@@ -0,0 +1,204 @@
+"""Tests for the relay timer engine, driven by a fake clock."""
+import struct
+from unittest.mock import MagicMock
+
+import pytest
+from modbus_tk import utils
+from modbus_tk.modbus_rtu import RtuQuery
+
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.timer_engine import EctoTimerEngine
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+
+
+class FakeLoop:
+    """Event loop stand-in with a manual clock and recorded call_at handles."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.handles = []
+
+    def time(self):
+        return self.now
+
+    def call_at(self, when, callback):
+        handle = MagicMock()
+        handle.when = when
+        handle.callback = callback
+        self.handles.append(handle)
+        return handle
+
+    def pending(self):
+        return [handle for handle in self.handles if not handle.cancel.called]
+
+    def advance(self, seconds):
+        """Move the clock and run the due callback, as the loop would."""
+        self.now += seconds
+        for handle in self.pending():
+            if handle.when <= self.now:
+                handle.cancel()
+                handle.callback()
+
+
+@pytest.fixture
+def loop():
+    return FakeLoop()
+
+
+@pytest.fixture
+def engine(loop):
+    return EctoTimerEngine(loop)
+
+
+@pytest.fixture
+def databank():
+    return RegisterBankDatabank(error_on_missing_slave=False)
+
+
+def _relay(engine, databank, addr=5):
+    server = MagicMock()
+    server.add_slave.side_effect = databank.add_slave
+    device = EctoRelay10CH({"addr": addr}, server)
+    engine.add_device(device)
+    return device
+
+
+def _state_register(device):
+    return device.registers[0x10].get_values()[0]
+
+
+class TestEctoTimerEngine:
+    """Test suite for EctoTimerEngine."""
+
+    def test_timer_switches_initial_then_opposite(self, loop, engine, databank):
+        """Test that a timer turns the channel on and off after the timeout."""
+        device = _relay(engine, databank)
+
+        device.set_timer(0, True, 30)
+
+        assert device.get_channel_state(0) == 1
+        assert len(engine) == 1
+
+        loop.advance(29.5)
+        assert device.get_channel_state(0) == 1
+
+        loop.advance(0.5)
+        assert device.get_channel_state(0) == 0
+        assert device.timers[0] == 0
+        assert device.registers[0x20].get_values()[0] == 0
+        assert len(engine) == 0
+        assert loop.pending() == []
+
+    def test_initial_off_turns_on(self, loop, engine, databank):
+        """Test that an initial-off timer switches the channel on when it expires."""
+        device = _relay(engine, databank)
+        device.set_switch_state(9, 1)
+
+        device.set_timer(9, False, 2)
+        assert device.get_channel_state(9) == 0
+
+        loop.advance(2)
+        assert device.get_channel_state(9) == 1
+        assert _state_register(device) == 0x0002
+
+    def test_rearm_replaces_deadline(self, loop, engine, databank):
+        """Test that writing a new timeout restarts the timer."""
+        device = _relay(engine, databank)
+        device.set_timer(1, True, 10)
+        loop.advance(8)
+
+        device.set_timer(1, True, 5)
+        loop.advance(4)
+        assert device.get_channel_state(1) == 1
+
+        loop.advance(1)
+        assert device.get_channel_state(1) == 0
+        assert len(loop.pending()) == 0
+
+    def test_zero_cancels(self, loop, engine, databank):
+        """Test that clearing the timer register keeps the current state."""
+        device = _relay(engine, databank)
+        device.set_timer(2, True, 10)
+
+        device.set_timer(2, False, 0)
+        loop.advance(10)
+
+        assert device.get_channel_state(2) == 1
+        assert len(engine) == 0
+        assert loop.pending() == []
+
+    def test_due_timers_applied_per_device(self, loop, engine, databank):
+        """Test that timers expiring together cost one state write per relay."""
+        device = _relay(engine, databank)
+        device.set_timers({channel: (True, 5) for channel in range(10)})
+        device.registers[0x10] = MagicMock()
+
+        loop.advance(5)
+
+        device.registers[0x10].set_raw_value.assert_called_once_with([0x0000])
+        assert device.timers == [0] * 10
+
+    def test_many_timers_one_callback(self, loop, engine, databank):
+        """Test that 320 timers over 32 relays share one pending loop callback."""
+        devices = [_relay(engine, databank, addr) for addr in range(3, 35)]
+        seconds = {}
+        for index, device in enumerate(devices):
+            timers = {channel: (True, 1 + (index * 10 + channel) % 60) for channel in range(10)}
+            seconds.update(((device, channel), timer[1]) for channel, timer in timers.items())
+            device.set_timers(timers)
+
+        assert len(engine) == 320
+        assert len(loop.pending()) == 1
+
+        loop.advance(30)
+        on = sum(device.get_channel_state(channel) for device in devices for channel in range(10))
+        assert on == sum(1 for timeout in seconds.values() if timeout > 30)
+        assert len(loop.pending()) == 1
+
+        loop.advance(30)
+        assert all(device._mask == 0 for device in devices)
+        assert len(engine) == 0
+        assert loop.pending() == []
+
+    def test_bus_write_arms_timer(self, loop, engine, databank):
+        """Test that a timer written by the bus master is run by the engine."""
+        device = _relay(engine, databank)
+        pdu = struct.pack(">BHHB2H", 0x10, 0x0023, 2, 4, 0x8000 | 4, 0x8000 | 6)
+        frame = bytes([5]) + pdu
+        databank.handle_request(RtuQuery(), frame + struct.pack(">H", utils.calculate_crc(frame)))
+
+        # The write hook delivers the new values to the device
+        device.on_register_write(0x23, list(device.registers[0x20].get_values()[3:5]))
+        assert device.get_channel_state(3) == 1
+        assert device.get_channel_state(4) == 1
+
+        loop.advance(2)
+        assert device.get_channel_state(3) == 0
+        assert device.get_channel_state(4) == 1
+
+        loop.advance(1)
+        assert device.get_channel_state(4) == 0
+        assert device.registers[0x20].get_values()[3:5] == (0, 0)
+
+    def test_stop_drops_timers(self, loop, engine, databank):
+        """Test that async_stop cancels the pending callback."""
+        device = _relay(engine, databank)
+        device.set_timer(0, True, 10)
+
+        engine.async_stop()
+
+        assert loop.pending() == []
+        assert len(engine) == 0
+
+    def test_stopped_engine_does_not_fire(self, loop, engine, databank):
+        """Test that no timer expires on a device after async_stop."""
+        device = _relay(engine, databank)
+        device.set_timer(0, True, 10)
+        timer = device.registers[0x20].get_values()[0]
+
+        engine.async_stop()
+        loop.advance(20)
+
+        # Neither switched back nor cleared
+        assert device.get_channel_state(0) == 1
+        assert device.registers[0x20].get_values()[0] == timer
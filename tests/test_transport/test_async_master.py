@@ -0,0 +1,192 @@
+"""Tests for the asyncio Modbus RTU master engine."""
+import asyncio
+import fcntl
+import os
+import pty
+import struct
+import termios
+import tty
+
+import pytest
+import modbus_tk.defines as cst
+from modbus_tk.exceptions import ModbusError
+
+from custom_components.ecto_modbus.const import PORT_TYPE_SERIAL
+from custom_components.ecto_modbus.devices import bitfield
+from custom_components.ecto_modbus.devices.binary_sensor import EctoCH10BinarySensor
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.transport.async_master import (
+    AsyncRtuMaster,
+    RegisterCache,
+    expected_response_length,
+)
+from custom_components.ecto_modbus.transport.async_rtu import AsyncRtuServer
+from custom_components.ecto_modbus.transport.serial_port import open_serial_port
+
+BAUDRATE = 115200
+# Address of the simulated OpenTherm adapter
+ADAPTER_ADDR = 1
+
+
+class FdSerial:
+    """Serial port interface over the master side of a pseudo-terminal."""
+
+    def __init__(self, fd, baudrate=BAUDRATE):
+        self._fd = fd
+        self.baudrate = baudrate
+        self.is_open = True
+        self.timeout = None
+        self.name = "pty"
+
+    @property
+    def in_waiting(self):
+        return struct.unpack("I", fcntl.ioctl(self._fd, termios.FIONREAD, b"\0\0\0\0"))[0]
+
+    def read(self, size=1):
+        try:
+            return os.read(self._fd, size)
+        except BlockingIOError:
+            return b""
+
+    def write(self, data):
+        return os.write(self._fd, data)
+
+    def fileno(self):
+        return self._fd
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+
+@pytest.fixture
+async def bus():
+    """A master on one end of a PTY, the integration's slave engine on the other.
+
+    The slaves are a relay block (5), a contact splitter (6) and the sensor
+    registers of an OpenTherm adapter (1).
+    """
+    master_fd, slave_fd = pty.openpty()
+    tty.setraw(slave_fd)
+    os.set_blocking(master_fd, False)
+    server = AsyncRtuServer(FdSerial(master_fd))
+    relay = EctoRelay10CH({"addr": 5}, server)
+    contacts = EctoCH10BinarySensor({"addr": 6}, server)
+    adapter = server.add_slave(ADAPTER_ADDR)
+    adapter.add_block("sensors", cst.HOLDING_REGISTERS, 0x10, 23)
+    server.start()
+    master = AsyncRtuMaster(open_serial_port(os.ttyname(slave_fd), PORT_TYPE_SERIAL, BAUDRATE))
+    master.start()
+    yield master, relay, contacts, adapter
+    master.stop()
+    server.stop()
+    os.close(slave_fd)
+    os.close(master_fd)
+
+
+class TestExpectedResponseLength:
+    def test_reads_scale_with_register_count(self):
+        assert expected_response_length(struct.pack(">BHH", cst.READ_HOLDING_REGISTERS, 0x10, 23)) == 51
+        assert expected_response_length(struct.pack(">BHH", cst.READ_INPUT_REGISTERS, 0x20, 1)) == 7
+
+    def test_writes_echo_the_request(self):
+        assert expected_response_length(struct.pack(">BHH", cst.WRITE_SINGLE_REGISTER, 0x10, 1)) == 8
+        assert expected_response_length(
+            struct.pack(">BHHBH", cst.WRITE_MULTIPLE_REGISTERS, 0x10, 1, 2, 1)) == 8
+
+    def test_unknown_function_code(self):
+        assert expected_response_length(bytes((cst.READ_COILS, 0, 0, 0, 1))) is None
+
+
+class TestRegisterCache:
+    def test_store_and_get(self):
+        cache = RegisterCache()
+        cache.store(1, cst.READ_HOLDING_REGISTERS, 0x10, (1, 2, 3))
+        assert cache.get(1, cst.READ_HOLDING_REGISTERS, 0x12) == 3
+        assert cache.get(1, cst.READ_INPUT_REGISTERS, 0x12) is None
+        assert cache.get(2, cst.READ_HOLDING_REGISTERS, 0x10) is None
+
+    def test_unavailable_slave_hides_values_until_next_read(self):
+        cache = RegisterCache()
+        cache.store(1, cst.READ_HOLDING_REGISTERS, 0x10, (7,))
+        cache.mark_unavailable(1)
+        assert not cache.available(1)
+        assert cache.get(1, cst.READ_HOLDING_REGISTERS, 0x10) is None
+        cache.store(1, cst.READ_HOLDING_REGISTERS, 0x10, (8,))
+        assert cache.available(1)
+        assert cache.get(1, cst.READ_HOLDING_REGISTERS, 0x10) == 8
+
+    def test_never_read_slave_is_unavailable(self):
+        assert not RegisterCache().available(1)
+
+
+class TestAsyncRtuMaster:
+    @pytest.mark.asyncio
+    async def test_execute_requires_start(self):
+        master = AsyncRtuMaster(FdSerial(-1))
+        with pytest.raises(RuntimeError):
+            await master.read_registers(1, 0x10, 1)
+
+    @pytest.mark.asyncio
+    async def test_reads_device_registers(self, bus):
+        master, relay, contacts, adapter = bus
+        relay.set_switch_state(2, 1)
+        contacts.set_switch_state(0, 1)
+        adapter.set_values("sensors", 0x18, [452, 0x7FFF])
+
+        assert await master.read_registers(5, 0x10, 1) == (bitfield.encode_channels(0b100),)
+        assert await master.read_registers(6, 0x10, 1, cst.READ_INPUT_REGISTERS) == \
+            (bitfield.encode_channels(0b1),)
+        values = await master.read_registers(ADAPTER_ADDR, 0x10, 23)
+        assert len(values) == 23
+        assert values[8:10] == (452, 0x7FFF)
+        # Identity registers of the emulated device
+        assert (await master.read_registers(5, 0x00, 4))[3] == (EctoRelay10CH.DEVICE_TYPE << 8) | 10
+        assert master.as_dict() == {"requests": 4, "timeouts": 0, "errors": 0, "queued": 0}
+
+    @pytest.mark.asyncio
+    async def test_writes_registers(self, bus):
+        master, _relay, _contacts, adapter = bus
+        value = bitfield.encode_channels(0b11)
+        await master.write_register(5, 0x10, value)
+        assert await master.read_registers(5, 0x10, 1) == (value,)
+        await master.write_registers(ADAPTER_ADDR, 0x11, [10, 20])
+        assert adapter.get_values("sensors", 0x11, 2) == (10, 20)
+
+    @pytest.mark.asyncio
+    async def test_absent_slave_times_out(self, bus):
+        master = bus[0]
+        with pytest.raises(asyncio.TimeoutError):
+            await master.read_registers(9, 0x10, 1, timeout=0.05)
+        assert master.timeouts == 1
+        # The bus is usable again after the timeout
+        assert len(await master.read_registers(5, 0x10, 1)) == 1
+
+    @pytest.mark.asyncio
+    async def test_exception_response_raises_modbus_error(self, bus):
+        master = bus[0]
+        with pytest.raises(ModbusError) as err:
+            await master.read_registers(5, 0x40, 1)
+        assert err.value.get_exception_code() == cst.ILLEGAL_DATA_ADDRESS
+        assert master.errors == 1
+
+    @pytest.mark.asyncio
+    async def test_writes_go_ahead_of_queued_reads(self, bus):
+        master = bus[0]
+        value = bitfield.encode_channels(0b1)
+        reads = [master.read_registers(5, 0x10, 1) for _ in range(3)]
+        results = await asyncio.gather(*reads, master.write_register(5, 0x10, value))
+        # The write was queued last but sent first
+        assert results[:3] == [(value,)] * 3
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_queued_requests(self, bus):
+        master = bus[0]
+        reads = [asyncio.ensure_future(master.read_registers(9, 0x10, 1, timeout=1)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        master.stop()
+        results = await asyncio.gather(*reads, return_exceptions=True)
+        assert all(isinstance(result, asyncio.CancelledError) for result in results)
+        assert not master.running
@@ -0,0 +1,193 @@
+"""Tests for the asyncio Modbus RTU slave engine."""
+import struct
+import pytest
+from unittest.mock import MagicMock
+import modbus_tk.defines as cst
+from modbus_tk import utils
+
+from custom_components.ecto_modbus.transport.async_rtu import (
+    AsyncRtuServer,
+    expected_request_length,
+)
+
+
+def _frame(*pdu):
+    """Build an RTU frame (slave + PDU + CRC) from raw bytes."""
+    data = bytes(pdu)
+    return data + struct.pack(">H", utils.calculate_crc(data))
+
+
+class FakeSerial:
+    """Serial port double fed from a byte buffer."""
+
+    def __init__(self, baudrate=19200):
+        self.baudrate = baudrate
+        self.is_open = True
+        self.timeout = None
+        self.name = "/dev/fake"
+        self.rx = bytearray()
+        self.tx = []
+
+    @property
+    def in_waiting(self):
+        return len(self.rx)
+
+    def read(self, size=1):
+        data = bytes(self.rx[:size])
+        del self.rx[:size]
+        return data
+
+    def write(self, data):
+        self.tx.append(bytes(data))
+        return len(data)
+
+    def fileno(self):
+        return 42
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+
+@pytest.fixture
+def server():
+    """AsyncRtuServer on a fake port with a mocked loop and one slave."""
+    loop = MagicMock()
+    srv = AsyncRtuServer(FakeSerial(), loop=loop)
+    slave = srv.add_slave(5)
+    slave.add_block("val-x16", cst.HOLDING_REGISTERS, 0x10, 1)
+    slave.set_values("val-x16", 0x10, [0x8103])
+    return srv
+
+
+class TestExpectedRequestLength:
+    """Test suite for RTU request length detection."""
+
+    def test_read_holding_registers(self):
+        """Test fixed-length read requests."""
+        assert expected_request_length(bytes([5, 0x03])) == 8
+
+    def test_write_multiple_registers(self):
+        """Test variable-length FC 0x10 requests use the byte count."""
+        partial = bytes([5, 0x10, 0x00, 0x20, 0x00, 0x02, 0x04])
+        assert expected_request_length(partial) == 7 + 4 + 2
+
+    def test_write_multiple_registers_without_byte_count(self):
+        """Test that the length is unknown until the byte count arrives."""
+        assert expected_request_length(bytes([5, 0x10, 0x00, 0x20])) is None
+
+    def test_unknown_function(self):
+        """Test that unknown function codes fall back to silence detection."""
+        assert expected_request_length(bytes([5, 0x2B])) is None
+
+    def test_too_short(self):
+        """Test that a single byte is not enough."""
+        assert expected_request_length(bytes([5])) is None
+
+
+class TestAsyncRtuServer:
+    """Test suite for AsyncRtuServer."""
+
+    def test_start_registers_reader(self, server):
+        """Test that start watches the port on the event loop without blocking."""
+        server.start()
+
+        server._loop.add_reader.assert_called_once_with(42, server._on_readable)
+        assert server._serial.timeout == 0
+
+    def test_stop_removes_reader(self, server):
+        """Test that stop releases the reader and the port."""
+        server.start()
+        server.stop()
+
+        server._loop.remove_reader.assert_called_once_with(42)
+        assert server._serial.is_open is False
+
+    def test_complete_frame_answered_immediately(self, server):
+        """Test that a whole read request is answered without waiting for t3.5."""
+        server._serial.rx += _frame(5, 0x03, 0x00, 0x10, 0x00, 0x01)
+
+        server._on_readable()
+
+        assert server._serial.tx == [_frame(5, 0x03, 0x02, 0x81, 0x03)]
+        server._loop.call_later.assert_not_called()
+
+    def test_partial_frame_waits_for_rest(self, server):
+        """Test that a frame split across reads is reassembled."""
+        frame = _frame(5, 0x03, 0x00, 0x10, 0x00, 0x01)
+        server._serial.rx += frame[:3]
+        server._on_readable()
+        assert server._serial.tx == []
+
+        server._serial.rx += frame[3:]
+        server._on_readable()
+
+        assert server._serial.tx == [_frame(5, 0x03, 0x02, 0x81, 0x03)]
+
+    def test_write_single_register(self, server):
+        """Test that FC 0x06 writes land in the slave's block."""
+        server._serial.rx += _frame(5, 0x06, 0x00, 0x10, 0x01, 0x00)
+
+        server._on_readable()
+
+        assert server.get_slave(5).get_values("val-x16", 0x10, 1) == (0x0100,)
+        assert server._serial.tx == [_frame(5, 0x06, 0x00, 0x10, 0x01, 0x00)]
+
+    def test_unknown_length_completed_on_silence(self, server):
+        """Test that frames of unknown length are completed by the t3.5 timer."""
+        server._serial.rx += _frame(5, 0x2B, 0x0E, 0x01, 0x00)
+
+        server._on_readable()
+        assert server._serial.tx == []
+        delay, callback = server._loop.call_later.call_args[0]
+        assert delay == pytest.approx(3.5 * 11.0 / 19200)
+
+        callback()
+
+        # Unsupported function → exception response
+        assert server._serial.tx == [_frame(5, 0x2B | 0x80, 0x01)]
+
+    def test_missing_slave_is_silent(self, server):
+        """Test that requests for other slaves get no response."""
+        server._serial.rx += _frame(9, 0x03, 0x00, 0x10, 0x00, 0x01)
+
+        server._on_readable()
+
+        assert server._serial.tx == []
+
+    def test_no_response_when_new_request_pending(self, server):
+        """Test that a stale response is dropped if the master already moved on."""
+        server._serial.rx += _frame(5, 0x03, 0x00, 0x10, 0x00, 0x01)
+        server._serial.read = MagicMock(
+            return_value=bytes(_frame(5, 0x03, 0x00, 0x10, 0x00, 0x01))
+        )
+
+        server._on_readable()
+
+        assert server._serial.tx == []
+
+    def test_stats_count_answered_request(self, server):
+        """Test that answered requests feed the per-slave statistics."""
+        server._serial.rx += _frame(5, 0x03, 0x00, 0x10, 0x00, 0x01)
+
+        server._on_readable()
+
+        stats = server.stats.slaves[5]
+        assert stats.requests == 1
+        assert stats.function_codes[0x03] == 1
+        assert stats.turnaround.count == 1
+
+    def test_stats_count_crc_error(self, server):
+        """Test that a frame with a bad CRC is counted for its slave address."""
+        frame = bytearray(_frame(5, 0x03, 0x00, 0x10, 0x00, 0x01))
+        frame[-1] ^= 0xFF
+        server._serial.rx += frame
+
+        server._on_readable()
+        server._loop.call_later.call_args[0][1]()
+
+        assert server._serial.tx == []
+        assert server.stats.slaves[5].crc_errors == 1
+        assert server.stats.slaves[5].requests == 0
@@ -0,0 +1,149 @@
+"""Tests for the serial packet capture."""
+import struct
+import tracemalloc
+from unittest.mock import MagicMock
+
+from custom_components.ecto_modbus.transport.capture import (
+    DIRECTION_RX,
+    DIRECTION_TX,
+    PCAP_HEADER,
+    PCAP_MAGIC_NS,
+    PCAP_RECORD,
+    CaptureSerialWrapper,
+    HexView,
+    PacketCapture,
+    read_capture_file,
+)
+
+
+class TestPacketCapture:
+    """Test suite for PacketCapture."""
+
+    def test_records_in_order(self):
+        """Test that appended chunks come back oldest first with direction."""
+        capture = PacketCapture(4096)
+        capture.append(DIRECTION_RX, b"\x05\x03", 1)
+        capture.append(DIRECTION_TX, b"\x05\x03\x02", 1)
+
+        records = capture.records()
+
+        assert [(direction, data) for _, direction, data in records] == [
+            (DIRECTION_RX, b"\x05\x03"),
+            (DIRECTION_TX, b"\x05\x03\x02"),
+        ]
+        assert records[0][0] <= records[1][0]
+
+    def test_ring_keeps_latest(self):
+        """Test that old chunks are dropped once both halves are full."""
+        capture = PacketCapture(2048)
+        for index in range(1000):
+            capture.append(DIRECTION_RX, struct.pack(">H", index), 1)
+
+        records = capture.records()
+
+        assert records[-1][2] == struct.pack(">H", 999)
+        values = [struct.unpack(">H", data)[0] for _, _, data in records]
+        assert values == list(range(values[0], 1000))
+        assert capture.packets == 1000
+
+    def test_switch_does_not_allocate(self):
+        """Test that clearing a half on a switch allocates no half-sized buffer."""
+        capture = PacketCapture(65536)
+        data = bytes(20)
+        tracemalloc.start()
+        try:
+            # About two halves of records: the active half switches at least once
+            for _ in range(2500):
+                capture.append(DIRECTION_RX, data, 1)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert capture.packets == 2500
+        assert peak < 4096
+
+    def test_oversized_chunk_truncated(self):
+        """Test that a chunk larger than half the buffer is cut to fit."""
+        capture = PacketCapture(2048)
+        capture.append(DIRECTION_RX, bytes(5000), 1)
+
+        assert len(capture.records()[0][2]) < 1024
+
+    def test_file_mode(self, tmp_path):
+        """Test that the memory-mapped capture file can be decoded offline."""
+        path = tmp_path / "capture.bin"
+        capture = PacketCapture(2048, path=str(path))
+        for index in range(600):
+            capture.append(DIRECTION_TX, struct.pack(">H", index), index + 1)
+        expected = capture.records()
+        capture.close()
+
+        assert read_capture_file(str(path)) == (expected, capture.epoch_ns)
+
+    def test_dump_pcap(self, tmp_path):
+        """Test the pcap output: nanosecond header and direction-prefixed packets."""
+        capture = PacketCapture(4096)
+        capture.append(DIRECTION_TX, b"\x05\x83\x02", 1)
+        path = tmp_path / "dump.pcap"
+
+        assert capture.dump_pcap(str(path)) == 1
+
+        data = path.read_bytes()
+        assert PCAP_HEADER.unpack_from(data)[0] == PCAP_MAGIC_NS
+        _, _, incl_len, _ = PCAP_RECORD.unpack_from(data, PCAP_HEADER.size)
+        assert incl_len == 4
+        assert data[PCAP_HEADER.size + PCAP_RECORD.size:] == b"\x01\x05\x83\x02"
+
+
+class TestCaptureSerialWrapper:
+    """Test suite for CaptureSerialWrapper."""
+
+    def test_read_write_captured(self):
+        """Test that RX and TX bytes are recorded and passed through."""
+        port = MagicMock()
+        port.read.return_value = b"\x05"
+        capture = PacketCapture(4096)
+        wrapper = CaptureSerialWrapper(port, capture)
+
+        assert wrapper.read(1) == b"\x05"
+        wrapper.write(b"\x06")
+
+        port.write.assert_called_once_with(b"\x06")
+        assert [data for _, _, data in capture.records()] == [b"\x05", b"\x06"]
+        assert wrapper.last_rx_ns > 0
+
+    def test_empty_read_not_captured(self):
+        """Test that timeouts (empty reads) leave no record."""
+        port = MagicMock()
+        port.read.return_value = b""
+        capture = PacketCapture(4096)
+
+        CaptureSerialWrapper(port, capture).read(1)
+
+        assert capture.records() == []
+
+    def test_timeout_forwarded(self):
+        """Test that the read timeout is set on the wrapped port."""
+        port = MagicMock()
+        wrapper = CaptureSerialWrapper(port, None)
+
+        wrapper.timeout = 0
+
+        assert port.timeout == 0
+
+    def test_hex_logging_opt_in(self):
+        """Test that hex logging is off unless enabled."""
+        port = MagicMock()
+        port.read.return_value = b"\xab"
+        logger = MagicMock()
+
+        CaptureSerialWrapper(port, None, logger).read(1)
+        logger.debug.assert_not_called()
+
+        CaptureSerialWrapper(port, None, logger, log_hex=True).read(1)
+        assert str(logger.debug.call_args[0][-1]) == "ab"
+
+
+def test_hex_view():
+    """Test the lazy hex formatting."""
+    assert str(HexView(b"\x01\xff")) == "01 ff"
@@ -93,6 +93,20 @@ class TestModBusRegisterSensor:
         # Assert
         mock_slave.set_values.assert_called_once_with("val-x16", 0x10, test_values)
 
+    def test_set_raw_value_offset(self, mock_modbus_server):
+        """Test writing part of a block at an offset."""
+        mock_slave = MagicMock()
+        sensor = ModBusRegisterSensor(
+            slave=mock_slave,
+            reg_type=cst.HOLDING_REGISTERS,
+            addr=0x20,
+            reg_size=10
+        )
+
+        sensor.set_raw_value([0x8014], offset=3)
+
+        mock_slave.set_values.assert_called_once_with("val-x32", 0x23, [0x8014])
+
     def test_set_raw_value_empty(self, mock_modbus_server):
         """Test setting empty value list."""
         # Setup
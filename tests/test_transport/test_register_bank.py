@@ -0,0 +1,300 @@
+"""Tests for the array-backed register bank."""
+import struct
+import threading
+import pytest
+from unittest.mock import MagicMock
+import modbus_tk.defines as cst
+from modbus_tk import hooks
+from modbus_tk.exceptions import (
+    DuplicatedKeyError,
+    MissingKeyError,
+    OutOfModbusBlockError,
+    OverlapModbusBlockError,
+)
+from modbus_tk.modbus import Slave
+
+from custom_components.ecto_modbus.transport.modBusRTU import ModBusRegisterSensor
+from custom_components.ecto_modbus.transport.register_bank import (
+    RegisterBankDatabank,
+    RegisterBankSlave,
+)
+
+
+@pytest.fixture
+def slave():
+    """Register bank slave with the identity and relay state blocks."""
+    bank_slave = RegisterBankSlave(5)
+    bank_slave.add_block("val-x0", cst.READ_INPUT_REGISTERS, 0x00, 4)
+    bank_slave.add_block("val-x16", cst.HOLDING_REGISTERS, 0x10, 1)
+    return bank_slave
+
+
+class TestRegisterBankSlave:
+    """Test suite for RegisterBankSlave."""
+
+    def test_images_sized_to_blocks(self, slave):
+        """Test that table images only cover the mapped address space."""
+        assert len(slave.images[cst.HOLDING_REGISTERS]) == 0x11
+        assert len(slave.images[cst.ANALOG_INPUTS]) == 0x04
+
+    def test_set_get_values(self, slave):
+        """Test block-level access goes through the image."""
+        slave.set_values("val-x0", 0x00, [0x8000, 0x0001, 0x0002, 0x5908])
+
+        assert slave.get_values("val-x0", 0x00, 4) == (0x8000, 0x0001, 0x0002, 0x5908)
+        assert slave.images[cst.READ_INPUT_REGISTERS][3] == 0x5908
+
+    def test_set_single_value(self, slave):
+        """Test that a scalar value is accepted like modbus_tk does."""
+        slave.set_values("val-x16", 0x10, 0x0300)
+
+        assert slave.get_values("val-x16", 0x10) == (0x0300,)
+
+    def test_negative_values_stored_twos_complement(self, slave):
+        """Test that negative values are stored as unsigned 16-bit."""
+        slave.write(cst.HOLDING_REGISTERS, 0x10, [-1])
+
+        assert slave.read(cst.HOLDING_REGISTERS, 0x10, 1)[0] == 0xFFFF
+
+    def test_out_of_block(self, slave):
+        """Test that writes past the block end are rejected."""
+        with pytest.raises(OutOfModbusBlockError):
+            slave.set_values("val-x16", 0x10, [1, 2])
+
+    def test_missing_block(self, slave):
+        """Test that unknown block names are rejected."""
+        with pytest.raises(MissingKeyError):
+            slave.get_values("val-x99", 0x99, 1)
+
+    def test_duplicate_block(self, slave):
+        """Test that block names stay unique."""
+        with pytest.raises(DuplicatedKeyError):
+            slave.add_block("val-x16", cst.HOLDING_REGISTERS, 0x20, 1)
+
+    def test_overlapping_block(self, slave):
+        """Test that overlapping blocks of the same table are rejected."""
+        with pytest.raises(OverlapModbusBlockError):
+            slave.add_block("other", cst.READ_INPUT_REGISTERS, 0x02, 4)
+
+    def test_same_address_other_table(self, slave):
+        """Test that holding and input tables are independent."""
+        slave.add_block("val-x0-hr", cst.HOLDING_REGISTERS, 0x00, 4)
+
+    def test_image_grows_for_large_blocks(self, slave):
+        """Test that blocks beyond the preallocated size grow the image."""
+        slave.add_block("big", cst.HOLDING_REGISTERS, 0x100, 2)
+        slave.set_values("big", 0x100, [7, 8])
+
+        assert len(slave.images[cst.HOLDING_REGISTERS]) == 0x102
+        assert slave.get_values("big", 0x100, 2) == (7, 8)
+
+    def test_remove_block_clears_range(self, slave):
+        """Test that a removed block is unmapped and zeroed."""
+        slave.set_values("val-x16", 0x10, [0x0100])
+        slave.remove_block("val-x16")
+
+        assert slave.images[cst.HOLDING_REGISTERS][0x10] == 0
+        slave.add_block("val-x16", cst.HOLDING_REGISTERS, 0x10, 1)
+
+    def test_coils_use_modbus_tk_blocks(self, slave):
+        """Test that bit tables fall back to regular modbus_tk blocks."""
+        slave.add_block("coils", cst.COILS, 0, 8)
+        slave.set_values("coils", 0, [1, 0, 1])
+
+        assert slave.get_values("coils", 0, 3) == (1, 0, 1)
+
+
+class TestRegisterBankRequests:
+    """Test suite for RTU requests served from the register bank."""
+
+    def test_read_input_registers(self, slave):
+        """Test FC 0x04 returns the big-endian image slice."""
+        slave.set_values("val-x0", 0x00, [0x8000, 0x0001, 0x0002, 0x5908])
+
+        response = slave.handle_request(struct.pack(">BHH", 0x04, 0x00, 4))
+
+        assert response == struct.pack(">BBHHHH", 0x04, 8, 0x8000, 0x0001, 0x0002, 0x5908)
+
+    def test_read_holding_registers(self, slave):
+        """Test FC 0x03 on the relay state register."""
+        slave.set_values("val-x16", 0x10, [0x8103])
+
+        response = slave.handle_request(struct.pack(">BHH", 0x03, 0x10, 1))
+
+        assert response == struct.pack(">BBH", 0x03, 2, 0x8103)
+
+    def test_read_unmapped_address(self, slave):
+        """Test that reads over unmapped registers fail with ILLEGAL_DATA_ADDRESS."""
+        response = slave.handle_request(struct.pack(">BHH", 0x03, 0x10, 2))
+
+        assert response == struct.pack(">BB", 0x83, cst.ILLEGAL_DATA_ADDRESS)
+
+    def test_illegal_function(self, slave):
+        """Test that the shared dispatch table still rejects unknown functions."""
+        response = slave.handle_request(struct.pack(">BHH", 0x2B, 0x10, 1))
+
+        assert response == struct.pack(">BB", 0x2B | 0x80, cst.ILLEGAL_FUNCTION)
+
+    def test_write_single_register(self, slave):
+        """Test FC 0x06 lands in the image."""
+        slave.handle_request(struct.pack(">BHH", 0x06, 0x10, 0x0100))
+
+        assert slave.get_values("val-x16", 0x10, 1) == (0x0100,)
+
+    def test_write_multiple_registers(self):
+        """Test FC 0x10 lands in the image."""
+        bank_slave = RegisterBankSlave(5)
+        bank_slave.add_block("val-x32", cst.HOLDING_REGISTERS, 0x20, 2)
+
+        bank_slave.handle_request(struct.pack(">BHHBHH", 0x10, 0x20, 2, 4, 0x8001, 0x0002))
+
+        assert bank_slave.get_values("val-x32", 0x20, 2) == (0x8001, 0x0002)
+
+
+class TestCopyOnWrite:
+    """Test suite for the copy-on-write table images."""
+
+    def test_write_swaps_image(self, slave):
+        """Test that a reader holding the previous image never sees the write."""
+        before = slave.images[cst.HOLDING_REGISTERS]
+
+        slave.set_values("val-x16", 0x10, [0x0300])
+
+        assert slave.images[cst.HOLDING_REGISTERS] is not before
+        assert before[0x10] == 0
+        assert slave.images[cst.HOLDING_REGISTERS][0x10] == 0x0300
+
+    def test_bus_write_published_whole(self):
+        """Test that an FC 0x10 write becomes visible all at once."""
+        bank_slave = RegisterBankSlave(5)
+        bank_slave.add_block("val-x32", cst.HOLDING_REGISTERS, 0x20, 10)
+        seen = []
+
+        def hook(data):
+            # Image a concurrent reader holds while the write is applied
+            seen.append(bank_slave.images[cst.HOLDING_REGISTERS])
+
+        pdu = struct.pack(">BHHB", 0x10, 0x20, 10, 20) + struct.pack(">10H", *range(1, 11))
+        hooks.install_hook("modbus.Slave.handle_write_multiple_registers_request", hook)
+        try:
+            bank_slave.handle_request(pdu)
+        finally:
+            hooks.uninstall_hook("modbus.Slave.handle_write_multiple_registers_request", hook)
+
+        assert tuple(seen[0][0x20:0x2A]) == (0,) * 10
+        assert bank_slave.get_values("val-x32", 0x20, 10) == tuple(range(1, 11))
+
+    def test_failed_bus_write_not_published(self, slave):
+        """Test that a rejected write leaves the published image untouched."""
+        before = slave.images[cst.HOLDING_REGISTERS]
+
+        response = slave.handle_request(struct.pack(">BHHBHH", 0x10, 0x10, 2, 4, 1, 2))
+
+        assert response[0] == 0x90
+        assert slave.images[cst.HOLDING_REGISTERS] is before
+
+    def test_writer_waits_only_for_writers(self, slave):
+        """Test that HA writes do not take the modbus_tk slave lock."""
+        with slave._data_lock:
+            thread = threading.Thread(target=slave.set_values, args=("val-x16", 0x10, [0x0100]))
+            thread.start()
+            thread.join(timeout=1)
+
+            assert not thread.is_alive()
+        assert slave.get_values("val-x16", 0x10) == (0x0100,)
+
+
+class TestRegisterBankDatabank:
+    """Test suite for RegisterBankDatabank."""
+
+    def test_add_slave(self):
+        """Test that slaves are created as register bank slaves."""
+        databank = RegisterBankDatabank(error_on_missing_slave=False)
+
+        assert isinstance(databank.add_slave(5), RegisterBankSlave)
+        assert databank.get_slave(5).slave_id == 5
+
+    def test_add_duplicate_slave(self):
+        """Test that slave ids stay unique."""
+        databank = RegisterBankDatabank()
+        databank.add_slave(5)
+
+        with pytest.raises(DuplicatedKeyError):
+            databank.add_slave(5)
+
+    def test_signed_slave_falls_back(self):
+        """Test that signed slaves keep the plain modbus_tk slave."""
+        databank = RegisterBankDatabank()
+
+        bank_slave = databank.add_slave(5, unsigned=False)
+
+        assert type(bank_slave) is Slave
+
+
+class TestRegisterSensorOnBank:
+    """Test suite for ModBusRegisterSensor on a register bank slave."""
+
+    def test_set_and_get_values(self):
+        """Test that the sensor reads and writes the image directly."""
+        bank_slave = RegisterBankSlave(5)
+        sensor = ModBusRegisterSensor(bank_slave, cst.HOLDING_REGISTERS, 0x20, 2)
+
+        sensor.set_raw_value([0x8001, 0x0002])
+
+        assert sensor.get_values() == (0x8001, 0x0002)
+        assert bank_slave.get_values("val-x32", 0x20, 2) == (0x8001, 0x0002)
+
+    def test_read_callback(self):
+        """Test that the read callback still sees the values."""
+        seen = []
+        bank_slave = RegisterBankSlave(5)
+        sensor = ModBusRegisterSensor(bank_slave, cst.READ_INPUT_REGISTERS, 0x10, 1,
+                                      read_callback=lambda addr, values: seen.append((addr, values)))
+        sensor.set_raw_value([0x0102])
+
+        sensor.get_values()
+
+        assert seen == [(0x10, (0x0102,))]
+
+
+class TestReadProviders:
+    """Test suite for computed registers evaluated on bus reads."""
+
+    def test_provider_runs_on_overlapping_read(self, slave):
+        """Test that a read overlapping the provider range refreshes it."""
+        slave.add_block("val-x32", cst.READ_INPUT_REGISTERS, 0x20, 1)
+        slave.set_read_provider(cst.READ_INPUT_REGISTERS, 0x20, 1, lambda: [215])
+
+        response = slave.handle_request(struct.pack(">BHH", 0x04, 0x20, 1))
+
+        assert response == struct.pack(">BBH", 0x04, 2, 215)
+
+    def test_provider_skipped_for_other_ranges(self, slave):
+        """Test that reads elsewhere do not run the provider."""
+        provider = MagicMock(return_value=[1])
+        slave.add_block("val-x32", cst.READ_INPUT_REGISTERS, 0x20, 1)
+        slave.set_read_provider(cst.READ_INPUT_REGISTERS, 0x20, 1, provider)
+
+        slave.handle_request(struct.pack(">BHH", 0x04, 0x00, 4))
+
+        provider.assert_not_called()
+
+    def test_provider_none_keeps_stored_value(self, slave):
+        """Test that a provider returning None serves the stored registers."""
+        slave.add_block("val-x32", cst.READ_INPUT_REGISTERS, 0x20, 1)
+        slave.set_values("val-x32", 0x20, [42])
+        slave.set_read_provider(cst.READ_INPUT_REGISTERS, 0x20, 1, lambda: None)
+
+        response = slave.handle_request(struct.pack(">BHH", 0x04, 0x20, 1))
+
+        assert response == struct.pack(">BBH", 0x04, 2, 42)
+
+    def test_provider_error_serves_stored_value(self, slave):
+        """Test that a failing provider does not break the response."""
+        slave.add_block("val-x32", cst.READ_INPUT_REGISTERS, 0x20, 1)
+        slave.set_values("val-x32", 0x20, [42])
+        slave.set_read_provider(cst.READ_INPUT_REGISTERS, 0x20, 1, MagicMock(side_effect=ValueError))
+
+        response = slave.handle_request(struct.pack(">BHH", 0x04, 0x20, 1))
+
+        assert response == struct.pack(">BBH", 0x04, 2, 42)
@@ -0,0 +1,122 @@
+"""Tests for the pre-encoded read response cache."""
+import struct
+import pytest
+import modbus_tk.defines as cst
+from modbus_tk import utils
+from modbus_tk.modbus_rtu import RtuQuery
+
+from custom_components.ecto_modbus.transport.modBusRTU import ModBusRegisterSensor
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+from custom_components.ecto_modbus.transport.response_cache import ResponseCache, written_range
+
+
+def _frame(slave_id, pdu):
+    data = bytes([slave_id]) + bytes(pdu)
+    return data + struct.pack(">H", utils.calculate_crc(data))
+
+
+READ_IDENTITY = _frame(5, [0x04, 0x00, 0x00, 0x00, 0x04])
+READ_STATE = _frame(5, [0x03, 0x00, 0x10, 0x00, 0x01])
+
+
+@pytest.fixture
+def databank():
+    """Databank with one slave holding the identity and relay state blocks."""
+    bank = RegisterBankDatabank(error_on_missing_slave=False)
+    slave = bank.add_slave(5)
+    identity = ModBusRegisterSensor(slave, cst.ANALOG_INPUTS, 0x00, 4)
+    identity.set_raw_value([0x8000, 0x0001, 0x0002, 0x5908])
+    state = ModBusRegisterSensor(slave, cst.HOLDING_REGISTERS, 0x10, 1)
+    state.set_raw_value([0x0100])
+    bank.registers = {"identity": identity, "state": state}
+    return bank
+
+
+def _request(databank, frame):
+    return databank.handle_request(RtuQuery(), memoryview(bytearray(frame)))
+
+
+class TestResponseCache:
+    """Test suite for cached register reads."""
+
+    def test_repeated_poll_hits(self, databank):
+        """Test that a repeated read returns the identical stored frame."""
+        first = _request(databank, READ_STATE)
+        second = _request(databank, READ_STATE)
+
+        assert second is first
+        assert second == _frame(5, [0x03, 0x02, 0x01, 0x00])
+        assert databank.response_cache.as_dict() == {
+            "entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5,
+        }
+
+    def test_set_raw_value_invalidates_overlap_only(self, databank):
+        """Test that an HA write drops the entries covering its registers only."""
+        identity = _request(databank, READ_IDENTITY)
+        _request(databank, READ_STATE)
+
+        databank.registers["state"].set_raw_value([0x0300])
+
+        assert _request(databank, READ_STATE) == _frame(5, [0x03, 0x02, 0x03, 0x00])
+        assert _request(databank, READ_IDENTITY) is identity
+
+    def test_bus_write_invalidates(self, databank):
+        """Test that an FC 0x06 write from the master drops the cached read."""
+        _request(databank, READ_STATE)
+
+        _request(databank, _frame(5, [0x06, 0x00, 0x10, 0x02, 0x00]))
+
+        assert _request(databank, READ_STATE) == _frame(5, [0x03, 0x02, 0x02, 0x00])
+
+    def test_exceptions_not_cached(self, databank):
+        """Test that exception responses are not stored."""
+        _request(databank, _frame(5, [0x03, 0x00, 0x40, 0x00, 0x01]))
+
+        assert len(databank.response_cache) == 0
+
+    def test_computed_registers_not_cached(self, databank):
+        """Test that reads reaching a read provider are evaluated every time."""
+        sensor = ModBusRegisterSensor(databank.get_slave(5), cst.ANALOG_INPUTS, 0x20, 1)
+        values = iter([[215], [216]])
+        sensor.set_compute(lambda: next(values))
+        read = _frame(5, [0x04, 0x00, 0x20, 0x00, 0x01])
+
+        assert _request(databank, read) == _frame(5, [0x04, 0x02, 0x00, 215])
+        assert _request(databank, read) == _frame(5, [0x04, 0x02, 0x00, 216])
+
+    def test_disabled(self):
+        """Test that response_cache=False serves every read through modbus_tk."""
+        bank = RegisterBankDatabank(response_cache=False)
+        slave = bank.add_slave(5)
+        ModBusRegisterSensor(slave, cst.HOLDING_REGISTERS, 0x10, 1)
+
+        assert _request(bank, READ_STATE) == _frame(5, [0x03, 0x02, 0x00, 0x00])
+        assert bank.response_cache is None
+
+    def test_store_discarded_after_concurrent_write(self):
+        """Test that a response computed before a write is not kept."""
+        cache = ResponseCache()
+        generation = cache.generation
+        cache.invalidate(5, cst.HOLDING_REGISTERS, 0x10, 0x11)
+
+        cache.store(READ_STATE, b"stale", generation)
+
+        assert cache.get(READ_STATE) is None
+
+    def test_full_cache_starts_over(self):
+        """Test that the entry limit bounds the cache."""
+        cache = ResponseCache(max_entries=2)
+        for address in range(3):
+            cache.store(_frame(5, [0x03, 0x00, address, 0x00, 0x01]), b"r", cache.generation)
+
+        assert len(cache) == 1
+
+    @pytest.mark.parametrize("pdu, expected", [
+        ([0x06, 0x00, 0x10, 0x01, 0x00], (0x10, 0x11)),
+        ([0x10, 0x00, 0x20, 0x00, 0x02, 0x04, 0, 1, 0, 2], (0x20, 0x22)),
+        ([0x17, 0x00, 0x00, 0x00, 0x01, 0x00, 0x30, 0x00, 0x01, 0x02, 0, 1], (0x30, 0x31)),
+        ([0x03, 0x00, 0x10, 0x00, 0x01], None),
+    ])
+    def test_written_range(self, pdu, expected):
+        """Test the holding register range written by a request frame."""
+        assert written_range(_frame(5, pdu)) == expected
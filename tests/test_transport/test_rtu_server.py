@@ -0,0 +1,147 @@
+"""Tests for the buffered modbus_tk RTU server."""
+import struct
+from unittest.mock import MagicMock, patch
+import modbus_tk.defines as cst
+from modbus_tk import utils
+
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+from custom_components.ecto_modbus.transport.rtu_server import EctoRtuServer
+
+
+def _frame(*pdu):
+    """Build an RTU frame (slave + PDU + CRC) from raw bytes."""
+    data = bytes(pdu)
+    return data + struct.pack(">H", utils.calculate_crc(data))
+
+
+class ChunkedSerial:
+    """Serial port double delivering queued chunks, one per sleep of the reader."""
+
+    def __init__(self, chunks, baudrate=19200):
+        self.baudrate = baudrate
+        self.is_open = True
+        self.timeout = None
+        self.inter_byte_timeout = None
+        self.name = "/dev/fake"
+        self.rx = bytearray(chunks[0]) if chunks else bytearray()
+        self.chunks = list(chunks[1:])
+        self.tx = []
+        self.reads = 0
+
+    @property
+    def in_waiting(self):
+        return len(self.rx)
+
+    def read(self, size=1):
+        self.reads += 1
+        data = bytes(self.rx[:size])
+        del self.rx[:size]
+        return data
+
+    def write(self, data):
+        self.tx.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def deliver(self, _delay=None):
+        if self.chunks:
+            self.rx += self.chunks.pop(0)
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+    def cancel_read(self):
+        pass
+
+
+def _server(serial):
+    server = EctoRtuServer(serial, interchar_multiplier=1,
+                           databank=RegisterBankDatabank(error_on_missing_slave=False))
+    server._block_on_first_byte = True
+    slave = server.add_slave(5)
+    slave.add_block("val-x16", cst.HOLDING_REGISTERS, 0x10, 1)
+    slave.set_values("val-x16", 0x10, [0x8103])
+    return server
+
+
+class TestEctoRtuServerReader:
+    """Test suite for the buffered frame reader."""
+
+    def test_whole_frame_read_in_bulk(self):
+        """Test that a buffered frame is drained with one read after the first byte."""
+        request = _frame(5, 0x03, 0x00, 0x10, 0x00, 0x01)
+        serial = ChunkedSerial([request])
+        server = _server(serial)
+
+        with patch("custom_components.ecto_modbus.transport.rtu_server.time.sleep") as sleep:
+            assert server._read_frame() == request
+
+        assert serial.reads == 2
+        sleep.assert_not_called()
+
+    def test_split_frame_waits_for_announced_length(self):
+        """Test that the reader sleeps for the bytes still on the wire, then drains them."""
+        request = _frame(5, 0x03, 0x00, 0x10, 0x00, 0x01)
+        serial = ChunkedSerial([request[:3], request[3:]])
+        server = _server(serial)
+
+        with patch("custom_components.ecto_modbus.transport.rtu_server.time.sleep",
+                   side_effect=serial.deliver) as sleep:
+            assert server._read_frame() == request
+
+        # 5 bytes outstanding at 11 bits per char, capped at the t3.5 silence
+        delay = sleep.call_args[0][0]
+        assert 3 * 11.0 / 19200 < delay <= 3.5 * 11.0 / 19200
+        assert sleep.call_count == 1
+
+    def test_unknown_length_ends_on_silence(self):
+        """Test that frames of unknown length are completed by t3.5 silence."""
+        request = _frame(5, 0x2B, 0x0E, 0x01, 0x00)
+        serial = ChunkedSerial([request])
+        server = _server(serial)
+        server._frame_silence = 0.001
+
+        assert server._read_frame() == request
+
+
+class TestEctoRtuServerRun:
+    """Test suite for request handling on the server thread."""
+
+    def test_read_request_answered(self):
+        """Test that a request is parsed from the memoryview, answered and counted."""
+        serial = ChunkedSerial([_frame(5, 0x03, 0x00, 0x10, 0x00, 0x01)])
+        server = _server(serial)
+
+        with patch("custom_components.ecto_modbus.transport.rtu_server.time.sleep"):
+            server._do_run()
+
+        assert serial.tx == [_frame(5, 0x03, 0x02, 0x81, 0x03)]
+        assert server.stats.slaves[5].requests == 1
+
+    def test_write_multiple_registers(self):
+        """Test that FC 0x10 writes are applied from the memoryview."""
+        serial = ChunkedSerial([_frame(5, 0x10, 0x00, 0x10, 0x00, 0x01, 0x02, 0x01, 0x00)])
+        server = _server(serial)
+
+        with patch("custom_components.ecto_modbus.transport.rtu_server.time.sleep"):
+            server._do_run()
+
+        assert server.get_slave(5).get_values("val-x16", 0x10, 1) == (0x0100,)
+        assert serial.tx == [_frame(5, 0x10, 0x00, 0x10, 0x00, 0x01)]
+
+    def test_no_data_no_response(self):
+        """Test that an empty read (stopping server) handles nothing."""
+        serial = ChunkedSerial([])
+        server = _server(serial)
+        server._block_on_first_byte = False
+        server._frame_silence = 0.001
+        server._handle = MagicMock()
+
+        server._do_run()
+
+        server._handle.assert_not_called()
@@ -0,0 +1,284 @@
+"""Tests for the shared-memory register bank and the process RTU backend."""
+import asyncio
+import os
+import pty
+import select
+import struct
+import threading
+import time
+import tty
+import pytest
+from unittest.mock import MagicMock, patch
+import modbus_tk.defines as cst
+from modbus_tk import hooks, utils
+from modbus_tk.exceptions import InvalidArgumentError, OutOfModbusBlockError
+from modbus_tk.modbus_rtu import RtuQuery
+
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.transport.modBusRTU import ModBusRegisterSensor
+from custom_components.ecto_modbus.transport.process_rtu import ProcessRtuServer, serve_bus
+from custom_components.ecto_modbus.transport.shared_bank import (
+    SHARED_REGISTERS,
+    SharedBankDatabank,
+    SharedRegisterBank,
+)
+from custom_components.ecto_modbus.transport.stats import BusStats
+
+
+def _frame(slave_id, pdu):
+    data = bytes([slave_id]) + bytes(pdu)
+    return data + struct.pack(">H", utils.calculate_crc(data))
+
+
+@pytest.fixture
+def bank():
+    shared = SharedRegisterBank()
+    yield shared
+    shared.close()
+
+
+@pytest.fixture
+def databank(bank):
+    """Integration-side and server-side databanks on one bank, like both processes."""
+    server = SharedBankDatabank(bank, error_on_missing_slave=False, write_listener=MagicMock())
+
+    def declare(slave_id, *block):
+        if slave_id not in server._slaves:
+            server.add_slave(slave_id)
+        server.get_slave(slave_id).add_block(*block)
+
+    integration = SharedBankDatabank(bank, error_on_missing_slave=False, layout_listener=declare)
+    integration.server = server
+    return integration
+
+
+class TestSharedRegisterBank:
+    """Test suite for SharedRegisterBank and SharedBankSlave."""
+
+    def test_attach_by_name_sees_writes(self, bank):
+        """Test that a second mapping of the segment reads the same registers."""
+        bank.write(5, cst.HOLDING_REGISTERS, 0x20, [1, 2, -1])
+        other = SharedRegisterBank(bank.name)
+        try:
+            assert other.read(5, cst.HOLDING_REGISTERS, 0x20, 3) == (1, 2, 0xFFFF)
+            assert other.read(5, cst.ANALOG_INPUTS, 0x20, 3) == (0, 0, 0)
+            assert other.read(6, cst.HOLDING_REGISTERS, 0x20, 3) == (0, 0, 0)
+        finally:
+            other.close()
+
+    def test_read_retries_across_write(self, bank):
+        """Test that a read overlapping a write is retried."""
+        calls = []
+
+        def read():
+            calls.append(1)
+            if len(calls) == 1:
+                bank.write(5, cst.HOLDING_REGISTERS, 0x10, [1])
+            return len(calls)
+
+        assert bank.read_consistent(5, read) == 2
+
+    def test_sensor_round_trip(self, databank):
+        """Test that ModBusRegisterSensor writes reach the server-side slave."""
+        sensor = ModBusRegisterSensor(databank.add_slave(5), cst.HOLDING_REGISTERS, 0x20, 10)
+        sensor.set_raw_value([7, 8], offset=3)
+
+        assert sensor.get_values()[2:6] == (0, 7, 8, 0)
+        assert databank.server.get_slave(5).get_values("val-x32", 0x23, 2) == (7, 8)
+        assert sensor.set_compute(lambda: [1]) is False
+
+    def test_block_limits(self, databank):
+        """Test that blocks must fit the shared window and writes their block."""
+        slave = databank.add_slave(5)
+        with pytest.raises(InvalidArgumentError):
+            slave.add_block("late", cst.HOLDING_REGISTERS, SHARED_REGISTERS - 1, 2)
+        slave.add_block("state", cst.HOLDING_REGISTERS, 0x10, 1)
+        with pytest.raises(OutOfModbusBlockError):
+            slave.set_values("state", 0x10, [1, 2])
+
+    def test_bus_read_and_write(self, databank):
+        """Test FC 0x03/0x10 requests against the shared registers."""
+        sensor = ModBusRegisterSensor(databank.add_slave(5), cst.HOLDING_REGISTERS, 0x20, 10)
+        sensor.set_raw_value([0x8000 | 60])
+        server = databank.server
+
+        response = server.handle_request(RtuQuery(), _frame(5, [0x03, 0x00, 0x20, 0x00, 0x01]))
+        assert response == _frame(5, [0x03, 0x02, 0x80, 60])
+
+        write = [0x10, 0x00, 0x21, 0x00, 0x02, 0x04, 0x00, 0x05, 0x00, 0x06]
+        server.handle_request(RtuQuery(), _frame(5, write))
+
+        assert sensor.get_values()[:3] == (0x8000 | 60, 5, 6)
+        server.write_listener.assert_called_once_with(5, bytes(write))
+
+    def test_bus_exception_not_reported(self, databank):
+        """Test that a write outside the blocks is refused and not reported."""
+        ModBusRegisterSensor(databank.add_slave(5), cst.HOLDING_REGISTERS, 0x10, 1)
+        server = databank.server
+
+        response = server.handle_request(RtuQuery(), _frame(5, [0x06, 0x00, 0x11, 0x00, 0x01]))
+
+        assert response[1] == 0x86
+        server.write_listener.assert_not_called()
+
+    def test_bus_write_checked_before_seqlock(self, databank, bank):
+        """Test that a bus write takes the seqlock only for the register copy."""
+        ModBusRegisterSensor(databank.add_slave(5), cst.HOLDING_REGISTERS, 0x10, 1)
+        server = databank.server
+        sequences = []
+
+        def on_write(data):
+            sequences.append(bank._sequence[5])
+
+        hooks.install_hook("modbus.Slave.handle_write_single_register_request", on_write)
+        try:
+            before = bank._sequence[5]
+            server.handle_request(RtuQuery(), _frame(5, [0x06, 0x00, 0x10, 0x01, 0x00]))
+            # Refused requests never mark the registers as changing
+            server.handle_request(RtuQuery(), _frame(5, [0x06, 0x00, 0x11, 0x00, 0x01]))
+        finally:
+            hooks.uninstall_hook("modbus.Slave.handle_write_single_register_request", on_write)
+
+        assert sequences == [before, before + 2]
+        assert bank._sequence[5] == before + 2
+        assert bank.read(5, cst.HOLDING_REGISTERS, 0x10, 1) == (0x0100,)
+
+    def test_bus_write_invalid_quantity(self, databank):
+        """Test that FC 0x10 with a byte count not matching the quantity is refused."""
+        ModBusRegisterSensor(databank.add_slave(5), cst.HOLDING_REGISTERS, 0x20, 10)
+        server = databank.server
+
+        response = server.handle_request(
+            RtuQuery(), _frame(5, [0x10, 0x00, 0x20, 0x00, 0x02, 0x02, 0x00, 0x05]))
+
+        assert response[1:3] == bytes([0x90, cst.ILLEGAL_DATA_VALUE])
+        server.write_listener.assert_not_called()
+
+
+class TestBusStatsUpdate:
+    """Test suite for copying statistics from the server process."""
+
+    def test_update_keeps_slave_objects(self):
+        """Test that update_from fills the SlaveStats already handed out."""
+        stats = BusStats()
+        held = stats.slave(5)
+        source = BusStats()
+        source.record(_frame(5, [0x03, 0x00, 0x10, 0x00, 0x01]), b"\x05\x03", rx_ns=0, tx_ns=400000)
+
+        stats.update_from(source)
+
+        assert stats.slave(5) is held
+        assert held.requests == 1
+        assert held.function_codes[3] == 1
+        assert held.turnaround.count == 1
+        assert stats.frames == 1
+
+
+def _read_response(fd, size, timeout=5.0):
+    data = bytearray()
+    deadline = time.monotonic() + timeout
+    while len(data) < size and time.monotonic() < deadline:
+        ready, _, _ = select.select([fd], [], [], deadline - time.monotonic())
+        if ready:
+            data += os.read(fd, size - len(data))
+    return bytes(data)
+
+
+class TestProcessRtuServer:
+    """End-to-end test of the server process over a pseudo-terminal."""
+
+    def test_slaves_declared_before_serving(self, bank):
+        """Test that the server process declares the queued slaves before it answers the bus."""
+        commands = [("add_slave", 5), ("add_block", 5, "state", cst.HOLDING_REGISTERS, 0x10, 1)]
+        pipe = MagicMock()
+        pipe.poll.side_effect = lambda timeout=0: bool(commands)
+        pipe.recv.side_effect = lambda: commands.pop(0)
+        declared = []
+        servers = []
+
+        def make_server(port, interchar_multiplier, databank):
+            server = MagicMock()
+            server.stats.frames = 0
+
+            def start():
+                declared.extend(databank.get_slave(5)._bank_blocks)
+                commands.append(("stop",))
+            server.start.side_effect = start
+            servers.append(server)
+            return server
+
+        with patch("custom_components.ecto_modbus.transport.process_rtu.open_serial_port"), \
+             patch("custom_components.ecto_modbus.transport.process_rtu.EctoRtuServer",
+                   side_effect=make_server):
+            serve_bus({"port": "/dev/null"}, bank.name, None, pipe, MagicMock())
+
+        assert declared == ["state"]
+        servers[0].stop.assert_called_once()
+
+    def test_async_stop_joins_in_executor(self):
+        """Test that async_stop leaves the blocking join of the process to an executor."""
+        loop = asyncio.new_event_loop()
+        server = ProcessRtuServer({"port": "/dev/null", "port_type": "serial", "baudrate": 19200}, loop=loop)
+        process = server._process = MagicMock()
+        server._add_reader = MagicMock()
+        threads = []
+        try:
+            with patch.object(ProcessRtuServer, "_shutdown",
+                              side_effect=lambda proc: threads.append((threading.get_ident(), proc))):
+                loop.run_until_complete(server.async_stop())
+                loop.run_until_complete(server.async_stop())
+        finally:
+            loop.close()
+            for pipe in (server._commands, server._events, server._child_commands, server._child_events):
+                pipe.close()
+            server.bank.close()
+
+        assert threads == [(threads[0][0], process)]
+        assert threads[0][0] != threading.get_ident()
+        server._add_reader.cancel.assert_called_once()
+
+    def test_serves_bus_and_reports_writes(self):
+        """Test reads, external writes and statistics through the server process."""
+        master_fd, slave_fd = pty.openpty()
+        tty.setraw(master_fd)
+        tty.setraw(slave_fd)
+        loop = asyncio.new_event_loop()
+        written = []
+
+        def on_write(data):
+            written.append((data[0], bytes(data[1])))
+
+        hooks.install_hook("modbus.Slave.handle_write_single_register_request", on_write)
+        server = ProcessRtuServer({"port": os.ttyname(slave_fd), "port_type": "serial",
+                                   "baudrate": 19200}, loop=loop)
+        try:
+            server.start()
+            relay = EctoRelay10CH({"addr": 5}, server)
+            relay.set_switch_state(0, 1)
+
+            read_state = _frame(5, [0x03, 0x00, 0x10, 0x00, 0x01])
+            response = b""
+            deadline = time.monotonic() + 30
+            while response != _frame(5, [0x03, 0x02, 0x01, 0x00]) and time.monotonic() < deadline:
+                # The server process may still be starting or declaring blocks
+                os.write(master_fd, read_state)
+                response = _read_response(master_fd, 7, timeout=0.5)
+
+            assert response == _frame(5, [0x03, 0x02, 0x01, 0x00])
+
+            os.write(master_fd, _frame(5, [0x06, 0x00, 0x10, 0x03, 0x00]))
+            assert len(_read_response(master_fd, 8)) == 8
+            assert relay.registers[0x10].get_values() == (0x0300,)
+
+            async def wait_for_events():
+                while not written or not server.stats.slave(5).requests:
+                    await asyncio.sleep(0.05)
+
+            loop.run_until_complete(asyncio.wait_for(wait_for_events(), 10))
+            assert written == [(relay.slave, bytes([0x06, 0x00, 0x10, 0x03, 0x00]))]
+        finally:
+            hooks.uninstall_hook("modbus.Slave.handle_write_single_register_request", on_write)
+            server.stop()
+            loop.close()
+            os.close(master_fd)
+            os.close(slave_fd)
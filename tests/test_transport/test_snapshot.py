@@ -0,0 +1,125 @@
+"""Tests for the memory-mapped register snapshot."""
+import struct
+import pytest
+from unittest.mock import MagicMock
+import modbus_tk.defines as cst
+from modbus_tk import utils
+from modbus_tk.modbus_rtu import RtuQuery
+
+from custom_components.ecto_modbus.devices.binary_sensor import EctoCH10BinarySensor
+from custom_components.ecto_modbus.devices.relay import EctoRelay10CH
+from custom_components.ecto_modbus.devices.temperature import EctoTemperatureSensor
+from custom_components.ecto_modbus.transport.register_bank import RegisterBankDatabank
+from custom_components.ecto_modbus.transport.snapshot import FILE_SIZE, RegisterSnapshot
+
+
+def _frame(slave_id, pdu):
+    data = bytes([slave_id]) + bytes(pdu)
+    return data + struct.pack(">H", utils.calculate_crc(data))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "registers.bin")
+
+
+def _server(snapshot):
+    databank = RegisterBankDatabank(error_on_missing_slave=False, snapshot=snapshot)
+    server = MagicMock()
+    server.add_slave.side_effect = databank.add_slave
+    server.databank = databank
+    return server
+
+
+class TestRegisterSnapshot:
+    """Test suite for RegisterSnapshot."""
+
+    def test_persists_across_reopen(self, path):
+        """Test that stored registers are read back after a restart."""
+        snapshot = RegisterSnapshot(path)
+        snapshot.store(5, cst.HOLDING_REGISTERS, 0x20, [1, 2, -1])
+        snapshot.close()
+
+        snapshot = RegisterSnapshot(path)
+        try:
+            assert snapshot.load(5, cst.HOLDING_REGISTERS, 0x20, 3) == (1, 2, 0xFFFF)
+            assert snapshot.load(5, cst.ANALOG_INPUTS, 0x20, 3) == (0, 0, 0)
+            assert snapshot.load(6, cst.HOLDING_REGISTERS, 0x20, 3) is None
+        finally:
+            snapshot.close()
+
+    def test_unknown_layout_starts_over(self, path):
+        """Test that a file with another header is cleared."""
+        with open(path, "wb") as f:
+            f.write(b"\xFF" * FILE_SIZE)
+
+        snapshot = RegisterSnapshot(path)
+        try:
+            assert snapshot.load(5, cst.HOLDING_REGISTERS, 0x00, 1) is None
+        finally:
+            snapshot.close()
+
+    def test_records_ha_and_bus_writes(self, path):
+        """Test that register bank writes from both sides reach the file."""
+        snapshot = RegisterSnapshot(path)
+        server = _server(snapshot)
+        relay = EctoRelay10CH({"addr": 5}, server)
+        relay.set_switch_state(0, 1)
+        write = [0x10, 0x00, 0x20, 0x00, 0x02, 0x04, 0x80, 0x02, 0x00, 0x04]
+        server.databank.handle_request(RtuQuery(), _frame(5, write))
+
+        assert snapshot.load(5, cst.HOLDING_REGISTERS, 0x10, 1) == (0x0100,)
+        assert snapshot.load(5, cst.HOLDING_REGISTERS, 0x20, 2) == (0x8002, 0x0004)
+        snapshot.close()
+
+
+class TestRestorePolicy:
+    """Test suite for the per-device register restore policy."""
+
+    def _restart(self, path, make_device, change):
+        snapshot = RegisterSnapshot(path)
+        change(make_device(_server(snapshot)))
+        snapshot.close()
+        snapshot = RegisterSnapshot(path)
+        device = make_device(_server(snapshot))
+        restored = device.restore_registers(snapshot)
+        snapshot.close()
+        return device, restored
+
+    def test_relay_starts_off(self, path):
+        """Test that relay channels and timers are not restored."""
+        def change(relay):
+            relay.set_switch_state(2, 1)
+            relay.set_timer(2, True, 10)
+
+        relay, restored = self._restart(path, lambda server: EctoRelay10CH({"addr": 5}, server), change)
+
+        assert restored == 0
+        assert relay.registers[0x10].get_values() == (0,)
+        assert relay.registers[0x20].get_values()[2] == 0
+
+    def test_binary_sensor_restores_contacts(self, path):
+        """Test that contact states come back in the register and the device."""
+        sensor, restored = self._restart(
+            path, lambda server: EctoCH10BinarySensor({"addr": 6}, server),
+            lambda sensor: sensor.set_channels(0b1000000001, 0b1000000001))
+
+        assert restored == 1
+        assert sensor.registers[0x10].get_values() == (0x0102,)
+        assert sensor.get_channel_state(0) == 1
+        assert sensor.get_channel_state(9) == 1
+
+    def test_temperature_restores_last_value(self, path):
+        """Test that the last temperature is served and deadband applies to it."""
+        def make(server):
+            sensor = EctoTemperatureSensor({"addr": 7, "entity_id": "sensor.t", "deadband": 0.5}, server)
+            sensor.computed = False
+            return sensor
+
+        sensor, restored = self._restart(path, make, lambda sensor: sensor.apply_state("-2.5"))
+
+        assert restored == 1
+        assert sensor.registers[0x20].get_values() == (0x10000 - 25,)
+        sensor.registers[0x20] = MagicMock()
+        sensor.apply_state("-2.1")
+        sensor.registers[0x20].set_raw_value.assert_not_called()
@@ -0,0 +1,123 @@
+"""Tests for the bus statistics."""
+import struct
+
+from modbus_tk import utils
+
+from custom_components.ecto_modbus.transport.stats import (
+    LATENCY_BUCKETS_US,
+    BusStats,
+    LatencyHistogram,
+)
+
+
+def _frame(*pdu):
+    """Build an RTU frame (slave + PDU + CRC) from raw bytes."""
+    data = bytes(pdu)
+    return data + struct.pack(">H", utils.calculate_crc(data))
+
+
+READ = _frame(5, 0x03, 0x00, 0x10, 0x00, 0x01)
+
+
+class TestLatencyHistogram:
+    """Test suite for LatencyHistogram."""
+
+    def test_buckets(self):
+        """Test that samples land in the bucket of their upper bound."""
+        histogram = LatencyHistogram()
+        histogram.record(100)
+        histogram.record(250)
+        histogram.record(251)
+        histogram.record(5000000)
+
+        assert histogram.counts[0] == 2
+        assert histogram.counts[1] == 1
+        assert histogram.counts[len(LATENCY_BUCKETS_US)] == 1
+        assert histogram.max_us == 5000000
+
+    def test_percentile(self):
+        """Test percentiles are reported as bucket upper bounds."""
+        histogram = LatencyHistogram()
+        for _ in range(99):
+            histogram.record(800)
+        histogram.record(12000)
+
+        assert histogram.percentile(50) == 1000
+        assert histogram.percentile(99) == 1000
+        assert histogram.percentile(100) == 15000
+
+    def test_percentile_empty(self):
+        """Test that an empty histogram has no percentile."""
+        assert LatencyHistogram().percentile(99) is None
+
+    def test_percentile_since_snapshot(self):
+        """Test that percentiles can be limited to samples after a snapshot."""
+        histogram = LatencyHistogram()
+        histogram.record(100000)
+        snapshot = histogram.snapshot()
+        histogram.record(400)
+
+        assert histogram.percentile(99, since=snapshot) == 500
+        assert histogram.percentile(99, since=histogram.snapshot()) is None
+
+
+class TestBusStats:
+    """Test suite for BusStats.record."""
+
+    def test_answered_request(self):
+        """Test counters and turnaround of an answered request."""
+        stats = BusStats()
+
+        stats.record(READ, _frame(5, 0x03, 0x02, 0x00, 0x00), rx_ns=1000000, tx_ns=3000000)
+
+        slave = stats.slaves[5]
+        assert slave.requests == slave.responses == 1
+        assert slave.function_codes[0x03] == 1
+        assert slave.turnaround.total_us == 2000
+
+    def test_exception_response(self):
+        """Test that exception responses are counted."""
+        stats = BusStats()
+
+        stats.record(READ, _frame(5, 0x83, 0x02), rx_ns=0, tx_ns=1000)
+
+        assert stats.slaves[5].exceptions == 1
+
+    def test_crc_error(self):
+        """Test that unanswered frames with a bad CRC count as CRC errors."""
+        stats = BusStats()
+
+        stats.record(READ[:-1] + bytes([READ[-1] ^ 1]), b"", rx_ns=0)
+
+        assert stats.slaves[5].crc_errors == 1
+        assert stats.slaves[5].requests == 0
+
+    def test_unanswered_request(self):
+        """Test that valid requests without a response (e.g. broadcast) are counted."""
+        stats = BusStats()
+
+        stats.record(READ, b"", rx_ns=0)
+
+        assert stats.slaves[5].requests == 1
+        assert stats.slaves[5].turnaround.count == 0
+
+    def test_short_frame(self):
+        """Test that frames too short to address a slave are counted per bus."""
+        stats = BusStats()
+
+        stats.record(b"\x05\x03", b"", rx_ns=0)
+
+        assert stats.short_frames == 1
+        assert stats.slaves == {}
+
+    def test_as_dict(self):
+        """Test the service representation."""
+        stats = BusStats()
+        stats.record(READ, _frame(5, 0x03, 0x02, 0x00, 0x00), rx_ns=0, tx_ns=1500000)
+
+        data = stats.as_dict()
+
+        slave = data["slaves"]["5"]
+        assert slave["function_codes"] == {"0x03": 1}
+        assert slave["turnaround"]["p99_ms"] == 1.5
+        assert slave["turnaround"]["max_ms"] == 1.5